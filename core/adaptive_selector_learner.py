@@ -10,7 +10,7 @@ import json
 import logging
 import time
 import warnings
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Union
 from functools import lru_cache
 from pathlib import Path
 import hashlib
@@ -19,6 +19,7 @@ from collections import Counter
 import threading
 from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup, Tag
+from core.extraction_plan import ExtractionPlan
 from core.selector_memory import SelectorMemory, DomainSelectorStore
 
 
@@ -215,6 +216,40 @@ class AdaptiveSelectorLearner:
 
         return adaptive_selectors[:fallback_limit]
 
+    def get_extraction_plan(
+        self,
+        domain: str,
+        fields: Sequence[str] = ("name", "price", "stock"),
+        *,
+        before: Optional[Dict[str, Sequence[str]]] = None,
+        after: Optional[Dict[str, Sequence[str]]] = None,
+        fallback_limit: int = 5,
+    ) -> ExtractionPlan:
+        """
+        Get the compiled extraction plan for a domain.
+
+        Same order as :meth:`get_adaptive_selectors` without HTML discovery:
+        learned selectors first, then generic fallbacks, all fields compiled
+        together and cached by SelectorMemory per store version.
+
+        Args:
+            domain: Domain name
+            fields: Fields to include
+            before: Selectors tried ahead of the learned ones, per field
+            after: Selectors tried after the generic fallbacks, per field
+            fallback_limit: Maximum learned selectors per field
+
+        Returns:
+            ExtractionPlan for the domain
+        """
+        trailing = {
+            field: [*self._get_generic_selectors(field), *(after or {}).get(field, ())]
+            for field in fields
+        }
+        return self.selector_memory.get_extraction_plan(
+            domain, fields, before=before, after=trailing, limit=fallback_limit
+        )
+
     def get_domain_memory(self, domain: str) -> Dict[str, List[str]]:
         """Backward compatible access to domain selector memory."""
         with self._lock:
@@ -8,9 +8,7 @@ import uuid
 import logging
 import atexit
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass, field
-from collections import deque
-from datetime import datetime, timedelta
+from datetime import timedelta
 from importlib import import_module
 from pathlib import Path
 from typing import Optional, Dict, List, Any, TypedDict, cast, TYPE_CHECKING, Callable, TypeVar
@@ -23,12 +21,21 @@ from core.session_manager import SessionManager
 from core.content_validator import ContentValidator
 from core.premium_proxy_manager import PremiumProxyManager
 from core.exponential_backoff import ExponentialBackoff
+from core.domain_health import (
+    CLOSED,
+    OPEN,
+    BreakerPolicy,
+    DomainHealthStore,
+    create_domain_health_store,
+)
 from core.captcha_solver import TwoCaptchaManager
 from core.user_agent_rotator import UserAgentRotator
 from core.robots_checker import RobotsTxtChecker
 from core.async_playwright_manager import AsyncPlaywrightManager
 from core.antibot_logger import AntiBotLogger
 from core.flaresolverr_client import FlareSolverrClient, FlareSolverrError
+from network.dns_cache import SharedAiohttpResolver
+from network.rate_limiter import configure_rate_limiter, throttle_request
 from utils.logger import get_logger
 from core.base_component import ConfigurableComponent
 from utils.helpers import looks_like_guard_html
@@ -107,17 +114,6 @@ class PageNavigationError(Exception):
     pass
 
 
-@dataclass
-class CircuitBreakerState:
-    """Tracks circuit breaker state for a domain"""
-    consecutive_failures: int = 0
-    recent_results: deque = field(default_factory=lambda: deque(maxlen=50))
-    is_open: bool = False
-    half_open: bool = False
-    opened_at: Optional[datetime] = None
-    half_open_attempts: int = 0
-
-
 class AntibotManager(ConfigurableComponent):
     def __init__(self, config_path: str) -> None:
         config_data: Dict[str, Any] = {}
@@ -198,10 +194,19 @@ class AntibotManager(ConfigurableComponent):
             "proxy_rotations": 0,
         }
 
-        # Circuit breaker infrastructure
-        self.domain_circuit_breakers: Dict[str, CircuitBreakerState] = {}
-        self.circuit_timeout = timedelta(minutes=5)  # Try again after 5 min
-        self.half_open_max_attempts = 1
+        # Circuit breaker infrastructure: state lives in a DomainHealthStore so
+        # parallel workers (SCRAPER_DOMAIN_HEALTH=sqlite/redis) share one breaker.
+        domain_health_config = (
+            self.config.get("domain_health", {}) if isinstance(self.config, dict) else {}
+        )
+        self.circuit_policy = BreakerPolicy.from_config(domain_health_config)
+        self.domain_health: DomainHealthStore = create_domain_health_store(
+            domain_health_config, namespace="antibot"
+        )
+        self.circuit_timeout = timedelta(seconds=self.circuit_policy.open_seconds)
+        configure_rate_limiter(
+            self.config.get("rate_limits") if isinstance(self.config, dict) else None
+        )
 
         self.stealth_script: str = """
         Object.defineProperty(navigator, 'webdriver', {
@@ -836,6 +841,7 @@ class AntibotManager(ConfigurableComponent):
                 enable_cleanup_closed=True,
                 use_dns_cache=True,
                 ttl_dns_cache=300,
+                resolver=SharedAiohttpResolver(),
             )
 
             proxy = None
@@ -1018,99 +1024,41 @@ class AntibotManager(ConfigurableComponent):
             f"Failed to get validated proxy after {max_attempts} attempts"
         )
         return None
-    def _get_or_create_breaker(self, domain: str) -> CircuitBreakerState:
-        """Get or create circuit breaker state for domain."""
-        if domain not in self.domain_circuit_breakers:
-            self.domain_circuit_breakers[domain] = CircuitBreakerState()
-        return self.domain_circuit_breakers[domain]
-    
     def _is_circuit_open(self, domain: str) -> bool:
-        """Check if circuit breaker is open for domain."""
-        breaker = self._get_or_create_breaker(domain)
-
-        if breaker.is_open:
-            # Half-open state after timeout
-            if breaker.opened_at and datetime.now() - breaker.opened_at > self.circuit_timeout:
-                breaker.is_open = False
-                breaker.half_open = True
-                breaker.half_open_attempts = 0
-                self.logger.info(f"Circuit breaker half-open for {domain}")
-                return False
-            return True
+        """Check the shared circuit breaker for domain.
 
-        if breaker.half_open and breaker.half_open_attempts >= self.half_open_max_attempts:
-            self.logger.warning(
-                f"Half-open attempt limit reached for {domain}; re-opening circuit"
-            )
-            self._open_circuit(domain)
-            return True
+        When the breaker is half-open the first caller (in any worker process)
+        claims the probe request; everyone else keeps waiting.
+        """
+        decision = self.domain_health.acquire(domain, self.circuit_policy)
+        if decision.probe:
+            self.logger.info(f"Circuit breaker half-open for {domain}; sending probe request")
+        return not decision.allowed
 
-        return False
-    
-    def _should_open_circuit(self, domain: str) -> bool:
-        """Determine if circuit should open."""
-        breaker = self._get_or_create_breaker(domain)
-        
-        # Open after 20 consecutive failures
-        if breaker.consecutive_failures >= 20:
-            self.logger.warning(
-                f"Opening circuit for {domain}: {breaker.consecutive_failures} consecutive failures"
-            )
-            return True
-        
-        # Open if 80% error rate in last 50 requests
-        if len(breaker.recent_results) >= 50:
-            error_rate = breaker.recent_results.count(False) / len(breaker.recent_results)
-            if error_rate >= 0.8:
-                self.logger.warning(
-                    f"Opening circuit for {domain}: {error_rate:.1%} error rate"
-                )
-                return True
-        
-        return False
-    
     def _record_success(self, domain: str) -> None:
         """Record successful request."""
-        breaker = self._get_or_create_breaker(domain)
-        breaker.consecutive_failures = 0
-        breaker.recent_results.append(True)
-        if breaker.half_open:
-            breaker.half_open = False
-            breaker.half_open_attempts = 0
-            breaker.opened_at = None
+        if self.domain_health.record(domain, self.circuit_policy, True) == CLOSED:
             self.logger.info(f"Circuit breaker CLOSED for {domain} after successful probe")
-    
+
     def _record_failure(self, domain: str) -> None:
-        """Record failed request."""
-        breaker = self._get_or_create_breaker(domain)
-        breaker.consecutive_failures += 1
-        breaker.recent_results.append(False)
-        if breaker.half_open:
-            breaker.half_open = False
-            breaker.half_open_attempts = 0
-            self.logger.warning(
-                f"Circuit breaker HALF-OPEN probe failed for {domain}; reopening"
-            )
-            self._open_circuit(domain)
-    
+        """Record failed request; opens the circuit once thresholds are reached."""
+        if self.domain_health.record(domain, self.circuit_policy, False) == OPEN:
+            self._log_circuit_opened(domain)
+
     def _open_circuit(self, domain: str) -> None:
         """Open circuit breaker."""
-        breaker = self._get_or_create_breaker(domain)
-        breaker.is_open = True
-        breaker.half_open = False
-        breaker.half_open_attempts = 0
-        breaker.opened_at = datetime.now()
+        if self.domain_health.trip(domain, policy=self.circuit_policy):
+            self._log_circuit_opened(domain)
+
+    def _log_circuit_opened(self, domain: str) -> None:
+        health = self.domain_health.snapshot(domain)
         self.logger.error(
-            f"Circuit breaker OPENED for {domain}. "
+            f"Circuit breaker OPENED for {domain} "
+            f"({health.consecutive_failures} consecutive failures, "
+            f"{1 - health.success_rate:.0%} recent error rate). "
             f"Will retry after {self.circuit_timeout.total_seconds()/60:.0f} minutes"
         )
 
-    def _before_request(self, domain: str) -> None:
-        """Update breaker state prior to executing a request."""
-        breaker = self._get_or_create_breaker(domain)
-        if breaker.half_open:
-            breaker.half_open_attempts += 1
-
     async def check_domain_health(self, domain: str, timeout: int = 10) -> bool:
         """
         Pre-flight health check before starting mass export.
@@ -1175,8 +1123,6 @@ class AntibotManager(ConfigurableComponent):
             )
             return None
 
-        self._before_request(domain)
-        
         session_created_here = False
         if not session:
             session, proxy = await self.get_async_session()
@@ -1194,6 +1140,8 @@ class AntibotManager(ConfigurableComponent):
             while attempt < max_attempts:
                 try:
                     self.request_stats["total_requests"] += 1
+                    # Shared per-domain / per-proxy token buckets (no-op when unset)
+                    await throttle_request(url, kwargs.get("proxy"))
                     start_time = time.time()
 
                     # Make request
@@ -1358,10 +1306,8 @@ class AntibotManager(ConfigurableComponent):
 
             self.logger.error(f"Request failed after {max_attempts} attempts")
             
-            # Record failure and check if circuit should open
+            # Record failure (opens the shared circuit once thresholds are hit)
             self._record_failure(domain)
-            if self._should_open_circuit(domain):
-                self._open_circuit(domain)
             
             return None
 
@@ -1523,6 +1469,8 @@ class AntibotManager(ConfigurableComponent):
                 backoff_stats = self.backoff.get_global_statistics()
                 stats["backoff_stats"] = backoff_stats
 
+            stats["domain_health"] = self.domain_health.stats()
+
             # Add premium proxy stats
             if self.premium_proxy_manager and hasattr(
                 self.premium_proxy_manager, "monitor_proxy_usage"
@@ -1,40 +1,162 @@
-from typing import List, Dict, Any, Optional
-from tqdm import tqdm
-from datetime import datetime
-import time
+"""Pipelined batch processing: fetch, parse and persist as overlapping stages.
+
+The stages are joined by small bounded queues:
+
+* **fetch**: ``HybridScrapingEngine.batch_scrape_optimized`` for one batch
+  at a time, so concurrency stays bounded.
+* **parse**: ``parser.parse`` for each fetched page on a thread pool.
+* **persist**: ``insert_product`` and ``insert_variations`` for each parsed
+  product of the batch. A checkpoint is written after each batch.
+
+While batch N is parsed and persisted, batch N+1 is already being fetched.
+Every URL ends up as a :class:`UrlOutcome` that records the stage that failed
+and why, so failed URLs no longer have to be recovered from exception text.
+With a checkpoint path, a restarted run skips the batches it already
+persisted.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
 from urllib.parse import urlparse
 
-from core.hybrid_engine import HybridScrapingEngine
+from tqdm import tqdm
+
 from utils.logger import setup_logger
 from utils.system_monitor import get_system_resources
 
 logger = setup_logger(__name__)
 
+FETCH = "fetch"
+PARSE = "parse"
+PERSIST = "persist"
+
+# Retry queue per failing stage (parse errors are deterministic: not retried).
+FAILURE_TYPES = {FETCH: "network_error", PARSE: "parse_error", PERSIST: "db_error"}
+RETRYABLE_STAGES = (FETCH, PERSIST)
+
+
+@dataclass(slots=True)
+class UrlOutcome:
+    """What happened to one URL; ``stage`` names the stage that failed."""
+
+    url: str
+    ok: bool = False
+    stage: Optional[str] = None
+    error: Optional[str] = None
+    product_id: Any = None
+    variations: int = 0
+    # Intermediate payloads, dropped once the next stage has consumed them.
+    html: Optional[str] = field(default=None, repr=False)
+    product: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+    def fail(self, stage: str, error: Any) -> None:
+        self.ok, self.stage, self.error = False, stage, str(error)
+        self.html = self.product = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"url": self.url, "stage": self.stage, "error": self.error}
+
+
+class BatchCheckpoint:
+    """Which batches of a URL list are persisted, and what failed, as a JSON file.
+
+    The checkpoint belongs to the URL list alone. Batch numbers only make
+    sense for the batch size they were cut with, so a resumed checkpoint
+    brings its ``batch_size`` along, and the caller must reuse it. A size
+    derived from live CPU and memory would differ after a crash.
+    """
+
+    def __init__(self, path: Path, urls: Sequence[str], batch_size: Optional[int] = None) -> None:
+        self.path = Path(path)
+        self.fingerprint = hashlib.sha1("\n".join(urls).encode("utf-8")).hexdigest()
+        self.completed: Set[int] = set()
+        self.failures: Dict[str, Dict[str, Any]] = {}
+        self.batch_size = batch_size
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        # Older checkpoints used "<digest>:<batch size>".
+        if str(state.get("fingerprint", "")).split(":")[0] != self.fingerprint:
+            return
+        stored_size = state.get("batch_size")
+        if not isinstance(stored_size, int) or stored_size <= 0:
+            return
+        self.batch_size = stored_size
+        self.completed = set(state.get("completed", []))
+        self.failures = dict(state.get("failures", {}))
+
+    def mark(self, batch_num: int, outcomes: Sequence[UrlOutcome]) -> None:
+        self.completed.add(batch_num)
+        self.record(outcomes)
+
+    def record(self, outcomes: Sequence[UrlOutcome]) -> None:
+        """Update the failures of ``outcomes`` (e.g. after a retry) and save."""
+
+        for outcome in outcomes:
+            if outcome.ok:
+                self.failures.pop(outcome.url, None)
+            else:
+                self.failures[outcome.url] = outcome.to_dict()
+        payload = {
+            "fingerprint": self.fingerprint,
+            "batch_size": self.batch_size,
+            "completed": sorted(self.completed),
+            "failures": self.failures,
+            "updated_at": datetime.now().isoformat(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+async def _call(func, *args, **kwargs) -> Any:
+    """Await async DB/parser methods; run sync ones off the event loop."""
+
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    result = await asyncio.to_thread(func, *args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
 
 class BatchProcessor:
-    def __init__(self, db_manager, config=None):
+    def __init__(self, db_manager, config=None, logger=None, engine=None):
         self.db_manager = db_manager
-        self.config = config
-        self.engine = HybridScrapingEngine()
-        self.retry_queues = {
+        self.config = config or {}
+        # ScraperEngine passes the "batch_processing" section, older callers the full settings.
+        self.settings = self.config.get("batch_processing", self.config)
+        if engine is None:
+            from core.hybrid_engine import HybridScrapingEngine
+
+            engine = HybridScrapingEngine()
+        self.engine = engine
+        self.retry_queues: Dict[str, List[str]] = {
             "network_error": [],
             "parse_error": [],
             "db_error": [],
             "batch_error": [],
         }
-        self.retry_counts = {
-            "network_error": 0,
-            "parse_error": 0,
-            "db_error": 0,
-            "batch_error": 0,
-        }
+        self.retry_counts = {key: 0 for key in self.retry_queues}
         self.performance_history = []
-        self.initial_batch_size = (
-            self.config.get("batch_processing", {}).get("batch_size", 50)
-            if self.config
-            else 50
-        )
+        self.initial_batch_size = int(self.settings.get("batch_size", 50))
+        self.max_concurrent = int(self.settings.get("max_concurrent", 10))
+        self.parse_workers = int(self.settings.get("parse_workers", os.cpu_count() or 2))
+        self.max_retries = int(self.settings.get("max_retries", 3))
+        self.retry_backoff = float(self.settings.get("retry_backoff", 1.0))
+        self.checkpoint_path = self.settings.get("checkpoint_path")
 
     def calculate_optimal_batch_size(
         self, total_urls: int, system_resources: Dict[str, float]
@@ -127,103 +249,187 @@ class BatchProcessor:
         pbar.set_description(desc)
         pbar.update(1)
 
-    def retry_failed_urls(
-        self, failed_urls: List[str], failure_type: str, max_retries: int = 3
-    ) -> List[str]:
-        """
-        Retry failed URLs with exponential backoff.
-        """
-        retry_count = self.retry_counts.get(failure_type, 0)
-        if retry_count >= max_retries:
-            logger.warning(
-                f"Max retries reached for {failure_type}: {len(failed_urls)} URLs skipped"
-            )
-            return []
+    # ------------------------------------------------------------------
+    # Pipeline stages
+    # ------------------------------------------------------------------
 
-        batch_size = max(
-            5, len(failed_urls) // (2**retry_count)
-        )  # Smaller batches on retry
-        batches = self.split_into_batches(failed_urls, batch_size)
+    async def fetch_batch(self, batch: Sequence[str]) -> List[UrlOutcome]:
+        """Fetch one batch; every URL gets an outcome holding its HTML or fetch error."""
 
-        backoff_time = (2**retry_count) + random.uniform(0, 1)
-        logger.info(
-            f"Retrying {len(failed_urls)} {failure_type} URLs in {len(batches)} batches, backoff: {backoff_time}s"
+        outcomes = {url: UrlOutcome(url) for url in batch}
+        try:
+            results = await self.engine.batch_scrape_optimized(
+                list(batch), batch_size=self.max_concurrent
+            )
+        except Exception as exc:  # noqa: BLE001 - the whole batch failed to fetch
+            for outcome in outcomes.values():
+                outcome.fail(FETCH, exc)
+            return list(outcomes.values())
+
+        for result in results:
+            if isinstance(result, dict) and result.get("url") in outcomes:
+                outcome = outcomes[result["url"]]
+                if result.get("success", True) and result.get("html"):
+                    outcome.ok, outcome.html = True, result["html"]
+                else:
+                    outcome.fail(FETCH, result.get("error") or "empty response")
+            elif isinstance(result, Exception) and getattr(result, "url", None) in outcomes:
+                outcomes[result.url].fail(FETCH, result)
+        for outcome in outcomes.values():
+            if not outcome.ok and outcome.stage is None:
+                outcome.fail(FETCH, "no result returned")
+        return list(outcomes.values())
+
+    async def parse_batch(
+        self, outcomes: List[UrlOutcome], parser, pool: ThreadPoolExecutor
+    ) -> List[UrlOutcome]:
+        loop = asyncio.get_running_loop()
+        fetched = [outcome for outcome in outcomes if outcome.ok]
+        parsed = await asyncio.gather(
+            *(loop.run_in_executor(pool, parser.parse, outcome.html, outcome.url) for outcome in fetched),
+            return_exceptions=True,
         )
-        time.sleep(backoff_time)
-
-        remaining_failed = []
-        for batch in batches:
+        scraped_at = datetime.now().isoformat()
+        for outcome, product in zip(fetched, parsed):
+            outcome.html = None
+            if isinstance(product, BaseException):
+                outcome.fail(PARSE, product)
+            elif not product:
+                outcome.fail(PARSE, "parser returned no product")
+            else:
+                product.setdefault("url", outcome.url)
+                # Required fields for database insertion.
+                product["site_domain"] = urlparse(product["url"]).netloc
+                product["scraped_at"] = scraped_at
+                outcome.product = product
+        return outcomes
+
+    async def persist_batch(self, outcomes: List[UrlOutcome], db_manager) -> List[UrlOutcome]:
+        ready = [outcome for outcome in outcomes if outcome.ok]
+        if not ready:
+            return outcomes
+        for outcome in ready:
+            product = outcome.product
             try:
-                results = self.engine.sync_batch_scrape(batch)
-                for result in results:
-                    if isinstance(result, Exception):
-                        # Handle exception results from failed fetches
-                        error_msg = str(result)
-                        if "Failed to fetch" in error_msg:
-                            url = error_msg.split("Failed to fetch ")[1].split(" ")[0]
-                            remaining_failed.append(url)
-                    elif isinstance(result, dict) and result.get("success", True):
-                        try:
-                            parsed_data = self.parser.parse(
-                                result["html"], result["url"]
-                            )
-                            # Add required fields for database insertion
-                            parsed_data["site_domain"] = urlparse(
-                                parsed_data["url"]
-                            ).netloc
-                            parsed_data["scraped_at"] = datetime.now().isoformat()
-                            pid = self.db_manager.insert_product(parsed_data)
-                            if (
-                                "variations" in parsed_data
-                                and parsed_data["variations"]
-                            ):
-                                self.db_manager.insert_variations(
-                                    pid,
-                                    parsed_data["variations"],
-                                    domain=parsed_data["site_domain"],
-                                )
-                        except Exception as e:
-                            logger.error(f"Parse/DB error for {result['url']}: {e}")
-                            remaining_failed.append(result["url"])
-                    else:
-                        # Handle failed dict results
-                        if isinstance(result, dict) and "url" in result:
-                            remaining_failed.append(result["url"])
-            except Exception as e:
-                logger.error(f"Retry batch failed: {e}")
-                remaining_failed.extend(batch)
-
-        self.retry_counts[failure_type] = retry_count + 1
-        if remaining_failed:
-            self.retry_queues[failure_type].extend(remaining_failed)
-        return remaining_failed
-
-    def fallback_to_sequential(self, urls: List[str], reason: str):
-        """
-        Graceful degradation to sequential processing.
-        """
-        logger.warning(f"Falling back to sequential processing due to: {reason}")
-        results = []
-        for url in tqdm(urls, desc="Sequential fallback"):
+                outcome.product_id = await _call(db_manager.insert_product, product)
+                if product.get("variations"):
+                    var_ids = await _call(
+                        db_manager.insert_variations,
+                        outcome.product_id,
+                        product["variations"],
+                        domain=product["site_domain"],
+                    )
+                    outcome.variations = len(var_ids) if var_ids is not None else len(product["variations"])
+                outcome.product = None
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"DB error for {outcome.url}: {exc}")
+                outcome.fail(PERSIST, exc)
+        return outcomes
+
+    async def run_pipeline(
+        self,
+        batches: Sequence[Sequence[str]],
+        parser,
+        db_manager,
+        checkpoint: Optional[BatchCheckpoint] = None,
+        pbar: Optional[tqdm] = None,
+    ) -> List[UrlOutcome]:
+        """Run fetch -> parse -> persist over ``batches`` with one batch of lookahead per stage."""
+
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=1)
+        parsed: asyncio.Queue = asyncio.Queue(maxsize=1)
+        results: List[UrlOutcome] = []
+        total_batches = len(batches)
+
+        # A stage that raises does not send its end marker; run_pipeline
+        # cancels the other stages instead.
+        async def fetch_stage() -> None:
+            for batch_num, batch in enumerate(batches, 1):
+                if checkpoint and batch_num in checkpoint.completed:
+                    if pbar is not None:
+                        pbar.update(1)
+                    continue
+                start_time = time.time()
+                await fetched.put((batch_num, start_time, await self.fetch_batch(batch)))
+            await fetched.put(None)
+
+        async def parse_stage(pool: ThreadPoolExecutor) -> None:
+            while (item := await fetched.get()) is not None:
+                batch_num, start_time, outcomes = item
+                await parsed.put((batch_num, start_time, await self.parse_batch(outcomes, parser, pool)))
+            await parsed.put(None)
+
+        async def persist_stage() -> None:
+            while (item := await parsed.get()) is not None:
+                batch_num, start_time, outcomes = item
+                outcomes = await self.persist_batch(outcomes, db_manager)
+                results.extend(outcomes)
+                if checkpoint is not None:
+                    checkpoint.mark(batch_num, outcomes)
+                successes = sum(outcome.ok for outcome in outcomes)
+                performance = self.track_batch_performance(
+                    batch_num, len(outcomes), successes, len(outcomes) - successes, start_time
+                )
+                if pbar is not None:
+                    self.update_progress_bar(
+                        pbar, batch_num, total_batches, performance, get_system_resources()
+                    )
+
+        with ThreadPoolExecutor(max_workers=max(self.parse_workers, 1), thread_name_prefix="batch-parse") as pool:
+            stages = [
+                asyncio.ensure_future(stage)
+                for stage in (fetch_stage(), parse_stage(pool), persist_stage())
+            ]
             try:
-                result = self.engine.sync_scrape(url)
-                parsed = self.parser.parse(result["html"], url)
-                # Add required fields for database insertion
-                parsed["site_domain"] = urlparse(parsed["url"]).netloc
-                parsed["scraped_at"] = datetime.now().isoformat()
-                self.db_manager.insert_product(parsed)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Sequential scrape failed for {url}: {e}")
-        logger.info(f"Sequential fallback completed: {len(results)} processed")
+                # The first failing stage would leave the others blocked on the
+                # bounded queues forever, so it takes them down with it.
+                await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            finally:
+                for stage in stages:
+                    stage.cancel()
+                await asyncio.gather(*stages, return_exceptions=True)
+            for stage in stages:
+                if not stage.cancelled() and stage.exception() is not None:
+                    raise stage.exception()
         return results
 
-    def process_url_batches(
-        self, urls: List[str], parser, db_manager, batch_size: Optional[int] = None
+    async def retry_failed_urls(
+        self, failures: List[UrlOutcome], parser, db_manager
+    ) -> List[UrlOutcome]:
+        """Re-run retryable failures in smaller batches with exponential backoff."""
+
+        outcomes: Dict[str, UrlOutcome] = {outcome.url: outcome for outcome in failures}
+        for attempt in range(self.max_retries):
+            retryable = [
+                outcome
+                for outcome in outcomes.values()
+                if not outcome.ok and outcome.stage in RETRYABLE_STAGES
+            ]
+            if not retryable:
+                break
+            for stage in {outcome.stage for outcome in retryable}:
+                self.retry_counts[FAILURE_TYPES[stage]] += 1
+            pending = [outcome.url for outcome in retryable]
+            backoff_time = self.retry_backoff * (2**attempt) + random.uniform(0, self.retry_backoff)
+            logger.info(f"Retrying {len(pending)} failed URLs (attempt {attempt + 1}), backoff: {backoff_time:.1f}s")
+            await asyncio.sleep(backoff_time)
+            batch_size = max(5, self.initial_batch_size // (2 ** (attempt + 1)))
+            for outcome in await self.run_pipeline(
+                self.split_into_batches(pending, batch_size), parser, db_manager
+            ):
+                outcomes[outcome.url] = outcome
+        return list(outcomes.values())
+
+    async def process_url_batches_async(
+        self,
+        urls: List[str],
+        parser,
+        db_manager,
+        batch_size: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """
-        Main batch processing method.
-        """
+        """Main batch processing method."""
+
         self.parser = parser
         self.db_manager = db_manager
 
@@ -233,152 +439,76 @@ class BatchProcessor:
                 "scraped_products": 0,
                 "variations": 0,
                 "failed_urls": [],
+                "failures": [],
                 "batches_completed": 0,
             }
 
-        system_resources = get_system_resources()
-        optimal_batch_size = self.calculate_optimal_batch_size(
-            len(urls), system_resources
-        )
-        actual_batch_size = batch_size if batch_size is not None else optimal_batch_size
-
-        batches = self.split_into_batches(urls, actual_batch_size)
-        total_batches = len(batches)
-
-        all_failed = []
-        overall_successes = 0
-        overall_errors = 0
-        total_variations = 0
-
-        # Main progress bar for batches
-        with tqdm(total=total_batches, desc="Processing batches", unit="batch") as pbar:
-            for batch_num, batch in enumerate(batches, 1):
-                start_time = time.time()
-                batch_successes = 0
-                batch_errors = 0
-                batch_failed = []
-
-                try:
-                    # Concurrent scraping
-                    results = self.engine.sync_batch_scrape(batch)
-                    logger.debug(f"Batch {batch_num}: Scraped {len(results)} URLs")
-
-                    # Sequential parsing and DB insertion
-                    for result in results:
-                        if isinstance(result, Exception):
-                            # Handle exception results from failed fetches
-                            batch_errors += 1
-                            # Extract URL from exception message if possible
-                            error_msg = str(result)
-                            if "Failed to fetch" in error_msg:
-                                url = error_msg.split("Failed to fetch ")[1].split(" ")[
-                                    0
-                                ]
-                                batch_failed.append(url)
-                                self.retry_queues["network_error"].append(url)
-                        elif isinstance(result, dict) and result.get("success", True):
-                            try:
-                                parsed_data = parser.parse(
-                                    result["html"], result["url"]
-                                )
-                                # Add required fields for database insertion
-                                parsed_data["site_domain"] = urlparse(
-                                    parsed_data["url"]
-                                ).netloc
-                                parsed_data["scraped_at"] = datetime.now().isoformat()
-                                pid = db_manager.insert_product(parsed_data)
-                                batch_successes += 1
-                                if (
-                                    "variations" in parsed_data
-                                    and parsed_data["variations"]
-                                ):
-                                    var_ids = db_manager.insert_variations(
-                                        pid,
-                                        parsed_data["variations"],
-                                        domain=parsed_data["site_domain"],
-                                    )
-                                    total_variations += len(var_ids)
-                            except Exception as e:
-                                logger.error(f"Parse/DB error for {result['url']}: {e}")
-                                batch_errors += 1
-                                batch_failed.append(result["url"])
-                                self.retry_queues[
-                                    "parse_error" if "parse" in str(e) else "db_error"
-                                ].append(result["url"])
-                        else:
-                            # Handle failed dict results
-                            batch_errors += 1
-                            if isinstance(result, dict) and "url" in result:
-                                batch_failed.append(result["url"])
-                                self.retry_queues["network_error"].append(result["url"])
-
-                    overall_successes += batch_successes
-                    overall_errors += batch_errors
-                    all_failed.extend(batch_failed)
-
-                    # Track performance
-                    performance = self.track_batch_performance(
-                        batch_num, len(batch), batch_successes, batch_errors, start_time
-                    )
-
-                    # Update resources and progress
-                    system_resources = get_system_resources()
-                    self.update_progress_bar(
-                        pbar, batch_num, total_batches, performance, system_resources
+        checkpoint = None
+        checkpoint_path = checkpoint_path or self.checkpoint_path
+        if checkpoint_path:
+            checkpoint = BatchCheckpoint(Path(checkpoint_path), urls)
+            if checkpoint.completed:
+                if batch_size is not None and batch_size != checkpoint.batch_size:
+                    logger.info(
+                        f"Resuming with the checkpoint's batch size {checkpoint.batch_size} "
+                        f"instead of {batch_size}"
                     )
-
-                    # Check for degradation
-                    if (
-                        performance["success_rate"] < 0.5
-                        or system_resources["memory_percent"] > 95
-                    ):
-                        logger.warning("Performance degradation detected")
-                        remaining_urls = batch_failed + [
-                            u for b in batches[batch_num:] for u in b
-                        ]
-                        self.fallback_to_sequential(
-                            remaining_urls, "high error rate or memory pressure"
-                        )
-                        break
-
-                except Exception as e:
-                    logger.error(f"Batch {batch_num} failed: {e}")
-                    batch_errors = len(batch)
-                    overall_errors += batch_errors
-                    all_failed.extend(batch)
-                    # Retry the entire batch
-                    remaining = self.retry_failed_urls(batch, "batch_error")
-                    all_failed.extend(remaining)
-
-        # Final retry for all failed
-        if all_failed:
-            logger.info(f"Retrying {len(all_failed)} failed URLs")
-            for failure_type, queue in self.retry_queues.items():
-                if queue:
-                    remaining = self.retry_failed_urls(queue, failure_type)
-                    all_failed = [
-                        u for u in all_failed if u not in queue or u in remaining
-                    ]
-
-        # Final stats
-        total_processed = len(urls)
-        final_success_rate = (
-            overall_successes / total_processed if total_processed > 0 else 0
-        )
+                batch_size = checkpoint.batch_size
+                logger.info(f"Resuming: {len(checkpoint.completed)} batches already persisted")
+        if batch_size is None:
+            batch_size = self.calculate_optimal_batch_size(len(urls), get_system_resources())
+        if checkpoint is not None:
+            checkpoint.batch_size = batch_size
+
+        batches = self.split_into_batches(urls, batch_size)
+        with tqdm(total=len(batches), desc="Processing batches", unit="batch") as pbar:
+            outcomes = await self.run_pipeline(batches, parser, db_manager, checkpoint, pbar)
+
+        failed = [outcome for outcome in outcomes if not outcome.ok]
+        if failed:
+            retried = await self.retry_failed_urls(failed, parser, db_manager)
+            if checkpoint is not None:
+                # Recovered URLs must not be reported as failed after a resume.
+                checkpoint.record(retried)
+            by_url = {outcome.url: outcome for outcome in retried}
+            outcomes = [by_url.get(outcome.url, outcome) for outcome in outcomes]
+
+        self.retry_queues = {key: [] for key in self.retry_queues}
+        failures = [outcome for outcome in outcomes if not outcome.ok]
+        for outcome in failures:
+            self.retry_queues[FAILURE_TYPES.get(outcome.stage, "batch_error")].append(outcome.url)
+        if checkpoint is not None:
+            # URLs of batches skipped on resume keep their recorded failures.
+            skipped = set(urls) - {outcome.url for outcome in outcomes}
+            failures_payload = [outcome.to_dict() for outcome in failures] + [
+                failure for url, failure in checkpoint.failures.items() if url in skipped
+            ]
+        else:
+            failures_payload = [outcome.to_dict() for outcome in failures]
+
+        successes = sum(outcome.ok for outcome in outcomes)
         logger.info(
-            f"Batch processing completed: {overall_successes}/{total_processed} successful ({final_success_rate:.1%})"
+            f"Batch processing completed: {successes}/{len(outcomes)} successful this run, "
+            f"{len(failures_payload)} failed"
         )
-
-        if final_success_rate < 0.7 and all_failed:
-            logger.info(
-                "Overall degradation: falling back remaining failed URLs to sequential"
-            )
-            self.fallback_to_sequential(all_failed, "overall low success rate")
-
-        # Return results
         return {
-            "scraped_products": overall_successes,
-            "variations": total_variations,
-            "failed_urls": all_failed,
-            "batches_completed": total_batches,
+            "scraped_products": successes,
+            "variations": sum(outcome.variations for outcome in outcomes if outcome.ok),
+            "failed_urls": [failure["url"] for failure in failures_payload],
+            "failures": failures_payload,
+            "batches_completed": len(batches),
         }
+
+    def process_url_batches(
+        self,
+        urls: List[str],
+        parser,
+        db_manager,
+        batch_size: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Synchronous entry point; use ``process_url_batches_async`` inside a running loop."""
+
+        return asyncio.run(
+            self.process_url_batches_async(urls, parser, db_manager, batch_size, checkpoint_path)
+        )
@@ -0,0 +1,500 @@
+"""Domain health and circuit-breaker state shared across worker processes.
+
+``AntibotManager``, ``ExponentialBackoff`` and ``SiteScheduler`` used to keep
+breaker state in per-process dicts, so when ``run_ili_ili_parallel.py`` starts
+N workers against one shop every worker had to burn its own failures before
+backing off. A :class:`DomainHealthStore` keeps that state (breaker state,
+consecutive failures, the recent outcome window and the half-open probe slot)
+in one place:
+
+* ``memory`` - in-process only, the previous behaviour (default);
+* ``sqlite`` - a WAL database file, for several processes on one host;
+* ``redis`` - for workers spread over several hosts.
+
+Every read-modify-write runs as one transaction (``BEGIN IMMEDIATE`` for
+SQLite, ``WATCH``/``MULTI`` for Redis), so exactly one worker trips a breaker
+or wins the half-open probe. The store only keeps state; thresholds live in
+the :class:`BreakerPolicy` each component passes in, and ``namespace`` keeps
+components with different policies apart.
+
+The backend comes from the component's ``domain_health`` config block or the
+:data:`DOMAIN_HEALTH_ENV` environment variable (``memory``, ``sqlite``,
+``sqlite:///path/to.db`` or a ``redis://`` URL). If the shared backend fails at
+runtime the store logs once and continues in memory rather than failing
+requests.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+try:  # pragma: no cover - optional dependency
+    import redis as _redis
+except ImportError:  # pragma: no cover - environment without redis
+    _redis = None
+
+logger = logging.getLogger(__name__)
+
+DOMAIN_HEALTH_ENV = "SCRAPER_DOMAIN_HEALTH"
+DEFAULT_SQLITE_PATH = Path("data/state/domain_health.sqlite3")
+DEFAULT_REDIS_PREFIX = "scraper:domain_health"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+T = TypeVar("T")
+
+_STORE_ERRORS: Tuple[type, ...] = (sqlite3.Error, OSError)
+if _redis is not None:
+    _STORE_ERRORS += (_redis.RedisError,)
+
+
+@dataclass(slots=True)
+class BreakerPolicy:
+    """Thresholds for one component's breaker."""
+
+    failure_threshold: int = 20
+    window_size: int = 50
+    error_rate: float = 0.8
+    open_seconds: float = 300.0
+    half_open_probes: int = 1
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]], **defaults: Any) -> "BreakerPolicy":
+        """Policy from a config block; missing keys use ``defaults``, then class defaults."""
+
+        policy = cls(**defaults)
+        for item in fields(cls):
+            value = (config or {}).get(item.name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                setattr(policy, item.name, type(getattr(policy, item.name))(value))
+        return policy
+
+
+@dataclass(slots=True)
+class DomainHealth:
+    """Stored breaker state for one domain."""
+
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    # Most recent outcome last: "1" success, "0" failure.
+    outcomes: str = ""
+    opened_at: float = 0.0
+    probes: int = 0
+    probe_started: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        if not self.outcomes:
+            return 1.0
+        return self.outcomes.count("1") / len(self.outcomes)
+
+    def open_until(self, policy: BreakerPolicy) -> Optional[float]:
+        if self.state != OPEN:
+            return None
+        return self.opened_at + policy.open_seconds
+
+    def to_fields(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_fields(cls, data: Mapping[Any, Any]) -> "DomainHealth":
+        health = cls()
+        for key, value in data.items():
+            if isinstance(key, bytes):
+                key = key.decode()
+            if isinstance(value, bytes):
+                value = value.decode()
+            default = getattr(health, key, None)
+            if default is None:
+                continue
+            try:
+                setattr(health, key, type(default)(value))
+            except (TypeError, ValueError):
+                continue
+        return health
+
+
+@dataclass(slots=True)
+class BreakerDecision:
+    """Outcome of :meth:`DomainHealthStore.acquire`."""
+
+    allowed: bool
+    state: str
+    retry_at: Optional[float] = None
+    # True when this caller won the half-open probe slot.
+    probe: bool = False
+
+
+def _open(health: DomainHealth, now: float) -> None:
+    health.state = OPEN
+    health.opened_at = now
+    health.probes = 0
+    health.probe_started = 0.0
+
+
+def _should_open(health: DomainHealth, policy: BreakerPolicy) -> bool:
+    if policy.failure_threshold > 0 and health.consecutive_failures >= policy.failure_threshold:
+        return True
+    window = policy.window_size
+    if window > 0 and len(health.outcomes) >= window:
+        return health.outcomes.count("0") / len(health.outcomes) >= policy.error_rate
+    return False
+
+
+def _acquire(health: DomainHealth, policy: BreakerPolicy, now: float) -> BreakerDecision:
+    if health.state == OPEN:
+        if now - health.opened_at < policy.open_seconds:
+            return BreakerDecision(False, OPEN, health.opened_at + policy.open_seconds)
+        health.state = HALF_OPEN
+        health.probes = 0
+    if health.state == HALF_OPEN:
+        if health.probes >= policy.half_open_probes:
+            # Another worker is probing. A probe that never reported back
+            # (worker killed) expires after ``open_seconds``.
+            if now - health.probe_started < policy.open_seconds:
+                return BreakerDecision(False, HALF_OPEN, health.probe_started + policy.open_seconds)
+            health.probes = 0
+        health.probes += 1
+        health.probe_started = now
+        return BreakerDecision(True, HALF_OPEN, probe=True)
+    return BreakerDecision(True, CLOSED)
+
+
+def _expired(health: DomainHealth, policy: Optional[BreakerPolicy], now: float) -> bool:
+    return policy is not None and now - health.opened_at >= policy.open_seconds
+
+
+def _record(health: DomainHealth, policy: BreakerPolicy, success: bool, now: float) -> Optional[str]:
+    if health.state == OPEN and _expired(health, policy, now):
+        # Callers that only snapshot() never acquire(), so an expired breaker
+        # is settled here: the next outcome closes or re-opens it.
+        health.state = HALF_OPEN
+        health.probes = 0
+    if policy.window_size > 0:
+        health.outcomes = (health.outcomes + ("1" if success else "0"))[-policy.window_size :]
+    if success:
+        health.consecutive_failures = 0
+        if health.state == HALF_OPEN:
+            health.state = CLOSED
+            health.opened_at = 0.0
+            health.probes = 0
+            return CLOSED
+        return None
+    health.consecutive_failures += 1
+    if health.state == HALF_OPEN or (health.state == CLOSED and _should_open(health, policy)):
+        _open(health, now)
+        return OPEN
+    return None
+
+
+def _trip(health: DomainHealth, now: float, policy: Optional[BreakerPolicy] = None) -> bool:
+    if health.state == OPEN and not _expired(health, policy, now):
+        return False
+    _open(health, now)
+    return True
+
+
+class DomainHealthStore:
+    """Breaker state keyed by ``(namespace, domain)``; in-process by default."""
+
+    backend = "memory"
+
+    def __init__(self, namespace: str = "default") -> None:
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._local: Dict[str, DomainHealth] = {}
+        self._degraded = False
+
+    # Backend hook -------------------------------------------------------
+
+    def _transact(self, domain: str, update: Callable[[DomainHealth], T]) -> T:
+        return self._transact_local(domain, update)
+
+    def _transact_local(self, domain: str, update: Callable[[DomainHealth], T]) -> T:
+        with self._lock:
+            health = self._local.get(domain)
+            if health is None:
+                health = self._local[domain] = DomainHealth()
+            result = update(health)
+            health.updated_at = time.time()
+            return result
+
+    def _run(self, domain: str, update: Callable[[DomainHealth], T]) -> T:
+        if self._degraded:
+            return self._transact_local(domain, update)
+        try:
+            return self._transact(domain, update)
+        except _STORE_ERRORS as exc:
+            self._degraded = True
+            logger.warning(
+                "Domain health %s backend failed (%s); continuing with in-process state",
+                self.backend,
+                exc,
+            )
+            return self._transact_local(domain, update)
+
+    # Public API ---------------------------------------------------------
+
+    def acquire(self, domain: str, policy: BreakerPolicy, now: Optional[float] = None) -> BreakerDecision:
+        """May a request to ``domain`` go out now? Claims the probe slot when half-open."""
+
+        moment = time.time() if now is None else now
+        return self._run(domain, lambda health: _acquire(health, policy, moment))
+
+    def record(
+        self, domain: str, policy: BreakerPolicy, success: bool, now: Optional[float] = None
+    ) -> Optional[str]:
+        """Record an outcome; returns the new state if this call changed it."""
+
+        moment = time.time() if now is None else now
+        return self._run(domain, lambda health: _record(health, policy, success, moment))
+
+    def trip(
+        self, domain: str, now: Optional[float] = None, policy: Optional[BreakerPolicy] = None
+    ) -> bool:
+        """Force the breaker open; ``False`` if it already was.
+
+        With ``policy``, a breaker whose open period has passed counts as
+        closed and is opened again with a fresh ``opened_at``.
+        """
+
+        moment = time.time() if now is None else now
+        return self._run(domain, lambda health: _trip(health, moment, policy))
+
+    def snapshot(self, domain: str) -> DomainHealth:
+        """Copy of the stored state (no transition applied)."""
+
+        return self._run(domain, lambda health: DomainHealth(**health.to_fields()))
+
+    def reset(self, domain: str) -> None:
+        def _clear(health: DomainHealth) -> None:
+            for key, value in DomainHealth().to_fields().items():
+                setattr(health, key, value)
+
+        self._run(domain, _clear)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "namespace": self.namespace, "degraded": self._degraded}
+
+    def close(self) -> None:
+        return None
+
+
+class SQLiteHealthStore(DomainHealthStore):
+    """Shared state in a WAL SQLite file (one host, many processes)."""
+
+    backend = "sqlite"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS domain_health (
+            namespace TEXT NOT NULL,
+            domain TEXT NOT NULL,
+            state TEXT NOT NULL,
+            consecutive_failures INTEGER NOT NULL,
+            outcomes TEXT NOT NULL,
+            opened_at REAL NOT NULL,
+            probes INTEGER NOT NULL,
+            probe_started REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (namespace, domain)
+        )
+    """
+    _COLUMNS = tuple(item.name for item in fields(DomainHealth))
+
+    def __init__(self, path: Path = DEFAULT_SQLITE_PATH, namespace: str = "default", timeout: float = 10.0) -> None:
+        super().__init__(namespace)
+        self.path = Path(path)
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross fork(); reopen in the child.
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), timeout=self.timeout, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(self._SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _transact(self, domain: str, update: Callable[[DomainHealth], T]) -> T:
+        columns = ", ".join(self._COLUMNS)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    f"SELECT {columns} FROM domain_health WHERE namespace = ? AND domain = ?",
+                    (self.namespace, domain),
+                ).fetchone()
+                health = DomainHealth(*row) if row else DomainHealth()
+                result = update(health)
+                health.updated_at = time.time()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO domain_health (namespace, domain, {columns}) "
+                    f"VALUES (?, ?, {', '.join('?' for _ in self._COLUMNS)})",
+                    (self.namespace, domain, *health.to_fields().values()),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+class RedisHealthStore(DomainHealthStore):
+    """Shared state in Redis hashes (workers on several hosts)."""
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        client: Any,
+        namespace: str = "default",
+        prefix: str = DEFAULT_REDIS_PREFIX,
+        ttl_seconds: int = 86400,
+    ) -> None:
+        super().__init__(namespace)
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, domain: str) -> str:
+        return f"{self.prefix}:{self.namespace}:{domain}"
+
+    def _transact(self, domain: str, update: Callable[[DomainHealth], T]) -> T:
+        key = self._key(domain)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    health = DomainHealth.from_fields(pipe.hgetall(key))
+                    result = update(health)
+                    health.updated_at = time.time()
+                    pipe.multi()
+                    pipe.hset(key, mapping=health.to_fields())
+                    pipe.expire(key, self.ttl_seconds)
+                    pipe.execute()
+                    return result
+                except _redis.WatchError:
+                    continue
+
+    def close(self) -> None:
+        closer = getattr(self.client, "close", None)
+        if callable(closer):
+            closer()
+
+
+def _backend_from_env() -> Tuple[Optional[str], Optional[str]]:
+    raw = os.environ.get(DOMAIN_HEALTH_ENV, "").strip()
+    if not raw:
+        return None, None
+    if raw.startswith(("redis://", "rediss://", "unix://")):
+        return "redis", raw
+    if raw.startswith("sqlite:///"):
+        return "sqlite", raw[len("sqlite:///") :]
+    return raw.lower(), None
+
+
+def _redis_client(url: str) -> Optional[Any]:
+    if _redis is None:
+        logger.warning("redis package not installed; cannot use %s for domain health", url)
+        return None
+    try:
+        client = _redis.Redis.from_url(url, socket_timeout=2.0, socket_connect_timeout=2.0)
+        client.ping()
+        return client
+    except _redis.RedisError as exc:
+        logger.warning("Redis at %s unavailable for domain health: %s", url, exc)
+        return None
+
+
+def create_domain_health_store(
+    config: Optional[Mapping[str, Any]] = None, *, namespace: str = "default"
+) -> DomainHealthStore:
+    """Store selected by :data:`DOMAIN_HEALTH_ENV` or ``config``.
+
+    ``config`` keys: ``backend`` (``memory``/``sqlite``/``redis``/``auto``),
+    ``redis_url``, ``sqlite_path``, ``key_prefix``, ``ttl_seconds``. An
+    unreachable Redis falls back to SQLite; ``auto`` uses Redis when a URL is
+    configured and SQLite otherwise.
+    """
+
+    config = config or {}
+    backend, location = _backend_from_env()
+    if backend is None:
+        backend = str(config.get("backend") or "memory").lower()
+    redis_url = location if backend == "redis" and location else config.get("redis_url")
+    sqlite_path = location if backend == "sqlite" and location else config.get("sqlite_path")
+
+    if backend in {"redis", "auto"} and redis_url:
+        client = _redis_client(str(redis_url))
+        if client is not None:
+            return RedisHealthStore(
+                client,
+                namespace=namespace,
+                prefix=str(config.get("key_prefix") or DEFAULT_REDIS_PREFIX),
+                ttl_seconds=int(config.get("ttl_seconds", 86400)),
+            )
+        backend = "sqlite"
+    if backend in {"sqlite", "redis", "auto"}:
+        try:
+            return SQLiteHealthStore(Path(sqlite_path or DEFAULT_SQLITE_PATH), namespace=namespace)
+        except sqlite3.Error as exc:
+            logger.warning("SQLite domain health store unavailable (%s); using in-process state", exc)
+    elif backend != "memory":
+        logger.warning("Unknown domain health backend %r; using in-process state", backend)
+    return DomainHealthStore(namespace=namespace)
+
+
+def shared_domain_health_store(
+    config: Optional[Mapping[str, Any]] = None, *, namespace: str = "default"
+) -> Optional[DomainHealthStore]:
+    """Like :func:`create_domain_health_store`, but ``None`` unless a shared backend is selected.
+
+    For components whose per-process state is kept as is by default.
+    """
+
+    backend, _ = _backend_from_env()
+    if backend is None:
+        backend = str((config or {}).get("backend") or "memory").lower()
+    if backend == "memory":
+        return None
+    return create_domain_health_store(config, namespace=namespace)
+
+
+__all__ = [
+    "CLOSED",
+    "DOMAIN_HEALTH_ENV",
+    "HALF_OPEN",
+    "OPEN",
+    "BreakerDecision",
+    "BreakerPolicy",
+    "DomainHealth",
+    "DomainHealthStore",
+    "RedisHealthStore",
+    "SQLiteHealthStore",
+    "create_domain_health_store",
+    "shared_domain_health_store",
+]
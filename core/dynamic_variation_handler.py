@@ -3,17 +3,34 @@ Dynamic Variation Handler with MutationObserver support.
 
 This module handles dynamic product variations that update via JavaScript/AJAX
 when users interact with variation selectors (dropdowns, swatches, buttons).
+
+In the default ``intercept`` mode the handler only clicks one value change per
+attribute. It records the XHR/fetch requests those clicks trigger and infers
+the variation endpoint from them (see :mod:`core.variation_endpoint`). All
+combinations are then requested directly through the page's request context.
+The browser's cookies still apply, but no page has to settle per combination.
+When no endpoint carries every attribute, it falls back to clicking through
+every combination (``SCRAPER_VARIATION_MODE=click`` forces that).
 """
 
 import asyncio
 import logging
+import os
 import time
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from playwright.async_api import Page, Response
 
+from core.variation_endpoint import (
+    EndpointTemplate,
+    RecordedRequest,
+    infer_endpoint,
+    variant_fields,
+)
 from utils.cms_detection import CMSDetection
 
+VARIATION_MODE = os.getenv("SCRAPER_VARIATION_MODE", "intercept").strip().lower()
+
 
 @dataclass
 class VariationState:
@@ -43,9 +60,12 @@ class DynamicVariationHandler:
     and AJAX monitoring for modern e-commerce platforms.
     """
 
-    def __init__(self, page: Page, cms_type: Optional[str] = None):
+    def __init__(
+        self, page: Page, cms_type: Optional[str] = None, mode: Optional[str] = None
+    ):
         self.page = page
         self.cms_type = cms_type
+        self.mode = (mode or VARIATION_MODE).lower()  # 'intercept' or 'click'
         self.cms_detector = CMSDetection()
         self.logger = logging.getLogger(__name__)
 
@@ -56,11 +76,15 @@ class DynamicVariationHandler:
         self.variation_states: List[VariationState] = []
         self.mutation_observer_active = False
         self.ajax_responses: List[Dict] = []
+        self.recorded_requests: List[RecordedRequest] = []
+        self._selected: Dict[str, str] = {}
+        self._recording = False
 
         # Configuration
         self.interaction_delay = 1000  # ms between interactions
         self.mutation_timeout = 5000  # ms to wait for DOM changes
         self.max_combinations = 100  # limit variation combinations
+        self.intercept_concurrency = 6  # parallel endpoint requests
 
     async def initialize_monitoring(self) -> bool:
         """Initialize MutationObserver and AJAX monitoring."""
@@ -129,6 +153,8 @@ class DynamicVariationHandler:
         """Set up monitoring for AJAX requests related to variations."""
 
         async def handle_response(response: Response):
+            if self._recording:
+                await self._record_request(response, dict(self._selected))
             try:
                 url = response.url
 
@@ -185,6 +211,31 @@ class DynamicVariationHandler:
         self.page.on("response", handle_response)
         self.logger.debug("AJAX monitoring setup complete")
 
+    async def _record_request(
+        self, response: Response, selected: Dict[str, str]
+    ) -> None:
+        """Keep an XHR/fetch request made while probing, with its selection."""
+        try:
+            request = response.request
+            if request.resource_type not in ("xhr", "fetch"):
+                return
+            try:
+                payload = await response.json() if response.ok else None
+            except (ValueError, TypeError, UnicodeDecodeError):
+                payload = None
+            self.recorded_requests.append(
+                RecordedRequest(
+                    method=request.method,
+                    url=response.url,
+                    selected=selected,
+                    post_data=request.post_data,
+                    headers=dict(request.headers),
+                    response=payload,
+                )
+            )
+        except Exception as e:
+            self.logger.debug(f"Error recording request: {e}")
+
     async def detect_variation_selectors(self) -> List[VariationInteraction]:
         """Detect all variation selectors on the page."""
         interactions = []
@@ -327,7 +378,12 @@ class DynamicVariationHandler:
             return "attribute"
 
     async def extract_all_variations(self) -> List[Dict[str, Any]]:
-        """Extract all possible product variations by interacting with selectors."""
+        """Extract all possible product variations.
+
+        In ``intercept`` mode the combinations are requested from the inferred
+        variation endpoint; otherwise (or when inference fails) each
+        combination is applied on the page and read back from the DOM.
+        """
         variations = []
 
         try:
@@ -354,6 +410,16 @@ class DynamicVariationHandler:
             combinations = self._generate_combinations(grouped_interactions)
             combinations = combinations[: self.max_combinations]
 
+            if self.mode == "intercept":
+                intercepted = await self._extract_via_endpoint(
+                    grouped_interactions, combinations
+                )
+                if intercepted is not None:
+                    return intercepted
+                self.logger.info(
+                    "No variation endpoint inferred, falling back to clicking"
+                )
+
             self.logger.info(f"Testing {len(combinations)} variation combinations")
 
             # Test each combination
@@ -369,33 +435,7 @@ class DynamicVariationHandler:
                     state = await self._apply_variation_combination(combination)
 
                     if state and state.price is not None:
-                        # Convert state to variation dict
-                        variation = {
-                            "type": (
-                                "_".join(state.attributes.keys())
-                                if state.attributes
-                                else "variation"
-                            ),
-                            "value": (
-                                " ".join(state.attributes.values())
-                                if state.attributes
-                                else f"Variation {i+1}"
-                            ),
-                            "price": state.price,
-                            "stock": state.stock or 0,
-                            "sku": state.sku or "",
-                            "image_url": state.image_url or "",
-                            "available": state.available,
-                            "attributes": state.attributes,
-                            "display_name": (
-                                " ".join(state.attributes.values())
-                                if state.attributes
-                                else f"Variation {i+1}"
-                            ),
-                            "sort_order": i,
-                            "category": "dynamic",
-                            "confidence_score": 0.9,
-                        }
+                        variation = self._state_to_variation(state, i)
                         variations.append(variation)
 
                         self.logger.debug(
@@ -418,6 +458,117 @@ class DynamicVariationHandler:
             self.logger.error(f"Error extracting variations: {e}")
             return []
 
+    def _state_to_variation(self, state: VariationState, index: int) -> Dict[str, Any]:
+        """Convert a variation state to the variation dict parsers expect."""
+        label = (
+            " ".join(state.attributes.values())
+            if state.attributes
+            else f"Variation {index+1}"
+        )
+        return {
+            "type": (
+                "_".join(state.attributes.keys()) if state.attributes else "variation"
+            ),
+            "value": label,
+            "price": state.price,
+            "stock": state.stock or 0,
+            "sku": state.sku or "",
+            "image_url": state.image_url or "",
+            "available": state.available,
+            "attributes": state.attributes,
+            "display_name": label,
+            "sort_order": index,
+            "category": "dynamic",
+            "confidence_score": 0.9,
+        }
+
+    async def _probe_endpoint(
+        self, grouped_interactions: Dict[str, List[VariationInteraction]]
+    ) -> Optional[EndpointTemplate]:
+        """Select one full combination, then change each attribute once.
+
+        Requests are only recorded once every attribute has a value, so each
+        recorded request knows the complete selection it was made for.
+        """
+        probes = [options[0] for options in grouped_interactions.values()]
+        probes += [
+            options[1] for options in grouped_interactions.values() if len(options) > 1
+        ]
+        self.recorded_requests.clear()
+        self._selected.clear()
+        try:
+            for interaction in probes:
+                self._selected[interaction.attribute_type] = interaction.value
+                self._recording = len(self._selected) == len(grouped_interactions)
+                if await self._perform_interaction(interaction):
+                    await asyncio.sleep(self.interaction_delay / 1000)
+            # Let the last responses arrive before inferring
+            await asyncio.sleep(1)
+        finally:
+            self._recording = False
+        # Attributes with a single option never change, so they need no slot
+        varying = [
+            name for name, options in grouped_interactions.items() if len(options) > 1
+        ]
+        if not varying:
+            return None
+        template = infer_endpoint(self.recorded_requests, varying)
+        if template is None or not isinstance(template.base.response, (dict, list)):
+            return None
+        return template
+
+    async def _extract_via_endpoint(
+        self,
+        grouped_interactions: Dict[str, List[VariationInteraction]],
+        combinations: List[List[VariationInteraction]],
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Request every combination from the inferred endpoint.
+
+        Returns ``None`` when no endpoint could be inferred or it answered with
+        nothing usable, so the caller can fall back to clicking.
+        """
+        template = await self._probe_endpoint(grouped_interactions)
+        if template is None:
+            return None
+
+        self.logger.info(
+            f"Fetching {len(combinations)} variation combinations from "
+            f"{template.base.method} {template.base.url}"
+        )
+        semaphore = asyncio.Semaphore(self.intercept_concurrency)
+
+        async def fetch(index: int, combination: List[VariationInteraction]):
+            selected = {item.attribute_type: item.value for item in combination}
+            request = template.render(selected)
+            async with semaphore:
+                try:
+                    response = await self.page.request.fetch(
+                        request.pop("url"), **request
+                    )
+                    if not response.ok:
+                        return None
+                    payload = await response.json()
+                except Exception as e:
+                    self.logger.debug(f"Error fetching combination {index}: {e}")
+                    return None
+            fields = variant_fields(payload)
+            if fields["price"] is None:
+                return None
+            return self._state_to_variation(
+                VariationState(attributes=selected, **fields), index
+            )
+
+        results = await asyncio.gather(
+            *(fetch(i, combination) for i, combination in enumerate(combinations))
+        )
+        variations = [variation for variation in results if variation is not None]
+        if not variations:
+            return None
+        self.logger.info(
+            f"Successfully extracted {len(variations)} variations from endpoint"
+        )
+        return variations
+
     def _generate_combinations(
         self, grouped_interactions: Dict[str, List[VariationInteraction]]
     ) -> List[List[VariationInteraction]]:
@@ -446,6 +597,49 @@ class DynamicVariationHandler:
 
         return combinations
 
+    async def _perform_interaction(self, interaction: VariationInteraction) -> bool:
+        """Select or click the element for one interaction; False if not found."""
+        try:
+            # Find the element
+            elements = await self.page.query_selector_all(interaction.selector)
+            target_element = None
+
+            # Find the specific element for this value
+            for element in elements:
+                if interaction.action == "select":
+                    # For select elements, find the option
+                    options = await element.query_selector_all("option")
+                    for option in options:
+                        value = await option.get_attribute("value")
+                        if value == interaction.value:
+                            target_element = element
+                            break
+                else:
+                    # For other elements, check value or text
+                    element_value = await element.get_attribute("value")
+                    element_text = await element.text_content()
+
+                    if (
+                        element_value == interaction.value
+                        or element_text == interaction.value
+                    ):
+                        target_element = element
+                        break
+
+            if not target_element:
+                return False
+
+            # Perform the interaction
+            if interaction.action == "select":
+                await target_element.select_option(value=interaction.value)
+            else:
+                await target_element.click()
+            return True
+
+        except Exception as e:
+            self.logger.debug(f"Error applying interaction {interaction.value}: {e}")
+            return False
+
     async def _apply_variation_combination(
         self, combination: List[VariationInteraction]
     ) -> Optional[VariationState]:
@@ -457,51 +651,12 @@ class DynamicVariationHandler:
 
             # Apply each interaction in the combination
             for interaction in combination:
-                try:
-                    # Find the element
-                    elements = await self.page.query_selector_all(interaction.selector)
-                    target_element = None
+                if await self._perform_interaction(interaction):
+                    # Update state attributes
+                    state.attributes[interaction.attribute_type] = interaction.value
 
-                    # Find the specific element for this value
-                    for element in elements:
-                        if interaction.action == "select":
-                            # For select elements, find the option
-                            options = await element.query_selector_all("option")
-                            for option in options:
-                                value = await option.get_attribute("value")
-                                if value == interaction.value:
-                                    target_element = element
-                                    break
-                        else:
-                            # For other elements, check value or text
-                            element_value = await element.get_attribute("value")
-                            element_text = await element.text_content()
-
-                            if (
-                                element_value == interaction.value
-                                or element_text == interaction.value
-                            ):
-                                target_element = element
-                                break
-
-                    if target_element:
-                        # Perform the interaction
-                        if interaction.action == "select":
-                            await target_element.select_option(value=interaction.value)
-                        else:
-                            await target_element.click()
-
-                        # Update state attributes
-                        state.attributes[interaction.attribute_type] = interaction.value
-
-                        # Wait for changes
-                        await asyncio.sleep(self.interaction_delay / 1000)
-
-                except Exception as e:
-                    self.logger.debug(
-                        f"Error applying interaction {interaction.value}: {e}"
-                    )
-                    continue
+                    # Wait for changes
+                    await asyncio.sleep(self.interaction_delay / 1000)
 
             # Wait for all changes to complete
             await asyncio.sleep(1)
@@ -0,0 +1,164 @@
+"""Per-URL escalation ladder for URLs the cheap HTTP path could not scrape.
+
+Falling back from HTTPX to a browser only when a whole run came back empty
+wastes two ways. One guarded page out of a thousand never gets a second
+chance. And a fully blocked domain pays for the HTTPX pass and then scrapes
+serially.
+
+The ladder takes each failed URL on its own (guard page, fetch error, empty
+parse) and walks it up a list of progressively more expensive steps, e.g.
+Playwright, then FlareSolverr, then the parser's own fetch. URLs run
+concurrently under one bound, and a URL stops at the first step that yields
+a product. :class:`EscalationReport` counts per domain how many URLs needed
+escalation and which step recovered them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+EscalationStep = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+DEFAULT_LADDER = ("playwright", "flaresolverr", "parser")
+
+
+def _domain(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def _url_key(url: Any) -> str:
+    return str(url or "").strip().rstrip("/")
+
+
+def urls_to_escalate(
+    urls: Iterable[str],
+    products: Iterable[Mapping[str, Any]],
+    failures: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, str]:
+    """URL -> reason for every URL that produced no product."""
+
+    scraped = {_url_key(product.get("url")) for product in products if isinstance(product, Mapping)}
+    failures = failures or {}
+    pending: Dict[str, str] = {}
+    for url in urls:
+        if _url_key(url) not in scraped and url not in pending:
+            pending[url] = str(failures.get(url) or "fetch_failed")
+    return pending
+
+
+@dataclass(slots=True)
+class DomainEscalation:
+    total: int = 0
+    escalated: int = 0
+    recovered: int = 0
+    by_step: Dict[str, int] = field(default_factory=dict)
+    reasons: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.total if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "escalated": self.escalated,
+            "recovered": self.recovered,
+            "escalation_rate": round(self.escalation_rate, 4),
+            "by_step": dict(self.by_step),
+            "reasons": dict(self.reasons),
+        }
+
+
+class EscalationReport:
+    """Escalation counters per domain for one scrape."""
+
+    def __init__(self) -> None:
+        self.domains: Dict[str, DomainEscalation] = {}
+
+    def _get(self, url: str) -> DomainEscalation:
+        return self.domains.setdefault(_domain(url), DomainEscalation())
+
+    def record_attempted(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self._get(url).total += 1
+
+    def record_escalated(self, url: str, reason: str) -> None:
+        stats = self._get(url)
+        stats.escalated += 1
+        stats.reasons[reason] = stats.reasons.get(reason, 0) + 1
+
+    def record_recovered(self, url: str, step: str) -> None:
+        stats = self._get(url)
+        stats.recovered += 1
+        stats.by_step[step] = stats.by_step.get(step, 0) + 1
+
+    def recovered_by_step(self) -> Dict[str, int]:
+        """Recovered URL count per step, summed over all domains."""
+        totals: Dict[str, int] = {}
+        for stats in self.domains.values():
+            for step, count in stats.by_step.items():
+                totals[step] = totals.get(step, 0) + count
+        return totals
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {domain: stats.to_dict() for domain, stats in self.domains.items()}
+
+
+class EscalationLadder:
+    """Walk each URL up ``steps`` with at most ``concurrency`` URLs in flight."""
+
+    def __init__(
+        self,
+        steps: Sequence[Tuple[str, EscalationStep]],
+        concurrency: int = 4,
+        *,
+        on_result: Optional[Callable[[str, Optional[str]], None]] = None,
+    ) -> None:
+        self.steps = list(steps)
+        self.concurrency = max(1, concurrency)
+        self.on_result = on_result
+
+    async def _climb(self, url: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        for name, step in self.steps:
+            try:
+                product = await step(url)
+            except Exception as exc:  # noqa: BLE001 - next rung
+                logger.debug("Escalation step %s failed for %s: %s", name, url, exc)
+                continue
+            if product:
+                return name, product
+        return None, None
+
+    async def run(self, pending: Mapping[str, str], report: EscalationReport) -> List[Dict[str, Any]]:
+        """Escalate ``pending`` (URL -> reason); returns the recovered products."""
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _escalate(url: str, reason: str) -> Optional[Dict[str, Any]]:
+            report.record_escalated(url, reason)
+            async with semaphore:
+                step, product = await self._climb(url)
+            if step is not None:
+                report.record_recovered(url, step)
+            if self.on_result is not None:
+                self.on_result(url, step)
+            return product
+
+        results = await asyncio.gather(*(_escalate(url, reason) for url, reason in pending.items()))
+        return [product for product in results if product]
+
+
+__all__ = [
+    "DEFAULT_LADDER",
+    "DomainEscalation",
+    "EscalationLadder",
+    "EscalationReport",
+    "EscalationStep",
+    "urls_to_escalate",
+]
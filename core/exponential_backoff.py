@@ -5,10 +5,12 @@ Provides error-specific strategies and circuit breaker patterns.
 
 import asyncio
 import random
+import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
+from core.domain_health import BreakerPolicy, DomainHealthStore, shared_domain_health_store
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -68,7 +70,7 @@ class RetryState:
 class ExponentialBackoff:
     """Advanced exponential backoff with intelligent retry strategies."""
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, health_store: Optional[DomainHealthStore] = None):
         self.config = config
         self.enabled = config.get("enabled", True)
         self.base_delay = config.get("base_delay_seconds", 1.0)
@@ -87,6 +89,20 @@ class ExponentialBackoff:
         self.circuit_timeout = config.get("circuit_timeout_seconds", 60)
         self.circuit_recovery_attempts = config.get("circuit_recovery_attempts", 3)
 
+        # Circuit state shared with other worker processes (see core.domain_health);
+        # ``retry_states`` then caches the shared breaker for each identifier.
+        self.health_store = health_store or shared_domain_health_store(
+            config.get("domain_health"),
+            namespace=config.get("domain_health_namespace", "backoff"),
+        )
+        self.circuit_policy = BreakerPolicy(
+            failure_threshold=self.circuit_failure_threshold,
+            window_size=int(config.get("circuit_window_size", 0)),
+            error_rate=float(config.get("circuit_error_rate", 1.0)),
+            open_seconds=float(self.circuit_timeout),
+            half_open_probes=max(1, int(self.circuit_recovery_attempts)),
+        )
+
         # State tracking
         self.retry_states: Dict[str, RetryState] = {}
         self.global_stats = {
@@ -190,7 +206,7 @@ class ExponentialBackoff:
             return False
 
         # Get retry state
-        state = self._get_retry_state(identifier)
+        state = self._sync_shared_circuit(identifier)
 
         # Check circuit breaker
         if self.circuit_breaker_enabled and state.is_circuit_open:
@@ -262,6 +278,9 @@ class ExponentialBackoff:
         # Keep only recent failure types
         state.failure_types = state.failure_types[-20:]
 
+        if self.health_store is not None:
+            self.health_store.record(identifier, self.circuit_policy, False)
+
         # Update global stats
         self.global_stats["total_retries"] += 1
 
@@ -282,6 +301,8 @@ class ExponentialBackoff:
         state.last_success = datetime.now()
         state.success_count += 1
         state.consecutive_failures = 0
+        if self.health_store is not None:
+            self.health_store.record(identifier, self.circuit_policy, True)
 
         # Close circuit breaker if open
         if state.circuit_open:
@@ -489,9 +510,27 @@ class ExponentialBackoff:
         else:
             return ErrorType.UNKNOWN
 
+    def _sync_shared_circuit(self, identifier: str) -> RetryState:
+        """Retry state with the circuit fields refreshed from the shared store."""
+        state = self._get_retry_state(identifier)
+        if self.health_store is None:
+            return state
+
+        open_until = self.health_store.snapshot(identifier).open_until(self.circuit_policy)
+        if open_until is not None and open_until > time.time():
+            state.circuit_open = True
+            state.circuit_open_until = datetime.fromtimestamp(open_until)
+        elif state.circuit_open:
+            # Another worker's probe closed it (or it timed out).
+            state.circuit_open = False
+            state.circuit_open_until = None
+        return state
+
     def _open_circuit_breaker(self, identifier: str) -> None:
         """Open circuit breaker for identifier."""
         state = self._get_retry_state(identifier)
+        if self.health_store is not None:
+            self.health_store.trip(identifier, policy=self.circuit_policy)
 
         if not state.circuit_open:
             state.circuit_open = True
@@ -514,10 +553,12 @@ class ExponentialBackoff:
         Returns:
             True if healthy, False if circuit is open or too many recent failures
         """
-        if identifier not in self.retry_states:
+        if self.health_store is not None:
+            state = self._sync_shared_circuit(identifier)
+        elif identifier not in self.retry_states:
             return True  # Unknown identifiers are considered healthy
-
-        state = self.retry_states[identifier]
+        else:
+            state = self.retry_states[identifier]
 
         # Check circuit breaker
         if state.is_circuit_open:
@@ -559,6 +600,9 @@ class ExponentialBackoff:
         Returns:
             True if circuit breaker was reset
         """
+        if self.health_store is not None:
+            self._sync_shared_circuit(identifier)
+            self.health_store.reset(identifier)
         if identifier in self.retry_states:
             state = self.retry_states[identifier]
             if state.circuit_open:
@@ -0,0 +1,286 @@
+"""Compiled per-domain extraction plans evaluated in a single tree walk.
+
+The selector cascades in ``ProductParser`` and ``BaseParser`` try selectors one
+at a time per field, and every ``select_one`` walks the document again. An
+:class:`ExtractionPlan` compiles the whole cascade for all fields once (per
+domain and selector-store version) and evaluates it in one pass:
+
+* every selector is compiled with soupsieve and indexed by the key of its
+  rightmost compound (id, class, attribute or tag), the way browsers hash CSS
+  rules, so each element is only matched against rules that can apply to it;
+* for each rule only its first matching element counts, exactly like
+  ``select_one`` in the cascade, and the lowest-index rule whose value passes
+  the field validator wins;
+* the walk stops as soon as every field is settled.
+
+Selectors soupsieve cannot compile are dropped from the plan (the cascade
+skipped them on error too).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+Validator = Callable[[str], Any]
+
+# Combinators outside of [...] / (...) split a selector into compounds.
+_COMBINATOR_RE = re.compile(r"\s*[>+~]\s*|\s+")
+_BRACKETED_RE = re.compile(r"\([^()]*\)|\[[^\[\]]*\]")
+_ID_RE = re.compile(r"#([\w-]+)")
+_CLASS_RE = re.compile(r"\.([\w-]+)")
+_ATTR_RE = re.compile(r"\[\s*([\w:-]+)")
+_TAG_RE = re.compile(r"^([a-zA-Z][\w-]*)")
+
+RuleKey = Tuple[str, str]
+
+
+@lru_cache(maxsize=2048)
+def compile_selector(selector: str) -> Optional[Any]:
+    """Compiled soupsieve pattern for ``selector`` (``None`` when invalid)."""
+
+    try:
+        return soupsieve.compile(selector)
+    except (soupsieve.SelectorSyntaxError, NotImplementedError, ValueError, TypeError):
+        return None
+
+
+def _split_top_level(selector: str, separator: str) -> List[str]:
+    parts: List[str] = []
+    depth = 0
+    current: List[str] = []
+    for char in selector:
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        if char == separator and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _mask_brackets(match: "re.Match[str]") -> str:
+    text = match.group(0)
+    return text[0] + "_" * (len(text) - 2) + text[-1]
+
+
+@lru_cache(maxsize=2048)
+def rule_keys(selector: str) -> Optional[Tuple[RuleKey, ...]]:
+    """Index keys of the rightmost compound of each alternative in ``selector``.
+
+    Returns ``None`` when some alternative cannot be indexed (``*``, escapes,
+    pseudo-element only...), meaning the rule is checked against every element.
+    """
+
+    if "\\" in selector:
+        return None
+    keys: List[RuleKey] = []
+    for alternative in _split_top_level(selector, ","):
+        alternative = alternative.strip()
+        # Blank out bracketed parts so ``:not(.x)`` and ``[a="b c"]`` cannot leak
+        # keys or combinators; offsets stay aligned with ``alternative``.
+        masked = _BRACKETED_RE.sub(_mask_brackets, alternative)
+        compound_start = 0
+        for match in _COMBINATOR_RE.finditer(masked):
+            if match.end() < len(masked):
+                compound_start = match.end()
+        compound = alternative[compound_start:]
+        masked_compound = masked[compound_start:]
+
+        key: Optional[RuleKey] = None
+        if match := _ID_RE.search(masked_compound):
+            key = ("id", match.group(1))
+        elif match := _CLASS_RE.search(masked_compound):
+            key = ("class", match.group(1))
+        elif (bracket := masked_compound.find("[")) >= 0 and (
+            match := _ATTR_RE.match(compound, bracket)
+        ):
+            # Found on the masked text (``:not([x])`` must not key the rule on
+            # ``x``), read from the original since the mask hides the name.
+            key = ("attr", match.group(1).lower())
+        elif match := _TAG_RE.match(masked_compound):
+            key = ("tag", match.group(1).lower())
+        if key is None:
+            return None
+        keys.append(key)
+    return tuple(keys)
+
+
+def _element_keys(element: Tag) -> Iterable[RuleKey]:
+    yield "tag", element.name
+    attrs = element.attrs
+    for name, value in attrs.items():
+        yield "attr", name
+        if name == "id" and isinstance(value, str):
+            yield "id", value
+        elif name == "class":
+            for class_name in value if isinstance(value, list) else str(value).split():
+                yield "class", class_name
+
+
+@dataclass(slots=True)
+class PlanMatch:
+    """Winning rule for a field."""
+
+    value: Any
+    text: str
+    selector: str
+    rank: int
+
+
+@dataclass(slots=True)
+class ExtractionPlan:
+    """Prioritised selector chains for several fields, compiled together."""
+
+    domain: str
+    version: float
+    chains: Dict[str, Tuple[str, ...]]
+    _indexed: Dict[RuleKey, List[Tuple[str, int, Any]]] = field(default_factory=dict, repr=False)
+    _universal: List[Tuple[str, int, Any]] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def compile(
+        cls, domain: str, chains: Mapping[str, Sequence[str]], version: float = 0.0
+    ) -> "ExtractionPlan":
+        deduped: Dict[str, Tuple[str, ...]] = {}
+        indexed: Dict[RuleKey, List[Tuple[str, int, Any]]] = {}
+        universal: List[Tuple[str, int, Any]] = []
+        for field_name, selectors in chains.items():
+            kept: List[str] = []
+            for selector in dict.fromkeys(s.strip() for s in selectors if isinstance(s, str)):
+                pattern = compile_selector(selector) if selector else None
+                if pattern is None:
+                    continue
+                rule = (field_name, len(kept), pattern)
+                kept.append(selector)
+                keys = rule_keys(selector)
+                if keys is None:
+                    universal.append(rule)
+                else:
+                    for key in dict.fromkeys(keys):
+                        indexed.setdefault(key, []).append(rule)
+            deduped[field_name] = tuple(kept)
+        return cls(domain, version, deduped, indexed, universal)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(self.chains)
+
+    def evaluate(
+        self,
+        document: Any,
+        validators: Optional[Mapping[str, Validator]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Dict[str, PlanMatch]:
+        """Walk ``document`` once and return the winning match per field.
+
+        ``validators`` convert a field's stripped text into its value; a rule
+        whose first match converts to ``None`` (or empty text) loses, as in the
+        cascade. ``fields`` restricts evaluation to a subset of the plan.
+        """
+
+        soup = document if isinstance(document, Tag) else BeautifulSoup(document or "", "html.parser")
+        wanted = set(self.chains if fields is None else fields) & set(self.chains)
+        validators = validators or {}
+        best: Dict[str, PlanMatch] = {}
+        tried: Dict[str, List[bool]] = {name: [False] * len(self.chains[name]) for name in wanted}
+        # Rules with rank below this may still beat the current winner.
+        open_ranks: Dict[str, int] = {name: len(self.chains[name]) for name in wanted}
+        if not any(open_ranks.values()):
+            return {}
+
+        indexed = self._indexed
+        universal = self._universal
+        for element in soup.descendants:
+            if not isinstance(element, Tag):
+                continue
+            candidates: List[Tuple[str, int, Any]] = [
+                rule for key in _element_keys(element) for rule in indexed.get(key, ())
+            ]
+            if universal:
+                candidates.extend(universal)
+            for field_name, rank, pattern in candidates:
+                if rank >= open_ranks.get(field_name, 0) or tried[field_name][rank]:
+                    continue
+                if not pattern.match(element):
+                    continue
+                tried[field_name][rank] = True
+                text = element.get_text(strip=True)
+                value: Any = text
+                if text and field_name in validators:
+                    try:
+                        value = validators[field_name](text)
+                    except Exception:
+                        value = None
+                if text and value is not None:
+                    best[field_name] = PlanMatch(value, text, self.chains[field_name][rank], rank)
+                    open_ranks[field_name] = rank
+                if all(tried[field_name][: open_ranks[field_name]]):
+                    open_ranks[field_name] = 0
+            if not any(open_ranks.values()):
+                break
+        return best
+
+
+class ExtractionPlanCache:
+    """Plans keyed by domain and chain layout, rebuilt when the version moves."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._plans: Dict[Tuple[Any, ...], ExtractionPlan] = {}
+        self.hits = 0
+        self.builds = 0
+
+    def get(
+        self,
+        key: Tuple[Any, ...],
+        version: float,
+        build_chains: Callable[[], Mapping[str, Sequence[str]]],
+    ) -> ExtractionPlan:
+        plan = self._plans.get(key)
+        if plan is not None and plan.version == version:
+            self.hits += 1
+            return plan
+        if plan is None and len(self._plans) >= self.max_entries:
+            self._plans.pop(next(iter(self._plans)))
+        plan = ExtractionPlan.compile(key[0], build_chains(), version)
+        self._plans[key] = plan
+        self.builds += 1
+        return plan
+
+    def invalidate(self, domain: Optional[str] = None) -> None:
+        if domain is None:
+            self._plans.clear()
+            return
+        for key in [key for key in self._plans if key[0] == domain]:
+            del self._plans[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"plans": len(self._plans), "hits": self.hits, "builds": self.builds}
+
+
+def freeze_chains(chains: Optional[Mapping[str, Sequence[str]]]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """Hashable form of a field -> selectors mapping (for cache keys)."""
+
+    if not chains:
+        return ()
+    return tuple(sorted((name, tuple(selectors)) for name, selectors in chains.items()))
+
+
+__all__ = [
+    "ExtractionPlan",
+    "ExtractionPlanCache",
+    "PlanMatch",
+    "compile_selector",
+    "freeze_chains",
+    "rule_keys",
+]
@@ -2,14 +2,15 @@ import asyncio
 import json
 import logging
 import re
-import threading
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from statistics import mean
-from typing import Any, Awaitable, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TYPE_CHECKING
+from urllib.parse import urlparse
 import psutil
 
 from network.fast_scraper import FastHeadlessScraper
+from network.single_flight import SingleFlight
 
 from core.async_playwright_manager import AsyncPlaywrightManager
 from utils.cms_detection import CMSDetection, CMSConfig, CMSDetectionResult
@@ -21,6 +22,41 @@ if TYPE_CHECKING:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
+# Path segments that identify one item rather than a section of the site.
+_ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12})$", re.IGNORECASE)
+
+
+def path_template(url: str) -> str:
+    """``host/section/*`` key under which method decisions are shared.
+
+    Pages of one template (all product pages under ``/product/``) render the
+    same way, so one detection per template is enough. Only the top-level
+    section is kept: the leaf and deeper segments are wildcarded (id-like
+    ones become ``{id}``), so products nested under many categories share one
+    key per depth instead of one per category.
+    """
+
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    last = len(segments) - 1
+    segments = [
+        "*" if index == last
+        else "{id}" if _ID_SEGMENT.match(segment)
+        else segment if index == 0
+        else "*"
+        for index, segment in enumerate(segments)
+    ]
+    return f"{parsed.netloc.lower()}/{'/'.join(segments)}"
+
+
+class FetchError(RuntimeError):
+    """A URL that could not be fetched; batch results carry it in place of a page."""
+
+    def __init__(self, url: str, reason: str = "") -> None:
+        super().__init__(f"Failed to fetch {url}" + (f": {reason}" if reason else ""))
+        self.url = url
+        self.reason = reason
+
 
 @dataclass
 class ScrapingConfig:
@@ -112,43 +148,39 @@ class HybridScrapingEngine:
             lambda: {"aiohttp": MethodMetrics(), "playwright": MethodMetrics()}
         )
         self.domain_preferences: Dict[str, str] = {}
+        # Detected method per path_template(); see _decide_method.
+        self.template_decisions: Dict[str, str] = {}
+        self._decision_flight: SingleFlight[Tuple[str, Optional[str]]] = SingleFlight(ttl=0.0)
         self.recent_failures: Dict[str, Dict[str, deque]] = defaultdict(
             lambda: {"aiohttp": deque(maxlen=10), "playwright": deque(maxlen=10)}
         )
 
-        # Dedicated background event loop for synchronous wrappers
-        self._loop = asyncio.new_event_loop()
-        self._loop_ready = threading.Event()
-        self._loop_thread = threading.Thread(
-            target=self._run_event_loop,
-            name="HybridScrapingEngineLoop",
-            daemon=True,
-        )
-        self._loop_thread.start()
-
-    def _run_event_loop(self) -> None:
-        asyncio.set_event_loop(self._loop)
-        self._loop_ready.set()
-        self._loop.run_forever()
+        # Loop for the sync wrappers, created on first use and run in the caller's
+        # thread; kept so Playwright objects survive between sync calls.
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
 
     def _run_coroutine_sync(self, coro: Awaitable[Any]) -> Any:
-        if not self._loop_ready.is_set():
-            self._loop_ready.wait()
-        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
-        return future.result()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError(
+                "HybridScrapingEngine sync wrappers cannot run inside an event loop; "
+                "await the async method instead"
+            )
+        if self._sync_loop is None or self._sync_loop.is_closed():
+            self._sync_loop = asyncio.new_event_loop()
+        return self._sync_loop.run_until_complete(coro)
 
     def shutdown(self) -> None:
-        if self._loop.is_running():
-            self._loop.call_soon_threadsafe(self._loop.stop)
-        if self._loop_thread.is_alive():
-            self._loop_thread.join(timeout=5)
-        if not self._loop.is_closed():
-            self._loop.close()
+        if self._sync_loop is not None and not self._sync_loop.is_closed():
+            self._sync_loop.close()
+        self._sync_loop = None
 
     def __del__(self):  # pragma: no cover - best effort cleanup
         try:
-            if self._loop.is_closed():
-                return
             self.shutdown()
         except Exception:  # noqa: BLE001
             pass
@@ -196,18 +228,29 @@ class HybridScrapingEngine:
     async def detect_optimal_scraping_method(
         self, url: str, html_preview: Optional[str] = None
     ) -> str:
+        method, _ = await self._decide_method(url, html_preview)
+        return method
+
+    async def _decide_method(
+        self, url: str, html_preview: Optional[str] = None
+    ) -> Tuple[str, Optional[str]]:
+        """Pick a method for ``url``; also returns the preview HTML if one was fetched.
+
+        A fetched preview is a complete aiohttp response, so callers reuse it as
+        the first attempt instead of requesting the page again.
+        """
         domain = self._extract_domain(url)
 
         # Manual override for full URL or domain
         if url in self.override_methods:
-            return self.override_methods[url]
+            return self.override_methods[url], None
         if domain in self.domain_preferences:
-            return self.domain_preferences[domain]
+            return self.domain_preferences[domain], None
 
         if domain in self.scraping_config.force_aiohttp:
-            return "aiohttp"
+            return "aiohttp", None
         if domain in self.scraping_config.force_playwright:
-            return "playwright"
+            return "playwright", None
 
         # Check fallback rules for recent failures
         intelligent_selection = self.settings.get("intelligent_method_selection", {})
@@ -226,14 +269,36 @@ class HybridScrapingEngine:
             logger.warning(
                 f"AIOHTTP method disabled for {domain} due to {recent_aiohttp_failures} recent failures"
             )
-            return "playwright"
+            return "playwright", None
         if recent_playwright_failures >= max_playwright_failures:
             logger.warning(
                 f"Playwright method disabled for {domain} due to {recent_playwright_failures} recent failures"
             )
-            return "aiohttp"
+            return "aiohttp", None
+
+        template = path_template(url)
+        if template in self.template_decisions:
+            return self.template_decisions[template], None
+
+        leader = False
+
+        async def _detect() -> Tuple[str, Optional[str]]:
+            nonlocal leader
+            leader = True
+            return await self._detect_template_method(url, domain, template, html_preview)
+
+        # Concurrent URLs of one template (a batch) wait for a single detection
+        # instead of each fetching a preview; only the URL it was fetched for
+        # may reuse that preview.
+        selected, fetched_preview = await self._decision_flight.do(template, _detect)
+        return selected, fetched_preview if leader else None
 
-        preview_html = html_preview or await self._fetch_preview_html(url)
+    async def _detect_template_method(
+        self, url: str, domain: str, template: str, html_preview: Optional[str]
+    ) -> Tuple[str, Optional[str]]:
+        intelligent_selection = self.settings.get("intelligent_method_selection", {})
+        fetched_preview = None if html_preview else await self._fetch_preview_html(url)
+        preview_html = html_preview or fetched_preview
         cms_result = self._detect_cms(url, preview_html)
 
         # Get weights from settings
@@ -294,16 +359,24 @@ class HybridScrapingEngine:
             logger.debug(f"Failed to get resource usage: {exc}")
 
         selected = max(method_scores, key=lambda k: method_scores[k])
-        self.domain_preferences[domain] = selected
-        return selected
+        self.template_decisions[template] = selected
+        return selected, fetched_preview
 
     async def scrape_single(
         self, url: str, method: Optional[str] = None, **kwargs
     ) -> Dict[str, Any]:
         domain = self._extract_domain(url)
-        selected_method = method or await self.detect_optimal_scraping_method(url)
+        preview_html = None
+        if method is None:
+            method, preview_html = await self._decide_method(url)
+        selected_method = method
         logger.info(f"Selected method '{selected_method}' for {url}")
 
+        if selected_method == "aiohttp" and preview_html and kwargs.get("use_proxy", True):
+            # The detection request already is the aiohttp fetch.
+            self._record_method_metrics(domain, "aiohttp", True, 0.0)
+            return {"html": preview_html, "url": url, "method": "aiohttp"}
+
         start_ts = asyncio.get_event_loop().time()
 
         try:
@@ -425,19 +498,20 @@ class HybridScrapingEngine:
         if not urls:
             return []
 
-        decisions = []
         if method is not None:
-            decisions = [method] * len(urls)
+            decisions = [(method, None)] * len(urls)
         else:
-            decisions = await asyncio.gather(
-                *(self.detect_optimal_scraping_method(url) for url in urls)
-            )
+            decisions = await asyncio.gather(*(self._decide_method(url) for url in urls))
 
         grouped: Dict[str, List[str]] = {"aiohttp": [], "playwright": []}
-        for url, decision in zip(urls, decisions):
-            grouped[decision].append(url)
-
         results: List[Any] = []
+        for url, (decision, preview_html) in zip(urls, decisions):
+            if decision == "aiohttp" and preview_html:
+                # Reuse the detection response instead of fetching the page twice.
+                results.append({"html": preview_html, "url": url, "method": "aiohttp"})
+                self._record_method_metrics(self._extract_domain(url), "aiohttp", True, 0.0)
+            else:
+                grouped[decision].append(url)
 
         # Process aiohttp in batches grouped by domain
         if grouped["aiohttp"]:
@@ -461,7 +535,7 @@ class HybridScrapingEngine:
                                 self._extract_domain(url), "aiohttp", True, 0.0
                             )
                         else:
-                            results.append(Exception(f"Failed to fetch {url}"))
+                            results.append(FetchError(url))
                             self._record_method_metrics(
                                 self._extract_domain(url), "aiohttp", False, 0.0
                             )
@@ -493,7 +567,9 @@ class HybridScrapingEngine:
                             self._record_method_metrics(
                                 self._extract_domain(url), "playwright", False, 0.0
                             )
-                            return exc
+                            error = FetchError(url, str(exc))
+                            error.__cause__ = exc
+                            return error
 
                 tasks = [scrape_with_semaphore(url) for url in urls]
                 domain_results = await asyncio.gather(*tasks)
@@ -575,6 +651,4 @@ class HybridScrapingEngine:
             self.stats[stat_key] += 1
 
     def _extract_domain(self, url: str) -> str:
-        from urllib.parse import urlparse
-
         return urlparse(url).netloc.lower()
@@ -19,6 +19,8 @@ import asyncio
 import aiohttp
 import logging
 
+from network.rate_limiter import RateLimit, get_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -311,6 +313,15 @@ class RobotsTxtChecker:
             return 0.0
 
         try:
+            limiter = get_rate_limiter()
+            if limiter is not None:
+                # Crawl-delay becomes a cap on the shared domain bucket, which the
+                # fetch path waits on - one delay across all workers, not per process.
+                base_delay = await self.get_crawl_delay(domain, user_agent)
+                if base_delay > 0:
+                    limiter.tighten_domain(domain, RateLimit(1.0 / base_delay))
+                return 0.0
+
             delay_needed = await self.get_ethical_crawl_delay(domain, user_agent)
 
             if delay_needed > 0:
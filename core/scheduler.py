@@ -1,17 +1,38 @@
+"""Recurring scrape tasks: storage, execution and the in-process scheduler.
+
+Tasks used to be installed as crontab/``schtasks`` entries that started a
+fresh interpreter per run. :meth:`ScheduleManager.serve` now keeps the timers
+in one asyncio process (:mod:`core.task_scheduler`) and dispatches each run to
+the RQ worker pool, where :func:`run_scheduled_task` executes it.
+"""
+
+import asyncio
 import json
 import os
-import platform
+import sys
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
-from pathlib import Path
-import sys
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
 import logging
-from crontab import CronTab
-from croniter import croniter
+from core.task_scheduler import CronSchedule, Dispatch, ScheduledJob, TaskScheduler, rq_dispatcher
 from database.manager import DatabaseManager
 
+DEFAULT_CONFIG_PATH = "config/settings.json"
+
+
+def scheduling_timezone(config: Dict) -> tzinfo:
+    """Zone cron expressions fire in: ``scheduling.timezone``, UTC by default"""
+    name = config.get("scheduling", {}).get("timezone", "UTC")
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        logging.getLogger(__name__).warning(f"Unknown scheduling timezone {name!r}, using UTC")
+        return timezone.utc
+
 
 @dataclass
 class ScheduledTask:
@@ -36,11 +57,10 @@ class ScheduledTask:
         if self.next_run is None:
             self._calculate_next_run()
 
-    def _calculate_next_run(self):
-        """Calculate next run time based on cron schedule"""
+    def _calculate_next_run(self, tz: tzinfo = timezone.utc):
+        """Calculate next run time based on cron schedule, evaluated in ``tz``"""
         try:
-            cron = croniter(self.cron_schedule, datetime.now())
-            self.next_run = cron.get_next(datetime)
+            self.next_run = CronSchedule.parse(self.cron_schedule).next_after(datetime.now(tz))
         except Exception as e:
             logging.error(f"Error calculating next run for task {self.id}: {e}")
             self.next_run = None
@@ -61,160 +81,12 @@ class ScheduledTask:
         for field in ["created_at", "last_run", "next_run"]:
             if data.get(field):
                 data[field] = datetime.fromisoformat(data[field])
+        # Older rows stored naive local times; compare them as aware.
+        if data.get("next_run") and data["next_run"].tzinfo is None:
+            data["next_run"] = data["next_run"].astimezone()
         return cls(**data)
 
 
-class CronJobManager:
-    """Manages cron job creation and deletion"""
-
-    def __init__(self, config: Dict):
-        self.config = config
-        self.cron_file = config.get("scheduling", {}).get(
-            "cron_file", "/tmp/webscraper_cron"
-        )
-        self.logger = logging.getLogger(__name__)
-
-        # Determine platform-specific cron handling
-        self.is_windows = platform.system().lower() == "windows"
-        if self.is_windows:
-            self.logger.warning(
-                "Windows detected - cron functionality limited. Consider using Windows Task Scheduler."
-            )
-
-    def create_cron_job(self, task: ScheduledTask) -> bool:
-        """Create a cron job for the given task"""
-        try:
-            if self.is_windows:
-                return self._create_windows_task(task)
-            else:
-                return self._create_unix_cron_job(task)
-        except Exception as e:
-            self.logger.error(f"Failed to create cron job for task {task.id}: {e}")
-            return False
-
-    def _create_unix_cron_job(self, task: ScheduledTask) -> bool:
-        """Create Unix/Linux cron job"""
-        try:
-            # Get current user's crontab
-            cron = CronTab(user=True)
-
-            # Create command to run
-            script_path = Path(__file__).resolve().parents[1] / "main.py"
-            command = f"cd {script_path.parent} && {sys.executable} {script_path} --execute-scheduled-task {task.id} >> /tmp/webscraper_cron.log 2>&1"
-
-            # Create new cron job
-            job = cron.new(
-                command=command,
-                comment=f"WebScraper Task: {task.task_name} ({task.id})",
-            )
-            job.setall(task.cron_schedule)
-
-            # Validate the schedule
-            if not job.is_valid():
-                self.logger.error(f"Invalid cron schedule: {task.cron_schedule}")
-                return False
-
-            # Write to crontab
-            cron.write()
-            self.logger.info(
-                f"Created cron job for task {task.id}: {task.cron_schedule}"
-            )
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error creating Unix cron job: {e}")
-            return False
-
-    def _create_windows_task(self, task: ScheduledTask) -> bool:
-        """Create Windows scheduled task (basic implementation)"""
-        try:
-            # Convert cron schedule to Windows task scheduler format
-            # This is a simplified implementation
-            script_path = Path(__file__).resolve().parents[1] / "main.py"
-
-            # Create a basic batch file for the task
-            bat_content = f"""@echo off
-cd /d "{script_path.parent}"
-{sys.executable} "{script_path}" --execute-scheduled-task {task.id} >> webscraper_task.log 2>&1
-"""
-
-            # Harden path handling by using absolute path for batch file
-            bat_file = Path.cwd() / f"webscraper_task_{task.id}.bat"
-            with open(bat_file, "w") as f:
-                f.write(bat_content)
-
-            self.logger.info(
-                f"Created Windows batch file for task {task.id}: {bat_file}"
-            )
-
-            # Emit the exact schtasks command users should run
-            schtasks_command = f'schtasks /Create /TN "WebScraper_{task.id}" /TR "cmd /c \\"{bat_file}\\"" /SC DAILY /ST 12:00 /F'
-            self.logger.info(
-                f"Example schtasks command (adjust schedule as needed): {schtasks_command}"
-            )
-            self.logger.warning(
-                "Please manually configure Windows Task Scheduler to run this batch file using the above command template"
-            )
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error creating Windows task: {e}")
-            return False
-
-    def delete_cron_job(self, task_id: str) -> bool:
-        """Delete cron job for the given task ID"""
-        try:
-            if self.is_windows:
-                return self._delete_windows_task(task_id)
-            else:
-                return self._delete_unix_cron_job(task_id)
-        except Exception as e:
-            self.logger.error(f"Failed to delete cron job for task {task_id}: {e}")
-            return False
-
-    def _delete_unix_cron_job(self, task_id: str) -> bool:
-        """Delete Unix/Linux cron job"""
-        try:
-            cron = CronTab(user=True)
-
-            # Find and remove jobs with matching task ID
-            jobs_removed = 0
-            for job in cron:
-                if task_id in job.comment:
-                    cron.remove(job)
-                    jobs_removed += 1
-
-            if jobs_removed > 0:
-                cron.write()
-                self.logger.info(
-                    f"Removed {jobs_removed} cron job(s) for task {task_id}"
-                )
-                return True
-            else:
-                self.logger.warning(f"No cron jobs found for task {task_id}")
-                return False
-
-        except Exception as e:
-            self.logger.error(f"Error deleting Unix cron job: {e}")
-            return False
-
-    def _delete_windows_task(self, task_id: str) -> bool:
-        """Delete Windows scheduled task"""
-        try:
-            bat_file = f"webscraper_task_{task_id}.bat"
-            if os.path.exists(bat_file):
-                os.remove(bat_file)
-                self.logger.info(f"Removed Windows batch file for task {task_id}")
-                return True
-            else:
-                self.logger.warning(f"No batch file found for task {task_id}")
-                return False
-
-        except Exception as e:
-            self.logger.error(f"Error deleting Windows task: {e}")
-            return False
-
-
 class TaskExecutor:
     """Executes scheduled tasks with error handling and retry logic"""
 
@@ -229,7 +101,10 @@ class TaskExecutor:
         self.task_timeout = (
             config.get("scheduling", {}).get("task_timeout_minutes", 60) * 60
         )
+        self.timezone = scheduling_timezone(config)
         self.logger = logging.getLogger(__name__)
+        # Kept across runs so a warm worker reuses browsers and sessions.
+        self._scraper = None
 
     def execute_task(self, task: ScheduledTask) -> Dict[str, Any]:
         """Execute a scheduled task with monitoring and error handling"""
@@ -251,11 +126,12 @@ class TaskExecutor:
                 f"Starting execution of scheduled task: {task.task_name} ({task.id})"
             )
 
-            # Import ScraperEngine here to avoid circular imports
-            from core.scraper_engine import ScraperEngine
+            if self._scraper is None:
+                # Import ScraperEngine here to avoid circular imports
+                from core.scraper_engine import ScraperEngine
 
-            # Initialize scraper engine
-            scraper = ScraperEngine(self.config)
+                self._scraper = ScraperEngine(self.config)
+            scraper = self._scraper
 
             # Execute scraping
             scrape_result = scraper.run_scheduled_scrape(task)
@@ -286,7 +162,7 @@ class TaskExecutor:
             # Handle retry logic
             if task.retry_count < self.max_retries:
                 task.retry_count += 1
-                task.next_run = datetime.now() + timedelta(
+                task.next_run = datetime.now(self.timezone) + timedelta(
                     minutes=self.retry_delay_minutes * task.retry_count
                 )  # Exponential backoff
                 self.logger.info(
@@ -309,11 +185,10 @@ class TaskExecutor:
     def _calculate_next_run(self, task: ScheduledTask) -> datetime:
         """Calculate next run time for the task"""
         try:
-            cron = croniter(task.cron_schedule, datetime.now())
-            return cron.get_next(datetime)
+            return CronSchedule.parse(task.cron_schedule).next_after(datetime.now(self.timezone))
         except Exception as e:
             self.logger.error(f"Error calculating next run for task {task.id}: {e}")
-            return datetime.now() + timedelta(days=1)  # Default to daily
+            return datetime.now(self.timezone) + timedelta(days=1)  # Default to daily
 
 
 class ScheduleManager:
@@ -323,16 +198,20 @@ class ScheduleManager:
         self.config_path = config_path
         self.config = self._load_config()
         self.task_storage_path = self._get_task_storage_path()
-        self.cron_manager = CronJobManager(self.config)
         self.task_executor = TaskExecutor(self.config)
         self.db_manager = DatabaseManager()
         self.logger = logging.getLogger(__name__)
+        # Task cache: the store is read once, then only changed rows are written.
+        self._tasks: Optional[Dict[str, ScheduledTask]] = None
+        # Set while serve() runs; task changes are applied to it directly.
+        self.scheduler: Optional[TaskScheduler] = None
 
         # Ensure data directory exists
         os.makedirs(os.path.dirname(self.task_storage_path), exist_ok=True)
 
         # Initialize database tables
         self.db_manager.init_db()
+        self._ensure_retry_count_column()
 
         # Migrate existing JSON data to database if needed
         self._migrate_json_to_db()
@@ -357,6 +236,16 @@ class ScheduleManager:
             "task_storage", "data/scheduled_tasks.json"
         )
 
+    def _ensure_retry_count_column(self) -> None:
+        """Add ``retry_count`` to task tables created before it was persisted"""
+        try:
+            self.db_manager.execute_query(
+                "ALTER TABLE scheduled_tasks ADD COLUMN retry_count INTEGER DEFAULT 0"
+            )
+        except Exception as e:
+            # Already there (duplicate column) on every start after the first
+            self.logger.debug(f"retry_count column not added: {e}")
+
     def _migrate_json_to_db(self) -> None:
         """Migrate existing JSON data to database at startup"""
         try:
@@ -407,8 +296,8 @@ class ScheduleManager:
                     self.db_manager.execute_query(
                         """
                         INSERT INTO scheduled_tasks
-                        (id, task_name, cron_schedule, base_url, email, status, last_run, next_run, created_at, updated_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        (id, task_name, cron_schedule, base_url, email, status, last_run, next_run, created_at, updated_at, retry_count)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
                         [
                             task_data["id"],
@@ -421,6 +310,7 @@ class ScheduleManager:
                             task_data.get("next_run"),
                             task_data.get("created_at"),
                             task_data.get("updated_at", datetime.now().isoformat()),
+                            task_data.get("retry_count", 0),
                         ],
                     )
                     migrated_count += 1
@@ -446,16 +336,42 @@ class ScheduleManager:
             self.logger.error(f"Error during JSON to DB migration: {e}")
 
     def _load_tasks(self) -> List[ScheduledTask]:
-        """Load scheduled tasks from database"""
+        """Scheduled tasks, read from the database on first use"""
+        if self._tasks is None:
+            tasks = self._read_tasks()
+            if tasks is None:
+                return []
+            self._tasks = {task.id: task for task in tasks}
+        return list(self._tasks.values())
+
+    def reload_tasks(self) -> None:
+        """Drop the task cache so the next access reads the database again"""
+        self._tasks = None
+
+    def _refresh_task(self, task_id: str) -> Optional[ScheduledTask]:
+        """Re-read one task so values written by workers replace cached ones"""
+        tasks = self._read_tasks(task_id)
+        if tasks is None:
+            return None
+        self._load_tasks()
+        if tasks:
+            self._tasks[task_id] = tasks[0]
+            return tasks[0]
+        self._tasks.pop(task_id, None)
+        return None
+
+    def _read_tasks(self, task_id: Optional[str] = None) -> Optional[List[ScheduledTask]]:
+        """Load scheduled tasks (or just ``task_id``) from database"""
         try:
-            results = self.db_manager.execute_query(
-                """
+            query = """
                 SELECT id, task_name, cron_schedule, base_url, email, status,
-                       last_run, next_run, created_at, updated_at
+                       last_run, next_run, created_at, updated_at, retry_count
                 FROM scheduled_tasks
-                ORDER BY created_at
             """
-            )
+            if task_id is None:
+                results = self.db_manager.execute_query(query + " ORDER BY created_at")
+            else:
+                results = self.db_manager.execute_query(query + " WHERE id = ?", [task_id])
 
             tasks = []
             for row in results:
@@ -469,7 +385,7 @@ class ScheduleManager:
                     "last_run": row[6],
                     "next_run": row[7],
                     "created_at": row[8],
-                    "updated_at": row[9],
+                    "retry_count": int(row[10] or 0),
                 }
                 tasks.append(ScheduledTask.from_dict(task_data))
 
@@ -477,49 +393,140 @@ class ScheduleManager:
 
         except Exception as e:
             self.logger.error(f"Error loading tasks from database: {e}")
-            return []
+            return None
 
-    def _save_tasks(self, tasks: List[ScheduledTask]) -> bool:
-        """Save scheduled tasks to database and optionally mirror to JSON"""
+    def _save_task(self, task: ScheduledTask) -> bool:
+        """Write one task to the database and optionally mirror to JSON"""
         try:
-            # Save to database (primary storage)
-            # First, clear existing tasks
-            self.db_manager.execute_query("DELETE FROM scheduled_tasks")
-
-            # Insert all tasks
-            for task in tasks:
-                self.db_manager.execute_query(
-                    """
-                    INSERT INTO scheduled_tasks
-                    (id, task_name, cron_schedule, base_url, email, status, last_run, next_run, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    [
-                        task.id,
-                        task.task_name,
-                        task.cron_schedule,
-                        task.base_url,
-                        task.email,
-                        task.status,
-                        task.last_run.isoformat() if task.last_run else None,
-                        task.next_run.isoformat() if task.next_run else None,
-                        task.created_at.isoformat() if task.created_at else None,
-                        datetime.now().isoformat(),
-                    ],
-                )
+            self.db_manager.execute_query(
+                "DELETE FROM scheduled_tasks WHERE id = ?", [task.id]
+            )
+            self.db_manager.execute_query(
+                """
+                INSERT INTO scheduled_tasks
+                (id, task_name, cron_schedule, base_url, email, status, last_run, next_run, created_at, updated_at, retry_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    task.id,
+                    task.task_name,
+                    task.cron_schedule,
+                    task.base_url,
+                    task.email,
+                    task.status,
+                    task.last_run.isoformat() if task.last_run else None,
+                    task.next_run.isoformat() if task.next_run else None,
+                    task.created_at.isoformat() if task.created_at else None,
+                    datetime.now().isoformat(),
+                    task.retry_count,
+                ],
+            )
+            self._load_tasks()
+            self._tasks[task.id] = task
+            self._mirror_to_json()
+            return True
 
-            # Optionally mirror to JSON for portability
-            if self.mirror_to_json:
-                tasks_data = [task.to_dict() for task in tasks]
-                with open(self.task_storage_path, "w") as f:
-                    json.dump(tasks_data, f, indent=2, default=str)
+        except Exception as e:
+            self.logger.error(f"Error saving task {task.id}: {e}")
+            return False
 
+    def _delete_task(self, task_id: str) -> bool:
+        """Remove one task from the database and the JSON mirror"""
+        try:
+            self.db_manager.execute_query(
+                "DELETE FROM scheduled_tasks WHERE id = ?", [task_id]
+            )
+            self._load_tasks()
+            self._tasks.pop(task_id, None)
+            if self.scheduler is not None:
+                self.scheduler.remove(task_id)
+            self._mirror_to_json()
             return True
 
         except Exception as e:
-            self.logger.error(f"Error saving tasks: {e}")
+            self.logger.error(f"Error deleting task {task_id}: {e}")
             return False
 
+    def _mirror_to_json(self) -> None:
+        """Optionally mirror the task list to JSON for portability"""
+        if self.mirror_to_json and self._tasks is not None:
+            tasks_data = [task.to_dict() for task in self._tasks.values()]
+            with open(self.task_storage_path, "w") as f:
+                json.dump(tasks_data, f, indent=2, default=str)
+
+    def _job_for(self, task: ScheduledTask) -> ScheduledJob:
+        """Scheduler view of ``task``: one domain, its priority and jitter"""
+        settings = self.config.get("scheduling", {})
+        domain = (urlparse(task.base_url).hostname or task.base_url).lower()
+        return ScheduledJob(
+            task_id=task.id,
+            schedule=CronSchedule.parse(task.cron_schedule),
+            domain=domain,
+            priority=int(settings.get("domain_priorities", {}).get(domain, 0)),
+            jitter=float(settings.get("jitter_seconds", 0)),
+            payload={"config_path": self.config_path},
+            next_run=task.next_run.timestamp() if task.next_run else None,
+        )
+
+    def _schedule(self, task: ScheduledTask) -> None:
+        """Add or replace ``task`` in the running scheduler"""
+        if self.scheduler is None:
+            return
+        if task.status == "active":
+            self.scheduler.add(self._job_for(task))
+        else:
+            self.scheduler.remove(task.id)
+
+    def _timezone(self) -> tzinfo:
+        return scheduling_timezone(self.config)
+
+    async def serve(self, dispatch: Optional[Dispatch] = None) -> None:
+        """Run all active tasks in-process until :meth:`stop` is called
+
+        Runs go to the RQ ``scraping`` queue unless ``dispatch`` is given.
+        """
+        settings = self.config.get("scheduling", {})
+        if dispatch is None:
+            from redis import Redis
+            from rq import Queue
+
+            redis_conn = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+            dispatch = rq_dispatcher(
+                Queue("scraping", connection=redis_conn),
+                job_timeout=f"{settings.get('task_timeout_minutes', 60)}m",
+            )
+
+        run = dispatch
+
+        async def dispatch_and_sync(job: ScheduledJob) -> Any:
+            try:
+                return await run(job)
+            finally:
+                # The worker wrote last_run/next_run/retry_count/status; take
+                # them over, and drop tasks it marked failed before the
+                # scheduler re-arms them.
+                task = self._refresh_task(job.task_id)
+                if self.scheduler is not None and (task is None or task.status != "active"):
+                    self.scheduler.remove(job.task_id)
+
+        self.scheduler = TaskScheduler(
+            dispatch_and_sync,
+            max_concurrent=settings.get("max_concurrent_tasks", 5),
+            tz=self._timezone(),
+        )
+        for task in self._load_tasks():
+            self._schedule(task)
+        self.logger.info(f"Scheduler serving {len(self.scheduler.jobs)} active tasks")
+        try:
+            await self.scheduler.run()
+        finally:
+            self.scheduler = None
+
+    def stop(self) -> None:
+        """Stop :meth:`serve` once the runs in flight have finished"""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
     def create_scheduled_task(
         self, schedule: str, name: str, url: str, email: str
     ) -> Optional[str]:
@@ -538,25 +545,15 @@ class ScheduleManager:
                 base_url=url,
                 email=email,
             )
+            task._calculate_next_run(self._timezone())
 
-            # Create cron job
-            if self.cron_manager.create_cron_job(task):
-                # Save task to storage
-                tasks = self._load_tasks()
-                tasks.append(task)
-
-                if self._save_tasks(tasks):
-                    self.logger.info(
-                        f"Created scheduled task: {task.task_name} ({task.id})"
-                    )
-                    return task.id
-                else:
-                    # If saving fails, try to remove the cron job
-                    self.cron_manager.delete_cron_job(task.id)
-                    return None
-            else:
+            if not self._save_task(task):
                 return None
 
+            self._schedule(task)
+            self.logger.info(f"Created scheduled task: {task.task_name} ({task.id})")
+            return task.id
+
         except Exception as e:
             self.logger.error(f"Error creating scheduled task: {e}")
             return None
@@ -587,32 +584,19 @@ class ScheduleManager:
                 self.logger.error(f"Invalid cron expression: {new_schedule}")
                 return False
 
-            tasks = self._load_tasks()
-            task_found = False
-
-            for task in tasks:
-                if task.id == task_id:
-                    # Delete old cron job
-                    self.cron_manager.delete_cron_job(task.id)
-
-                    # Update schedule
-                    task.cron_schedule = new_schedule
-                    task._calculate_next_run()
-
-                    # Create new cron job
-                    if self.cron_manager.create_cron_job(task):
-                        task_found = True
-                        break
-                    else:
-                        return False
-
-            if task_found:
-                success = self._save_tasks(tasks)
-                return success
-            else:
+            # Workers update run state in the database; edit the current row
+            task = self._refresh_task(task_id)
+            if task is None:
                 self.logger.error(f"Task not found: {task_id}")
                 return False
 
+            task.cron_schedule = new_schedule
+            task._calculate_next_run(self._timezone())
+            if not self._save_task(task):
+                return False
+            self._schedule(task)
+            return True
+
         except Exception as e:
             self.logger.error(f"Error updating schedule: {e}")
             return False
@@ -620,26 +604,15 @@ class ScheduleManager:
     def delete_scheduled_task(self, task_id: str) -> bool:
         """Delete a scheduled task"""
         try:
-            tasks = self._load_tasks()
-            tasks_before = len(tasks)
-
-            # Remove task from list
-            tasks = [task for task in tasks if task.id != task_id]
-
-            if len(tasks) < tasks_before:
-                # Delete cron job
-                self.cron_manager.delete_cron_job(task_id)
-
-                # Save updated tasks
-                if self._save_tasks(tasks):
-                    self.logger.info(f"Deleted scheduled task: {task_id}")
-                    return True
-                else:
-                    return False
-            else:
+            if not any(task.id == task_id for task in self._load_tasks()):
                 self.logger.error(f"Task not found: {task_id}")
                 return False
 
+            if self._delete_task(task_id):
+                self.logger.info(f"Deleted scheduled task: {task_id}")
+                return True
+            return False
+
         except Exception as e:
             self.logger.error(f"Error deleting scheduled task: {e}")
             return False
@@ -654,7 +627,10 @@ class ScheduleManager:
                     result = self.task_executor.execute_task(task)
 
                     # Save updated task (with new last_run time)
-                    self._save_tasks(tasks)
+                    self._save_task(task)
+                    if result.get("status") == "failed" and task.status == "active":
+                        # Lets the scheduler run the retry before the next cron slot
+                        result["retry_at"] = task.next_run.timestamp()
 
                     # Insert execution record into database
                     try:
@@ -706,7 +682,7 @@ class ScheduleManager:
     def _validate_cron_expression(self, expression: str) -> bool:
         """Validate cron expression"""
         try:
-            croniter(expression)
+            CronSchedule.parse(expression)
             return True
         except Exception:
             return False
@@ -719,22 +695,20 @@ class ScheduleManager:
             )
             cutoff_date = datetime.now() - timedelta(days=cleanup_days)
 
-            tasks = self._load_tasks()
-            tasks_before = len(tasks)
-
             # Keep active tasks and recent tasks
-            tasks = [
-                task
-                for task in tasks
-                if task.status == "active"
-                or (task.last_run and task.last_run > cutoff_date)
-                or (task.created_at and task.created_at > cutoff_date)
+            stale = [
+                task.id
+                for task in self._load_tasks()
+                if not (
+                    task.status == "active"
+                    or (task.last_run and task.last_run > cutoff_date)
+                    or (task.created_at and task.created_at > cutoff_date)
+                )
             ]
 
-            tasks_removed = tasks_before - len(tasks)
+            tasks_removed = sum(self._delete_task(task_id) for task_id in stale)
 
             if tasks_removed > 0:
-                self._save_tasks(tasks)
                 self.logger.info(f"Cleaned up {tasks_removed} old tasks")
 
             return tasks_removed
@@ -772,3 +746,31 @@ class ScheduleManager:
         except Exception as e:
             self.logger.error(f"Error getting task statistics: {e}")
             return {}
+
+
+@lru_cache(maxsize=None)
+def _schedule_manager(config_path: str) -> ScheduleManager:
+    return ScheduleManager(config_path)
+
+
+def run_scheduled_task(task_id: str, config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
+    """RQ entry point for runs dispatched by :meth:`ScheduleManager.serve`"""
+    manager = _schedule_manager(config_path)
+    # Tasks are edited in the scheduler process; pick up the current row.
+    manager.reload_tasks()
+    return manager.execute_scheduled_task(task_id)
+
+
+def main() -> None:
+    """Run the scheduler: ``python -m core.scheduler [config_path]``"""
+    logging.basicConfig(level=logging.INFO)
+    config_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CONFIG_PATH
+    manager = ScheduleManager(config_path)
+    try:
+        asyncio.run(manager.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,7 @@ from .types import (
 from .antibot_manager import AntibotManager
 from .sitemap_analyzer import SitemapAnalyzer
 from .batch_processor import BatchProcessor
+from .escalation import DEFAULT_LADDER, EscalationLadder, EscalationReport, urls_to_escalate
 from database.manager import DatabaseManager
 from utils.logger import setup_logger
 from .hybrid_engine import HybridScrapingEngine
@@ -46,6 +47,14 @@ from database.history_writer import (
 from utils.export_writers import write_product_exports
 from utils.helpers import human_delay as _human_delay_helper
 
+# Escalation rung -> backend reported as ``method_used``. FlareSolverr is a
+# plain HTTP call from our side; the parser rung fetches in the Playwright thread.
+_ESCALATION_STEP_METHODS = {
+    "playwright": ScrapingMethod.PLAYWRIGHT,
+    "flaresolverr": ScrapingMethod.HTTPX,
+    "parser": ScrapingMethod.PLAYWRIGHT,
+}
+
 def human_delay(duration: float = 0.0) -> None:
     """Convenience wrapper to allow patching in tests."""
 
@@ -134,6 +143,10 @@ class ScraperEngine:
         self._skip_cache_refresh: bool = False
         self._progress_callback: Optional[ProgressCallback] = None
         self._current_scrape_total: int = 0
+        self._escalation_report: Optional[EscalationReport] = None
+        self._flaresolverr_client: Any = None
+        self._playwright_browser: Any = None
+        self._playwright_browser_lock: Optional[asyncio.Lock] = None
 
     def _load_config(self) -> ConfigDict:
         """Load configuration from JSON file."""
@@ -974,17 +987,9 @@ class ScraperEngine:
             "Starting product scraping",
         )
 
+        self._escalation_report = None
         try:
-            if method == ScrapingMethod.HTTPX:
-                scraped_data = await self._try_httpx_scraping(urls)
-                if scraped_data:
-                    actual_method = ScrapingMethod.HTTPX
-                else:
-                    fallback = await self._try_playwright_scraping(urls)
-                    if fallback:
-                        scraped_data = fallback
-                        actual_method = ScrapingMethod.PLAYWRIGHT
-            elif method == ScrapingMethod.PLAYWRIGHT:
+            if method == ScrapingMethod.PLAYWRIGHT:
                 scraped_data = await self._try_playwright_scraping(urls)
                 if scraped_data:
                     actual_method = ScrapingMethod.PLAYWRIGHT
@@ -993,46 +998,21 @@ class ScraperEngine:
                     if fallback:
                         scraped_data = fallback
                         actual_method = ScrapingMethod.HTTPX
-            else:  # HYBRID or AUTO
+            else:  # HTTPX, HYBRID or AUTO: HTTPX first, failed URLs escalate one by one
                 scraped_data = await self._try_httpx_scraping(urls)
                 if scraped_data:
                     actual_method = ScrapingMethod.HTTPX
-                else:
-                    scraped_data = await self._try_playwright_scraping(urls)
-                    if scraped_data:
-                        actual_method = ScrapingMethod.PLAYWRIGHT
+                escalated = await self._escalate_failed_urls(urls, scraped_data)
+                if escalated:
+                    if not scraped_data:
+                        actual_method = self._escalation_method()
+                    scraped_data = list(scraped_data) + escalated
 
         except Exception as e:
             self.logger.error(f"Scraping execution failed: {e}")
 
         self._last_used_method = actual_method
 
-        if not scraped_data and hasattr(self.parser, "parse_product"):
-            fallback_products: List[ProductData] = []
-            loop = asyncio.get_running_loop()
-            for url in urls:
-                try:
-                    try:
-                        parsed = await loop.run_in_executor(
-                            None,
-                            lambda url=url: self.antibot.run_playwright_task(
-                                lambda: self.parser.parse_product(url)
-                            ),
-                        )
-                    except TypeError:
-                        parsed = await loop.run_in_executor(
-                            None,
-                            lambda url=url: self.antibot.run_playwright_task(
-                                lambda: self.parser.parse_product("", url)
-                            ),
-                        )
-                    if parsed:
-                        fallback_products.append(parsed)
-                except Exception as exc:
-                    self.logger.debug("Parser fallback failed for %s: %s", url, exc)
-            if fallback_products:
-                scraped_data = fallback_products
-
         return scraped_data
 
     async def _try_httpx_scraping(self, urls: List[URL]) -> List[ProductData]:
@@ -1158,6 +1138,128 @@ class ScraperEngine:
 
         return products
 
+    def _escalation_config(self) -> Dict[str, Any]:
+        config = self.config.get("scraping", {}).get("escalation", {})
+        return config if isinstance(config, dict) else {}
+
+    def _escalation_steps(self) -> List[Tuple[str, Any]]:
+        """Available ladder rungs, in the configured order."""
+        ladder = self._escalation_config().get("ladder", DEFAULT_LADDER)
+        available = {
+            "playwright": self._escalate_with_playwright if self.playwright_manager else None,
+            "flaresolverr": self._escalate_with_flaresolverr if self._get_flaresolverr_client() else None,
+            "parser": self._escalate_with_parser if hasattr(self.parser, "parse_product") else None,
+        }
+        return [(name, available[name]) for name in ladder if available.get(name)]
+
+    async def _escalate_failed_urls(
+        self, urls: List[URL], products: List[ProductData]
+    ) -> List[ProductData]:
+        """Route every URL HTTPX could not scrape up the escalation ladder."""
+        report = EscalationReport()
+        report.record_attempted(urls)
+        self._escalation_report = report
+        escalation_cfg = self._escalation_config()
+        if escalation_cfg.get("enabled", True) is False:
+            return []
+
+        failures = (self._last_scrape_metadata or {}).get("failures") or {}
+        pending = urls_to_escalate(urls, products, failures)
+        steps = self._escalation_steps()
+        if not pending or not steps:
+            return []
+
+        done = {"count": 0}
+
+        def _on_result(url: str, step: Optional[str]) -> None:
+            done["count"] += 1
+            self._emit_progress(
+                PHASE_SCRAPING,
+                len(products) + done["count"],
+                max(self._current_scrape_total, 1),
+                f"escalated via {step}: {url}" if step else f"escalation failed: {url}",
+            )
+
+        # Per run: one shared browser, and a lock bound to the running loop.
+        self._playwright_browser = None
+        self._playwright_browser_lock = asyncio.Lock()
+        ladder = EscalationLadder(
+            steps,
+            concurrency=int(escalation_cfg.get("concurrency", 4)),
+            on_result=_on_result,
+        )
+        recovered = await ladder.run(pending, report)
+        for domain, stats in report.to_dict().items():
+            self.logger.info(
+                "Escalation for %s: %d/%d URLs (%.1f%%), %d recovered %s",
+                domain,
+                stats["escalated"],
+                stats["total"],
+                stats["escalation_rate"] * 100,
+                stats["recovered"],
+                stats["by_step"],
+            )
+        return recovered
+
+    def _escalation_method(self) -> ScrapingMethod:
+        """Backend of the ladder rung that recovered the most URLs this run."""
+        recovered = self._escalation_report.recovered_by_step() if self._escalation_report else {}
+        if not recovered:
+            return ScrapingMethod.PLAYWRIGHT
+        step = max(recovered, key=recovered.__getitem__)
+        return _ESCALATION_STEP_METHODS.get(step, ScrapingMethod.PLAYWRIGHT)
+
+    async def _escalate_with_playwright(self, url: URL) -> Optional[ProductData]:
+        async with self._playwright_browser_lock:
+            if self._playwright_browser is None:
+                # Launch once per pass: a failed launch marks the rung
+                # unavailable (False) instead of being retried for every URL.
+                browser = None
+                try:
+                    browser = await self._maybe_await(self.playwright_manager.get_browser())
+                finally:
+                    self._playwright_browser = browser or False
+        if not self._playwright_browser:
+            return None
+        return await self._scrape_page_with_playwright(self._playwright_browser, url)
+
+    def _get_flaresolverr_client(self) -> Any:
+        if self._flaresolverr_client is None:
+            flaresolverr_cfg = self.config.get("flaresolverr", {})
+            self._flaresolverr_client = False
+            if isinstance(flaresolverr_cfg, dict) and flaresolverr_cfg.get("enabled"):
+                from .flaresolverr_client import FlareSolverrClient
+
+                self._flaresolverr_client = FlareSolverrClient(flaresolverr_cfg)
+        return self._flaresolverr_client
+
+    async def _escalate_with_flaresolverr(self, url: URL) -> Optional[ProductData]:
+        solution = await self._get_flaresolverr_client().solve_get_request(url)
+        if not solution or solution.get("status") != 200 or not solution.get("html"):
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.parser.parse_product(solution["html"], url)
+        )
+
+    async def _escalate_with_parser(self, url: URL) -> Optional[ProductData]:
+        """Last rung: let the parser fetch the page itself in the Playwright thread."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                None,
+                lambda: self.antibot.run_playwright_task(
+                    lambda: self.parser.parse_product(url)
+                ),
+            )
+        except TypeError:
+            return await loop.run_in_executor(
+                None,
+                lambda: self.antibot.run_playwright_task(
+                    lambda: self.parser.parse_product("", url)
+                ),
+            )
+
     async def _try_playwright_scraping(self, urls: List[URL]) -> List[ProductData]:
         """Fallback to Playwright scraping."""
         if not self.playwright_manager:
@@ -1227,6 +1329,9 @@ class ScraperEngine:
         if "failures" in metadata:
             result["failures"] = metadata["failures"]
 
+        if self._escalation_report is not None and self._escalation_report.domains:
+            result["escalation"] = self._escalation_report.to_dict()
+
         if metadata.get("avg_response_time") is not None:
             result["avg_response_time"] = metadata["avg_response_time"]
 
@@ -1329,17 +1434,28 @@ class ScraperEngine:
             self.logger.error(f"Cleanup failed: {e}")
 
     async def run_stock_monitoring(
-        self, product_ids: Optional[List[ProductID]] = None
+        self,
+        product_ids: Optional[List[ProductID]] = None,
+        *,
+        urls: Optional[List[URL]] = None,
+        previous: Optional[Dict[URL, Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
         """
         Run stock monitoring for specified products or all products.
 
         Args:
             product_ids: Optional list of product IDs to monitor
+            urls: Product URLs to check in lightweight mode (price/stock only,
+                via the cheapest CMS endpoint instead of the full scrape pipeline)
+            previous: Optional URL -> last exported record, used for change
+                detection and CMS hints (e.g. CS-Cart product_id)
 
         Returns:
             Dictionary with monitoring results
         """
+        if urls:
+            return await self._run_lightweight_stock_check(urls, previous or {})
+
         if not self.stock_monitor:
             return {"error": "Stock monitor not initialized"}
 
@@ -1365,6 +1481,47 @@ class ScraperEngine:
             self.logger.error(f"Stock monitoring failed: {e}")
             return {"success": False, "error": str(e), "timestamp": time.time()}
 
+    async def _run_lightweight_stock_check(
+        self, urls: List[URL], previous: Dict[URL, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Check price/stock only, without downloading and parsing full pages."""
+        from network.stock_probe import LightweightStockMonitor, diff_snapshots
+
+        stock_config = self.config.get("stock_monitoring", {})
+        monitor = LightweightStockMonitor(
+            cms_by_domain=stock_config.get("cms_by_domain"),
+            concurrency=int(stock_config.get("concurrency", 16)),
+            timeout=float(stock_config.get("timeout_seconds", 15)),
+            api_credentials=self.config.get("api_credentials", {}),
+        )
+
+        try:
+            snapshots = await monitor.check(urls, hints=previous)
+        except Exception as e:
+            self.logger.error(f"Lightweight stock check failed: {e}")
+            return {"success": False, "error": str(e), "timestamp": time.time()}
+
+        results = {snapshot.url: snapshot.to_dict() for snapshot in snapshots}
+        if self.stock_monitor:
+            for snapshot in snapshots:
+                if snapshot.ok:
+                    await self._maybe_call_method(
+                        self.stock_monitor, "analyze_product", snapshot.to_dict()
+                    )
+
+        failed = sum(1 for snapshot in snapshots if not snapshot.ok)
+        self.logger.info(
+            "Lightweight stock check: %d products, %d failed", len(snapshots), failed
+        )
+        return {
+            "success": True,
+            "mode": "lightweight",
+            "results": results,
+            "changes": diff_snapshots(snapshots, previous),
+            "failed": failed,
+            "timestamp": time.time(),
+        }
+
     def _select_optimal_method(self) -> ScrapingMethod:
         """Select optimal scraping method based on configuration and performance."""
         # Check for method override
@@ -1423,38 +1580,10 @@ class ScraperEngine:
 
             # Process each URL
             for url in urls:
-                page = None
                 try:
-                    page = await self._maybe_await(browser.new_page()) if hasattr(browser, "new_page") else None
-
-                    if not page:
-                        continue
-
-                    # Apply antibot headers
-                    headers = await self._maybe_await(self.antibot.get_headers())
-                    if page and hasattr(page, "set_extra_http_headers"):
-                        await self._maybe_await(page.set_extra_http_headers(headers))
-
-                    if self._timeout_override and self._timeout_override > 0:
-                        timeout_ms = int(self._timeout_override * 1000)
-                        page.set_default_navigation_timeout(timeout_ms)
-                        page.set_default_timeout(timeout_ms)
-
-                    # Navigate to page
-                    response = await self._maybe_await(
-                        page.goto(url, wait_until="networkidle")
-                    )
-
-                    if response and response.status == 200:
-                        # Get page content
-                        content = await self._maybe_await(page.content())
-
-                        # Parse product data
-                        product_data = self.parser.parse_product(content, url)
-
-                        if product_data:
-                            scraped_products.append(product_data)
-
+                    product_data = await self._scrape_page_with_playwright(browser, url)
+                    if product_data:
+                        scraped_products.append(product_data)
                 except Exception as e:
                     self.logger.error(f"Failed to scrape {url}: {e}")
                 finally:
@@ -1465,9 +1594,6 @@ class ScraperEngine:
                         total_urls,
                         f"Processed {processed}/{total_urls} via Playwright",
                     )
-                    if page is not None:
-                        with contextlib.suppress(Exception):
-                            await page.close()
 
             return scraped_products
 
@@ -1475,6 +1601,35 @@ class ScraperEngine:
             self.logger.error(f"Playwright scraping failed: {e}")
             return []
 
+    async def _scrape_page_with_playwright(self, browser: Any, url: URL) -> Optional[ProductData]:
+        """Render one URL in a fresh page of ``browser`` and parse it."""
+        page = await self._maybe_await(browser.new_page()) if hasattr(browser, "new_page") else None
+        if not page:
+            return None
+
+        try:
+            # Apply antibot headers
+            headers = await self._maybe_await(self.antibot.get_headers())
+            if hasattr(page, "set_extra_http_headers"):
+                await self._maybe_await(page.set_extra_http_headers(headers))
+
+            if self._timeout_override and self._timeout_override > 0:
+                timeout_ms = int(self._timeout_override * 1000)
+                page.set_default_navigation_timeout(timeout_ms)
+                page.set_default_timeout(timeout_ms)
+
+            # Navigate to page
+            response = await self._maybe_await(page.goto(url, wait_until="networkidle"))
+            if not response or response.status != 200:
+                return None
+
+            # Get page content and parse product data
+            content = await self._maybe_await(page.content())
+            return self.parser.parse_product(content, url)
+        finally:
+            with contextlib.suppress(Exception):
+                await page.close()
+
     async def _get_product_urls(self, base_url: URL, max_products: int) -> List[URL]:
         """Get product URLs through HTTP discovery."""
         try:
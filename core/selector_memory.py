@@ -20,7 +20,7 @@ import logging
 import time
 import threading
 import hashlib
-from typing import Any, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field, asdict
 from datetime import UTC, datetime
 from functools import lru_cache
@@ -29,6 +29,9 @@ from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
 import gzip
 
+from core.extraction_plan import ExtractionPlan, ExtractionPlanCache, freeze_chains
+from utils import serialization
+
 if TYPE_CHECKING:  # pragma: no cover
     from database.manager import DatabaseManager
 
@@ -582,6 +585,9 @@ class SelectorMemory:
         # Integration hooks
         self._integration_hooks = {}
 
+        # Compiled extraction plans, versioned by store.last_updated
+        self._plan_cache = ExtractionPlanCache(max_entries=cache_size)
+
     def _load_all_stores(self) -> None:
         """Load all domain stores from disk and synchronize with database if available."""
         file_domains: Set[str] = set()
@@ -621,8 +627,7 @@ class SelectorMemory:
             return None
 
         try:
-            with open(store_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = serialization.read_json(store_file)
 
             store = DomainSelectorStore(
                 domain=domain,
@@ -700,8 +705,7 @@ class SelectorMemory:
                     for metadata in field_selectors
                 ]
 
-            with open(store_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            serialization.write_json(store_file, data, atomic=True)
 
             if self._database_sync_enabled:
                 self.database_manager.save_site_selectors(
@@ -1381,6 +1385,51 @@ class SelectorMemory:
             self.memory_manager.cache_store(store)
         return store
 
+    def get_extraction_plan(
+        self,
+        domain: str,
+        fields: Sequence[str],
+        *,
+        before: Optional[Dict[str, Sequence[str]]] = None,
+        after: Optional[Dict[str, Sequence[str]]] = None,
+        limit: int = 10,
+    ) -> ExtractionPlan:
+        """
+        Get a compiled extraction plan covering several fields of a domain.
+
+        Each field's chain is ``before`` + up to ``limit`` stored selectors
+        (learned by confidence, then static and CMS ones) + ``after``. Plans
+        are cached and rebuilt only when the domain store's ``last_updated``
+        changes.
+
+        Args:
+            domain: Domain name
+            fields: Fields to include in the plan
+            before: Selectors tried ahead of the stored ones, per field
+            after: Selectors tried after the stored ones, per field
+            limit: Maximum stored selectors per field (0 skips the store)
+
+        Returns:
+            ExtractionPlan evaluating all fields in one document walk
+        """
+        with self._lock:
+            store = self.hybrid_load(domain) if limit > 0 else None
+            version = store.last_updated if store else 0.0
+            key = (domain, tuple(fields), freeze_chains(before), freeze_chains(after), limit)
+
+            def build_chains() -> Dict[str, List[str]]:
+                stored = self.load_domain_selectors(domain) if store else {}
+                return {
+                    field: [
+                        *(before or {}).get(field, ()),
+                        *stored.get(field, [])[:limit],
+                        *(after or {}).get(field, ()),
+                    ]
+                    for field in fields
+                }
+
+            return self._plan_cache.get(key, version, build_chains)
+
     # Integration Hooks
 
     def register_integration_hook(self, component_name: str, hook_function) -> None:
@@ -1434,6 +1483,7 @@ class SelectorMemory:
                 store.total_selectors for store in self.stores.values()
             ),
             "cache_stats": self.memory_manager.get_cache_stats(),
+            "plan_cache_stats": self._plan_cache.stats(),
             "backup_count": len(self.backup_manager.list_backups()),
             "domains": {},
         }
@@ -1468,6 +1518,7 @@ class SelectorMemory:
         """Optimize memory usage and performance."""
         # Clear old cache entries
         self.memory_manager.invalidate_cache()
+        self._plan_cache.invalidate()
 
         # Cleanup stale selectors
         self.cleanup_old_selectors()
@@ -5,7 +5,6 @@ Handles cookie persistence, session data management, and security.
 
 import asyncio
 import aiofiles
-import json
 import os
 import hashlib
 from typing import Dict, Optional, Any, List, Union
@@ -16,6 +15,7 @@ import base64
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from utils import serialization
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -374,7 +374,7 @@ class SessionManager:
                         if self.encryption_enabled:
                             json_data = self._decrypt_data(json_data)
 
-                        session_dict = json.loads(json_data)
+                        session_dict = serialization.loads(json_data)
                         domain = session_dict.get("_domain")
 
                         if domain:
@@ -540,7 +540,7 @@ class SessionManager:
         session_dict = session.to_dict()
         # Add domain to session data for cleanup purposes
         session_dict["_domain"] = domain
-        json_data = json.dumps(session_dict, indent=2, default=str)
+        json_data = serialization.dumps(session_dict, default=str)
 
         if self.encryption_enabled:
             json_data = self._encrypt_data(json_data)
@@ -565,7 +565,7 @@ class SessionManager:
             if self.encryption_enabled:
                 json_data = self._decrypt_data(json_data)
 
-            session_dict = json.loads(json_data)
+            session_dict = serialization.loads(json_data)
             return SessionData.from_dict(session_dict)
 
         except Exception as e:
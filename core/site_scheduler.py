@@ -9,6 +9,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Any, Deque, Dict, Optional, Tuple
 
+from core.domain_health import shared_domain_health_store
 from core.exponential_backoff import ExponentialBackoff
 from utils.logger import get_logger
 
@@ -93,9 +94,15 @@ class SiteScheduler:
             "circuit_recovery_attempts": circuit_cfg.get("recovery_attempts", 1),
             "base_delay_seconds": max(1.0, self.inter_site_delay or 1.0),
             "max_delay_seconds": max(60.0, self.inter_site_delay * 10 or 60.0),
+            "circuit_window_size": circuit_cfg.get("outcome_window_size", 50),
         }
 
-        self.backoff = ExponentialBackoff(backoff_config)
+        # Shared with the other worker processes when circuit_breaker.domain_health
+        # (or SCRAPER_DOMAIN_HEALTH) selects a sqlite/redis backend.
+        self.health_store = shared_domain_health_store(
+            circuit_cfg.get("domain_health"), namespace="site_scheduler"
+        )
+        self.backoff = ExponentialBackoff(backoff_config, health_store=self.health_store)
 
         alias_cfg_raw = self.config.get("domain_aliasing")
         alias_cfg = alias_cfg_raw if isinstance(alias_cfg_raw, dict) else {}
@@ -169,9 +176,14 @@ class SiteScheduler:
             delay = max(delay, required_gap)
 
         if self.auto_adjust_delays:
-            stats = self.domain_stats.get(domain_key)
-            if stats:
+            success_rate: Optional[float] = None
+            if self.health_store is not None:
+                shared = self.health_store.snapshot(domain_key)
+                if shared.outcomes:
+                    success_rate = shared.success_rate
+            elif (stats := self.domain_stats.get(domain_key)) is not None:
                 success_rate = stats.success_rate
+            if success_rate is not None:
                 if success_rate < 0.5:
                     delay *= 1.5
                 elif success_rate > 0.9:
@@ -189,7 +201,9 @@ class SiteScheduler:
     def is_domain_healthy(self, domain: str) -> Tuple[bool, Optional[datetime]]:
         domain_key = self.normalize_domain(domain)
 
-        if self.health_check_interval > 0:
+        # Other workers change shared state, so a shared store is never cached.
+        use_cache = self.health_check_interval > 0 and self.health_store is None
+        if use_cache:
             last_check = self._last_health_check.get(domain_key)
             if last_check is not None and (time.time() - last_check) < self.health_check_interval:
                 cached = self._health_cache.get(domain_key)
@@ -214,11 +228,13 @@ class SiteScheduler:
                 )
             open_until = datetime.now() + timedelta(seconds=timeout_seconds or 0)
             state.circuit_open_until = open_until
+            if self.health_store is not None:
+                self.health_store.trip(domain_key, policy=self.backoff.circuit_policy)
             healthy = False
         elif not healthy and state and state.circuit_open_until:
             open_until = state.circuit_open_until
 
-        if self.health_check_interval > 0:
+        if use_cache:
             self._last_health_check[domain_key] = time.time()
             self._health_cache[domain_key] = (healthy, open_until)
 
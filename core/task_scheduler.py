@@ -0,0 +1,340 @@
+"""In-process asyncio scheduler for recurring scrape tasks.
+
+``CronJobManager`` used to install one crontab (or ``schtasks``) entry per
+task. Every run therefore paid for a cold interpreter and re-imported the
+scraper stack, and nothing stopped two runs for the same domain from
+overlapping. :class:`TaskScheduler` keeps the timers in one process instead:
+
+* A heap ordered by due time holds the next run of every task.
+* Due runs move to a ready heap ordered by priority. When all
+  ``max_concurrent`` slots are busy, the most important task goes next.
+* ``jitter`` spreads tasks that share a cron expression over a few seconds,
+  so ``0 */6 * * *`` does not start every site at the same instant.
+* At most one run per domain is in flight. A run that comes due while its
+  domain is busy waits and starts as soon as the domain is released.
+
+Runs are handed to a ``dispatch`` coroutine. :func:`rq_dispatcher` enqueues
+them on the ``scraping`` queue, where an already running RQ worker starts
+them at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+# minute, hour, day of month, month, day of week (0 and 7 are Sunday)
+_FIELD_BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# Longest gap between two fires of a valid expression (e.g. Feb 29 on a Monday).
+_SEARCH_LIMIT = timedelta(days=366 * 8)
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values: Set[int] = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"Invalid cron step in {text!r}")
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (int(value) for value in base.split("-", 1))
+        else:
+            start = int(base)
+            end = high if step_text else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field {text!r} outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True, slots=True)
+class CronSchedule:
+    """A parsed five-field cron expression."""
+
+    expression: str
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]
+    day_restricted: bool
+    weekday_restricted: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> "CronSchedule":
+        fields = _ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {expression!r}")
+        try:
+            minutes, hours, days, months, weekdays = (
+                _parse_field(text, low, high) for text, (low, high) in zip(fields, _FIELD_BOUNDS)
+            )
+        except ValueError as exc:
+            raise ValueError(f"Invalid cron expression {expression!r}: {exc}") from exc
+        return cls(
+            expression=expression,
+            minutes=minutes,
+            hours=hours,
+            days=days,
+            months=months,
+            weekdays=frozenset(day % 7 for day in weekdays),
+            day_restricted=not fields[2].startswith("*"),
+            weekday_restricted=not fields[4].startswith("*"),
+        )
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = moment.isoweekday() % 7 in self.weekdays
+        # Classic cron: when both day fields are restricted, either may match.
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First fire time strictly after ``moment`` (same tzinfo)."""
+
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + _SEARCH_LIMIT
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                first = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (first + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+
+@dataclass(slots=True)
+class ScheduledJob:
+    """One recurring task as the scheduler sees it."""
+
+    task_id: str
+    schedule: CronSchedule
+    domain: str
+    priority: int = 0  # lower runs first
+    jitter: float = 0.0  # seconds, added uniformly at random to each fire time
+    payload: Dict[str, Any] = field(default_factory=dict)
+    next_run: Optional[float] = None  # epoch seconds
+    runs: int = 0
+    last_result: Any = None
+
+
+Dispatch = Callable[[ScheduledJob], Awaitable[Any]]
+
+
+class TaskScheduler:
+    """Heap-ordered timers with priority dispatch and per-domain exclusivity.
+
+    ``dispatch`` may return a mapping with ``retry_at`` (epoch seconds). The next
+    run then happens at that time if it is earlier than the next cron fire.
+    """
+
+    def __init__(
+        self,
+        dispatch: Dispatch,
+        *,
+        max_concurrent: int = 5,
+        tz: tzinfo = timezone.utc,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.dispatch = dispatch
+        self.max_concurrent = max(1, max_concurrent)
+        self.tz = tz
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._timers: List[Tuple[float, int, str]] = []
+        self._ready: List[Tuple[int, float, int, str]] = []
+        self._armed: Dict[str, int] = {}  # task_id -> seq of its live timer
+        self._seq = itertools.count()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._busy_domains: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    # -- task management -------------------------------------------------
+
+    def next_fire(self, job: ScheduledJob, after: float) -> float:
+        moment = datetime.fromtimestamp(after, self.tz)
+        due = job.schedule.next_after(moment).timestamp()
+        if job.jitter > 0:
+            due += self.rng.uniform(0.0, job.jitter)
+        return due
+
+    def add(self, job: ScheduledJob) -> None:
+        """Register (or replace) ``job``; its first run is ``job.next_run`` if set."""
+
+        self.jobs[job.task_id] = job
+        if job.task_id in self._running:
+            return  # re-armed when the current run finishes
+        if job.next_run is None:
+            job.next_run = self.next_fire(job, self.clock())
+        self._arm(job)
+
+    def remove(self, task_id: str) -> bool:
+        """Forget ``task_id``. A run already in flight is allowed to finish."""
+
+        self._armed.pop(task_id, None)
+        removed = self.jobs.pop(task_id, None) is not None
+        self._wake()
+        return removed
+
+    def _arm(self, job: ScheduledJob) -> None:
+        seq = next(self._seq)
+        self._armed[job.task_id] = seq
+        heapq.heappush(self._timers, (job.next_run, seq, job.task_id))
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def running(self) -> List[str]:
+        return list(self._running)
+
+    # -- dispatch loop ---------------------------------------------------
+
+    def _promote_due(self, now: float) -> None:
+        while self._timers and self._timers[0][0] <= now:
+            due, seq, task_id = heapq.heappop(self._timers)
+            if self._armed.get(task_id) != seq:
+                continue  # removed or re-armed since
+            del self._armed[task_id]
+            job = self.jobs[task_id]
+            heapq.heappush(self._ready, (job.priority, due, seq, task_id))
+
+    def _start_ready(self) -> None:
+        blocked = []
+        while self._ready and len(self._running) < self.max_concurrent:
+            entry = heapq.heappop(self._ready)
+            job = self.jobs.get(entry[3])
+            if job is None:
+                continue
+            if job.domain in self._busy_domains:
+                blocked.append(entry)
+                continue
+            self._busy_domains.add(job.domain)
+            self._running[job.task_id] = asyncio.create_task(
+                self._execute(job), name=f"scheduled:{job.task_id}"
+            )
+        for entry in blocked:
+            heapq.heappush(self._ready, entry)
+
+    async def _execute(self, job: ScheduledJob) -> None:
+        result: Any = None
+        try:
+            logger.info("Starting scheduled task %s (%s)", job.task_id, job.domain)
+            result = await self.dispatch(job)
+        except Exception as exc:  # noqa: BLE001 - one task must not stop the loop
+            logger.error("Scheduled task %s failed: %s", job.task_id, exc)
+        finally:
+            self._busy_domains.discard(job.domain)
+            self._running.pop(job.task_id, None)
+            job.runs += 1
+            job.last_result = result
+            current = self.jobs.get(job.task_id)  # may have been replaced meanwhile
+            if current is None:
+                self._wake()
+            else:
+                current.next_run = self.next_fire(current, self.clock())
+                retry_at = result.get("retry_at") if isinstance(result, Mapping) else None
+                if current is job and retry_at is not None and float(retry_at) < job.next_run:
+                    job.next_run = float(retry_at)
+                self._arm(current)
+
+    async def run(self) -> None:
+        """Dispatch due tasks until :meth:`stop`; waits for runs in flight on exit."""
+
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        while not self._stopping:
+            now = self.clock()
+            self._promote_due(now)
+            self._start_ready()
+            timeout = max(0.0, self._timers[0][0] - now) if self._timers else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake()
+
+
+_RQ_DONE = {"finished", "failed", "stopped", "canceled"}
+
+
+def rq_dispatcher(
+    queue: Any,
+    func: str = "core.scheduler.run_scheduled_task",
+    *,
+    poll_interval: float = 2.0,
+    job_timeout: str = "2h",
+) -> Dispatch:
+    """Dispatch runs onto RQ ``queue`` and wait until the worker finishes them.
+
+    Waiting is what keeps the domain busy, so the next run for that domain
+    cannot start while a worker is still scraping it.
+    """
+
+    async def dispatch(job: ScheduledJob) -> Any:
+        rq_job = await asyncio.to_thread(
+            queue.enqueue,
+            func,
+            task_id=job.task_id,
+            job_timeout=job_timeout,
+            result_ttl=86400,
+            **job.payload,
+        )
+        while True:
+            status = await asyncio.to_thread(rq_job.get_status)
+            status = str(getattr(status, "value", status))
+            if status in _RQ_DONE:
+                break
+            await asyncio.sleep(poll_interval)
+        if status != "finished":
+            raise RuntimeError(f"RQ job {rq_job.id} for task {job.task_id} ended as {status}")
+        return rq_job.return_value()
+
+    return dispatch
+
+
+__all__ = [
+    "CronSchedule",
+    "Dispatch",
+    "ScheduledJob",
+    "TaskScheduler",
+    "rq_dispatcher",
+]
@@ -0,0 +1,579 @@
+"""Shared URL frontier: lease-based claiming of a catalog across workers.
+
+Splitting a catalog into static ``--batch-offset`` slices means a slow slice
+holds up its whole wave. A :class:`UrlFrontier` is a work queue instead:
+workers :meth:`~UrlFrontier.claim` a few URLs at a time and the fast ones
+simply claim more.
+
+* **Dedup** - a URL is queued once per frontier, however many workers seed it.
+* **Leases / visibility timeout** - claimed URLs are invisible to other workers
+  until the lease expires; a crashed worker's URLs come back automatically.
+* **Retries** - :meth:`~UrlFrontier.fail` requeues a URL after a delay until it
+  has used ``max_attempts``; then it is parked as failed with its last error.
+* **Lease tokens** - completing or failing with a lost lease is a no-op, so a
+  slow worker cannot clobber the result of the worker that took over.
+
+Backends: :class:`MemoryFrontier` (one process, tests), :class:`SQLiteFrontier`
+(processes on one host) and :class:`RedisFrontier` (nodes sharing Redis; every
+operation is one Lua script). :func:`create_frontier` picks one from a spec
+such as ``"sqlite"``, ``"sqlite:///path.db"`` or ``"redis://host:6379/0"``
+(default: :data:`FRONTIER_ENV`).
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import redis as _redis
+except ImportError:  # pragma: no cover - environment without redis
+    _redis = None
+
+logger = logging.getLogger(__name__)
+
+FRONTIER_ENV = "SCRAPER_FRONTIER"
+# Names the crawl run so all of its workers share one frontier (new run -> fresh frontier).
+FRONTIER_RUN_ENV = "SCRAPER_FRONTIER_RUN"
+# Worker id within a run; such workers keep per-worker partials merged at the end.
+FRONTIER_WORKER_ENV = "SCRAPER_FRONTIER_WORKER"
+DEFAULT_SQLITE_PATH = Path("data/state/frontier.sqlite3")
+DEFAULT_REDIS_PREFIX = "scraper:frontier"
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass(frozen=True, slots=True)
+class Lease:
+    """A claimed URL; pass it back to ``complete``/``fail``/``extend``."""
+
+    url: str
+    token: str
+    # Attempts used before this claim (0 on the first try).
+    attempts: int = 0
+
+
+@dataclass(slots=True)
+class FrontierStats:
+    pending: int = 0
+    leased: int = 0
+    done: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.leased + self.done + self.failed
+
+    @property
+    def drained(self) -> bool:
+        """Nothing left to claim now or later."""
+
+        return self.pending == 0 and self.leased == 0
+
+
+class UrlFrontier:
+    """Interface shared by the frontier backends."""
+
+    backend = "abstract"
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Queue URLs not seen before by this frontier; returns how many were new."""
+        raise NotImplementedError
+
+    def claim(self, count: int = 1, lease_seconds: Optional[float] = None) -> List[Lease]:
+        """Lease up to ``count`` URLs (expired leases are reclaimed first)."""
+        raise NotImplementedError
+
+    def complete(self, lease: Lease) -> bool:
+        """Mark done; ``False`` if the lease was lost to another worker."""
+        raise NotImplementedError
+
+    def fail(self, lease: Lease, error: str = "", *, retry: bool = True) -> bool:
+        """Requeue after ``retry_delay * attempts`` (or park as failed when exhausted)."""
+        raise NotImplementedError
+
+    def extend(self, lease: Lease, seconds: Optional[float] = None) -> bool:
+        """Push the lease expiry ``seconds`` from now; ``False`` if it was lost."""
+        raise NotImplementedError
+
+    def stats(self) -> FrontierStats:
+        raise NotImplementedError
+
+    def failures(self) -> Dict[str, str]:
+        """Permanently failed URLs and their last error."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        return None
+
+    def _new_token(self) -> str:
+        return uuid.uuid4().hex
+
+    def _retry_at(self, now: float, attempts: int) -> float:
+        return now + self.retry_delay * attempts
+
+
+@dataclass(slots=True)
+class _Entry:
+    state: str = PENDING
+    attempts: int = 0
+    token: Optional[str] = None
+    lease_expires: float = 0.0
+    error: str = ""
+
+
+class MemoryFrontier(UrlFrontier):
+    """In-process frontier (single worker, tests)."""
+
+    backend = "memory"
+
+    def __init__(self, name: str = "default", **kwargs: Any) -> None:
+        super().__init__(name, **kwargs)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._pending: Deque[str] = deque()
+        self._delayed: List[Tuple[float, int, str]] = []
+        self._leased: Dict[str, None] = {}
+        self._sequence = 0
+
+    def add(self, urls: Iterable[str]) -> int:
+        added = 0
+        with self._lock:
+            for url in urls:
+                url = url.strip()
+                if url and url not in self._entries:
+                    self._entries[url] = _Entry()
+                    self._pending.append(url)
+                    added += 1
+        return added
+
+    def _requeue(self, url: str, entry: _Entry, error: str, now: float, retry: bool = True) -> None:
+        entry.attempts += 1
+        entry.token = None
+        entry.error = error
+        self._leased.pop(url, None)
+        if not retry or entry.attempts >= self.max_attempts:
+            entry.state = FAILED
+            return
+        entry.state = PENDING
+        self._sequence += 1
+        heapq.heappush(self._delayed, (self._retry_at(now, entry.attempts), self._sequence, url))
+
+    def claim(self, count: int = 1, lease_seconds: Optional[float] = None) -> List[Lease]:
+        now = time.time()
+        token = self._new_token()
+        expires = now + (self.lease_seconds if lease_seconds is None else lease_seconds)
+        leases: List[Lease] = []
+        with self._lock:
+            for url in [url for url in self._leased if self._entries[url].lease_expires <= now]:
+                self._requeue(url, self._entries[url], "lease expired", now)
+            while self._delayed and self._delayed[0][0] <= now:
+                self._pending.append(heapq.heappop(self._delayed)[2])
+            while self._pending and len(leases) < count:
+                url = self._pending.popleft()
+                entry = self._entries[url]
+                entry.state, entry.token, entry.lease_expires = LEASED, token, expires
+                self._leased[url] = None
+                leases.append(Lease(url, token, entry.attempts))
+        return leases
+
+    def _owned(self, lease: Lease) -> Optional[_Entry]:
+        entry = self._entries.get(lease.url)
+        if entry is None or entry.state != LEASED or entry.token != lease.token:
+            return None
+        return entry
+
+    def complete(self, lease: Lease) -> bool:
+        with self._lock:
+            entry = self._owned(lease)
+            if entry is None:
+                return False
+            entry.state, entry.token = DONE, None
+            self._leased.pop(lease.url, None)
+            return True
+
+    def fail(self, lease: Lease, error: str = "", *, retry: bool = True) -> bool:
+        with self._lock:
+            entry = self._owned(lease)
+            if entry is None:
+                return False
+            self._requeue(lease.url, entry, error, time.time(), retry)
+            return True
+
+    def extend(self, lease: Lease, seconds: Optional[float] = None) -> bool:
+        with self._lock:
+            entry = self._owned(lease)
+            if entry is None:
+                return False
+            entry.lease_expires = time.time() + (self.lease_seconds if seconds is None else seconds)
+            return True
+
+    def stats(self) -> FrontierStats:
+        stats = FrontierStats()
+        with self._lock:
+            for entry in self._entries.values():
+                setattr(stats, entry.state, getattr(stats, entry.state) + 1)
+        return stats
+
+    def failures(self) -> Dict[str, str]:
+        with self._lock:
+            return {url: entry.error for url, entry in self._entries.items() if entry.state == FAILED}
+
+
+class SQLiteFrontier(UrlFrontier):
+    """Frontier in a WAL SQLite file, shared by the processes of one host."""
+
+    backend = "sqlite"
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS frontier (
+            name TEXT NOT NULL,
+            url TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            token TEXT,
+            lease_expires REAL NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (name, url)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS frontier_state ON frontier (name, state, available_at)",
+    )
+
+    def __init__(self, name: str = "default", path: Path = DEFAULT_SQLITE_PATH, **kwargs: Any) -> None:
+        super().__init__(name, **kwargs)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross fork(); reopen in the child.
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _write(self, operation: Any) -> Any:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return result
+
+    def add(self, urls: Iterable[str]) -> int:
+        rows = [(self.name, url.strip()) for url in urls if url and url.strip()]
+
+        def _insert(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO frontier (name, url) VALUES (?, ?)", rows)
+            return conn.total_changes - before
+
+        return self._write(_insert) if rows else 0
+
+    def claim(self, count: int = 1, lease_seconds: Optional[float] = None) -> List[Lease]:
+        now = time.time()
+        token = self._new_token()
+        expires = now + (self.lease_seconds if lease_seconds is None else lease_seconds)
+
+        def _claim(conn: sqlite3.Connection) -> List[Lease]:
+            conn.execute(
+                "UPDATE frontier SET attempts = attempts + 1, token = NULL, last_error = 'lease expired', "
+                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+                "available_at = ? + ? * (attempts + 1) "
+                "WHERE name = ? AND state = 'leased' AND lease_expires <= ?",
+                (self.max_attempts, now, self.retry_delay, self.name, now),
+            )
+            rows = conn.execute(
+                "SELECT rowid, url, attempts FROM frontier "
+                "WHERE name = ? AND state = 'pending' AND available_at <= ? ORDER BY rowid LIMIT ?",
+                (self.name, now, count),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE frontier SET state = 'leased', token = ?, lease_expires = ? WHERE rowid = ?",
+                [(token, expires, rowid) for rowid, _, _ in rows],
+            )
+            return [Lease(url, token, attempts) for _, url, attempts in rows]
+
+        return self._write(_claim)
+
+    def complete(self, lease: Lease) -> bool:
+        return self._write(
+            lambda conn: conn.execute(
+                "UPDATE frontier SET state = 'done', token = NULL "
+                "WHERE name = ? AND url = ? AND state = 'leased' AND token = ?",
+                (self.name, lease.url, lease.token),
+            ).rowcount
+            == 1
+        )
+
+    def fail(self, lease: Lease, error: str = "", *, retry: bool = True) -> bool:
+        now = time.time()
+        limit = self.max_attempts if retry else 0
+        return self._write(
+            lambda conn: conn.execute(
+                "UPDATE frontier SET attempts = attempts + 1, token = NULL, last_error = ?, "
+                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+                "available_at = ? + ? * (attempts + 1) "
+                "WHERE name = ? AND url = ? AND state = 'leased' AND token = ?",
+                (error, limit, now, self.retry_delay, self.name, lease.url, lease.token),
+            ).rowcount
+            == 1
+        )
+
+    def extend(self, lease: Lease, seconds: Optional[float] = None) -> bool:
+        expires = time.time() + (self.lease_seconds if seconds is None else seconds)
+        return self._write(
+            lambda conn: conn.execute(
+                "UPDATE frontier SET lease_expires = ? "
+                "WHERE name = ? AND url = ? AND state = 'leased' AND token = ?",
+                (expires, self.name, lease.url, lease.token),
+            ).rowcount
+            == 1
+        )
+
+    def stats(self) -> FrontierStats:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT state, COUNT(*) FROM frontier WHERE name = ? GROUP BY state", (self.name,)
+            ).fetchall()
+        stats = FrontierStats()
+        for state, count in rows:
+            setattr(stats, state, count)
+        return stats
+
+    def failures(self) -> Dict[str, str]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT url, last_error FROM frontier WHERE name = ? AND state = 'failed'", (self.name,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+# KEYS for every script: seen, pending, delayed, leases, tokens, attempts, failed, done.
+_REDIS_CLOCK = """
+pcall(redis.replicate_commands)
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+"""
+
+_ADD_SCRIPT = """
+local added = 0
+for _, url in ipairs(ARGV) do
+  if redis.call('SADD', KEYS[1], url) == 1 then
+    redis.call('RPUSH', KEYS[2], url)
+    added = added + 1
+  end
+end
+return added
+"""
+
+# ARGV: count, lease_seconds, token, max_attempts, retry_delay
+_CLAIM_SCRIPT = _REDIS_CLOCK + """
+local count = tonumber(ARGV[1])
+local max_attempts = tonumber(ARGV[4])
+local retry_delay = tonumber(ARGV[5])
+for _, url in ipairs(redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now)) do
+  redis.call('ZREM', KEYS[4], url)
+  redis.call('HDEL', KEYS[5], url)
+  local attempts = redis.call('HINCRBY', KEYS[6], url, 1)
+  if attempts >= max_attempts then
+    redis.call('HSET', KEYS[7], url, 'lease expired')
+  else
+    redis.call('ZADD', KEYS[3], now + retry_delay * attempts, url)
+  end
+end
+for _, url in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+  redis.call('ZREM', KEYS[3], url)
+  redis.call('RPUSH', KEYS[2], url)
+end
+local claimed = {}
+for _ = 1, count do
+  local url = redis.call('LPOP', KEYS[2])
+  if not url then break end
+  redis.call('ZADD', KEYS[4], now + tonumber(ARGV[2]), url)
+  redis.call('HSET', KEYS[5], url, ARGV[3])
+  table.insert(claimed, url)
+  table.insert(claimed, redis.call('HGET', KEYS[6], url) or '0')
+end
+return claimed
+"""
+
+# ARGV: action (complete/fail/extend), url, token, error, max_attempts, retry_delay, lease_seconds
+_SETTLE_SCRIPT = _REDIS_CLOCK + """
+local url = ARGV[2]
+if redis.call('HGET', KEYS[5], url) ~= ARGV[3] then return 0 end
+local action = ARGV[1]
+if action == 'extend' then
+  redis.call('ZADD', KEYS[4], now + tonumber(ARGV[7]), url)
+  return 1
+end
+redis.call('ZREM', KEYS[4], url)
+redis.call('HDEL', KEYS[5], url)
+if action == 'complete' then
+  redis.call('SADD', KEYS[8], url)
+  return 1
+end
+local attempts = redis.call('HINCRBY', KEYS[6], url, 1)
+if attempts >= tonumber(ARGV[5]) then
+  redis.call('HSET', KEYS[7], url, ARGV[4])
+else
+  redis.call('ZADD', KEYS[3], now + tonumber(ARGV[6]) * attempts, url)
+end
+return 1
+"""
+
+
+class RedisFrontier(UrlFrontier):
+    """Frontier in Redis, shared by workers on any number of nodes."""
+
+    backend = "redis"
+
+    def __init__(self, name: str, client: Any, *, prefix: str = DEFAULT_REDIS_PREFIX, **kwargs: Any) -> None:
+        super().__init__(name, **kwargs)
+        self.client = client
+        base = f"{prefix}:{name}"
+        self._keys = [
+            f"{base}:{part}"
+            for part in ("seen", "pending", "delayed", "leases", "tokens", "attempts", "failed", "done")
+        ]
+        self._add = client.register_script(_ADD_SCRIPT)
+        self._claim = client.register_script(_CLAIM_SCRIPT)
+        self._settle = client.register_script(_SETTLE_SCRIPT)
+
+    def add(self, urls: Iterable[str]) -> int:
+        batch = [url.strip() for url in urls if url and url.strip()]
+        added = 0
+        for start in range(0, len(batch), 1000):
+            added += int(self._add(keys=self._keys, args=batch[start : start + 1000]))
+        return added
+
+    def claim(self, count: int = 1, lease_seconds: Optional[float] = None) -> List[Lease]:
+        token = self._new_token()
+        lease = self.lease_seconds if lease_seconds is None else lease_seconds
+        reply = self._claim(
+            keys=self._keys, args=[count, lease, token, self.max_attempts, self.retry_delay]
+        )
+        values = [item.decode() if isinstance(item, bytes) else str(item) for item in reply]
+        return [Lease(values[i], token, int(values[i + 1])) for i in range(0, len(values), 2)]
+
+    def _settle_lease(self, action: str, lease: Lease, error: str = "", max_attempts: int = 0, seconds: float = 0.0) -> bool:
+        args = [action, lease.url, lease.token, error, max_attempts, self.retry_delay, seconds]
+        return bool(int(self._settle(keys=self._keys, args=args)))
+
+    def complete(self, lease: Lease) -> bool:
+        return self._settle_lease("complete", lease)
+
+    def fail(self, lease: Lease, error: str = "", *, retry: bool = True) -> bool:
+        return self._settle_lease("fail", lease, error, self.max_attempts if retry else 0)
+
+    def extend(self, lease: Lease, seconds: Optional[float] = None) -> bool:
+        return self._settle_lease("extend", lease, seconds=self.lease_seconds if seconds is None else seconds)
+
+    def stats(self) -> FrontierStats:
+        seen, pending, delayed, leases, _, _, failed, done = self._keys
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.llen(pending)
+            pipe.zcard(delayed)
+            pipe.zcard(leases)
+            pipe.scard(done)
+            pipe.hlen(failed)
+            queued, waiting, leased, finished, broken = pipe.execute()
+        return FrontierStats(pending=queued + waiting, leased=leased, done=finished, failed=broken)
+
+    def failures(self) -> Dict[str, str]:
+        raw = self.client.hgetall(self._keys[6])
+        return {
+            (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+            for key, value in raw.items()
+        }
+
+    def close(self) -> None:
+        closer = getattr(self.client, "close", None)
+        if callable(closer):
+            closer()
+
+
+def create_frontier(name: str, spec: Optional[str] = None, **kwargs: Any) -> UrlFrontier:
+    """Frontier ``name`` on the backend given by ``spec`` (default: :data:`FRONTIER_ENV`).
+
+    ``spec``: ``memory``, ``sqlite``, ``sqlite:///path/to.db`` or a Redis URL.
+    Keyword arguments (``lease_seconds``, ``max_attempts``, ``retry_delay``)
+    go to the backend.
+    """
+
+    spec = (spec or os.environ.get(FRONTIER_ENV) or "memory").strip()
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        if _redis is None:
+            raise RuntimeError("redis package is required for a Redis URL frontier")
+        return RedisFrontier(name, _redis.Redis.from_url(spec), **kwargs)
+    if spec == "sqlite" or spec.startswith("sqlite:///"):
+        path = spec[len("sqlite:///") :] if spec.startswith("sqlite:///") else DEFAULT_SQLITE_PATH
+        return SQLiteFrontier(name, Path(path), **kwargs)
+    if spec != "memory":
+        raise ValueError(f"Unknown frontier backend: {spec!r}")
+    return MemoryFrontier(name, **kwargs)
+
+
+__all__ = [
+    "DONE",
+    "FAILED",
+    "FRONTIER_ENV",
+    "FRONTIER_RUN_ENV",
+    "FRONTIER_WORKER_ENV",
+    "LEASED",
+    "PENDING",
+    "FrontierStats",
+    "Lease",
+    "MemoryFrontier",
+    "RedisFrontier",
+    "SQLiteFrontier",
+    "UrlFrontier",
+    "create_frontier",
+]
@@ -0,0 +1,265 @@
+"""Infer a product's variation endpoint from a few recorded interactions.
+
+``DynamicVariationHandler`` used to click through the full cartesian product
+of variation selectors and wait for the page to settle after every click.
+Most storefronts fetch the price/stock of the selected variant from one XHR
+endpoint, and the selected attribute values show up in its query string,
+form body, JSON body or path. So one interaction per attribute value
+change is enough to learn the request shape. The remaining combinations can
+then be requested directly instead of clicked.
+
+A recorded request is flattened into *slots* (``path:<i>``, ``query:<name>``,
+``body:<name>``). A slot belongs to an attribute when its value always equals
+the value selected for that attribute. It must also change whenever that
+attribute changes. :class:`EndpointTemplate` keeps the most recent request
+and re-renders it with the slots of every other combination replaced.
+Nothing here touches the browser; the handler records and fetches.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# Headers the fetching context sets itself (cookies come from the browser jar).
+_DROP_HEADERS = {"content-length", "cookie", "host", "connection", "accept-encoding"}
+_PRICE_KEYS = ("price", "final_price", "price_value", "cost", "amount")
+_STOCK_KEYS = ("stock", "quantity", "qty", "inventory", "inventory_quantity", "rest")
+_SKU_KEYS = ("sku", "product_code", "article", "code")
+_IMAGE_KEYS = ("image_url", "image", "img", "picture", "featured_image")
+_AVAILABLE_KEYS = ("available", "in_stock", "is_available", "can_buy", "instock")
+_FALSY = {"0", "false", "no", "n", "off", "нет"}
+
+
+def _norm(value: Any) -> str:
+    return unquote(str(value)).strip().lower()
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = re.sub(r"[^\d,.\-]", "", str(value)).replace(",", ".")
+    if cleaned.count(".") > 1:
+        head, _, tail = cleaned.rpartition(".")
+        cleaned = head.replace(".", "") + "." + tail
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class RecordedRequest:
+    """One XHR/fetch request seen while a set of attribute values was selected."""
+
+    method: str
+    url: str
+    selected: Dict[str, str]  # attribute type -> selected value at request time
+    post_data: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    response: Any = None  # decoded JSON body, when there was one
+
+    def _body(self) -> Tuple[str, Dict[str, Any]]:
+        if not self.post_data:
+            return "", {}
+        content_type = {k.lower(): v for k, v in self.headers.items()}.get("content-type", "")
+        text = self.post_data.strip()
+        if "json" in content_type or text[:1] == "{":
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                return "json", {
+                    key: value for key, value in data.items() if not isinstance(value, (dict, list))
+                }
+        if "=" in text:
+            return "form", dict(parse_qsl(text, keep_blank_values=True))
+        return "", {}
+
+    def slots(self) -> Dict[str, str]:
+        parts = urlsplit(self.url)
+        segments = [seg for seg in parts.path.split("/") if seg]
+        slots = {f"path:{i}": seg for i, seg in enumerate(segments)}
+        slots.update((f"query:{k}", v) for k, v in parse_qsl(parts.query, keep_blank_values=True))
+        slots.update((f"body:{k}", str(v)) for k, v in self._body()[1].items())
+        return slots
+
+    def shape(self) -> Tuple[str, str, int, Tuple[str, ...]]:
+        """Requests with the same shape can be the same endpoint."""
+
+        parts = urlsplit(self.url)
+        names = tuple(sorted(name for name in self.slots() if not name.startswith("path:")))
+        segments = len([seg for seg in parts.path.split("/") if seg])
+        return self.method.upper(), parts.netloc.lower(), segments, names
+
+
+@dataclass(slots=True)
+class EndpointTemplate:
+    """A request that can be re-issued for any combination of attribute values."""
+
+    base: RecordedRequest
+    slots: Dict[str, str]  # slot name -> attribute type
+
+    @property
+    def attributes(self) -> List[str]:
+        return sorted(set(self.slots.values()))
+
+    def render(self, selected: Mapping[str, str]) -> Dict[str, Any]:
+        """Keyword arguments for ``APIRequestContext.fetch`` for ``selected``."""
+
+        def value_for(slot: str, current: Any) -> Any:
+            attribute = self.slots.get(slot)
+            return selected[attribute] if attribute in selected else current
+
+        parts = urlsplit(self.base.url)
+        segments = parts.path.split("/")
+        index = -1
+        for position, segment in enumerate(segments):
+            if segment:
+                index += 1
+                segments[position] = quote(str(value_for(f"path:{index}", segment)), safe="")
+        query = [
+            (key, value_for(f"query:{key}", value))
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        ]
+        url = urlunsplit(
+            (parts.scheme, parts.netloc, "/".join(segments), urlencode(query), parts.fragment)
+        )
+        request: Dict[str, Any] = {
+            "method": self.base.method.upper(),
+            "headers": {
+                key: value
+                for key, value in self.base.headers.items()
+                if key.lower() not in _DROP_HEADERS and not key.startswith(":")
+            },
+        }
+        kind, _ = self.base._body()
+        if kind == "json":
+            body = json.loads(self.base.post_data)
+            request["data"] = json.dumps(
+                {key: value_for(f"body:{key}", value) for key, value in body.items()}
+            )
+        elif kind == "form":
+            pairs = parse_qsl(self.base.post_data.strip(), keep_blank_values=True)
+            request["data"] = urlencode(
+                [(key, value_for(f"body:{key}", value)) for key, value in pairs]
+            )
+        elif self.base.post_data:
+            request["data"] = self.base.post_data
+        return {"url": url, **request}
+
+
+def _slot_mapping(group: Sequence[RecordedRequest], attributes: Sequence[str]) -> Dict[str, str]:
+    mapping: Dict[str, str] = {}
+    all_slots = [request.slots() for request in group]
+    for attribute in attributes:
+        values = {_norm(request.selected.get(attribute, "")) for request in group}
+        if len(values) < 2:
+            continue  # never saw this attribute change, cannot tell its slot apart
+        for name in all_slots[-1]:
+            if name in mapping:
+                continue
+            if all(
+                name in slots and _norm(slots[name]) == _norm(request.selected.get(attribute, ""))
+                for slots, request in zip(all_slots, group)
+            ):
+                mapping[name] = attribute
+                break
+    return mapping
+
+
+def infer_endpoint(
+    recorded: Sequence[RecordedRequest], attributes: Sequence[str]
+) -> Optional[EndpointTemplate]:
+    """Find the endpoint whose request carries every attribute in ``attributes``.
+
+    Returns ``None`` when no recorded endpoint covers all attributes, e.g. when
+    the page resolves a variant ID client-side. The caller then has to fall
+    back to clicking.
+    """
+
+    groups: Dict[Tuple[str, str, int, Tuple[str, ...]], List[RecordedRequest]] = {}
+    for request in recorded:
+        if attributes and all(name in request.selected for name in attributes):
+            groups.setdefault(request.shape(), []).append(request)
+
+    best: Optional[EndpointTemplate] = None
+    best_score: Tuple[bool, int] = (False, 0)
+    for group in groups.values():
+        mapping = _slot_mapping(group, attributes)
+        if set(mapping.values()) != set(attributes):
+            continue
+        # Prefer endpoints that answered with JSON, then the most observed one.
+        score = (any(isinstance(r.response, (dict, list)) for r in group), len(group))
+        if best is None or score > best_score:
+            best, best_score = EndpointTemplate(base=group[-1], slots=mapping), score
+    if best is not None:
+        logger.debug(
+            "Variation endpoint %s %s (slots %s)", best.base.method, best.base.url, best.slots
+        )
+    return best
+
+
+def _find(data: Any, keys: Sequence[str], depth: int = 3) -> Any:
+    """First value under one of ``keys``, searching nested objects breadth-first."""
+
+    level = [data]
+    for _ in range(depth + 1):
+        following = []
+        for node in level:
+            if isinstance(node, dict):
+                lowered = {str(key).lower(): value for key, value in node.items()}
+                for key in keys:
+                    value = lowered.get(key)
+                    if value not in (None, "", [], {}):
+                        return value
+                following.extend(v for v in node.values() if isinstance(v, (dict, list)))
+            elif isinstance(node, list):
+                following.extend(v for v in node[:20] if isinstance(v, (dict, list)))
+        level = following
+    return None
+
+
+def variant_fields(payload: Any) -> Dict[str, Any]:
+    """Price, stock, SKU, image and availability from a variation response."""
+
+    price = _find(payload, _PRICE_KEYS)
+    if isinstance(price, dict):
+        price = _find(price, ("value", "amount", "final"), depth=1)
+    stock_value = _to_float(_find(payload, _STOCK_KEYS))
+    image = _find(payload, _IMAGE_KEYS)
+    if isinstance(image, dict):
+        image = _find(image, ("src", "url"), depth=1)
+    elif isinstance(image, list):
+        image = image[0] if image and isinstance(image[0], str) else None
+    sku = _find(payload, _SKU_KEYS)
+    available = _find(payload, _AVAILABLE_KEYS)
+    stock = int(stock_value) if stock_value is not None else None
+    if available is None:
+        available = stock is None or stock > 0
+    elif isinstance(available, str):
+        available = available.strip().lower() not in _FALSY
+    return {
+        "price": _to_float(price),
+        "stock": stock,
+        "sku": str(sku) if sku is not None and not isinstance(sku, (dict, list)) else None,
+        "image_url": image if isinstance(image, str) else None,
+        "available": bool(available),
+    }
+
+
+__all__ = [
+    "EndpointTemplate",
+    "RecordedRequest",
+    "infer_endpoint",
+    "variant_fields",
+]
@@ -0,0 +1,384 @@
+"""Clearance cookies for guarded shops, shared by the httpx fast paths.
+
+A shop behind a JS challenge (Cloudflare, DDoS-Guard, ...) answers every plain
+request with the interstitial. Routing each blocked URL through FlareSolverr
+or a browser costs seconds per page. The challenge is per *visitor*, though:
+once solved, the ``cf_clearance``/session cookies and the user agent that
+earned them open every page of the domain until they expire.
+
+:class:`ClearanceBroker` solves once per ``(domain, proxy, user agent)``. It
+hands the cookies to the shared httpx clients, so guarded pages are fetched
+at plain-httpx speed:
+
+* Concurrent requests that hit the guard share one solve (single flight).
+* A clearance is refreshed in the background once it is within
+  ``refresh_margin`` seconds of expiry, so requests keep using the old one
+  meanwhile.
+* A failed solve puts the key on cooldown. Callers then fall back to their
+  per-URL path instead of queueing more solves.
+
+Solvers: :func:`flaresolverr_solver` (``core.flaresolverr_client``) and
+:func:`playwright_solver`. Configuration comes from a ``clearance`` block::
+
+    {"enabled": true, "solver": "flaresolverr", "ttl_seconds": 1800,
+     "refresh_margin_seconds": 300, "failure_cooldown_seconds": 120}
+
+or from the environment: :data:`CLEARANCE_ENV` (``flaresolverr``,
+``playwright`` or ``off``), with FlareSolverr at ``FLARESOLVERR_URL``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from network.rate_limiter import domain_key, proxy_key
+from network.single_flight import SingleFlight
+from utils.helpers import looks_like_guard_html
+
+logger = logging.getLogger(__name__)
+
+CLEARANCE_ENV = "SCRAPER_CLEARANCE"
+FLARESOLVERR_URL_ENV = "FLARESOLVERR_URL"
+DEFAULT_FLARESOLVERR_URL = "http://localhost:8192"
+CLEARANCE_COOKIE = "cf_clearance"
+# Statuses challenge pages are served with; other errors are not worth a solve.
+CHALLENGE_STATUSES = frozenset({403, 503})
+
+ClearanceKey = Tuple[str, str, str]
+
+
+def is_challenge(status_code: int, text: Optional[str]) -> bool:
+    """Whether a response is a guard interstitial a clearance could get past."""
+
+    if looks_like_guard_html(text):
+        return True
+    return status_code in CHALLENGE_STATUSES and bool(text) and "<html" in text[:2048].lower()
+
+
+@dataclass(slots=True)
+class Clearance:
+    """Cookies and user agent that passed the challenge for one domain."""
+
+    domain: str
+    cookies: Dict[str, str]
+    user_agent: Optional[str]
+    expires_at: float
+    obtained_at: float = field(default_factory=time.time)
+
+    def headers(self) -> Dict[str, str]:
+        # The clearance is bound to the user agent that solved it.
+        return {"User-Agent": self.user_agent} if self.user_agent else {}
+
+
+Solver = Callable[[str, Optional[str], Optional[str]], Awaitable[Optional[Clearance]]]
+
+
+def clearance_from_cookies(
+    url: str,
+    cookies: Iterable[Mapping[str, Any]],
+    user_agent: Optional[str],
+    *,
+    now: Optional[float] = None,
+) -> Optional[Clearance]:
+    """Build a clearance from browser-style cookie dicts (``expiry``/``expires`` in epoch seconds).
+
+    The expiry is that of ``cf_clearance`` when present, else the earliest
+    persistent cookie; ``0`` means unknown (the broker applies its default TTL).
+    """
+
+    now = time.time() if now is None else now
+    values: Dict[str, str] = {}
+    expiries: Dict[str, float] = {}
+    for cookie in cookies:
+        name = cookie.get("name")
+        if not name or cookie.get("value") is None:
+            continue
+        values[str(name)] = str(cookie["value"])
+        expiry = cookie.get("expiry", cookie.get("expires"))
+        try:
+            expiry = float(expiry)
+        except (TypeError, ValueError):
+            continue
+        if expiry > now:
+            expiries[str(name)] = expiry
+    if not values:
+        return None
+    expires_at = expiries.get(CLEARANCE_COOKIE) or min(expiries.values(), default=0.0)
+    return Clearance(domain_key(url), values, user_agent, expires_at, obtained_at=now)
+
+
+class ClearanceBroker:
+    """Solve guards once per domain/proxy/user agent and share the cookies."""
+
+    def __init__(
+        self,
+        solver: Solver,
+        *,
+        ttl_seconds: float = 1800.0,
+        refresh_margin: float = 300.0,
+        failure_cooldown: float = 120.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.solver = solver
+        self.ttl_seconds = float(ttl_seconds)
+        self.refresh_margin = float(refresh_margin)
+        self.failure_cooldown = float(failure_cooldown)
+        self.clock = clock
+        self.stats = {"solves": 0, "failures": 0, "hits": 0, "refreshes": 0}
+        self._cache: Dict[ClearanceKey, Clearance] = {}
+        self._cooldown: Dict[ClearanceKey, float] = {}
+        self._refreshing: Dict[ClearanceKey, asyncio.Task] = {}
+        self._flight: SingleFlight[Optional[Clearance]] = SingleFlight(ttl=0.0)
+
+    @staticmethod
+    def key(url: str, proxy: Any = None, user_agent: Optional[str] = None) -> ClearanceKey:
+        return domain_key(url), proxy_key(proxy) or "", user_agent or ""
+
+    def lookup(
+        self, url: str, proxy: Any = None, user_agent: Optional[str] = None
+    ) -> Optional[Clearance]:
+        """Cached, unexpired clearance for ``url``; starts a refresh when it expires soon."""
+
+        key = self.key(url, proxy, user_agent)
+        clearance = self._cache.get(key)
+        if clearance is None:
+            return None
+        now = self.clock()
+        if now >= clearance.expires_at:
+            del self._cache[key]
+            return None
+        self.stats["hits"] += 1
+        if now >= clearance.expires_at - self.refresh_margin and key not in self._refreshing:
+            self._start_refresh(key, url, proxy, user_agent, clearance)
+        return clearance
+
+    def _start_refresh(
+        self,
+        key: ClearanceKey,
+        url: str,
+        proxy: Any,
+        user_agent: Optional[str],
+        current: Clearance,
+    ) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.stats["refreshes"] += 1
+        task = loop.create_task(self.obtain(url, proxy, user_agent, rejected=current))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def obtain(
+        self,
+        url: str,
+        proxy: Any = None,
+        user_agent: Optional[str] = None,
+        *,
+        rejected: Optional[Clearance] = None,
+    ) -> Optional[Clearance]:
+        """Clearance for ``url``, solving the challenge if needed.
+
+        ``rejected`` is the clearance a request just failed (or is about to
+        expire) with; it is replaced even though it has not expired yet.
+        Concurrent callers with a newer clearance in hand reuse it.
+        """
+
+        key = self.key(url, proxy, user_agent)
+        cached = self._cache.get(key)
+        if cached is not None and cached is not rejected and self.clock() < cached.expires_at:
+            return cached
+        if self.clock() < self._cooldown.get(key, 0.0):
+            return None
+        return await self._flight.do("|".join(key), lambda: self._solve(key, url, proxy, user_agent))
+
+    async def _solve(
+        self, key: ClearanceKey, url: str, proxy: Any, user_agent: Optional[str]
+    ) -> Optional[Clearance]:
+        started = self.clock()
+        try:
+            clearance = await self.solver(url, proxy, user_agent)
+        except Exception as exc:  # noqa: BLE001 - solver backends raise anything
+            logger.warning("Clearance solve failed for %s: %s", key[0], exc)
+            clearance = None
+        if clearance is None:
+            self.stats["failures"] += 1
+            self._cooldown[key] = self.clock() + self.failure_cooldown
+            return None
+        if clearance.expires_at <= started:
+            clearance.expires_at = started + self.ttl_seconds
+        self.stats["solves"] += 1
+        self._cooldown.pop(key, None)
+        self._cache[key] = clearance
+        logger.info(
+            "Clearance for %s obtained in %.1fs (%d cookies, valid %.0fs)",
+            key[0],
+            self.clock() - started,
+            len(clearance.cookies),
+            clearance.expires_at - self.clock(),
+        )
+        return clearance
+
+    def reject(self, url: str, proxy: Any = None, user_agent: Optional[str] = None) -> None:
+        """A fresh clearance still got the challenge: drop it and stop solving for a while."""
+
+        key = self.key(url, proxy, user_agent)
+        self._cache.pop(key, None)
+        self._cooldown[key] = self.clock() + self.failure_cooldown
+        self.stats["failures"] += 1
+
+    @staticmethod
+    def apply(client: Any, clearance: Clearance) -> Dict[str, str]:
+        """Put the clearance cookies into ``client``'s jar; returns the headers to send."""
+
+        for name, value in clearance.cookies.items():
+            client.cookies.set(name, value, domain=f".{clearance.domain}")
+        return clearance.headers()
+
+    async def close(self) -> None:
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+
+
+def flaresolverr_solver(client: Any) -> Solver:
+    """Solver backed by a :class:`core.flaresolverr_client.FlareSolverrClient`."""
+
+    async def solve(url: str, proxy: Optional[str], user_agent: Optional[str]) -> Optional[Clearance]:
+        raw = await client.solve_get_request(
+            url,
+            headers={"User-Agent": user_agent} if user_agent else None,
+            proxy=proxy,
+            return_raw=True,
+        )
+        solution = (raw or {}).get("solution") or {}
+        if looks_like_guard_html(solution.get("response")):
+            return None
+        return clearance_from_cookies(
+            url, solution.get("cookies") or [], solution.get("userAgent") or user_agent
+        )
+
+    return solve
+
+
+def playwright_solver(*, headless: bool = True, timeout: float = 45.0) -> Solver:
+    """Solver that opens the page in Chromium and waits until the guard is gone."""
+
+    async def solve(url: str, proxy: Optional[str], user_agent: Optional[str]) -> Optional[Clearance]:
+        from playwright.async_api import async_playwright  # Heavy import, only when solving
+
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(
+                headless=headless, proxy={"server": proxy} if proxy else None
+            )
+            try:
+                context = await browser.new_context(user_agent=user_agent or None)
+                page = await context.new_page()
+                await page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+                deadline = time.monotonic() + timeout
+                while looks_like_guard_html(await page.content()):
+                    if time.monotonic() >= deadline:
+                        return None
+                    await asyncio.sleep(1.0)
+                cookies = await context.cookies(url)
+                agent = await page.evaluate("navigator.userAgent")
+            finally:
+                await browser.close()
+        return clearance_from_cookies(url, cookies, agent)
+
+    return solve
+
+
+def create_clearance_broker(
+    config: Optional[Mapping[str, Any]] = None,
+    flaresolverr_config: Optional[Mapping[str, Any]] = None,
+) -> Optional[ClearanceBroker]:
+    """Broker from a ``clearance`` block and the environment; ``None`` when disabled."""
+
+    config = config or {}
+    solver_name = os.environ.get(CLEARANCE_ENV, "").strip().lower()
+    if not solver_name:
+        if not config.get("enabled"):
+            return None
+        solver_name = str(config.get("solver") or "flaresolverr").lower()
+    if solver_name in {"0", "off", "false", "none"}:
+        return None
+
+    if solver_name == "playwright":
+        solver = playwright_solver(timeout=float(config.get("solve_timeout_seconds", 45.0)))
+    elif solver_name == "flaresolverr":
+        from core.flaresolverr_client import FlareSolverrClient
+
+        settings = dict(flaresolverr_config or {})
+        settings["enabled"] = True
+        if os.environ.get(FLARESOLVERR_URL_ENV):
+            settings["endpoint"] = os.environ[FLARESOLVERR_URL_ENV]
+        settings.setdefault("endpoint", DEFAULT_FLARESOLVERR_URL)
+        solver = flaresolverr_solver(FlareSolverrClient(settings))
+    else:
+        logger.warning("Unknown clearance solver %r; clearance broker disabled", solver_name)
+        return None
+
+    return ClearanceBroker(
+        solver,
+        ttl_seconds=float(config.get("ttl_seconds", 1800.0)),
+        refresh_margin=float(config.get("refresh_margin_seconds", 300.0)),
+        failure_cooldown=float(config.get("failure_cooldown_seconds", 120.0)),
+    )
+
+
+_BROKER: Optional[ClearanceBroker] = None
+_BROKER_CONFIGURED = False
+
+
+def configure_clearance_broker(
+    config: Optional[Mapping[str, Any]],
+    flaresolverr_config: Optional[Mapping[str, Any]] = None,
+) -> Optional[ClearanceBroker]:
+    """Install the process-wide broker; the first one installed wins."""
+
+    global _BROKER, _BROKER_CONFIGURED
+    if not _BROKER_CONFIGURED or (_BROKER is None and config):
+        _BROKER = create_clearance_broker(config, flaresolverr_config)
+        _BROKER_CONFIGURED = True
+        if _BROKER is not None:
+            logger.info("Clearance broker enabled")
+    return _BROKER
+
+
+def set_clearance_broker(broker: Optional[ClearanceBroker]) -> None:
+    """Replace the process-wide broker (tests, explicit wiring)."""
+
+    global _BROKER, _BROKER_CONFIGURED
+    _BROKER = broker
+    _BROKER_CONFIGURED = True
+
+
+def get_clearance_broker() -> Optional[ClearanceBroker]:
+    """Process-wide broker; built from the environment on first use."""
+
+    if not _BROKER_CONFIGURED:
+        return configure_clearance_broker(None)
+    return _BROKER
+
+
+__all__ = [
+    "CLEARANCE_COOKIE",
+    "CLEARANCE_ENV",
+    "Clearance",
+    "ClearanceBroker",
+    "Solver",
+    "clearance_from_cookies",
+    "configure_clearance_broker",
+    "create_clearance_broker",
+    "flaresolverr_solver",
+    "get_clearance_broker",
+    "is_challenge",
+    "playwright_solver",
+    "set_clearance_broker",
+]
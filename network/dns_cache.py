@@ -0,0 +1,309 @@
+"""Process-wide async DNS cache and keep-alive connection pre-warming.
+
+Every ``httpx.AsyncClient`` (``AsyncFetcher``, ``ModernHttpxScraper``,
+discovery) and every aiohttp connector used to resolve hosts on its own. The
+:class:`AsyncDnsCache` singleton is shared by all of them:
+
+* httpx — :func:`cached_transport` builds an ``AsyncHTTPTransport`` whose
+  httpcore network backend resolves through the cache (TLS SNI and the Host
+  header still use the original hostname);
+* aiohttp — :class:`SharedAiohttpResolver` plugs the same cache into
+  ``aiohttp.TCPConnector(resolver=...)``.
+
+TTLs come from the DNS answer when ``aiodns`` is installed, otherwise
+``SCRAPER_DNS_TTL`` (default 300 s) applies. Concurrent lookups of one host are
+coalesced.
+
+:func:`prewarm_connections` opens and validates K keep-alive connections to a
+site (through the client's proxy, if any) before the fetch stage starts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpcore
+import httpx
+
+from network.single_flight import SingleFlight
+
+try:  # pragma: no cover - optional dependency
+    import aiodns as _aiodns
+except ImportError:  # pragma: no cover - environment without aiodns
+    _aiodns = None
+
+try:  # pragma: no cover - optional dependency
+    from aiohttp.abc import AbstractResolver as _AiohttpResolverBase
+except ImportError:  # pragma: no cover - environment without aiohttp
+    _AiohttpResolverBase = object
+
+logger = logging.getLogger(__name__)
+
+DNS_TTL_ENV = "SCRAPER_DNS_TTL"
+DEFAULT_DNS_TTL = 300.0
+MIN_DNS_TTL = 30.0
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+@dataclass(slots=True)
+class DnsEntry:
+    addresses: Tuple[Tuple[int, str], ...]  # (family, address)
+    expires_at: float
+    cursor: int = 0
+
+    def rotated(self) -> List[Tuple[int, str]]:
+        """Addresses starting at the round-robin cursor (advances it)."""
+
+        count = len(self.addresses)
+        start = self.cursor % count
+        self.cursor += 1
+        return list(self.addresses[start:] + self.addresses[:start])
+
+
+class AsyncDnsCache:
+    """TTL-honouring hostname cache shared by all async HTTP clients."""
+
+    def __init__(self, *, default_ttl: Optional[float] = None, min_ttl: float = MIN_DNS_TTL) -> None:
+        if default_ttl is None:
+            try:
+                default_ttl = float(os.environ.get(DNS_TTL_ENV, DEFAULT_DNS_TTL))
+            except ValueError:
+                default_ttl = DEFAULT_DNS_TTL
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self._entries: Dict[str, DnsEntry] = {}
+        self._lookups: SingleFlight[DnsEntry] = SingleFlight(ttl=0)
+        self._resolver: Any = None
+        self._resolver_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host: str) -> List[Tuple[int, str]]:
+        """Return ``(family, address)`` pairs for ``host``, rotated per call."""
+
+        key = host.lower().rstrip(".")
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self.hits += 1
+            return entry.rotated()
+
+        self.misses += 1
+        entry = await self._lookups.do(key, lambda: self._lookup(key))
+        self._entries[key] = entry
+        return entry.rotated()
+
+    async def _lookup(self, host: str) -> DnsEntry:
+        if _aiodns is not None:
+            try:
+                return await self._lookup_aiodns(host)
+            except Exception as exc:  # noqa: BLE001 - fall back to the system resolver
+                logger.debug("aiodns lookup failed for %s: %s", host, exc)
+
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addresses = tuple(dict.fromkeys((family, sockaddr[0]) for family, _, _, _, sockaddr in infos))
+        if not addresses:
+            raise OSError(f"DNS lookup returned no addresses for {host}")
+        return DnsEntry(addresses=addresses, expires_at=time.monotonic() + self.default_ttl)
+
+    def _aiodns_resolver(self) -> Any:
+        """One resolver (one c-ares channel) per cache and event loop."""
+
+        loop = asyncio.get_running_loop()
+        if self._resolver is None or self._resolver_loop is not loop:
+            self._resolver = _aiodns.DNSResolver(loop=loop)
+            self._resolver_loop = loop
+        return self._resolver
+
+    async def _lookup_aiodns(self, host: str) -> DnsEntry:
+        resolver = self._aiodns_resolver()
+        families = ((socket.AF_INET, "A"), (socket.AF_INET6, "AAAA"))
+        results = await asyncio.gather(
+            *(resolver.query(host, qtype) for _, qtype in families), return_exceptions=True
+        )
+        addresses: List[Tuple[int, str]] = []
+        ttls: List[float] = []
+        for (family, _), answers in zip(families, results):
+            if isinstance(answers, BaseException):  # e.g. no AAAA records
+                continue
+            for answer in answers:
+                addresses.append((family, answer.host))
+                ttls.append(float(getattr(answer, "ttl", self.default_ttl)))
+        if not addresses:
+            raise OSError(f"DNS lookup returned no addresses for {host}")
+        return DnsEntry(
+            addresses=tuple(dict.fromkeys(addresses)),
+            expires_at=time.monotonic() + max(min(ttls), self.min_ttl),
+        )
+
+    def prime(self, host: str, addresses: Iterable[str], ttl: Optional[float] = None) -> None:
+        """Seed the cache (tests, static overrides)."""
+
+        pairs = tuple(
+            (socket.AF_INET6 if ":" in address else socket.AF_INET, address) for address in addresses
+        )
+        self._entries[host.lower()] = DnsEntry(
+            addresses=pairs, expires_at=time.monotonic() + (ttl or self.default_ttl)
+        )
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        if host is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(host.lower(), None)
+
+
+_SHARED_CACHE: Optional[AsyncDnsCache] = None
+
+
+def get_dns_cache() -> AsyncDnsCache:
+    global _SHARED_CACHE
+    if _SHARED_CACHE is None:
+        _SHARED_CACHE = AsyncDnsCache()
+    return _SHARED_CACHE
+
+
+class CachedDnsBackend(httpcore.AsyncNetworkBackend):
+    """httpcore backend that connects to cached addresses (failing over in order)."""
+
+    def __init__(
+        self,
+        cache: Optional[AsyncDnsCache] = None,
+        backend: Optional[httpcore.AsyncNetworkBackend] = None,
+    ) -> None:
+        self.cache = cache or get_dns_cache()
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        if _is_ip_literal(host) or host == "localhost":
+            return await self._backend.connect_tcp(host, port, timeout, local_address, socket_options)
+
+        try:
+            addresses = await self.cache.resolve(host)
+        except OSError as exc:
+            raise httpcore.ConnectError(str(exc)) from exc
+
+        last_error: Optional[Exception] = None
+        for _family, address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout, local_address, socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                last_error = exc
+        self.cache.invalidate(host)
+        assert last_error is not None
+        raise last_error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+def cached_transport(
+    *, cache: Optional[AsyncDnsCache] = None, **transport_kwargs: Any
+) -> httpx.AsyncHTTPTransport:
+    """``httpx.AsyncHTTPTransport`` (same kwargs) resolving hosts via the shared cache."""
+
+    transport = httpx.AsyncHTTPTransport(**transport_kwargs)
+    pool = getattr(transport, "_pool", None)
+    if pool is not None and hasattr(pool, "_network_backend"):
+        pool._network_backend = CachedDnsBackend(cache)
+    else:  # pragma: no cover - httpcore internals changed
+        logger.debug("httpcore pool has no network backend hook; DNS cache not applied")
+    return transport
+
+
+class SharedAiohttpResolver(_AiohttpResolverBase):
+    """aiohttp resolver backed by the shared :class:`AsyncDnsCache`."""
+
+    def __init__(self, cache: Optional[AsyncDnsCache] = None) -> None:
+        self.cache = cache or get_dns_cache()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET):
+        pairs = await self.cache.resolve(host)
+        return [
+            {
+                "hostname": host,
+                "host": address,
+                "port": port,
+                "family": addr_family,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            }
+            for addr_family, address in pairs
+            if family in (socket.AF_UNSPEC, addr_family)
+        ]
+
+    async def close(self) -> None:
+        return None
+
+
+async def prewarm_connections(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    connections: int = 4,
+    path: str = "/",
+    timeout: float = 10.0,
+) -> int:
+    """Open ``connections`` keep-alive connections to ``url``'s origin.
+
+    Issues concurrent ``HEAD`` requests (so HTTP/1.1 pools open distinct
+    sockets) and returns how many validated with a non-5xx status.
+    """
+
+    if connections <= 0:
+        return 0
+    parsed = urlparse(url)
+    if not parsed.scheme or not parsed.netloc:
+        return 0
+    target = f"{parsed.scheme}://{parsed.netloc}{path}"
+
+    async def _one() -> bool:
+        try:
+            response = await client.head(target, timeout=timeout, follow_redirects=False)
+        except httpx.HTTPError as exc:
+            logger.debug("Pre-warm request to %s failed: %s", target, exc)
+            return False
+        return response.status_code < 500
+
+    results = await asyncio.gather(*(_one() for _ in range(connections)))
+    warmed = sum(results)
+    logger.debug("Pre-warmed %d/%d connections to %s", warmed, connections, parsed.netloc)
+    return warmed
+
+
+__all__ = [
+    "AsyncDnsCache",
+    "CachedDnsBackend",
+    "DNS_TTL_ENV",
+    "SharedAiohttpResolver",
+    "cached_transport",
+    "get_dns_cache",
+    "prewarm_connections",
+]
@@ -7,6 +7,8 @@ from contextlib import asynccontextmanager
 from fake_useragent import UserAgent
 from curl_cffi import requests as curl_requests
 from core.proxy_rotator import ProxyRotator
+from network.dns_cache import SharedAiohttpResolver
+from network.single_flight import SingleFlight, request_key
 import time
 import logging
 import json
@@ -111,6 +113,7 @@ class FastHeadlessScraper:
         self._max_request_delay = 10.0
         self._domain_last_request = {}
         self._min_domain_delay = 0.1  # Simple per-domain rate limiting
+        self._single_flight_ttl = 5.0
 
         try:
             with open("config/settings.json", "r") as f:
@@ -125,6 +128,9 @@ class FastHeadlessScraper:
                     self._request_timeout = fs_config.get(
                         "request_timeout", self._request_timeout
                     )
+                    self._single_flight_ttl = fs_config.get(
+                        "single_flight_ttl_seconds", self._single_flight_ttl
+                    )
                 if "resource_monitoring" in config:
                     rm_config = config["resource_monitoring"]
                     self._cpu_threshold = rm_config.get("cpu_threshold", 85)
@@ -144,6 +150,10 @@ class FastHeadlessScraper:
         except FileNotFoundError:
             self.verify_ssl = True
 
+        self._single_flight: SingleFlight[Optional[Tuple[str, float, Dict]]] = SingleFlight(
+            ttl=self._single_flight_ttl
+        )
+
     def adjust_concurrency(self, new_limit: int):
         """Update semaphore limits at runtime without breaking active requests."""
         if new_limit > 0:
@@ -238,6 +248,7 @@ class FastHeadlessScraper:
             enable_cleanup_closed=True,
             force_close=False,
             keepalive_timeout=self._keep_alive_timeout,
+            resolver=SharedAiohttpResolver(),
         )
         timeout = aiohttp.ClientTimeout(total=30, connect=10)
 
@@ -291,7 +302,20 @@ class FastHeadlessScraper:
         """
         Fetch single URL with rate limiting and proxy rotation.
         Returns (html, response_time, status) or None on failure.
+        Concurrent requests for the same normalized URL share one fetch.
         """
+        key = request_key("GET", url, extra=(use_proxy, use_curl))
+        return await self._single_flight.do(
+            key, lambda: self._fetch_url_uncoalesced(url, semaphore, use_proxy, use_curl)
+        )
+
+    async def _fetch_url_uncoalesced(
+        self,
+        url: str,
+        semaphore: Optional[asyncio.Semaphore],
+        use_proxy: bool,
+        use_curl: bool,
+    ) -> Optional[Tuple[str, float, Dict]]:
         if semaphore is None:
             semaphore = self._dynamic_semaphore
 
@@ -22,6 +22,12 @@ from bs4 import BeautifulSoup
 from utils.data_paths import COMPILED_DATA_ROOT, get_site_paths
 from utils.export_writers import write_product_exports
 from network.firecrawl_client import FirecrawlClient
+from parsers.structured_data import extract_structured_product
+from network.clearance import CHALLENGE_STATUSES, Clearance, configure_clearance_broker
+from network.dns_cache import cached_transport, prewarm_connections
+from network.rate_limiter import configure_rate_limiter, throttle_request
+from network.single_flight import SingleFlight, request_key
+from network.stream_cutoff import MarkerCutoff, build_cutoff, resolve_cutoff_markers
 from core.proxy_policy_manager import (
     ProxyFlowController,
     build_proxy_controller,
@@ -86,6 +92,11 @@ class ModernHttpxScraper:
         self.config_path = config_path
         self.config = self._load_config()
         self.httpx_config = self.config.get("httpx_scraper", {})
+        configure_rate_limiter(self.config.get("rate_limits"))
+        # Guard clearance cookies shared with every httpx client in the process
+        self.clearance = configure_clearance_broker(
+            self.config.get("clearance"), self.config.get("flaresolverr")
+        )
         self.logger = logging.getLogger(__name__)
         self.firecrawl_client = firecrawl_client
 
@@ -147,6 +158,11 @@ class ModernHttpxScraper:
         max_concurrent = self.httpx_config.get("max_concurrent", 50)
         self.semaphore = asyncio.Semaphore(max_concurrent)
 
+        # Duplicate in-flight requests share one response; successes are memoised briefly
+        self._single_flight: SingleFlight[Any] = SingleFlight(
+            ttl=float(self.httpx_config.get("single_flight_ttl_seconds", 5.0))
+        )
+
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file"""
         try:
@@ -249,11 +265,33 @@ class ModernHttpxScraper:
             
         return headers
 
+    def _build_transport(self, proxy: Optional[str] = None) -> httpx.AsyncHTTPTransport:
+        """Transport resolving hosts via the process-wide DNS cache."""
+
+        return cached_transport(
+            verify=self._client_config["verify"],
+            http2=self._client_config["http2"],
+            limits=self._client_config["limits"],
+            proxy=proxy,
+        )
+
     async def __aenter__(self):
         """Async context manager entry"""
-        self.client = httpx.AsyncClient(**self._client_config)
+        self.client = httpx.AsyncClient(
+            **self._client_config, transport=self._build_transport()
+        )
         return self
 
+    async def prewarm(self, url: str, connections: Optional[int] = None) -> int:
+        """Open keep-alive connections to ``url``'s origin before the fetch stage."""
+
+        if not self.client:
+            return 0
+        count = connections
+        if count is None:
+            count = int(self.httpx_config.get("prewarm_connections", 0))
+        return await prewarm_connections(self.client, url, connections=count)
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
         if self.client:
@@ -262,11 +300,21 @@ class ModernHttpxScraper:
     async def fetch_url(
         self, url: str, allow_redirect_resolution: bool = True
     ) -> Optional[Tuple[str, float, Dict[str, Any]]]:
-        """Fetch URL using multi-step proxy orchestration when available."""
+        """Fetch URL; concurrent/immediately repeated requests for it are coalesced."""
 
         if not self.client:
             raise RuntimeError("HTTP client not initialized. Use async context manager.")
 
+        key = request_key("GET", url, extra=(allow_redirect_resolution,))
+        return await self._single_flight.do(
+            key, lambda: self._fetch_url_uncoalesced(url, allow_redirect_resolution)
+        )
+
+    async def _fetch_url_uncoalesced(
+        self, url: str, allow_redirect_resolution: bool = True
+    ) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """Fetch URL using multi-step proxy orchestration when available."""
+
         async with self.semaphore:
             if not self.proxy_flow:
                 return await self._legacy_fetch_url(url, allow_redirect_resolution)
@@ -274,6 +322,8 @@ class ModernHttpxScraper:
             domain = urlparse(url).netloc
             flow_state = self.proxy_flow.start_flow(domain)
             attempt = 0
+            # Proxy ("" = direct) -> clearance the latest attempt over it sent.
+            sent_clearances: Dict[str, Optional[Clearance]] = {}
 
             while True:
                 step = flow_state.current_step
@@ -286,6 +336,7 @@ class ModernHttpxScraper:
                             url,
                             domain,
                             allow_redirect_resolution,
+                            sent_clearances=sent_clearances,
                         )
                     )
                     metadata.setdefault("attempt", attempt)
@@ -376,6 +427,7 @@ class ModernHttpxScraper:
                     )
                     
                     headers = self._get_headers()
+                    await throttle_request(url)
                     response = await self.client.get(url, headers=headers)
                     
                     response_time = time.time() - start_time
@@ -497,8 +549,14 @@ class ModernHttpxScraper:
         url: str,
         domain: str,
         allow_redirect_resolution: bool,
+        *,
+        sent_clearances: Optional[Dict[str, Optional[Clearance]]] = None,
     ) -> Tuple[str, float, Dict[str, Any], int]:
-        """Execute a single transport step from the proxy policy."""
+        """Execute a single transport step from the proxy policy.
+
+        ``sent_clearances`` collects the clearance each proxy's request sent,
+        so the FlareSolverr step only rejects one a failed request really used.
+        """
 
         if step == "direct":
             return await self._httpx_request(
@@ -507,6 +565,7 @@ class ModernHttpxScraper:
                 proxy=None,
                 allow_redirect_resolution=allow_redirect_resolution,
                 transport="direct",
+                sent_clearances=sent_clearances,
             )
 
         if step == "datacenter_proxy":
@@ -527,6 +586,7 @@ class ModernHttpxScraper:
                 proxy=proxy_url,
                 allow_redirect_resolution=allow_redirect_resolution,
                 transport="datacenter",
+                sent_clearances=sent_clearances,
             )
 
         if step == "antibot":
@@ -558,6 +618,25 @@ class ModernHttpxScraper:
             return content, response_time, metadata, bytes_used
 
         if step == "flaresolverr":
+            if self.clearance is not None:
+                # Solve once per domain; this and later URLs then go over plain httpx.
+                # Only a clearance an earlier direct attempt sent is known to be stale.
+                rejected = (sent_clearances or {}).get("")
+                if await self.clearance.obtain(url, rejected=rejected):
+                    try:
+                        return await self._httpx_request(
+                            url,
+                            domain,
+                            proxy=None,
+                            allow_redirect_resolution=allow_redirect_resolution,
+                            transport="direct",
+                            sent_clearances=sent_clearances,
+                        )
+                    except httpx.HTTPStatusError as exc:
+                        if exc.response.status_code not in CHALLENGE_STATUSES:
+                            raise
+                        self.clearance.reject(url)
+
             solver_client = getattr(self.antibot, "flaresolverr_client", None)
             if not solver_client or not solver_client.is_enabled():
                 raise ProxyUnavailableError("FlareSolverr is disabled")
@@ -597,6 +676,7 @@ class ModernHttpxScraper:
                 proxy=proxy_url,
                 allow_redirect_resolution=allow_redirect_resolution,
                 transport="residential",
+                sent_clearances=sent_clearances,
             )
 
             status = self.proxy_flow.record_residential_request(
@@ -622,6 +702,7 @@ class ModernHttpxScraper:
         proxy: Optional[str],
         allow_redirect_resolution: bool,
         transport: str,
+        sent_clearances: Optional[Dict[str, Optional[Clearance]]] = None,
     ) -> Tuple[str, float, Dict[str, Any], int]:
         """Perform an HTTPX request with optional streaming safeguards."""
 
@@ -639,18 +720,28 @@ class ModernHttpxScraper:
         start_time = time.time()
         bytes_downloaded = 0
 
+        await throttle_request(url, proxy)
+
         client = self.client
         temp_client: Optional[httpx.AsyncClient] = None
         if proxy:
-            temp_client = httpx.AsyncClient(**self._client_config, proxy=proxy)
+            temp_client = httpx.AsyncClient(
+                **self._client_config, transport=self._build_transport(proxy)
+            )
             client = temp_client
 
+        clearance = self.clearance.lookup(url, proxy) if self.clearance else None
+        if clearance is not None:
+            headers.update(self.clearance.apply(client, clearance))
+        if sent_clearances is not None:
+            sent_clearances[proxy or ""] = clearance
+
         try:
             if self.bandwidth_config.get("enable_streaming", True):
                 chunk_size = max(1, int(self.bandwidth_config.get("chunk_size_kb", 64)))
                 chunk_bytes = chunk_size * 1024
                 markers = [
-                    marker.lower()
+                    marker.lower().encode("utf-8")
                     for marker in self.bandwidth_config.get(
                         "early_termination_markers", []
                     )
@@ -660,26 +751,34 @@ class ModernHttpxScraper:
                     "abort_on_large_response", True
                 )
 
+                cutoff = self._build_marker_cutoff(url)
+
                 stream_kwargs = dict(request_kwargs)
-                content_parts: List[str] = []
+                content_parts: List[bytes] = []
+                cutoff_reason: Optional[str] = None
                 async with client.stream("GET", url, **stream_kwargs) as response:
                     status_code = response.status_code
                     response.raise_for_status()
 
-                    async for chunk in response.aiter_text(chunk_size=chunk_bytes):
+                    async for chunk in response.aiter_bytes(chunk_size=chunk_bytes):
                         content_parts.append(chunk)
-                        bytes_downloaded += len(chunk.encode("utf-8", errors="ignore"))
-                        lower_chunk = chunk.lower()
-                        if markers and any(marker in lower_chunk for marker in markers):
+                        bytes_downloaded += len(chunk)
+                        if cutoff is not None and cutoff.feed(chunk):
+                            cutoff_reason = "markers"
+                            break
+                        if markers and any(marker in chunk.lower() for marker in markers):
                             break
                         if (
                             max_bytes
                             and abort_on_large
                             and bytes_downloaded >= max_bytes
                         ):
+                            cutoff_reason = "max_bytes"
                             break
 
-                    html = "".join(content_parts)
+                    html = b"".join(content_parts).decode(
+                        response.encoding or "utf-8", errors="replace"
+                    )
                     response_time = time.time() - start_time
                     metadata = {
                         "status_code": status_code,
@@ -688,6 +787,8 @@ class ModernHttpxScraper:
                         "transport": transport,
                         "domain": domain,
                     }
+                    if cutoff_reason:
+                        metadata["truncated"] = cutoff_reason
                     budget_status = None
                     if transport != "residential":
                         budget_status = self._record_budget_usage(
@@ -729,6 +830,16 @@ class ModernHttpxScraper:
             metadata["budget_reason"] = budget_status.reason
         return html, response_time, metadata, bytes_downloaded
 
+    def _build_marker_cutoff(self, url: str) -> Optional[MarkerCutoff]:
+        """Return a per-request marker detector when marker cutoff is enabled."""
+
+        cutoff_config = self.bandwidth_config.get("marker_cutoff") or {}
+        if not cutoff_config.get("enabled", False):
+            return None
+        return build_cutoff(
+            resolve_cutoff_markers(url, cutoff_config.get("profiles"))
+        )
+
     def _record_budget_usage(
         self, domain: str, bytes_used: int, transport: str
     ) -> Optional[BudgetStatus]:
@@ -819,15 +930,30 @@ class ModernHttpxScraper:
         return processed_results
 
     def _fallback_parse_product(self, html: str, url: str) -> Dict[str, Any]:
-        """Very lightweight HTML parsing that works for generic pages."""
-        soup = None
+        """Very lightweight HTML parsing that works for generic pages.
+
+        JSON-LD / microdata / OG fields are taken first; the soup and regex
+        heuristics below only run for whatever they leave missing.
+        """
         try:
-            soup = BeautifulSoup(html, "html.parser")
-        except Exception:
-            soup = None
+            structured = extract_structured_product(html)
+        except Exception as exc:  # pragma: no cover - defensive guard
+            self.logger.debug("Structured data extraction failed for %s: %s", url, exc)
+            structured = None
 
-        title = None
-        if soup:
+        title = structured.name if structured else None
+        price = structured.price if structured else None
+        stock_quantity = structured.stock if structured else None
+        structured_in_stock = structured.in_stock if structured else None
+
+        soup = None
+        if not title or stock_quantity is None:
+            try:
+                soup = BeautifulSoup(html, "html.parser")
+            except Exception:
+                soup = None
+
+        if not title and soup:
             title_tag = soup.find("h1") or soup.find("title")
             if title_tag:
                 title = title_tag.get_text(strip=True)
@@ -847,12 +973,19 @@ class ModernHttpxScraper:
 
         clean_title = title or url
 
-        price = self._extract_price_from_html(html)
-        stock_quantity = self._extract_stock_from_html(html, soup)
-        in_stock = stock_quantity is None or stock_quantity > 0
+        if price is None:
+            price = self._extract_price_from_html(html)
+        if stock_quantity is None:
+            stock_quantity = self._extract_stock_from_html(html, soup)
+        if stock_quantity is not None and stock_quantity > 0:
+            in_stock = True
+        elif structured_in_stock is not None:
+            in_stock = structured_in_stock
+        else:
+            in_stock = stock_quantity is None or stock_quantity > 0
         site_domain = urlparse(url).netloc
 
-        return {
+        result = {
             "url": url,
             "name": clean_title,
             "price": price,
@@ -863,6 +996,10 @@ class ModernHttpxScraper:
             "scraped_at": datetime.now(UTC).isoformat(),
             "variations": [],
         }
+        if structured:
+            for key, value in structured.extra_fields().items():
+                result.setdefault(key, value)
+        return result
 
     @staticmethod
     def _extract_price_from_html(html: str) -> float:
@@ -1278,12 +1415,18 @@ class ModernHttpxScraper:
         return variations
 
     async def _resolve_redirect_chain(self, url: str) -> Optional[str]:
+        return await self._single_flight.do(
+            request_key("REDIRECT", url), lambda: self._follow_redirect_chain(url)
+        )
+
+    async def _follow_redirect_chain(self, url: str) -> Optional[str]:
         headers = self._get_headers()
         try:
             async with httpx.AsyncClient(
                 timeout=self.client.timeout,
                 follow_redirects=False,
                 headers=headers,
+                transport=self._build_transport(),
             ) as resolver:
                 current = url
                 visited: Set[str] = set()
@@ -1392,6 +1535,9 @@ class ModernHttpxScraper:
         # Update analyzer base URL
         self.analyzer.base_url = base_url
 
+        if target_urls:
+            await self.prewarm(target_urls[0])
+
         # Batch fetch all URLs
         results = await self.fetch_urls_batch(target_urls)
 
@@ -0,0 +1,355 @@
+"""Token-bucket rate limiting per domain and per proxy, shared across workers.
+
+Politeness used to be enforced per process (crawl-delay sleeps, scheduler
+delays), so N workers against one shop sent N times the intended rate. A
+:class:`RequestRateLimiter` keys token buckets by target domain and by proxy
+endpoint; with the Redis backend every worker draws from the same buckets, so
+more workers can run against a site at its maximum safe *aggregate* rate.
+
+Buckets use reservation semantics: each request takes its tokens immediately
+(the balance may go negative) and sleeps for the time the bucket needs to pay
+the debt back. One atomic call per request - a Lua script on Redis, a lock in
+process - and no polling between workers. Waiters are served in arrival order.
+
+Configuration comes from a ``rate_limits`` block::
+
+    {"backend": "redis", "redis_url": "redis://localhost:6379/0",
+     "domain": {"rate": 2, "burst": 4},
+     "proxy": {"rate": 5, "burst": 5},
+     "domains": {"shop.example": {"rate": 0.5, "burst": 1}}}
+
+or from the environment: :data:`RATE_LIMITER_ENV` (``memory`` or a Redis URL),
+:data:`DOMAIN_RATE_ENV` / :data:`PROXY_RATE_ENV` (``"rate"`` or
+``"rate/burst"``). Nothing configured means no limiter and no overhead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+try:  # pragma: no cover - optional dependency
+    import redis.asyncio as _aioredis
+    from redis.exceptions import RedisError as _RedisError
+except ImportError:  # pragma: no cover - environment without redis
+    _aioredis = None
+    _RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITER_ENV = "SCRAPER_RATE_LIMITER"
+DOMAIN_RATE_ENV = "SCRAPER_DOMAIN_RATE"
+PROXY_RATE_ENV = "SCRAPER_PROXY_RATE"
+DEFAULT_KEY_PREFIX = "scraper:ratelimit"
+
+# KEYS: bucket keys. ARGV: cost, ttl, then rate/burst per key.
+# Returns the longest wait (seconds, as a string: Lua numbers become integers).
+_RESERVE_SCRIPT = """
+pcall(redis.replicate_commands)
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local wait = 0
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[1 + 2 * i])
+  local burst = tonumber(ARGV[2 + 2 * i])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or burst
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - cost
+  redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+  redis.call('EXPIRE', key, ttl)
+  if tokens < 0 then
+    wait = math.max(wait, -tokens / rate)
+  end
+end
+return tostring(wait)
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    """``rate`` requests per second with bursts of up to ``burst``."""
+
+    rate: float
+    burst: float = 1.0
+
+    @classmethod
+    def parse(cls, value: Any) -> Optional["RateLimit"]:
+        """From ``{"rate", "burst"}``, ``"rate/burst"`` or a number; ``None`` if unset/invalid."""
+
+        try:
+            if isinstance(value, Mapping):
+                rate = float(value.get("rate", 0) or 0)
+                burst = float(value.get("burst", 0) or 0)
+            elif isinstance(value, str) and value.strip():
+                rate_text, _, burst_text = value.strip().partition("/")
+                rate, burst = float(rate_text), float(burst_text or 0)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                rate, burst = float(value), 0.0
+            else:
+                return None
+        except ValueError:
+            return None
+        if rate <= 0:
+            return None
+        return cls(rate, max(burst, 1.0))
+
+
+class MemoryTokenBuckets:
+    """In-process buckets (single worker, tests)."""
+
+    backend = "memory"
+
+    def __init__(self, clock: Any = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def reserve_now(self, items: Sequence[Tuple[str, RateLimit]], cost: float = 1.0) -> float:
+        now = self._clock()
+        wait = 0.0
+        with self._lock:
+            for key, limit in items:
+                tokens, stamp = self._buckets.get(key, (limit.burst, now))
+                tokens = min(limit.burst, tokens + max(0.0, now - stamp) * limit.rate) - cost
+                self._buckets[key] = (tokens, now)
+                if tokens < 0:
+                    wait = max(wait, -tokens / limit.rate)
+        return wait
+
+    async def reserve(self, items: Sequence[Tuple[str, RateLimit]], cost: float = 1.0) -> float:
+        return self.reserve_now(items, cost)
+
+    async def close(self) -> None:
+        return None
+
+
+class RedisTokenBuckets:
+    """Buckets shared through Redis; one Lua call reserves all keys atomically."""
+
+    backend = "redis"
+
+    def __init__(self, client: Any, prefix: str = DEFAULT_KEY_PREFIX, ttl_seconds: int = 3600) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self._script = client.register_script(_RESERVE_SCRIPT)
+        self._fallback: Optional[MemoryTokenBuckets] = None
+
+    async def reserve(self, items: Sequence[Tuple[str, RateLimit]], cost: float = 1.0) -> float:
+        if self._fallback is not None:
+            return self._fallback.reserve_now(items, cost)
+        args: list = [cost, self.ttl_seconds]
+        for _, limit in items:
+            args.extend((limit.rate, limit.burst))
+        try:
+            wait = await self._script(keys=[f"{self.prefix}:{key}" for key, _ in items], args=args)
+        except (_RedisError, OSError) as exc:
+            logger.warning("Redis rate limiter failed (%s); limiting per process from now on", exc)
+            self._fallback = MemoryTokenBuckets()
+            return self._fallback.reserve_now(items, cost)
+        return float(wait)
+
+    async def close(self) -> None:
+        closer = getattr(self.client, "aclose", None) or getattr(self.client, "close", None)
+        if closer is not None:
+            await closer()
+
+
+def domain_key(url_or_domain: str) -> str:
+    """Bucket name for a URL or bare domain (lowercase host, no ``www.``/port)."""
+
+    text = (url_or_domain or "").strip()
+    host = urlsplit(text).hostname if "://" in text else text.split("/", 1)[0].split(":", 1)[0]
+    host = (host or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def proxy_key(proxy: Any) -> Optional[str]:
+    """Bucket name for a proxy endpoint (``host:port``, credentials dropped)."""
+
+    if not proxy:
+        return None
+    text = str(getattr(proxy, "url", proxy))
+    parts = urlsplit(text if "://" in text else f"http://{text}")
+    if not parts.hostname:
+        return None
+    return f"{parts.hostname.lower()}:{parts.port}" if parts.port else parts.hostname.lower()
+
+
+class RequestRateLimiter:
+    """Per-domain and per-proxy token buckets in front of every fetch path."""
+
+    def __init__(
+        self,
+        buckets: Any,
+        *,
+        domain_limit: Optional[RateLimit] = None,
+        proxy_limit: Optional[RateLimit] = None,
+        domain_overrides: Optional[Mapping[str, RateLimit]] = None,
+    ) -> None:
+        self.buckets = buckets
+        self.domain_limit = domain_limit
+        self.proxy_limit = proxy_limit
+        self.domain_overrides: Dict[str, RateLimit] = {
+            domain_key(domain): limit for domain, limit in (domain_overrides or {}).items()
+        }
+        self.stats = {"requests": 0, "throttled": 0, "waited_seconds": 0.0}
+
+    @property
+    def backend(self) -> str:
+        return getattr(self.buckets, "backend", "memory")
+
+    def limit_for_domain(self, domain: str) -> Optional[RateLimit]:
+        return self.domain_overrides.get(domain_key(domain), self.domain_limit)
+
+    def tighten_domain(self, domain: str, limit: RateLimit) -> None:
+        """Cap ``domain`` at ``limit`` unless it is already slower (e.g. robots.txt crawl-delay)."""
+
+        key = domain_key(domain)
+        current = self.limit_for_domain(key)
+        if current is None or limit.rate < current.rate:
+            self.domain_overrides[key] = limit
+
+    def _items(self, url: str, proxy: Any) -> list:
+        items = []
+        domain = domain_key(url)
+        limit = self.limit_for_domain(domain) if domain else None
+        if limit is not None:
+            items.append((f"domain:{domain}", limit))
+        endpoint = proxy_key(proxy) if self.proxy_limit is not None else None
+        if endpoint:
+            items.append((f"proxy:{endpoint}", self.proxy_limit))
+        return items
+
+    async def throttle(self, url: str, proxy: Any = None, cost: float = 1.0) -> float:
+        """Reserve a slot for a request to ``url`` (through ``proxy``) and wait for it."""
+
+        items = self._items(url, proxy)
+        if not items:
+            return 0.0
+        wait = await self.buckets.reserve(items, cost)
+        self.stats["requests"] += 1
+        if wait > 0:
+            self.stats["throttled"] += 1
+            self.stats["waited_seconds"] += wait
+            await asyncio.sleep(wait)
+        return wait
+
+    async def close(self) -> None:
+        await self.buckets.close()
+
+
+def create_rate_limiter(config: Optional[Mapping[str, Any]] = None) -> Optional[RequestRateLimiter]:
+    """Limiter from a ``rate_limits`` block and the environment; ``None`` when no limit is set."""
+
+    config = config or {}
+    if config.get("enabled") is False:
+        return None
+    domain_limit = RateLimit.parse(os.environ.get(DOMAIN_RATE_ENV) or config.get("domain"))
+    proxy_limit = RateLimit.parse(os.environ.get(PROXY_RATE_ENV) or config.get("proxy"))
+    overrides = {
+        domain: limit
+        for domain, raw in (config.get("domains") or {}).items()
+        if (limit := RateLimit.parse(raw)) is not None
+    }
+    if domain_limit is None and proxy_limit is None and not overrides:
+        return None
+
+    backend = os.environ.get(RATE_LIMITER_ENV, "").strip() or str(config.get("backend") or "memory")
+    redis_url = backend if "://" in backend else config.get("redis_url")
+    buckets: Any = None
+    if (backend == "redis" or "://" in backend) and redis_url:
+        if _aioredis is None:
+            logger.warning("redis package not installed; rate limits apply per process")
+        else:
+            client = _aioredis.Redis.from_url(
+                str(redis_url), socket_timeout=2.0, socket_connect_timeout=2.0
+            )
+            buckets = RedisTokenBuckets(
+                client,
+                prefix=str(config.get("key_prefix") or DEFAULT_KEY_PREFIX),
+                ttl_seconds=int(config.get("ttl_seconds", 3600)),
+            )
+    return RequestRateLimiter(
+        buckets or MemoryTokenBuckets(),
+        domain_limit=domain_limit,
+        proxy_limit=proxy_limit,
+        domain_overrides=overrides,
+    )
+
+
+_LIMITER: Optional[RequestRateLimiter] = None
+_LIMITER_CONFIGURED = False
+
+
+def configure_rate_limiter(config: Optional[Mapping[str, Any]]) -> Optional[RequestRateLimiter]:
+    """Install the process-wide limiter from a ``rate_limits`` block.
+
+    The first limiter installed wins, so every component of a worker shares
+    the same buckets.
+    """
+
+    global _LIMITER, _LIMITER_CONFIGURED
+    if not _LIMITER_CONFIGURED or (_LIMITER is None and config):
+        _LIMITER = create_rate_limiter(config)
+        _LIMITER_CONFIGURED = True
+        if _LIMITER is not None:
+            logger.info(
+                "Request rate limiter enabled (%s backend): domain=%s proxy=%s",
+                _LIMITER.backend,
+                _LIMITER.domain_limit,
+                _LIMITER.proxy_limit,
+            )
+    return _LIMITER
+
+
+def set_rate_limiter(limiter: Optional[RequestRateLimiter]) -> None:
+    """Replace the process-wide limiter (tests, explicit wiring)."""
+
+    global _LIMITER, _LIMITER_CONFIGURED
+    _LIMITER = limiter
+    _LIMITER_CONFIGURED = True
+
+
+def get_rate_limiter() -> Optional[RequestRateLimiter]:
+    """Process-wide limiter; built from the environment on first use."""
+
+    if not _LIMITER_CONFIGURED:
+        return configure_rate_limiter(None)
+    return _LIMITER
+
+
+async def throttle_request(url: str, proxy: Any = None) -> float:
+    """Wait for the domain/proxy buckets of ``url``; no-op without a limiter."""
+
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return 0.0
+    return await limiter.throttle(url, proxy)
+
+
+__all__ = [
+    "DOMAIN_RATE_ENV",
+    "PROXY_RATE_ENV",
+    "RATE_LIMITER_ENV",
+    "MemoryTokenBuckets",
+    "RateLimit",
+    "RedisTokenBuckets",
+    "RequestRateLimiter",
+    "configure_rate_limiter",
+    "create_rate_limiter",
+    "domain_key",
+    "get_rate_limiter",
+    "proxy_key",
+    "set_rate_limiter",
+    "throttle_request",
+]
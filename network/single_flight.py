@@ -0,0 +1,172 @@
+"""Single-flight request coalescing with a short-TTL memo.
+
+Concurrent callers asking for the same key share one in-flight coroutine
+instead of issuing duplicate requests (canonical/non-canonical duplicates,
+variation API calls for sibling products, category pages revisited during
+discovery, redirect resolution). Successful results are additionally memoised
+for ``ttl`` seconds so immediate repeats are free as well.
+
+The shared task is shielded: cancelling one waiter never cancels the request
+for the others. Exceptions are propagated to every waiter and never memoised.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Iterable, Mapping, Optional, Tuple, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+T = TypeVar("T")
+
+# Headers that change the response body; everything else is ignored for keys.
+VARY_HEADERS: Tuple[str, ...] = (
+    "accept",
+    "accept-language",
+    "authorization",
+    "cookie",
+    "x-requested-with",
+)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form for keys: lowercase scheme/host, no default port/fragment, sorted query."""
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def request_key(
+    method: str,
+    url: str,
+    *,
+    headers: Optional[Mapping[str, str]] = None,
+    body: Any = None,
+    vary: Iterable[str] = VARY_HEADERS,
+    extra: Iterable[Any] = (),
+) -> str:
+    """Build a coalescing key from method, normalised URL, relevant headers and body."""
+
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(method.upper().encode("ascii"))
+    digest.update(b"\0" + normalize_url(url).encode("utf-8"))
+    if headers:
+        lowered = {str(key).lower(): str(value) for key, value in headers.items()}
+        for name in vary:
+            if name in lowered:
+                digest.update(f"\0{name}={lowered[name]}".encode("utf-8"))
+    if body is not None:
+        if isinstance(body, Mapping):
+            body = sorted((str(key), str(value)) for key, value in body.items())
+        digest.update(b"\0" + repr(body).encode("utf-8"))
+    for item in extra:
+        digest.update(b"\0" + repr(item).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class SingleFlightStats:
+    calls: int = 0
+    executed: int = 0
+    coalesced: int = 0
+    memo_hits: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.coalesced + self.memo_hits
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent calls per key and memoise successes for ``ttl`` seconds.
+
+    Args:
+        ttl: Memo lifetime in seconds (0 disables memoisation, coalescing stays on).
+        max_entries: Upper bound for memoised results (LRU eviction).
+        cacheable: Predicate deciding whether a result may be memoised
+            (default: anything but ``None``).
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 5.0,
+        max_entries: int = 1024,
+        cacheable: Optional[Callable[[T], bool]] = None,
+    ) -> None:
+        self.ttl = max(float(ttl), 0.0)
+        self.max_entries = max(int(max_entries), 1)
+        self.cacheable = cacheable or (lambda value: value is not None)
+        self.stats = SingleFlightStats()
+        self._inflight: Dict[str, "asyncio.Task[T]"] = {}
+        self._memo: "OrderedDict[str, Tuple[float, T]]" = OrderedDict()
+
+    def _memo_get(self, key: str) -> Tuple[bool, Optional[T]]:
+        entry = self._memo.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._memo[key]
+            return False, None
+        self._memo.move_to_end(key)
+        return True, value
+
+    def _memo_put(self, key: str, value: T) -> None:
+        if self.ttl <= 0 or not self.cacheable(value):
+            return
+        self._memo[key] = (time.monotonic() + self.ttl, value)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """Return the memoised/in-flight result for ``key`` or run ``factory``."""
+
+        self.stats.calls += 1
+        hit, value = self._memo_get(key)
+        if hit:
+            self.stats.memo_hits += 1
+            return value  # type: ignore[return-value]
+
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.stats.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.stats.executed += 1
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+
+        def _done(finished: "asyncio.Task[T]") -> None:
+            if self._inflight.get(key) is finished:
+                del self._inflight[key]
+            if not finished.cancelled() and finished.exception() is None:
+                self._memo_put(key, finished.result())
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+    def forget(self, key: str) -> None:
+        self._memo.pop(key, None)
+
+    def clear(self) -> None:
+        self._memo.clear()
+
+
+__all__ = [
+    "SingleFlight",
+    "SingleFlightStats",
+    "VARY_HEADERS",
+    "normalize_url",
+    "request_key",
+]
@@ -0,0 +1,505 @@
+"""Lightweight price/stock probes for scheduled stock monitoring.
+
+Full exports download every product page and run the complete parser stack.
+For hourly stock checks only price, stock and availability matter, so this
+module asks each CMS for its cheapest machine-readable source instead:
+
+* InSales — ``<product-url>.json`` (public storefront JSON);
+* shop2 (cm3) — ``shop2.init`` config from the page + ``getProductListItem``;
+* Bitrix — the inline offers JSON (``JCCatalogElement`` / ``OFFERS``);
+* CS-Cart — ``/api/2.0/products/{id}`` when an API key is configured
+  (same credentials as ``VariationParser``);
+* anything else — JSON-LD / microdata / Open Graph price tags.
+
+Parsing is regex + ``json.loads`` only; BeautifulSoup is never loaded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+from utils.cms_detection import DOMAIN_HINTS
+from utils.json_blocks import decode_json_after
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CMS_BY_DOMAIN: Dict[str, str] = {
+    **{domain: cms for domain, (cms, _weight) in DOMAIN_HINTS.items()},
+    "manefa.ru": "insales",
+    "sittingknitting.ru": "bitrix",
+}
+
+_TRUTHY = {"1", "true", "yes", "y", "on", "да"}
+_IN_STOCK_SCHEMA = ("instock", "limitedavailability", "onlineonly", "presale", "preorder")
+
+_JSON_LD_RE = re.compile(
+    r"<script[^>]+type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+    re.IGNORECASE | re.DOTALL,
+)
+_META_PRICE_RE = re.compile(
+    r"<meta[^>]+(?:itemprop=[\"']price[\"']|property=[\"'](?:product:price:amount|og:price:amount)[\"'])"
+    r"[^>]*content=[\"']([^\"']+)[\"']",
+    re.IGNORECASE,
+)
+_META_AVAILABILITY_RE = re.compile(
+    r"(?:itemprop=[\"']availability[\"'][^>]*(?:content|href)=[\"']|"
+    r"property=[\"']product:availability[\"'][^>]*content=[\"'])([^\"']+)",
+    re.IGNORECASE,
+)
+_SHOP2_PRICE_RE = re.compile(r"price-current[^>]*>\s*<strong[^>]*>([^<]+)<", re.IGNORECASE)
+_SHOP2_BUY_RE = re.compile(r"shop-product-btn[^\"']*\bbuy\b[^>]*>", re.IGNORECASE)
+_CSCART_ID_RE = re.compile(r"product_data\[(\d+)\]|data-ca-product-id=[\"'](\d+)")
+_BITRIX_MARKERS = ("new JCCatalogElement(", "JCCatalogElement(", "OFFERS")
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = re.sub(r"[^\d,.\-]", "", str(value)).replace(",", ".")
+    if cleaned.count(".") > 1:
+        head, _, tail = cleaned.rpartition(".")
+        cleaned = head.replace(".", "") + "." + tail
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _truthy(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUTHY or value.strip().upper() == "Y"
+    return bool(value)
+
+
+@dataclass(slots=True)
+class StockSnapshot:
+    """Price/stock state of a single product at ``fetched_at``."""
+
+    url: str
+    price: Optional[float] = None
+    in_stock: Optional[bool] = None
+    stock: Optional[float] = None
+    variations: List[Dict[str, Any]] = field(default_factory=list)
+    source: str = "html"
+    fetched_at: float = field(default_factory=time.time)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (self.price is not None or self.in_stock is not None)
+
+    def summarize_variations(self) -> None:
+        """Derive product-level price/stock from variations when missing."""
+
+        if not self.variations:
+            return
+        prices = [item["price"] for item in self.variations if item.get("price") is not None]
+        if self.price is None and prices:
+            self.price = min(prices)
+        stocks = [item["stock"] for item in self.variations if item.get("stock") is not None]
+        if self.stock is None and stocks:
+            self.stock = float(sum(stocks))
+        if self.in_stock is None:
+            self.in_stock = any(item.get("in_stock") for item in self.variations)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "price": self.price,
+            "in_stock": self.in_stock,
+            "stock": self.stock,
+            "stock_quantity": self.stock,
+            "variations": self.variations,
+            "source": self.source,
+            "fetched_at": self.fetched_at,
+            "error": self.error,
+        }
+
+
+ProbeHandler = Callable[[httpx.AsyncClient, str, Mapping[str, Any]], Awaitable[StockSnapshot]]
+
+
+class LightweightStockMonitor:
+    """Fetch price/stock for many product URLs via per-CMS cheap endpoints.
+
+    Args:
+        cms_by_domain: Overrides for the CMS of a domain (``insales``, ``cm3``,
+            ``bitrix``, ``cscart``); unknown domains use the generic HTML probe.
+        concurrency: Maximum number of in-flight products.
+        timeout: Per-request timeout in seconds.
+        api_credentials: Same structure as ``VariationParser.api_credentials``.
+        client: Optional pre-built ``httpx.AsyncClient`` (not closed here).
+    """
+
+    def __init__(
+        self,
+        *,
+        cms_by_domain: Optional[Mapping[str, str]] = None,
+        concurrency: int = 16,
+        timeout: float = 15.0,
+        api_credentials: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.cms_by_domain = dict(DEFAULT_CMS_BY_DOMAIN)
+        if cms_by_domain:
+            self.cms_by_domain.update({k.lower(): v.lower() for k, v in cms_by_domain.items()})
+        self.concurrency = max(int(concurrency), 1)
+        self.timeout = timeout
+        self.api_credentials = dict(api_credentials or {})
+        self.headers = dict(headers or {})
+        self._client = client
+        self._probes: Dict[str, ProbeHandler] = {
+            "insales": self._probe_insales,
+            "cm3": self._probe_shop2,
+            "shop2": self._probe_shop2,
+            "bitrix": self._probe_bitrix,
+            "cscart": self._probe_cscart,
+        }
+
+    def cms_for(self, url: str) -> Optional[str]:
+        host = urlparse(url).netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return self.cms_by_domain.get(host)
+
+    async def check(
+        self,
+        urls: Sequence[str],
+        *,
+        hints: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ) -> List[StockSnapshot]:
+        """Probe ``urls``; ``hints`` maps URL -> previous record (e.g. product_id)."""
+
+        if not urls:
+            return []
+        hints = hints or {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _one(client: httpx.AsyncClient, url: str) -> StockSnapshot:
+            async with semaphore:
+                return await self.probe(client, url, hints.get(url) or {})
+
+        if self._client is not None:
+            return list(await asyncio.gather(*(_one(self._client, url) for url in urls)))
+
+        limits = httpx.Limits(
+            max_connections=self.concurrency, max_keepalive_connections=self.concurrency
+        )
+        async with httpx.AsyncClient(
+            headers=self.headers or None,
+            timeout=httpx.Timeout(self.timeout),
+            limits=limits,
+            follow_redirects=True,
+        ) as client:
+            return list(await asyncio.gather(*(_one(client, url) for url in urls)))
+
+    async def probe(
+        self, client: httpx.AsyncClient, url: str, hint: Mapping[str, Any]
+    ) -> StockSnapshot:
+        handler = self._probes.get(self.cms_for(url) or "", self._probe_html)
+        try:
+            snapshot = await handler(client, url, hint)
+        except (httpx.HTTPError, ValueError) as exc:
+            logger.debug("Stock probe failed for %s: %s", url, exc)
+            return StockSnapshot(url=url, error=str(exc) or exc.__class__.__name__)
+        snapshot.summarize_variations()
+        return snapshot
+
+    # --- CMS probes -----------------------------------------------------------
+
+    async def _get(self, client: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+        response = await client.get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def _probe_insales(
+        self, client: httpx.AsyncClient, url: str, hint: Mapping[str, Any]
+    ) -> StockSnapshot:
+        base = url.split("?", 1)[0].rstrip("/")
+        response = await client.get(f"{base}.json", headers={"Accept": "application/json"})
+        if response.status_code != 200:
+            return await self._probe_html(client, url, hint)
+        payload = response.json()
+        product = payload.get("product", payload) if isinstance(payload, dict) else None
+        if not isinstance(product, dict):
+            raise ValueError("Unexpected InSales product payload")
+
+        variations = []
+        for variant in product.get("variants") or []:
+            if not isinstance(variant, dict):
+                continue
+            quantity = _to_float(variant.get("quantity"))
+            available = variant.get("available")
+            variations.append(
+                {
+                    "variant_id": variant.get("id"),
+                    "sku": variant.get("sku"),
+                    "price": _to_float(variant.get("price")),
+                    "stock": quantity,
+                    "in_stock": bool(available) if available is not None else bool(quantity),
+                }
+            )
+        return StockSnapshot(
+            url=url,
+            price=_to_float(product.get("price_min") or product.get("price")),
+            variations=variations,
+            source="insales_json",
+        )
+
+    async def _probe_shop2(
+        self, client: httpx.AsyncClient, url: str, hint: Mapping[str, Any]
+    ) -> StockSnapshot:
+        html_text = (await self._get(client, url)).text
+        marker = html_text.find("shop2.init(")
+        config = decode_json_after(html_text, marker + len("shop2.init("), skip="(=") if marker != -1 else None
+        config = config if isinstance(config, dict) else {}
+        refs = config.get("productRefs")
+        api_hash = config.get("apiHash")
+        api_hash = api_hash.get("getProductListItem") if isinstance(api_hash, dict) else None
+        ver_id = config.get("verId")
+        if not isinstance(refs, dict) or not refs or not api_hash or not ver_id:
+            return self._snapshot_from_markup(url, html_text, source="shop2_html")
+
+        product_id = next(iter(refs))
+        kind_ids: Dict[str, None] = {}
+        stack: List[Any] = [refs[product_id]]
+        while stack:
+            node = stack.pop(0)
+            if isinstance(node, dict):
+                stack.extend(node.values())
+            elif isinstance(node, (list, tuple)):
+                stack.extend(node)
+            elif isinstance(node, (str, int)):
+                kind_ids[str(node)] = None
+
+        origin = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+        endpoint = f"{origin}/-/shop2-api/?cmd=getProductListItem&hash={api_hash}&ver_id={ver_id}"
+        variations = []
+        for kind_id in kind_ids:
+            response = await client.post(
+                endpoint,
+                data={"product_id": product_id, "kind_id": kind_id},
+                headers={"X-Requested-With": "XMLHttpRequest", "Referer": url},
+            )
+            response.raise_for_status()
+            payload = response.json()
+            data = payload.get("data") if isinstance(payload, dict) else None
+            body = data.get("body") if isinstance(data, dict) else None
+            if not isinstance(body, str):
+                continue
+            price_match = _SHOP2_PRICE_RE.search(body)
+            buy_match = _SHOP2_BUY_RE.search(body)
+            in_stock = bool(buy_match and "disabled" not in buy_match.group(0))
+            variations.append(
+                {
+                    "variant_id": kind_id,
+                    "price": _to_float(price_match.group(1)) if price_match else None,
+                    "stock": 1.0 if in_stock else 0.0,
+                    "in_stock": in_stock,
+                }
+            )
+
+        if not variations:
+            return self._snapshot_from_markup(url, html_text, source="shop2_html")
+        return StockSnapshot(url=url, variations=variations, source="shop2_api")
+
+    async def _probe_bitrix(
+        self, client: httpx.AsyncClient, url: str, hint: Mapping[str, Any]
+    ) -> StockSnapshot:
+        html_text = (await self._get(client, url)).text
+        offers: List[Dict[str, Any]] = []
+        for marker in _BITRIX_MARKERS:
+            position = html_text.find(marker)
+            if position == -1:
+                continue
+            start = position + len(marker)
+            if marker == "OFFERS":
+                start = html_text.find(":", start) + 1 or start
+            data = decode_json_after(html_text, start, skip="(=")
+            if isinstance(data, dict):
+                data = data.get("OFFERS") or data.get("offers")
+            if isinstance(data, list):
+                offers = [item for item in data if isinstance(item, dict)]
+                if offers:
+                    break
+
+        if not offers:
+            return self._snapshot_from_markup(url, html_text, source="bitrix_html")
+
+        variations = []
+        for offer in offers:
+            price_block = offer.get("ITEM_PRICES") or offer.get("PRICE") or offer.get("PRICES")
+            price = None
+            if isinstance(price_block, list) and price_block:
+                price_block = price_block[0]
+            if isinstance(price_block, dict):
+                price = _to_float(
+                    price_block.get("PRICE")
+                    or price_block.get("DISCOUNT_PRICE")
+                    or price_block.get("DISCOUNT_VALUE")
+                    or price_block.get("VALUE")
+                )
+            quantity = _to_float(offer.get("MAX_QUANTITY") or offer.get("CATALOG_QUANTITY"))
+            can_buy = offer.get("CAN_BUY")
+            in_stock = _truthy(can_buy) if can_buy is not None else bool(quantity and quantity > 0)
+            variations.append(
+                {
+                    "variant_id": offer.get("ID"),
+                    "price": price,
+                    "stock": quantity,
+                    "in_stock": in_stock,
+                }
+            )
+        return StockSnapshot(url=url, variations=variations, source="bitrix_offers")
+
+    async def _probe_cscart(
+        self, client: httpx.AsyncClient, url: str, hint: Mapping[str, Any]
+    ) -> StockSnapshot:
+        credentials = self.api_credentials.get("cscart") or {}
+        api_key = os.environ.get(credentials.get("api_key_env", "CSCART_API_KEY"))
+        product_id = hint.get("product_id")
+        html_text: Optional[str] = None
+        if api_key and not product_id:
+            html_text = (await self._get(client, url)).text
+            match = _CSCART_ID_RE.search(html_text)
+            product_id = (match.group(1) or match.group(2)) if match else None
+        if not api_key or not product_id:
+            if html_text is None:
+                html_text = (await self._get(client, url)).text
+            return self._snapshot_from_markup(url, html_text, source="cscart_html")
+
+        parsed = urlparse(url)
+        pattern = credentials.get("api_url_pattern") or "/api/2.0/products/{product_id}"
+        endpoint = urljoin(f"{parsed.scheme}://{parsed.netloc}", pattern.format(product_id=product_id))
+        response = await self._get(
+            client,
+            endpoint,
+            headers={"Accept": "application/json", "Authorization": f"Bearer {api_key}"},
+        )
+        payload = response.json()
+        if not isinstance(payload, dict):
+            raise ValueError("Unexpected CS-Cart product payload")
+
+        amount = _to_float(payload.get("amount"))
+        variations = []
+        combinations = payload.get("variations") or payload.get("combinations") or []
+        if isinstance(combinations, dict):
+            combinations = list(combinations.values())
+        for item in combinations:
+            if not isinstance(item, dict):
+                continue
+            quantity = _to_float(item.get("amount"))
+            variations.append(
+                {
+                    "variant_id": item.get("product_id") or item.get("combination_hash"),
+                    "price": _to_float(item.get("price")),
+                    "stock": quantity,
+                    "in_stock": bool(quantity and quantity > 0),
+                }
+            )
+        return StockSnapshot(
+            url=url,
+            price=_to_float(payload.get("price")),
+            stock=amount,
+            in_stock=None if amount is None and variations else bool(amount and amount > 0),
+            variations=variations,
+            source="cscart_api",
+        )
+
+    async def _probe_html(
+        self, client: httpx.AsyncClient, url: str, hint: Mapping[str, Any]
+    ) -> StockSnapshot:
+        html_text = (await self._get(client, url)).text
+        return self._snapshot_from_markup(url, html_text, source="html")
+
+    @staticmethod
+    def _snapshot_from_markup(url: str, html_text: str, *, source: str) -> StockSnapshot:
+        """Extract price/availability from JSON-LD, microdata or OG tags."""
+
+        price: Optional[float] = None
+        availability: Optional[str] = None
+        for block in _JSON_LD_RE.findall(html_text):
+            try:
+                data = json.loads(block.strip())
+            except json.JSONDecodeError:
+                continue
+            stack: List[Any] = [data]
+            while stack and price is None:
+                node = stack.pop()
+                if isinstance(node, list):
+                    stack.extend(node)
+                    continue
+                if not isinstance(node, dict):
+                    continue
+                offers = node.get("offers")
+                if isinstance(offers, (dict, list)):
+                    offer_list = offers if isinstance(offers, list) else [offers]
+                    for offer in offer_list:
+                        if not isinstance(offer, dict):
+                            continue
+                        price = _to_float(offer.get("price") or offer.get("lowPrice"))
+                        availability = str(offer.get("availability") or "") or None
+                        if price is not None:
+                            break
+                stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+            if price is not None:
+                break
+
+        if price is None:
+            match = _META_PRICE_RE.search(html_text)
+            price = _to_float(match.group(1)) if match else None
+        if availability is None:
+            match = _META_AVAILABILITY_RE.search(html_text)
+            availability = match.group(1) if match else None
+
+        in_stock = None
+        if availability:
+            in_stock = any(token in availability.lower() for token in _IN_STOCK_SCHEMA)
+        return StockSnapshot(url=url, price=price, in_stock=in_stock, source=source)
+
+
+def diff_snapshots(
+    snapshots: Iterable[StockSnapshot],
+    previous: Mapping[str, Mapping[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Compare snapshots to previous export records; return changed products."""
+
+    changes: List[Dict[str, Any]] = []
+    for snapshot in snapshots:
+        if not snapshot.ok:
+            continue
+        before = previous.get(snapshot.url) or {}
+        old_price = _to_float(before.get("price"))
+        old_stock = _to_float(before.get("stock", before.get("stock_quantity")))
+        old_in_stock = before.get("in_stock")
+        changed = {}
+        if snapshot.price is not None and old_price != snapshot.price:
+            changed["price"] = [old_price, snapshot.price]
+        if snapshot.stock is not None and old_stock != snapshot.stock:
+            changed["stock"] = [old_stock, snapshot.stock]
+        if snapshot.in_stock is not None and old_in_stock is not None and bool(old_in_stock) != snapshot.in_stock:
+            changed["in_stock"] = [bool(old_in_stock), snapshot.in_stock]
+        if changed:
+            changes.append({"url": snapshot.url, "changes": changed, "source": snapshot.source})
+    return changes
+
+
+__all__ = [
+    "DEFAULT_CMS_BY_DOMAIN",
+    "LightweightStockMonitor",
+    "StockSnapshot",
+    "diff_snapshots",
+]
@@ -0,0 +1,162 @@
+"""Marker-based early termination for streamed HTML downloads.
+
+Product pages weigh 300 KB–1.5 MB, while the payloads the parsers need
+(``shop2.init``, ``JCCatalogElement``, JSON-LD, price blocks) sit in the first
+part of the document. :class:`MarkerCutoff` is fed the body chunk by chunk and
+reports when every required marker *and its terminator* has been seen, so the
+caller can close the stream and keep only the bytes read so far.
+
+Profiles are keyed by CMS type (see ``DEFAULT_CMS_BY_DOMAIN``) or by domain.
+If any marker never shows up the whole body is read, so a wrong profile costs
+bandwidth, never data. A profile must cover every field the site's parser
+reads, not just the embedded JSON. A cut is only safe for product pages, since
+category and listing pages need their pagination and links. The feature is
+opt-in: ``bandwidth_optimization.marker_cutoff.enabled`` for
+``ModernHttpxScraper``, and for the fast exporters ``SCRAPER_STREAM_CUTOFF=1``
+plus a product-page fetch that passes :func:`product_cutoff_markers`.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from network.stock_probe import DEFAULT_CMS_BY_DOMAIN
+
+STREAM_CUTOFF_ENV = "SCRAPER_STREAM_CUTOFF"
+
+
+@dataclass(frozen=True, slots=True)
+class CutoffMarker:
+    """``start`` must appear, followed by ``end`` (if given), before cutting."""
+
+    start: bytes
+    end: Optional[bytes] = None
+
+    @classmethod
+    def parse(cls, raw: Any) -> "CutoffMarker":
+        if isinstance(raw, CutoffMarker):
+            return raw
+        if isinstance(raw, str):
+            return cls(raw.lower().encode("utf-8"))
+        start, end = (list(raw) + [None])[:2]
+        return cls(
+            str(start).lower().encode("utf-8"),
+            str(end).lower().encode("utf-8") if end else None,
+        )
+
+
+CUTOFF_PROFILES: Dict[str, Tuple[CutoffMarker, ...]] = {
+    # mpyarn.ru: shop2 config (in <head>), the price block and the product
+    # form up to its end, which holds the buy button, article and amount input.
+    "cm3": (
+        CutoffMarker(b"shop2.init(", b"</script>"),
+        CutoffMarker(b"price-current", b"</div>"),
+        CutoffMarker(b"shop-product-btn", b"</form>"),
+    ),
+    "bitrix": (CutoffMarker(b"jccatalogelement(", b"</script>"),),
+    "jsonld": (CutoffMarker(b"application/ld+json", b"</script>"),),
+}
+
+
+def resolve_cutoff_markers(
+    url_or_domain: str,
+    profiles: Optional[Mapping[str, Any]] = None,
+) -> Optional[Tuple[CutoffMarker, ...]]:
+    """Return the marker set for a URL/domain, or None when no profile applies.
+
+    ``profiles`` (from config) may map a domain or a CMS type to a list of
+    ``"marker"`` strings or ``[start, end]`` pairs and override the defaults.
+    """
+
+    host = urlparse(url_or_domain).netloc or url_or_domain
+    host = host.lower().split(":", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+
+    configured = profiles or {}
+    if host in configured:
+        return tuple(CutoffMarker.parse(item) for item in configured[host]) or None
+    cms = DEFAULT_CMS_BY_DOMAIN.get(host)
+    if cms and cms in configured:
+        return tuple(CutoffMarker.parse(item) for item in configured[cms]) or None
+    return CUTOFF_PROFILES.get(cms or "")
+
+
+def stream_cutoff_enabled() -> bool:
+    return os.environ.get(STREAM_CUTOFF_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def product_cutoff_markers(
+    url: str, profiles: Optional[Mapping[str, Any]] = None
+) -> Optional[Tuple[CutoffMarker, ...]]:
+    """Markers for a *product page* fetch when ``SCRAPER_STREAM_CUTOFF`` is on."""
+
+    return resolve_cutoff_markers(url, profiles) if stream_cutoff_enabled() else None
+
+
+class MarkerCutoff:
+    """Incremental, chunk-boundary-safe detector for a set of markers."""
+
+    __slots__ = ("markers", "_pending", "_tail", "_offset", "_overlap", "bytes_seen")
+
+    def __init__(self, markers: Iterable[CutoffMarker]) -> None:
+        self.markers = tuple(markers)
+        # marker -> absolute offset where the ``end`` search starts (None = start not seen yet)
+        self._pending: Dict[CutoffMarker, Optional[int]] = {marker: None for marker in self.markers}
+        tokens = [len(m.start) for m in self.markers] + [len(m.end or b"") for m in self.markers]
+        self._overlap = max(max(tokens, default=1) - 1, 0)
+        self._tail = b""
+        self._offset = 0
+        self.bytes_seen = 0
+
+    @property
+    def satisfied(self) -> bool:
+        return bool(self.markers) and not self._pending
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume ``chunk``; returns True once every marker is complete."""
+
+        self.bytes_seen += len(chunk)
+        if not self._pending:
+            return bool(self.markers)
+
+        window = self._tail + chunk.lower()
+        base = self._offset - len(self._tail)
+        done: List[CutoffMarker] = []
+        for marker, end_from in self._pending.items():
+            if end_from is None:
+                position = window.find(marker.start)
+                if position == -1:
+                    continue
+                end_from = base + position + len(marker.start)
+                self._pending[marker] = end_from
+            if marker.end is None:
+                done.append(marker)
+                continue
+            if window.find(marker.end, max(end_from - base, 0)) != -1:
+                done.append(marker)
+        for marker in done:
+            del self._pending[marker]
+
+        self._offset += len(chunk)
+        self._tail = window[-self._overlap :] if self._overlap else b""
+        return self.satisfied
+
+
+def build_cutoff(markers: Optional[Sequence[CutoffMarker]]) -> Optional[MarkerCutoff]:
+    return MarkerCutoff(markers) if markers else None
+
+
+__all__ = [
+    "CUTOFF_PROFILES",
+    "CutoffMarker",
+    "MarkerCutoff",
+    "STREAM_CUTOFF_ENV",
+    "build_cutoff",
+    "product_cutoff_markers",
+    "resolve_cutoff_markers",
+    "stream_cutoff_enabled",
+]
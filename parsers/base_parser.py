@@ -15,6 +15,7 @@ from dataclasses import dataclass
 from collections import Counter
 from core.adaptive_selector_learner import AdaptiveSelectorLearner
 from core.selector_memory import SelectorMemory
+from core.extraction_plan import ExtractionPlan
 from bs4 import BeautifulSoup, Tag
 import threading
 
@@ -634,7 +635,28 @@ class BaseParser(ABC):
         # Pre-analyze HTML if provided
         soup = self._get_soup(html_content) if html_content else None
 
+        # Resolve every field with one compiled pass over the soup; only the
+        # fields it misses go through the per-selector driver cascade.
+        if soup is not None:
+            start_time = time.time()
+            try:
+                plan = self._get_extraction_plan(
+                    {field: selectors for selectors, field in selector_field_pairs}, url
+                )
+                matches = plan.evaluate(soup)
+            except Exception as e:
+                self.logger.debug(f"Extraction plan failed: {e}")
+                matches = {}
+            for field, match in matches.items():
+                self._update_adaptive_learning(
+                    field, match.selector, True, time.time() - start_time, url
+                )
+                self._extraction_stats["successful_extractions"] += 1
+                results[field] = match.value
+
         for selectors, field in selector_field_pairs:
+            if results.get(field) is not None:
+                continue
             try:
                 # Try adaptive extraction first
                 result = self.extract_text_adaptive(
@@ -889,6 +911,24 @@ class BaseParser(ABC):
 
         return unique_chain
 
+    def _get_extraction_plan(
+        self, field_selectors: Dict[str, List[str]], url: Optional[str]
+    ) -> ExtractionPlan:
+        """Compiled plan with the same order as _build_adaptive_selector_chain (minus discovery)."""
+        fields = tuple(field_selectors)
+        before = {
+            field: list(selectors)
+            + self.get_cms_specific_selectors(field, self._detected_cms)
+            for field, selectors in field_selectors.items()
+        }
+        if self.adaptive_learner and url:
+            return self.adaptive_learner.get_extraction_plan(
+                self._extract_domain(url), fields, before=before, fallback_limit=5
+            )
+        return self.selector_memory.get_extraction_plan(
+            "unknown", fields, before=before, limit=0
+        )
+
     def _extract_with_selector(self, selector: str) -> Optional[str]:
         """Extract text using a single selector."""
         element = self.driver.find_element(By.CSS_SELECTOR, selector)
@@ -23,6 +23,7 @@ from core.antibot_manager import AntibotManager
 from core.sitemap_analyzer import SitemapAnalyzer
 from core.adaptive_selector_learner import AdaptiveSelectorLearner
 from core.selector_memory import SelectorMemory
+from core.extraction_plan import ExtractionPlan
 from utils.helpers import (
     clean_price,
     parse_stock,
@@ -32,6 +33,7 @@ from utils.helpers import (
     safe_int_conversion,
 )
 from parsers.variation_parser import VariationParser
+from parsers.structured_data import StructuredProduct, extract_structured_product
 from bs4 import BeautifulSoup, Tag
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import Page as AsyncPage
@@ -106,6 +108,8 @@ class ProductParserConfig:
     debug_logging: bool = False
     graceful_degradation: bool = True
     return_none_on_missing: bool = False
+    structured_data_first: bool = True
+    compiled_extraction_plan: bool = True
 
     def __post_init__(self):
         if self.timeout <= 0:
@@ -1003,18 +1007,33 @@ class ProductParser:
 
     @overload
     def _extract_stock_with_fallback(
-        self, html: str, url: Optional[str] = None, *, include_selector: Literal[True]
+        self,
+        html: str,
+        url: Optional[str] = None,
+        *,
+        include_selector: Literal[True],
+        use_firecrawl: bool = True,
     ) -> Tuple[Optional[int], Optional[str]]:
         ...
 
     @overload
     def _extract_stock_with_fallback(
-        self, html: str, url: Optional[str] = None, *, include_selector: Literal[False] = False
+        self,
+        html: str,
+        url: Optional[str] = None,
+        *,
+        include_selector: Literal[False] = False,
+        use_firecrawl: bool = True,
     ) -> Optional[int]:
         ...
 
     def _extract_stock_with_fallback(
-        self, html: str, url: Optional[str] = None, *, include_selector: bool = False
+        self,
+        html: str,
+        url: Optional[str] = None,
+        *,
+        include_selector: bool = False,
+        use_firecrawl: bool = True,
     ) -> Union[Optional[int], Tuple[Optional[int], Optional[str]]]:
         """Extract product stock with CMS-aware prioritized fallback chain."""
         try:
@@ -1056,7 +1075,7 @@ class ProductParser:
                     self._track_selector_failure("stock", selector, url)
                     continue
 
-            firecrawl_stock = self._extract_stock_with_firecrawl(url)
+            firecrawl_stock = self._extract_stock_with_firecrawl(url) if use_firecrawl else None
             if firecrawl_stock is not None:
                 result = firecrawl_stock, "firecrawl"
                 return result if include_selector else result[0]
@@ -1197,17 +1216,48 @@ class ProductParser:
         self._current_url = url
 
         try:
-            # Extract data
-            name, _ = self._extract_name_with_fallback(
-                html, url, include_selector=True
-            )
-            price, _ = self._extract_price_with_fallback(
-                html, url, include_selector=True
-            )
-            stock, _ = self._extract_stock_with_fallback(
-                html, url, include_selector=True
-            )
+            # Structured data (JSON-LD / microdata / OG) first; the selector
+            # cascades only run for fields it did not provide.
+            structured = self._extract_structured_data(html)
+            structured_in_stock = structured.in_stock if structured else None
+
+            name = structured.name if structured else None
+            price = structured.price if structured else None
+            stock = structured.stock if structured else None
+
+            # One compiled pass over the soup for everything still missing
+            missing = [
+                field
+                for field, value in (("name", name), ("price", price), ("stock", stock))
+                if value is None
+            ]
+            if missing:
+                planned = self._extract_fields_with_plan(html, url, missing)
+                name = planned.get("name", name)
+                price = planned.get("price", price)
+                stock = planned.get("stock", stock)
+
+            if name is None:
+                name, _ = self._extract_name_with_fallback(
+                    html, url, include_selector=True
+                )
+            if name is None and structured:
+                # og:title is usually an SEO title; only when selectors fail
+                name = structured.og_title
+            if price is None:
+                price, _ = self._extract_price_with_fallback(
+                    html, url, include_selector=True
+                )
+            if stock is None:
+                stock, _ = self._extract_stock_with_fallback(
+                    html,
+                    url,
+                    include_selector=True,
+                    use_firecrawl=structured_in_stock is None,
+                )
             variations = self._extract_variations_with_fallback(html)
+            if not variations and structured and len(structured.offers) > 1:
+                variations = [offer.to_variation() for offer in structured.offers]
 
             # Basic SEO fields for parent-level reporting
             try:
@@ -1244,7 +1294,7 @@ class ProductParser:
                     "price": price,
                     "base_price": price,
                     "stock": stock,
-                    "in_stock": stock is not None and stock > 0,
+                    "in_stock": self._resolve_in_stock(stock, structured_in_stock),
                     "stock_quantity": stock,
                     "variations": variations,
                     "error": None,
@@ -1261,7 +1311,7 @@ class ProductParser:
                     "price": normalized_price,
                     "base_price": normalized_price,
                     "stock": normalized_stock,
-                    "in_stock": normalized_stock > 0,
+                    "in_stock": self._resolve_in_stock(normalized_stock, structured_in_stock),
                     "stock_quantity": normalized_stock,
                     "variations": variations,
                     "error": None,
@@ -1270,11 +1320,92 @@ class ProductParser:
                     "seo_meta_description": seo_meta_description,
                 }
 
+            if structured:
+                for key, value in structured.extra_fields().items():
+                    result.setdefault(key, value)
             return result
         finally:
             self.html = original_html
             self._current_url = original_url
 
+    _PLAN_FIELDS = ("name", "price", "stock")
+    _PLAN_VALIDATORS = {
+        "name": lambda text: sanitize_text(text) or None,
+        "price": clean_price,
+        "stock": parse_stock,
+    }
+
+    def _get_extraction_plan(self, url: Optional[str], html: Optional[str]) -> ExtractionPlan:
+        """Compiled selector plan for the page's domain, in fallback-step order.
+
+        Config and CMS selectors come from the configured steps around the
+        adaptive ones; the learner and SelectorMemory cache the compiled plan
+        per store version. HTML-based detection stays in the cascade.
+        """
+        domain = self._extract_domain(url) if url else "unknown"
+        cms_type = None
+        if "cms_selectors" in self._fallback_steps and (url or html):
+            cms_result = self.cms_detector.detect_cms_by_patterns(url=url, html=html)
+            if cms_result.confidence >= self._cms_confidence_threshold:
+                cms_type = cms_result.cms_type
+
+        before: Dict[str, List[str]] = {field: [] for field in self._PLAN_FIELDS}
+        after: Dict[str, List[str]] = {field: [] for field in self._PLAN_FIELDS}
+        target = before
+        for step in self._fallback_steps:
+            if step == "adaptive_selectors":
+                target = after
+                continue
+            for field in self._PLAN_FIELDS:
+                if step == "config_selectors":
+                    target[field].extend(self.selectors.get(field, []))
+                elif step == "cms_selectors" and cms_type:
+                    target[field].extend(self._get_cms_selectors(cms_type, field))
+
+        if self.adaptive_learner and "adaptive_selectors" in self._fallback_steps:
+            return self.adaptive_learner.get_extraction_plan(
+                domain, self._PLAN_FIELDS, before=before, after=after
+            )
+        return self.selector_memory.get_extraction_plan(
+            domain, self._PLAN_FIELDS, before=before, after=after, limit=0
+        )
+
+    def _extract_fields_with_plan(
+        self, html: str, url: Optional[str], fields: List[str]
+    ) -> Dict[str, Any]:
+        """Resolve several fields in one soup walk; empty when the plan is off."""
+        if not self.config.compiled_extraction_plan or self.page or not html:
+            return {}
+        try:
+            plan = self._get_extraction_plan(url, html)
+            matches = plan.evaluate(self._get_bs4_soup(html), self._PLAN_VALIDATORS, fields)
+        except Exception as e:
+            self.logger.debug(f"Extraction plan failed: {e}")
+            return {}
+
+        for field, match in matches.items():
+            self._track_selector_success(field, match.selector, url)
+        return {field: match.value for field, match in matches.items()}
+
+    def _extract_structured_data(self, html: str) -> Optional[StructuredProduct]:
+        """Product fields from JSON-LD, microdata and OG tags (one lxml pass)."""
+        if not self.config.structured_data_first or not html:
+            return None
+        try:
+            return extract_structured_product(html)
+        except Exception as e:
+            self.logger.debug(f"Structured data extraction failed: {e}")
+            return None
+
+    @staticmethod
+    def _resolve_in_stock(stock: Optional[int], structured_in_stock: Optional[bool]) -> bool:
+        """A positive quantity wins; otherwise trust schema.org availability."""
+        if stock is not None and stock > 0:
+            return True
+        if structured_in_stock is not None:
+            return structured_in_stock
+        return False
+
     def parse(self, html: str, url: str) -> Dict[str, Any]:
         """Legacy parse interface returning a plain dictionary."""
         product_data = self.parse_product_from_html(html, url)
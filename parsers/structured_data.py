@@ -0,0 +1,462 @@
+"""Structured-data-first product extraction (JSON-LD, microdata, OpenGraph).
+
+Most storefronts we crawl (InSales, Bitrix, CS-Cart, WooCommerce) embed a
+schema.org ``Product`` with its ``Offer``s as JSON-LD, microdata or OG
+``product:*`` tags. :func:`extract_structured_product` reads all three from a
+single lxml parse and one XPath sweep, so callers can skip their CSS selector
+cascades for every field already present.
+
+Field precedence: JSON-LD > microdata > OpenGraph. Microdata is only read
+from the page's top-level ``Product`` scope, so related/similar products in
+carousels cannot leak their offers into it. ``og:title`` is usually an SEO
+title ("<name> — купить в ..."), so it is kept apart in ``og_title`` for
+callers to use only when their own name selectors found nothing.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from utils.helpers import clean_price
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_TYPES = frozenset({"product", "productgroup", "individualproduct", "productmodel"})
+OFFER_TYPES = frozenset({"offer", "aggregateoffer"})
+
+_IN_STOCK = frozenset(
+    {"instock", "limitedavailability", "onlineonly", "instoreonly", "presale", "preorder"}
+)
+_OUT_OF_STOCK = frozenset({"outofstock", "soldout", "discontinued"})
+
+_STRUCTURED_XPATH = etree.XPath(
+    "//script[contains(@type, 'ld+json')] | //*[@itemprop] | //meta[@property]"
+)
+
+_OG_FIELDS = {
+    "product:price:amount": "price",
+    "og:price:amount": "price",
+    "product:price:currency": "currency",
+    "og:price:currency": "currency",
+    "product:availability": "availability",
+    "og:availability": "availability",
+    "product:retailer_item_id": "sku",
+    "product:brand": "brand",
+}
+
+# Where microdata keeps an item property's value when ``content`` is absent.
+_MICRODATA_URL_ATTRIBUTES = {"a": "href", "link": "href", "img": "src", "time": "datetime"}
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("@id") or value.get("url")
+    if isinstance(value, (list, tuple)):
+        value = next((item for item in value if item), None)
+    text = str(value).strip() if value is not None else ""
+    return text or None
+
+
+def _price(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value >= 0 else None
+    text = str(value).strip()
+    return clean_price(text) if text else None
+
+
+def _int(value: Any) -> Optional[int]:
+    if isinstance(value, dict):
+        value = value.get("value")
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_availability(value: Any) -> Optional[str]:
+    """``https://schema.org/InStock`` -> ``InStock``; free text is kept."""
+
+    text = _text(value)
+    if not text:
+        return None
+    return text.rstrip("/").rsplit("/", 1)[-1]
+
+
+def availability_in_stock(availability: Optional[str]) -> Optional[bool]:
+    if not availability:
+        return None
+    token = availability.replace(" ", "").replace("_", "").lower()
+    if token in _IN_STOCK:
+        return True
+    if token in _OUT_OF_STOCK:
+        return False
+    return None
+
+
+def _types(node: Dict[str, Any]) -> Iterator[str]:
+    raw = node.get("@type")
+    for item in raw if isinstance(raw, list) else [raw]:
+        if isinstance(item, str):
+            yield item.rsplit("/", 1)[-1].lower()
+
+
+def _images(value: Any) -> List[str]:
+    images: List[str] = []
+    for item in value if isinstance(value, list) else [value]:
+        url = item.get("url") or item.get("contentUrl") if isinstance(item, dict) else item
+        if isinstance(url, str) and url.strip():
+            images.append(url.strip())
+    return images
+
+
+@dataclass(slots=True)
+class StructuredOffer:
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    availability: Optional[str] = None
+    sku: Optional[str] = None
+    name: Optional[str] = None
+    url: Optional[str] = None
+    stock: Optional[int] = None
+
+    @property
+    def in_stock(self) -> Optional[bool]:
+        if self.stock is not None:
+            return self.stock > 0
+        return availability_in_stock(self.availability)
+
+    def to_variation(self) -> Dict[str, Any]:
+        """Shape the offer like ``VariationData``."""
+
+        return {
+            "type": "variant",
+            "value": self.name or self.sku or "",
+            "price": self.price,
+            "stock": self.stock,
+            "in_stock": self.in_stock,
+            "variant_id": self.sku,
+            "sku": self.sku,
+            "url": self.url,
+            "attributes": {},
+        }
+
+
+@dataclass(slots=True)
+class StructuredProduct:
+    """Product fields found in structured markup, with the source of each."""
+
+    name: Optional[str] = None
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    availability: Optional[str] = None
+    sku: Optional[str] = None
+    brand: Optional[str] = None
+    images: List[str] = field(default_factory=list)
+    offers: List[StructuredOffer] = field(default_factory=list)
+    sources: Dict[str, str] = field(default_factory=dict)
+    # Last-resort name; not part of ``sources`` (see module docstring).
+    og_title: Optional[str] = None
+
+    @property
+    def in_stock(self) -> Optional[bool]:
+        state = availability_in_stock(self.availability)
+        if state is not None or not self.offers:
+            return state
+        states = [offer.in_stock for offer in self.offers if offer.in_stock is not None]
+        return any(states) if states else None
+
+    @property
+    def stock(self) -> Optional[int]:
+        """Explicit quantity summed over offers; ``None`` when no offer states one.
+
+        Availability alone (even ``OutOfStock``) is not a quantity, so callers
+        still run their stock selectors and read :attr:`in_stock` separately.
+        """
+
+        quantities = [offer.stock for offer in self.offers if offer.stock is not None]
+        if quantities:
+            return sum(max(quantity, 0) for quantity in quantities)
+        return None
+
+    def has(self, field_name: str) -> bool:
+        return field_name in self.sources
+
+    def _set(self, field_name: str, value: Any, source: str) -> None:
+        if value in (None, "", []) or field_name in self.sources:
+            return
+        setattr(self, field_name, value)
+        self.sources[field_name] = source
+
+    def extra_fields(self) -> Dict[str, Any]:
+        """Export-level fields (``sku``, ``currency``, ...) that are present."""
+
+        extras = {
+            "sku": self.sku,
+            "currency": self.currency,
+            "brand": self.brand,
+            "availability": self.availability,
+            "images": list(self.images) or None,
+        }
+        return {key: value for key, value in extras.items() if value is not None}
+
+
+def _offers_availability(offers: Iterable[StructuredOffer]) -> Optional[str]:
+    """Availability of the first in-stock offer, else of the first offer that has one."""
+
+    first: Optional[str] = None
+    for offer in offers:
+        if offer.in_stock:
+            return offer.availability or "InStock"
+        first = first or offer.availability
+    return first
+
+
+def _offer_from_jsonld(node: Dict[str, Any]) -> StructuredOffer:
+    price = node.get("price")
+    if price is None:
+        price = node.get("lowPrice")
+    specification = node.get("priceSpecification")
+    if price is None and isinstance(specification, dict):
+        price = specification.get("price")
+    return StructuredOffer(
+        price=_price(price),
+        currency=_text(node.get("priceCurrency"))
+        or (_text(specification.get("priceCurrency")) if isinstance(specification, dict) else None),
+        availability=normalize_availability(node.get("availability")),
+        sku=_text(node.get("sku")),
+        name=_text(node.get("name")),
+        url=_text(node.get("url")),
+        stock=_int(node.get("inventoryLevel")),
+    )
+
+
+def _jsonld_offers(value: Any) -> List[StructuredOffer]:
+    offers: List[StructuredOffer] = []
+    for node in value if isinstance(value, list) else [value]:
+        if not isinstance(node, dict):
+            continue
+        nested = node.get("offers")
+        parent = _offer_from_jsonld(node)
+        if "aggregateoffer" in _types(node) and nested:
+            children = _jsonld_offers(nested)
+            for child in children:
+                child.currency = child.currency or parent.currency
+            if any(child.price is not None for child in children):
+                offers.extend(children)
+                continue
+        offers.append(parent)
+    return offers
+
+
+def _iter_jsonld_nodes(data: Any) -> Iterator[Dict[str, Any]]:
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            yield node
+            graph = node.get("@graph")
+            if graph is not None:
+                stack.append(graph)
+            main = node.get("mainEntity")
+            if isinstance(main, (dict, list)):
+                stack.append(main)
+
+
+def _apply_jsonld(product: StructuredProduct, payload: str) -> None:
+    try:
+        data = json.loads(payload, strict=False)
+    except json.JSONDecodeError:
+        logger.debug("Skipping malformed JSON-LD block")
+        return
+    for node in _iter_jsonld_nodes(data):
+        if not PRODUCT_TYPES.intersection(_types(node)):
+            continue
+        offers = _jsonld_offers(node.get("offers")) if node.get("offers") else []
+        for variant in node.get("hasVariant") or []:
+            if isinstance(variant, dict):
+                for offer in _jsonld_offers(variant.get("offers")):
+                    offer.sku = offer.sku or _text(variant.get("sku"))
+                    offer.name = offer.name or _text(variant.get("name"))
+                    offers.append(offer)
+
+        product._set("name", _text(node.get("name")), "json-ld")
+        product._set("sku", _text(node.get("sku") or node.get("mpn") or node.get("productID")), "json-ld")
+        product._set("brand", _text(node.get("brand")), "json-ld")
+        product._set("images", _images(node.get("image")), "json-ld")
+        if offers and "offers" not in product.sources:
+            product.offers = offers
+            product.sources["offers"] = "json-ld"
+        priced = next((offer for offer in offers if offer.price is not None), None)
+        if priced is not None:
+            product._set("price", priced.price, "json-ld")
+            product._set("currency", priced.currency, "json-ld")
+        product._set("availability", _offers_availability(offers), "json-ld")
+
+
+def _microdata_value(element: Any) -> Optional[str]:
+    tag = element.tag if isinstance(element.tag, str) else ""
+    for attribute in ("content", _MICRODATA_URL_ATTRIBUTES.get(tag)):
+        value = element.get(attribute) if attribute else None
+        if value and value.strip():
+            return value.strip()
+    text = element.text_content().strip()
+    return text or None
+
+
+def _item_scope(element: Any) -> Any:
+    parent = element.getparent()
+    while parent is not None and parent.get("itemscope") is None:
+        parent = parent.getparent()
+    return parent
+
+
+def _scope_type(scope: Any) -> str:
+    return (scope.get("itemtype") or "").rstrip("/").rsplit("/", 1)[-1].lower()
+
+
+def _owner_products(scope: Any) -> List[Any]:
+    """Product itemscopes at or above ``scope``, nearest first."""
+
+    owners = []
+    node = scope
+    while node is not None:
+        if node.get("itemscope") is not None and _scope_type(node) in PRODUCT_TYPES:
+            owners.append(node)
+        node = node.getparent()
+    return owners
+
+
+def _apply_microdata(product: StructuredProduct, elements: Iterable[Any]) -> None:
+    offers: Dict[Any, StructuredOffer] = {}
+    scoped = [(element, _item_scope(element)) for element in elements]
+    # The page's product is the first top-level Product scope; nested
+    # isRelatedTo/isSimilarTo products and carousel items are other products.
+    main = next(
+        (owners[-1] for _, scope in scoped if scope is not None and (owners := _owner_products(scope))),
+        None,
+    )
+    for element, scope in scoped:
+        if scope is None:
+            continue
+        owners = _owner_products(scope)
+        if (owners[0] if owners else None) is not main:
+            continue
+        scope_type = _scope_type(scope)
+        prop = element.get("itemprop").strip().lower()
+        if scope_type in PRODUCT_TYPES:
+            if prop == "name":
+                product._set("name", _microdata_value(element), "microdata")
+            elif prop in ("sku", "mpn", "productid"):
+                product._set("sku", _microdata_value(element), "microdata")
+            elif prop == "image":
+                value = _microdata_value(element)
+                if value and (product.sources.get("images") in (None, "microdata")):
+                    product.images.append(value)
+                    product.sources["images"] = "microdata"
+            elif prop == "brand" and element.get("itemscope") is None:
+                product._set("brand", _microdata_value(element), "microdata")
+        elif scope_type in OFFER_TYPES:
+            offer = offers.setdefault(scope, StructuredOffer())
+            value = _microdata_value(element)
+            if prop in ("price", "lowprice") and offer.price is None:
+                offer.price = _price(value)
+            elif prop == "pricecurrency":
+                offer.currency = value
+            elif prop == "availability":
+                offer.availability = normalize_availability(value)
+            elif prop == "sku":
+                offer.sku = value
+            elif prop == "inventorylevel":
+                offer.stock = _int(value)
+        elif scope_type in ("brand", "organization") and prop == "name" and scope.get("itemprop") == "brand":
+            product._set("brand", _microdata_value(element), "microdata")
+
+    if offers and "offers" not in product.sources:
+        product.offers = list(offers.values())
+        product.sources["offers"] = "microdata"
+    for offer in offers.values():
+        if offer.price is not None:
+            product._set("price", offer.price, "microdata")
+            product._set("currency", offer.currency, "microdata")
+            break
+    product._set("availability", _offers_availability(offers.values()), "microdata")
+
+
+def _apply_opengraph(product: StructuredProduct, metas: Iterable[Any]) -> None:
+    images: List[str] = []
+    for meta in metas:
+        prop = (meta.get("property") or "").strip().lower()
+        content = (meta.get("content") or "").strip()
+        if not content:
+            continue
+        if prop in ("og:image", "og:image:url", "og:image:secure_url"):
+            if content not in images:
+                images.append(content)
+            continue
+        if prop == "og:title":
+            product.og_title = product.og_title or content
+            continue
+        target = _OG_FIELDS.get(prop)
+        if target == "price":
+            product._set("price", _price(content), "opengraph")
+        elif target == "availability":
+            product._set("availability", normalize_availability(content), "opengraph")
+        elif target:
+            product._set(target, content, "opengraph")
+    product._set("images", images, "opengraph")
+
+
+def extract_structured_product(html: str) -> Optional[StructuredProduct]:
+    """Return structured product fields from ``html`` (``None`` if there are none)."""
+
+    if not html or not isinstance(html, str):
+        return None
+    try:
+        root = lxml_html.fromstring(html)
+    except ValueError:  # str with an XML encoding declaration
+        root = lxml_html.fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return None
+
+    jsonld: List[str] = []
+    microdata: List[Any] = []
+    metas: List[Any] = []
+    for element in _STRUCTURED_XPATH(root):
+        tag = element.tag if isinstance(element.tag, str) else ""
+        if tag == "script":
+            if element.text:
+                jsonld.append(element.text)
+        elif element.get("itemprop") is not None:
+            microdata.append(element)
+        if tag == "meta" and element.get("property") is not None:
+            metas.append(element)
+
+    product = StructuredProduct()
+    for payload in jsonld:
+        _apply_jsonld(product, payload)
+    if microdata:
+        _apply_microdata(product, microdata)
+    if metas:
+        _apply_opengraph(product, metas)
+    return product if product.sources else None
+
+
+__all__ = [
+    "StructuredOffer",
+    "StructuredProduct",
+    "availability_in_stock",
+    "extract_structured_product",
+    "normalize_availability",
+]
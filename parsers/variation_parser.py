@@ -20,10 +20,18 @@ from utils.helpers import (
     get_variation_type,
     get_variation_type_details,
     clean_price,
+    memoized_parser,
     parse_stock,
     sanitize_text,
 )
 from utils.cms_detection import CMSDetection, CMSDetectionResult
+from utils.json_blocks import (
+    DEFAULT_ANCHORS,
+    assignment_anchor,
+    find_closing_bracket,
+    find_opening_bracket,
+    scan_json_blocks,
+)
 
 if TYPE_CHECKING:  # pragma: no cover
     from bs4 import BeautifulSoup  # type: ignore
@@ -43,6 +51,79 @@ def _bs():
 SETTINGS_PATH = Path("config/settings.json")
 
 
+# Size patterns (numbers, letters, dimensions)
+_SIZE_VALUE_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"\b\d+(?:\.\d+)?\s*(?:x|×|by|\*)\s*\d+(?:\.\d+)?",  # dimensions like 10x10
+        r"\b\d+(?:\.\d+)?\s*(?:ml|l|kg|g|oz|lb|cm|mm|inch)",  # units
+        r"\b(?:xs|s|m|l|xl|xxl|xxxl|2xl|3xl|4xl)\b",  # size letters
+        r"\b\d+(?:\.\d+)?(?:\s*-\s*\d+(?:\.\d+)?)?\b",  # numbers/ranges
+    )
+)
+# Color patterns
+_COLOR_VALUE_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"\b(?:red|blue|green|black|white|yellow|orange|purple|pink|brown|gray|grey|silver|gold)\b",
+        r"\b(?:красный|синий|зеленый|черный|белый|желтый|оранжевый|фиолетовый|розовый|коричневый|серый|серебряный|золотой)\b",
+    )
+)
+# Model/style patterns
+_MODEL_VALUE_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"\b(?:model|style|type|variant|series|edition|version)\b",
+        r"\b(?:модель|стиль|тип|вариант|серия|издание|версия)\b",
+    )
+)
+_VARIATION_CATEGORY_MAP = {
+    "size": "dimension",
+    "color": "appearance",
+    "model": "variant",
+    "unknown": "other",
+}
+
+
+@memoized_parser("classify_variation_type")
+def _classify_variation_type_cached(label_text: str, value_text: str) -> Tuple[str, float, str]:
+    # Get base classification from helper
+    base_result = get_variation_type_details(label_text)
+    var_type = str(base_result.get("type", "unknown"))
+    confidence = float(base_result.get("confidence", 0.0))
+
+    # Enhanced keyword detection with value_text context
+    value_lower = value_text.lower().strip()
+    size_matches = sum(1 for pattern in _SIZE_VALUE_PATTERNS if pattern.search(value_lower))
+    color_matches = sum(1 for pattern in _COLOR_VALUE_PATTERNS if pattern.search(value_lower))
+    model_matches = sum(1 for pattern in _MODEL_VALUE_PATTERNS if pattern.search(value_lower))
+
+    # Adjust confidence based on value_text
+    if size_matches > 0 and var_type == "size":
+        confidence = min(confidence + 0.2, 1.0)
+    elif color_matches > 0 and var_type == "color":
+        confidence = min(confidence + 0.2, 1.0)
+    elif model_matches > 0 and var_type == "model":
+        confidence = min(confidence + 0.2, 1.0)
+
+    # Fallback assignment for low confidence
+    if confidence < 0.3:
+        if size_matches > color_matches and size_matches > model_matches:
+            var_type = "size"
+            confidence = 0.4
+        elif color_matches > model_matches:
+            var_type = "color"
+            confidence = 0.4
+        elif model_matches > 0:
+            var_type = "model"
+            confidence = 0.4
+        else:
+            var_type = "unknown"
+            confidence = 0.0
+
+    return var_type, confidence, _VARIATION_CATEGORY_MAP.get(var_type, "other")
+
+
 @lru_cache(maxsize=1)
 def _load_settings() -> Dict[str, Any]:
     try:
@@ -2325,61 +2406,20 @@ class VariationParser:
             return None
 
     def _extract_json_blocks(self, text: str, anchors: List[str]) -> List[str]:
-        blocks: List[str] = []
-        if not text:
-            return blocks
-
-        if not anchors:
-            return blocks
-
-        escaped = [re.escape(anchor) for anchor in anchors if anchor]
-        if not escaped:
-            return blocks
-
-        pattern = re.compile(
-            r"(?:^|[;,{]\s*|\s+)(?:var|let|const)?\s*(?P<anchor>" + "|".join(escaped) + r")\b\s*=\s*",
-            re.IGNORECASE | re.MULTILINE,
-        )
-
-        for match in pattern.finditer(text):
-            open_idx = self._find_first_bracket(text, match.end())
-            if open_idx == -1:
-                continue
-            close_idx = self._find_closing_bracket(text, open_idx)
-            if close_idx == -1:
-                continue
-            blocks.append(text[open_idx : close_idx + 1])
-        return blocks
+        if not text or not anchors or not any(anchors):
+            return []
+        blocks = scan_json_blocks(text, {"assignment": assignment_anchor(anchors)})
+        return [block.text for block in blocks]
 
     def _extract_jccatalogelement_blocks(self, text: str) -> List[str]:
         """Extract JSON payloads passed into Bitrix JCCatalogElement constructors."""
         if not text:
             return []
-
-        blocks: List[str] = []
-        pattern = re.compile(r"new\s+JCCatalog(?:Element|Section)\s*\(", re.IGNORECASE)
-
-        for match in pattern.finditer(text):
-            start = match.end()
-            open_idx = self._find_first_bracket(text, start)
-            if open_idx == -1:
-                continue
-            close_idx = self._find_closing_bracket(text, open_idx)
-            if close_idx == -1:
-                continue
-            blocks.append(text[open_idx : close_idx + 1])
-
-        return blocks
+        blocks = scan_json_blocks(text, {"jccatalog": DEFAULT_ANCHORS["jccatalogelement"]})
+        return [block.text for block in blocks]
 
     def _find_first_bracket(self, text: str, idx: int) -> int:
-        while idx < len(text):
-            ch = text[idx]
-            if ch in "[{":
-                return idx
-            if not ch.isspace():
-                return -1
-            idx += 1
-        return -1
+        return find_opening_bracket(text, idx)
 
     def _extract_bitrix_price(self, offer: Dict[str, Any]) -> Tuple[Optional[float], Optional[str]]:
         """Extract normalized price and currency information from Bitrix offer payloads."""
@@ -2555,43 +2595,7 @@ class VariationParser:
         return attributes
 
     def _find_closing_bracket(self, text: str, start_idx: int) -> int:
-        if start_idx >= len(text):
-            return -1
-
-        opening = text[start_idx]
-        closing = "}" if opening == "{" else "]"
-        depth = 0
-        in_string = False
-        string_char = ""
-        escape = False
-
-        for pos in range(start_idx, len(text)):
-            ch = text[pos]
-
-            if in_string:
-                if escape:
-                    escape = False
-                    continue
-                if ch == "\\":
-                    escape = True
-                    continue
-                if ch == string_char:
-                    in_string = False
-                continue
-
-            if ch in ('"', "'"):
-                in_string = True
-                string_char = ch
-                continue
-
-            if ch == opening:
-                depth += 1
-            elif ch == closing:
-                depth -= 1
-                if depth == 0:
-                    return pos
-
-        return -1
+        return find_closing_bracket(text, start_idx)
 
     def _parse_bitrix_json(self, script_content: str) -> List[Dict]:
         variations: List[Dict] = []
@@ -2607,8 +2611,16 @@ class VariationParser:
             "OFFERS",
         ]
 
-        json_blocks = list(self._extract_json_blocks(script_content, anchors))
-        json_blocks.extend(self._extract_jccatalogelement_blocks(script_content))
+        # One pass for both anchor kinds; assignments keep precedence over constructors.
+        scanned = scan_json_blocks(
+            script_content or "",
+            {
+                "assignment": assignment_anchor(anchors),
+                "jccatalog": DEFAULT_ANCHORS["jccatalogelement"],
+            },
+        )
+        json_blocks = [block.text for block in scanned if block.anchor == "assignment"]
+        json_blocks.extend(block.text for block in scanned if block.anchor == "jccatalog")
 
         MAX_BLOCKS = 12
         MAX_BLOCK_SIZE = 1_500_000  # ~1.4 MB
@@ -3204,83 +3216,17 @@ class VariationParser:
         self, label_text: str, value_text: str
     ) -> Dict[str, Any]:
         """Enhanced variation type classification with comprehensive keyword detection and confidence scoring."""
-        logger = logging.getLogger(__name__)
-
-        # Get base classification from helper
-        base_result = get_variation_type_details(label_text)
-        var_type = str(base_result.get("type", "unknown"))
-        confidence = float(base_result.get("confidence", 0.0))
-
-        # Enhanced keyword detection with value_text context
-        value_lower = value_text.lower().strip() if value_text else ""
-
-        # Size patterns (numbers, letters, dimensions)
-        size_patterns = [
-            r"\b\d+(?:\.\d+)?\s*(?:x|×|by|\*)\s*\d+(?:\.\d+)?",  # dimensions like 10x10
-            r"\b\d+(?:\.\d+)?\s*(?:ml|l|kg|g|oz|lb|cm|mm|inch)",  # units
-            r"\b(?:xs|s|m|l|xl|xxl|xxxl|2xl|3xl|4xl)\b",  # size letters
-            r"\b\d+(?:\.\d+)?(?:\s*-\s*\d+(?:\.\d+)?)?\b",  # numbers/ranges
-        ]
-
-        # Color patterns
-        color_patterns = [
-            r"\b(?:red|blue|green|black|white|yellow|orange|purple|pink|brown|gray|grey|silver|gold)\b",
-            r"\b(?:красный|синий|зеленый|черный|белый|желтый|оранжевый|фиолетовый|розовый|коричневый|серый|серебряный|золотой)\b",
-        ]
-
-        # Model/style patterns
-        model_patterns = [
-            r"\b(?:model|style|type|variant|series|edition|version)\b",
-            r"\b(?:модель|стиль|тип|вариант|серия|издание|версия)\b",
-        ]
-
-        # Check value_text for additional context
-        size_matches = sum(
-            1 for pattern in size_patterns if re.search(pattern, value_lower)
-        )
-        color_matches = sum(
-            1 for pattern in color_patterns if re.search(pattern, value_lower)
+        var_type, confidence, category = _classify_variation_type_cached(
+            label_text if isinstance(label_text, str) else "",
+            value_text if isinstance(value_text, str) else "",
         )
-        model_matches = sum(
-            1 for pattern in model_patterns if re.search(pattern, value_lower)
+        logging.getLogger(__name__).debug(
+            "Classified variation type: %s (confidence: %.2f) for label: '%s', value: '%s'",
+            var_type,
+            confidence,
+            label_text,
+            value_text,
         )
-
-        # Adjust confidence based on value_text
-        if size_matches > 0 and var_type == "size":
-            confidence = min(confidence + 0.2, 1.0)
-        elif color_matches > 0 and var_type == "color":
-            confidence = min(confidence + 0.2, 1.0)
-        elif model_matches > 0 and var_type == "model":
-            confidence = min(confidence + 0.2, 1.0)
-
-        # Fallback assignment for low confidence
-        if confidence < 0.3:
-            if size_matches > color_matches and size_matches > model_matches:
-                var_type = "size"
-                confidence = 0.4
-            elif color_matches > model_matches:
-                var_type = "color"
-                confidence = 0.4
-            elif model_matches > 0:
-                var_type = "model"
-                confidence = 0.4
-            else:
-                var_type = "unknown"
-                confidence = 0.0
-
-        # Determine category
-        category_map = {
-            "size": "dimension",
-            "color": "appearance",
-            "model": "variant",
-            "unknown": "other",
-        }
-        category = category_map.get(var_type, "other")
-
-        logger.debug(
-            f"Classified variation type: {var_type} (confidence: {confidence:.2f}) for label: '{label_text}', value: '{value_text}'"
-        )
-
         return {"type": var_type, "confidence": confidence, "category": category}
 
     def format_variation_display_name(self, var_type: str, value: str) -> str:
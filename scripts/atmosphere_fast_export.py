@@ -33,6 +33,7 @@ from scripts.fast_export_base import (
     prepare_incremental_writer,
     record_error_product,
     prime_writer_from_export,
+    select_urls_to_fetch,
     release_process_lock,
     request_with_retries,
     update_summary,
@@ -348,7 +349,9 @@ def _run(
                     products=existing_export_products,
                 )
 
-        urls_to_fetch = [url for url in urls if url not in writer.processed_urls]
+        urls_to_fetch = select_urls_to_fetch(
+            SITE_DOMAIN, urls, writer, export_path=EXPORT_PATH
+        )
         LOGGER.info(
             "Total candidate URLs: %s (skipped: %s, to fetch: %s)",
             len(urls),
@@ -454,7 +457,7 @@ def _run(
             return
 
         success_ratio = (
-            len(processed_products) / total_attempts if total_attempts > 0 else None
+            len(processed_products) / fetcher.attempted if fetcher.attempted > 0 else None
         )
 
         export_products(
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Benchmark memoised price/stock/variation-type parsing on export corpora.
+
+Rebuilds the raw strings the parsers see on product pages ("1 250 ₽",
+"В наличии", "12 шт.", option labels and values) from
+``data/sites/*/exports/latest.json`` and times the uncached parsers against
+the LRU-memoised ones, reporting cache hit rates.
+
+    python scripts/bench_text_parsing.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from parsers.variation_parser import _classify_variation_type_cached  # noqa: E402
+from utils.helpers import (  # noqa: E402
+    _clean_price_cached,
+    _parse_stock_cached,
+    _variation_type_cached,
+    clear_parsing_caches,
+    parsing_cache_stats,
+)
+
+DEFAULT_GLOB = "data/sites/*/exports/latest.json"
+
+
+def _render_price(value: Any) -> str:
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if amount.is_integer():
+        return f"{int(amount):,} ₽".replace(",", " ")
+    return f"{amount:,.2f} ₽".replace(",", " ").replace(".", ",")
+
+
+def _render_stock(value: Any, in_stock: Any) -> str:
+    try:
+        quantity = int(float(value))
+    except (TypeError, ValueError):
+        return "В наличии" if in_stock else "Нет в наличии"
+    if quantity <= 0:
+        return "Нет в наличии"
+    return f"{quantity} шт."
+
+
+def _load_products(pattern: str) -> List[Dict[str, Any]]:
+    products: List[Dict[str, Any]] = []
+    for path in sorted(PROJECT_ROOT.glob(pattern)):
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(payload, dict):
+            payload = payload.get("products") or []
+        products.extend(item for item in payload if isinstance(item, dict))
+    return products
+
+
+def build_corpus(products: Iterable[Dict[str, Any]]) -> Dict[str, List[Tuple[str, ...]]]:
+    corpus: Dict[str, List[Tuple[str, ...]]] = {
+        "clean_price": [],
+        "parse_stock": [],
+        "variation_type": [],
+        "classify_variation_type": [],
+    }
+    for product in products:
+        rows = [product] + [v for v in product.get("variations") or [] if isinstance(v, dict)]
+        for row in rows:
+            price = row.get("variation_price", row.get("price"))
+            if price is not None:
+                corpus["clean_price"].append((_render_price(price),))
+            stock = row.get("variation_stock", row.get("stock"))
+            corpus["parse_stock"].append((_render_stock(stock, row.get("in_stock")),))
+
+            labels = [str(row.get("variation_type") or row.get("type") or "")]
+            attributes = row.get("variation_attributes") or row.get("attributes") or {}
+            if isinstance(attributes, dict):
+                labels.extend(str(key) for key in attributes)
+            value = str(row.get("variation_value") or row.get("value") or "")
+            for label in filter(None, labels):
+                corpus["variation_type"].append((label,))
+                corpus["classify_variation_type"].append((label, value))
+    return corpus
+
+
+def _time(func: Callable[..., Any], calls: Sequence[Tuple[str, ...]], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for args in calls:
+            func(*args)
+    return time.perf_counter() - started
+
+
+def run_benchmark(pattern: str = DEFAULT_GLOB, repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    corpus = build_corpus(_load_products(pattern))
+    cached_funcs: Dict[str, Callable[..., Any]] = {
+        "clean_price": _clean_price_cached,
+        "parse_stock": _parse_stock_cached,
+        "variation_type": _variation_type_cached,
+        "classify_variation_type": _classify_variation_type_cached,
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, cached in cached_funcs.items():
+        calls = corpus[name]
+        clear_parsing_caches()
+        uncached_seconds = _time(cached.__wrapped__, calls, repeat)
+        clear_parsing_caches()
+        cached_seconds = _time(cached, calls, repeat)
+        stats = parsing_cache_stats()[name]
+        results[name] = {
+            "calls": len(calls) * repeat,
+            "distinct": len(set(calls)),
+            "uncached_ms": round(uncached_seconds * 1000, 2),
+            "cached_ms": round(cached_seconds * 1000, 2),
+            "speedup": round(uncached_seconds / cached_seconds, 1) if cached_seconds else None,
+            "hit_rate": stats["hit_rate"],
+        }
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--glob", default=DEFAULT_GLOB, help="Export files relative to the repo root")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    args = parser.parse_args(argv)
+    # Parsers log every unparseable string; keep the report readable.
+    logging.disable(logging.WARNING)
+
+    results = run_benchmark(args.glob, max(args.repeat, 1))
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{'parser':<26}{'calls':>8}{'distinct':>10}{'uncached ms':>13}{'cached ms':>11}{'x':>7}{'hit rate':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<26}{row['calls']:>8}{row['distinct']:>10}{row['uncached_ms']:>13}"
+            f"{row['cached_ms']:>11}{row['speedup']:>7}{row['hit_rate']:>10.1%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,21 +7,41 @@ import atexit
 import contextlib
 import contextvars
 import fcntl
+import hashlib
 import json
 import logging
 import os
+import struct
 import time
+import weakref
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Mapping, MutableSequence, Optional, Sequence, Set, TextIO, TypeVar
+from typing import TYPE_CHECKING, Any, Awaitable, BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, MutableSequence, Optional, Sequence, Set, TextIO, TypeVar
 from urllib.parse import urlparse
 
 import httpx
 
+from core.url_frontier import (
+    FRONTIER_ENV,
+    FRONTIER_RUN_ENV,
+    FRONTIER_WORKER_ENV,
+    Lease,
+    UrlFrontier,
+    create_frontier,
+)
+from network.clearance import Clearance, get_clearance_broker, is_challenge
+from network.dns_cache import cached_transport, prewarm_connections
+from network.rate_limiter import throttle_request
+from network.single_flight import SingleFlight, request_key
+from network.stream_cutoff import CutoffMarker, MarkerCutoff
 from utils.export_writers import ExportArtifacts, write_product_exports
 from utils.firecrawl_summary import update_summary
+from utils.records import ProductRecord, compact_products
 from utils.helpers import looks_like_guard_html
+from utils.recrawl_planner import RecrawlHistory, RecrawlPlanner
+from utils import compression, serialization
 
 LOGGER = logging.getLogger(__name__)
 
@@ -548,6 +568,10 @@ class HTTPClientConfig:
     base_url: Optional[str] = None
     transport: Any = None
     verify: bool = True
+    proxy: Optional[str] = None
+    prewarm_connections: int = 0
+    # Shared core.url_frontier.UrlFrontier; None -> resolved from the environment.
+    frontier: Any = None
 
     def build_limits(self) -> httpx.Limits:
         limit = max(self.concurrency, 1)
@@ -569,9 +593,57 @@ async def request_with_retries(
     backoff_base: float = 0.5,
     antibot: Optional[AntibotRuntime] = None,
     fallback_statuses: Optional[Set[int]] = None,
+    cutoff_markers: Optional[Sequence[CutoffMarker]] = None,
+    coalesce: bool = False,
+    proxy_endpoint: Optional[str] = None,
     **kwargs: Any,
 ) -> httpx.Response:
-    """Perform an HTTP request with retry + optional Antibot fallback."""
+    """Perform an HTTP request with retry + optional Antibot fallback.
+
+    Every attempt first waits for the shared per-domain and per-proxy token
+    buckets when a rate limiter is configured (see :mod:`network.rate_limiter`).
+    The proxy is ``proxy_endpoint`` or, without it, the one an
+    :class:`AsyncFetcher` client goes out through (:func:`client_proxy`).
+
+    With ``cutoff_markers`` GET bodies are streamed and cut once all markers
+    were seen. Only product-page fetches should pass them (see
+    :func:`network.stream_cutoff.product_cutoff_markers`); listing pages need
+    their full body.
+    With ``coalesce=True`` identical concurrent requests (method, normalised
+    URL, body and body-relevant headers) made through the same client and
+    proxy share one response, and successful responses are reused for a few
+    seconds.
+
+    With a clearance broker configured (:mod:`network.clearance`), known
+    clearance cookies are sent along. A challenge response triggers one shared
+    solve for the domain and a free retry before the Antibot fallback.
+    Clearances are IP-bound, so they are keyed and solved by that proxy too.
+    """
+
+    if coalesce:
+        key = request_key(
+            method,
+            url,
+            headers=kwargs.get("headers"),
+            body=kwargs.get("data", kwargs.get("json")),
+            # Clients differ in cookies, default headers and exit IP.
+            extra=(kwargs.get("params"), id(client), proxy_endpoint or client_proxy(client)),
+        )
+        return await _REQUEST_FLIGHT.do(
+            key,
+            lambda: request_with_retries(
+                client,
+                method,
+                url,
+                max_retries=max_retries,
+                backoff_base=backoff_base,
+                antibot=antibot,
+                fallback_statuses=fallback_statuses,
+                cutoff_markers=cutoff_markers,
+                proxy_endpoint=proxy_endpoint,
+                **kwargs,
+            ),
+        )
 
     attempt = 0
     last_error: Optional[Exception] = None
@@ -584,16 +656,44 @@ async def request_with_retries(
         if context is not None:
             antibot = context.antibot
 
+    broker = get_clearance_broker()
+    proxy_endpoint = proxy_endpoint or client_proxy(client)
+    user_agent = client.headers.get("user-agent")
+    clearance: Optional[Clearance] = None
+    cleared = False
+
     while attempt < max_retries:
         attempt += 1
+        request_kwargs = kwargs
+        if broker is not None:
+            clearance = broker.lookup(url, proxy_endpoint, user_agent)
+            if clearance is not None:
+                headers = {**(kwargs.get("headers") or {}), **broker.apply(client, clearance)}
+                request_kwargs = {**kwargs, "headers": headers}
+        await throttle_request(url, proxy_endpoint)
         try:
-            response = await client.request(method, url, **kwargs)
+            if cutoff_markers:
+                response = await _request_with_cutoff(
+                    client, method, url, cutoff_markers, **request_kwargs
+                )
+            else:
+                response = await client.request(method, url, **request_kwargs)
         except httpx.HTTPError as exc:
             last_error = exc
             LOGGER.warning("HTTP request error (%s %s): %s", method, url, exc)
         else:
             status = response.status_code
 
+            if broker is not None and is_challenge(status, _response_text(response)):
+                if not cleared:
+                    cleared = True
+                    if await broker.obtain(url, proxy_endpoint, user_agent, rejected=clearance):
+                        attempt -= 1  # the retry with fresh cookies does not count
+                        continue
+                elif clearance is not None:
+                    # Fresh cookies did not get past the guard (e.g. fingerprint-bound).
+                    broker.reject(url, proxy_endpoint, user_agent)
+
             if antibot and _should_trigger_antibot(response, fallback_statuses):
                 fallback_response = await _try_antibot_fallback(
                     antibot,
@@ -627,6 +727,64 @@ async def request_with_retries(
     raise RuntimeError(f"Failed to execute request after {max_retries} attempts: {method} {url}")
 
 
+_REQUEST_FLIGHT: SingleFlight[httpx.Response] = SingleFlight(
+    ttl=5.0, cacheable=lambda response: response.status_code < 400
+)
+
+# Proxy each AsyncFetcher client goes out through; httpx does not expose it.
+_CLIENT_PROXIES: "weakref.WeakKeyDictionary[httpx.AsyncClient, str]" = weakref.WeakKeyDictionary()
+
+
+def client_proxy(client: httpx.AsyncClient) -> Optional[str]:
+    """Proxy ``client`` was built with by :class:`AsyncFetcher`, if any."""
+
+    return _CLIENT_PROXIES.get(client)
+
+_STREAM_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+async def _request_with_cutoff(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    markers: Sequence[CutoffMarker],
+    **kwargs: Any,
+) -> httpx.Response:
+    """Stream the body and stop reading once every cutoff marker was seen."""
+
+    cutoff = MarkerCutoff(markers)
+    parts: List[bytes] = []
+    async with client.stream(method, url, **kwargs) as response:
+        async for chunk in response.aiter_bytes():
+            parts.append(chunk)
+            if cutoff.feed(chunk):
+                LOGGER.debug(
+                    "Stream cutoff for %s after %d bytes", url, cutoff.bytes_seen
+                )
+                break
+        # Body is already decoded; drop transfer headers so httpx does not re-decode it.
+        headers = [
+            (key, value)
+            for key, value in response.headers.multi_items()
+            if key.lower() not in _STREAM_DROP_HEADERS
+        ]
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=b"".join(parts),
+            request=response.request,
+        )
+
+
+def _response_text(response: httpx.Response) -> Optional[str]:
+    if "text/html" not in response.headers.get("content-type", "").lower():
+        return None
+    try:
+        return response.text
+    except UnicodeDecodeError:
+        return None
+
+
 def _should_trigger_antibot(
     response: httpx.Response,
     fallback_statuses: Set[int],
@@ -705,69 +863,422 @@ def binary_stock(flag: Any) -> float:
     return 1.0 if bool(flag) else 0.0
 
 
+_INDEX_SUFFIX = ".idx"
+_SHARD_STATS_SUFFIX = ".stats.json"
+_INDEX_RECORD = struct.Struct("<QQQ")
+
+
+def _url_digest(url: str) -> int:
+    """Return a stable 64-bit digest used as the on-disk key for ``url``."""
+
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+    # Zero is reserved for "no original_url" in the sidecar index.
+    return int.from_bytes(digest, "little") or 1
+
+
+class ProcessedUrlSet:
+    """Set-like container of processed URLs stored as 64-bit digests."""
+
+    __slots__ = ("_digests",)
+
+    def __init__(self, urls: Iterable[str] = ()) -> None:
+        self._digests: set[int] = set()
+        self.update(urls)
+
+    def add(self, url: str) -> None:
+        self._digests.add(_url_digest(url))
+
+    def add_new(self, url: str) -> bool:
+        """Add ``url`` and report whether it was previously unseen."""
+
+        digest = _url_digest(url)
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def add_digest(self, digest: int) -> None:
+        if digest:
+            self._digests.add(digest)
+
+    def update(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self.add(url)
+
+    def discard(self, url: str) -> None:
+        self._digests.discard(_url_digest(url))
+
+    def clear(self) -> None:
+        self._digests.clear()
+
+    def __contains__(self, url: object) -> bool:
+        return isinstance(url, str) and _url_digest(url) in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def __bool__(self) -> bool:
+        return bool(self._digests)
+
+
+class _RecordReader:
+    """Random access to partial records by (virtual) offset."""
+
+    def __init__(self, path: Path, compressed: bool) -> None:
+        self._handle = path.open("rb")
+        self._compressed = compressed
+        self._frame_offset = -1
+        self._frame: bytes = b""
+
+    def read_line(self, offset: int) -> bytes:
+        if not self._compressed:
+            self._handle.seek(offset)
+            return self._handle.readline()
+
+        frame_offset, inner = compression.split_virtual_offset(offset)
+        if frame_offset != self._frame_offset:
+            payload, _ = compression.read_frame(self._handle, frame_offset)
+            self._frame_offset = frame_offset
+            self._frame = payload or b""
+        end = self._frame.find(b"\n", inner)
+        return self._frame[inner:] if end < 0 else self._frame[inner : end + 1]
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "_RecordReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class PartialProducts(Sequence[Dict[str, Any]]):
+    """Lazy view over products persisted in a partial JSONL file.
+
+    Length comes from the sidecar index, iteration streams the file, so
+    resuming a run or finalising an export never keeps every record in memory.
+    The file must outlive the view: reading it after ``IncrementalWriter.cleanup``
+    raises ``FileNotFoundError`` rather than silently yielding nothing.
+    """
+
+    def __init__(self, path: Path, offsets: Sequence[int], *, compressed: bool = False) -> None:
+        self._path = path
+        self._offsets = list(offsets)
+        self._compressed = compressed
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not self._offsets:
+            return
+        if not self._path.exists():
+            raise FileNotFoundError(
+                f"Partial {self._path} was removed while {len(self._offsets)} records still refer to it"
+            )
+        with _RecordReader(self._path, self._compressed) as reader:
+            for offset in self._offsets:
+                product = _decode_partial_line(reader.read_line(offset))
+                if product is not None:
+                    yield product
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self._read_at(offset) for offset in self._offsets[index]]
+        return self._read_at(self._offsets[index])
+
+    def _read_at(self, offset: int) -> Dict[str, Any]:
+        with _RecordReader(self._path, self._compressed) as reader:
+            product = _decode_partial_line(reader.read_line(offset))
+        if product is None:
+            raise ValueError(f"Corrupted partial record at offset {offset} in {self._path}")
+        return product
+
+
+def _decode_partial_line(line: bytes) -> Optional[Dict[str, Any]]:
+    if not line.strip():
+        return None
+    try:
+        product = serialization.loads(line)
+    except (serialization.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return product if isinstance(product, dict) else None
+
+
 @dataclass(slots=True)
 class IncrementalWriter:
-    """Append-only writer for partial export results with resume support."""
+    """Append-only writer for partial export results with resume support.
+
+    Records are group-committed: they are buffered and flushed every
+    ``flush_every`` records or ``flush_interval`` seconds, and fsynced every
+    ``checkpoint_every`` records and on close. A sidecar ``<partial>.idx``
+    maps URL digests to byte offsets so resume reads only the index.
+
+    With ``compress`` (default: ``SCRAPER_STORAGE_COMPRESSION``) the partial is
+    stored as ``<partial>.zst``, one zstd frame per flush, and the index holds
+    virtual offsets into those frames.
+    """
 
     partial_path: Path
     resume: bool
     resume_window_hours: Optional[int] = None
-    _file: Optional[TextIO] = field(default=None, init=False)
-    processed_urls: set[str] = field(default_factory=set, init=False)
-
-    def load_existing(self) -> List[Dict[str, Any]]:
-        if not self.partial_path.exists():
+    flush_every: int = 64
+    flush_interval: float = 1.0
+    checkpoint_every: int = 1024
+    compress: Optional[bool] = None
+    _compressed: Optional[bool] = field(default=None, init=False)
+    _file: Optional[BinaryIO] = field(default=None, init=False)
+    _index_file: Optional[BinaryIO] = field(default=None, init=False)
+    _offset: int = field(default=0, init=False)
+    _offsets: List[int] = field(default_factory=list, init=False)
+    _frame: bytearray = field(default_factory=bytearray, init=False)
+    _index_buffer: bytearray = field(default_factory=bytearray, init=False)
+    _pending: int = field(default=0, init=False)
+    _since_checkpoint: int = field(default=0, init=False)
+    _last_flush: float = field(default=0.0, init=False)
+    processed_urls: ProcessedUrlSet = field(default_factory=ProcessedUrlSet, init=False)
+
+    @property
+    def compressed(self) -> bool:
+        """Whether the partial is stored as zstd frames (decided once per run)."""
+
+        if self._compressed is None:
+            if self.partial_path.exists():
+                self._compressed = False
+            elif compression.compressed_path(self.partial_path).exists():
+                self._compressed = True
+            elif self.compress is None:
+                self._compressed = compression.compression_enabled()
+            else:
+                self._compressed = bool(self.compress)
+        return self._compressed
+
+    @property
+    def storage_path(self) -> Path:
+        if self.compressed:
+            return compression.compressed_path(self.partial_path)
+        return self.partial_path
+
+    @property
+    def index_path(self) -> Path:
+        storage = self.storage_path
+        return storage.with_name(storage.name + _INDEX_SUFFIX)
+
+    def load_existing(self) -> PartialProducts:
+        """Load the sidecar index (recovering the unindexed tail if needed)."""
+
+        self._offsets = []
+        storage = self.storage_path
+        if not storage.exists():
+            with contextlib.suppress(FileNotFoundError):
+                self.index_path.unlink()
+            return PartialProducts(storage, [], compressed=self.compressed)
+
+        entries = self._read_index()
+        if entries and not self._is_readable(entries[-1][2]):
+            LOGGER.warning("Sidecar index %s is stale, rebuilding", self.index_path)
+            entries = []
+
+        for url_digest, original_digest, offset in entries:
+            self.processed_urls.add_digest(url_digest)
+            self.processed_urls.add_digest(original_digest)
+            self._offsets.append(offset)
+
+        last_offset = entries[-1][2] if entries else None
+        recovered = self._recover_tail(last_offset)
+        if recovered:
+            LOGGER.info("Recovered %s unindexed records from %s", recovered, storage)
+        return PartialProducts(storage, self._offsets, compressed=self.compressed)
+
+    def _read_index(self) -> List[tuple[int, int, int]]:
+        try:
+            raw = self.index_path.read_bytes()
+        except FileNotFoundError:
             return []
-        entries: List[Dict[str, Any]] = []
-        with self.partial_path.open('r', encoding='utf-8') as handle:
-            for line in handle:
-                if not line.strip():
-                    continue
-                try:
-                    product = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                url = product.get('url')
-                if isinstance(url, str):
-                    self.processed_urls.add(url)
-                original_url = product.get('original_url')
-                if isinstance(original_url, str):
-                    self.processed_urls.add(original_url)
-                entries.append(product)
-        return entries
+        except OSError as exc:
+            LOGGER.warning("Failed to read sidecar index %s: %s", self.index_path, exc)
+            return []
+        usable = len(raw) - len(raw) % _INDEX_RECORD.size
+        return [entry for entry in _INDEX_RECORD.iter_unpack(raw[:usable])]
+
+    def _is_readable(self, offset: int) -> bool:
+        with _RecordReader(self.storage_path, self.compressed) as reader:
+            line = reader.read_line(offset)
+        return line.endswith(b"\n") and _decode_partial_line(line) is not None
+
+    def _iter_stored_lines(self, start: int) -> Iterator[tuple[int, bytes, int]]:
+        """Yield ``(offset, line, durable_end)`` for complete records from ``start``."""
+
+        storage = self.storage_path
+        with storage.open("rb") as handle:
+            if not self.compressed:
+                handle.seek(start)
+                offset = start
+                for line in handle:
+                    line_offset = offset
+                    offset += len(line)
+                    if not line.endswith(b"\n"):
+                        return
+                    yield line_offset, line, offset
+                return
 
-    def open(self) -> None:
-        self.partial_path.parent.mkdir(parents=True, exist_ok=True)
-        self._file = self.partial_path.open('a', encoding='utf-8')
+            for frame_offset, frame_end, payload in compression.iter_frames(handle, start):
+                inner = 0
+                for line in payload.splitlines(keepends=True):
+                    virtual = compression.make_virtual_offset(frame_offset, inner)
+                    inner += len(line)
+                    yield virtual, line, frame_end
+
+    def _recover_tail(self, last_offset: Optional[int]) -> int:
+        """Index records stored after the last index flush; drop torn data."""
+
+        storage = self.storage_path
+        if last_offset is None:
+            start = 0
+        elif self.compressed:
+            start = compression.split_virtual_offset(last_offset)[0]
+        else:
+            start = last_offset
 
-    def append(self, product: Dict[str, Any]) -> None:
-        if self._file is None:
-            raise RuntimeError('incremental writer is not opened')
+        recovered: List[bytes] = []
+        good_end = start
+        for offset, line, durable_end in self._iter_stored_lines(start):
+            good_end = durable_end
+            if last_offset is not None and offset <= last_offset:
+                continue
+            product = _decode_partial_line(line)
+            if product is None:
+                continue
+            url_digest, original_digest = self._register(product)
+            self._offsets.append(offset)
+            recovered.append(_INDEX_RECORD.pack(url_digest, original_digest, offset))
+
+        if good_end < storage.stat().st_size:
+            LOGGER.warning("Truncating torn record at end of %s", storage)
+            with storage.open("r+b") as handle:
+                handle.truncate(good_end)
+
+        rewrite_index = last_offset is None
+        if recovered or rewrite_index:
+            with self.index_path.open("wb" if rewrite_index else "ab") as index:
+                index.write(b"".join(recovered))
+        return len(recovered)
+
+    def _register(self, product: Mapping[str, Any]) -> tuple[int, int]:
+        url_digest = 0
+        original_digest = 0
         url = product.get('url')
         if isinstance(url, str):
-            self.processed_urls.add(url)
+            url_digest = _url_digest(url)
+            self.processed_urls.add_digest(url_digest)
         original_url = product.get('original_url')
         if isinstance(original_url, str):
-            self.processed_urls.add(original_url)
-        self._file.write(json.dumps(product, ensure_ascii=False) + '\n')
+            original_digest = _url_digest(original_url)
+            self.processed_urls.add_digest(original_digest)
+        return url_digest, original_digest
+
+    def open(self) -> None:
+        storage = self.storage_path
+        storage.parent.mkdir(parents=True, exist_ok=True)
+        self._file = storage.open('ab')
+        self._index_file = self.index_path.open('ab')
+        self._offset = self._file.seek(0, os.SEEK_END)
+        self._frame.clear()
+        self._index_buffer.clear()
+        self._pending = 0
+        self._since_checkpoint = 0
+        self._last_flush = time.monotonic()
+
+    def append(self, product: Dict[str, Any]) -> None:
+        if self._file is None or self._index_file is None:
+            raise RuntimeError('incremental writer is not opened')
+        url_digest, original_digest = self._register(product)
+        line = serialization.dumps_bytes(product) + b'\n'
+
+        if self.compressed:
+            if self._frame and len(self._frame) + len(line) > compression.MAX_FRAME_BYTES:
+                self._write_frame()
+            offset = compression.make_virtual_offset(self._offset, len(self._frame))
+            self._frame.extend(line)
+        else:
+            offset = self._offset
+            self._file.write(line)
+            self._offset += len(line)
+
+        self._index_buffer.extend(_INDEX_RECORD.pack(url_digest, original_digest, offset))
+        self._offsets.append(offset)
+        self._pending += 1
+        self._since_checkpoint += 1
+
+        if self._since_checkpoint >= max(self.checkpoint_every, 1):
+            self.checkpoint()
+        elif (
+            self._pending >= max(self.flush_every, 1)
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def _write_frame(self) -> None:
+        if not self._frame or self._file is None:
+            return
+        payload = compression.compress_frame(bytes(self._frame))
+        self._file.write(payload)
+        self._offset += len(payload)
+        self._frame.clear()
+
+    def _flush_buffers(self, *, durable: bool) -> None:
+        if self._file is None or self._index_file is None:
+            return
+        self._write_frame()
         self._file.flush()
+        if durable:
+            os.fsync(self._file.fileno())
+        if self._index_buffer:
+            self._index_file.write(self._index_buffer)
+            self._index_buffer.clear()
+        self._index_file.flush()
+        if durable:
+            os.fsync(self._index_file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        """Push buffered records to the OS; data always lands before its index."""
+
+        self._flush_buffers(durable=False)
+
+    def checkpoint(self) -> None:
+        """Flush and fsync the partial file and its index."""
+
+        self._flush_buffers(durable=True)
+        self._since_checkpoint = 0
 
     def close(self) -> None:
         if self._file is not None:
+            with contextlib.suppress(OSError, ValueError):
+                self.checkpoint()
             self._file.close()
             self._file = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
 
-    def finalize(self) -> List[Dict[str, Any]]:
+    def finalize(self) -> PartialProducts:
         self.close()
-        return self.load_existing()
+        return PartialProducts(self.storage_path, self._offsets, compressed=self.compressed)
 
     def cleanup(self) -> None:
         self.close()
         self.processed_urls.clear()
-        try:
-            self.partial_path.unlink()
-        except FileNotFoundError:
-            return
+        self._offsets = []
+        for storage in (self.partial_path, compression.compressed_path(self.partial_path)):
+            for path in (storage, storage.with_name(storage.name + _INDEX_SUFFIX)):
+                with contextlib.suppress(FileNotFoundError):
+                    path.unlink()
+        with contextlib.suppress(FileNotFoundError):
+            _shard_stats_path(self.partial_path).unlink()
+        self._compressed = None
 
 
 def make_cli_progress_callback(
@@ -813,11 +1324,128 @@ def make_cli_progress_callback(
     return _emit if normalized_total or flag else None
 
 
+def resolve_frontier(config: HTTPClientConfig, urls: Sequence[str]) -> Optional[UrlFrontier]:
+    """Frontier for this fetch: the configured one, or one named by the environment.
+
+    ``SCRAPER_FRONTIER`` picks the backend and ``SCRAPER_FRONTIER_RUN`` names the
+    crawl run; both must be set (by ``run_ili_ili_parallel.py --frontier`` or by
+    hand) so that every worker of a run shares one frontier while a new run
+    starts from a fresh one.
+    """
+
+    if config.frontier is not None:
+        return config.frontier
+    spec = os.environ.get(FRONTIER_ENV, "").strip()
+    run = os.environ.get(FRONTIER_RUN_ENV, "").strip()
+    if not spec or not run or not urls:
+        return None
+    host = (urlparse(urls[0]).hostname or "default").lower()
+    return create_frontier(f"{host}:{run}", spec)
+
+
+def frontier_shard() -> Optional[str]:
+    """Worker id of a parallel frontier run, or ``None`` outside of one.
+
+    ``run_ili_ili_parallel.py --frontier`` sets ``SCRAPER_FRONTIER_WORKER`` for
+    each worker. Such a worker keeps its own partial (see :func:`shard_path`)
+    and leaves the export to :func:`merge_partial_shards`, since every worker
+    only ever holds its own share of the catalog.
+    """
+
+    if not os.environ.get(FRONTIER_ENV, "").strip():
+        return None
+    if not os.environ.get(FRONTIER_RUN_ENV, "").strip():
+        return None
+    return os.environ.get(FRONTIER_WORKER_ENV, "").strip() or None
+
+
+def shard_path(path: Path, shard: str) -> Path:
+    """Per-worker sibling of ``path``: ``httpx_partial.jsonl`` -> ``httpx_partial.shard-0.jsonl``."""
+
+    return path.with_name(f"{path.stem}.shard-{shard}{path.suffix}")
+
+
+def _shard_stats_path(partial_path: Path) -> Path:
+    return partial_path.with_name(partial_path.name + _SHARD_STATS_SUFFIX)
+
+
+def write_shard_stats(partial_path: Path, *, attempted: int, succeeded: int) -> None:
+    """Add this worker's claimed/succeeded counts to its shard's stats sidecar.
+
+    Counts accumulate over resumed runs of the same shard and are dropped
+    together with the partial.
+    """
+
+    path = _shard_stats_path(partial_path)
+    totals = {"attempted": 0, "succeeded": 0}
+    try:
+        stored = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        stored = {}
+    if isinstance(stored, dict):
+        for key in totals:
+            with contextlib.suppress(TypeError, ValueError):
+                totals[key] = int(stored.get(key) or 0)
+    totals["attempted"] += attempted
+    totals["succeeded"] += succeeded
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(totals), encoding="utf-8")
+
+
+def merge_partial_shards(writer: IncrementalWriter) -> tuple[int, int]:
+    """Fold every worker shard of ``writer.partial_path`` into ``writer``.
+
+    Records whose URL the writer already holds are skipped. Each shard is
+    removed once its records are checkpointed into ``writer``. Returns the
+    summed ``(attempted, succeeded)`` counts of the shards, so the success rate
+    is taken over the URLs the workers claimed rather than the whole catalog.
+    """
+
+    partial_path = writer.partial_path
+    pattern = f"{partial_path.stem}.shard-*{partial_path.suffix}"
+    shards = sorted(
+        {
+            compression.logical_path(path)
+            for path in partial_path.parent.glob(pattern + "*")
+            if path.name.endswith((partial_path.suffix, partial_path.suffix + compression.ZSTD_SUFFIX))
+        }
+    )
+    attempted = succeeded = 0
+    for shard in shards:
+        shard_writer = IncrementalWriter(partial_path=shard, resume=True)
+        merged = 0
+        for product in shard_writer.load_existing():
+            url = product.get("url")
+            if isinstance(url, str) and url in writer.processed_urls:
+                continue
+            writer.append(dict(product))
+            merged += 1
+        try:
+            stats = json.loads(_shard_stats_path(shard).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            stats = {}
+        attempted += int(stats.get("attempted") or 0)
+        succeeded += int(stats.get("succeeded") or 0)
+        writer.checkpoint()
+        shard_writer.cleanup()
+        LOGGER.info("Merged %s records from partial shard %s", merged, shard.name)
+    return attempted, succeeded
+
+
 @dataclass(slots=True)
 class AsyncFetcher:
-    """Run asynchronous product fetch tasks with bounded concurrency."""
+    """Run asynchronous product fetch tasks with bounded concurrency.
+
+    With a shared URL frontier (see :func:`resolve_frontier`) ``run`` seeds it
+    with ``urls`` and then pulls leases until it is drained, so workers of one
+    run split the catalog dynamically; each worker returns only its own share.
+    ``attempted`` counts the URLs the last ``run`` actually handled (all of
+    ``urls``, or the leases this worker claimed), the denominator of its
+    success rate.
+    """
 
     config: HTTPClientConfig
+    attempted: int = field(default=0, init=False)
 
     async def run(
         self,
@@ -827,6 +1455,7 @@ class AsyncFetcher:
         progress_callback: Optional[Callable[[Dict[str, int]], None]] = None,
         progress_total: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
+        self.attempted = 0
         if not urls:
             return []
 
@@ -863,17 +1492,38 @@ class AsyncFetcher:
             except Exception:  # pragma: no cover - defensive guard
                 LOGGER.debug("Progress callback raised an exception", exc_info=True)
 
+        transport = self.config.transport
+        if transport is None:
+            transport = cached_transport(
+                verify=self.config.verify, limits=limits, proxy=self.config.proxy
+            )
         client_kwargs: Dict[str, Any] = {
             "headers": dict(self.config.headers) if self.config.headers else None,
             "limits": limits,
             "timeout": timeout,
-            "transport": self.config.transport,
+            "transport": transport,
             "verify": self.config.verify,
         }
         if self.config.base_url:
             client_kwargs["base_url"] = self.config.base_url
 
         async with httpx.AsyncClient(**client_kwargs) as client:
+            if self.config.proxy:
+                _CLIENT_PROXIES[client] = self.config.proxy
+            prewarm = self.config.prewarm_connections or (
+                _env_number("SCRAPER_PREWARM_CONNECTIONS", int) or 0
+            )
+            if prewarm > 0:
+                await prewarm_connections(
+                    client,
+                    self.config.base_url or urls[0],
+                    connections=min(prewarm, concurrency),
+                )
+
+            frontier = resolve_frontier(self.config, urls)
+            if frontier is not None:
+                return await self._drain_frontier(frontier, urls, client, handler, _emit_progress)
+
             async def _wrapped(index: int, url: str) -> None:
                 result: Optional[Dict[str, Any]] = None
                 async with semaphore:
@@ -885,6 +1535,7 @@ class AsyncFetcher:
                 results[index] = result
                 await _emit_progress(result is not None)
 
+            self.attempted = len(urls)
             tasks = [
                 asyncio.create_task(_wrapped(index, url))
                 for index, url in enumerate(urls)
@@ -894,6 +1545,53 @@ class AsyncFetcher:
 
         return [item for item in results if item is not None]
 
+    async def _drain_frontier(
+        self,
+        frontier: UrlFrontier,
+        urls: Sequence[str],
+        client: httpx.AsyncClient,
+        handler: ProductHandler,
+        emit_progress: Callable[[bool], Awaitable[None]],
+    ) -> List[Dict[str, Any]]:
+        concurrency = max(self.config.concurrency, 1)
+        # A lease must outlive the handler's own retries or the URL is fetched twice.
+        lease_seconds = max(
+            frontier.lease_seconds, self.config.timeout * (self.config.max_retries + 1)
+        )
+        added = await asyncio.to_thread(frontier.add, urls)
+        LOGGER.info("Frontier %s (%s): %d new of %d URLs", frontier.name, frontier.backend, added, len(urls))
+
+        results: List[Dict[str, Any]] = []
+        leases: Deque[Lease] = deque()
+        claim_lock = asyncio.Lock()
+
+        async def _next_lease() -> Optional[Lease]:
+            async with claim_lock:
+                if not leases:
+                    leases.extend(await asyncio.to_thread(frontier.claim, concurrency, lease_seconds))
+                return leases.popleft() if leases else None
+
+        async def _worker() -> None:
+            while (lease := await _next_lease()) is not None:
+                self.attempted += 1
+                try:
+                    result = await handler(client, lease.url)
+                except Exception as exc:  # pragma: no cover - defensive
+                    LOGGER.exception("Handler error for %s: %s", lease.url, exc)
+                    await asyncio.to_thread(frontier.fail, lease, repr(exc))
+                    result = None
+                else:
+                    if result is None:
+                        # Handlers already retried the request; do not requeue.
+                        await asyncio.to_thread(frontier.fail, lease, "no product", retry=False)
+                    else:
+                        results.append(result)
+                        await asyncio.to_thread(frontier.complete, lease)
+                await emit_progress(result is not None)
+
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        return results
+
 
 def export_products(
     domain: str,
@@ -911,11 +1609,14 @@ def export_products(
         success_rate: Доля успешно обработанных URL (0.0–1.0). None, если метрика недоступна.
     """
 
-    sorted_products = sorted(products, key=lambda item: item.get("url", ""))
+    # Records (not dicts) from here to serialisation; sorted in place, no copies.
+    sorted_products = compact_products(products)
+    sorted_products.sort(key=lambda item: item.get("url", ""))
     artifacts = write_product_exports(sorted_products, export_path)
+    _record_recrawl_observations(domain, sorted_products)
     update_summary(
         domain,
-        list(sorted_products),
+        sorted_products,
         export_file=artifacts.json_path.name,
         status="ok",
         success_rate=success_rate,
@@ -923,26 +1624,118 @@ def export_products(
     return artifacts
 
 
-def load_export_products(export_path: Path) -> List[Dict[str, Any]]:
-    """Load product dictionaries from an export file."""
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in {"1", "true", "yes", "on"}
+
+
+def _env_number(name: str, cast: Callable[[str], T]) -> Optional[T]:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return None
+    try:
+        return cast(raw)
+    except ValueError:
+        LOGGER.warning("Ignoring invalid %s=%r", name, raw)
+        return None
+
 
-    if not export_path.exists():
+def _record_recrawl_observations(domain: str, products: Sequence[Dict[str, Any]]) -> None:
+    if not _env_flag("RECRAWL_PLANNER", default=True):
+        return
+    try:
+        history = RecrawlHistory.for_domain(_normalize_domain(domain))
+        changed = history.observe_products(products)
+        history.save()
+    except Exception as exc:  # noqa: BLE001 - stats must never break an export
+        LOGGER.warning("Failed to update recrawl stats for %s: %s", domain, exc)
+        return
+    LOGGER.info("Recrawl stats: %s of %s products changed", changed, len(products))
+
+
+def select_urls_to_fetch(
+    domain: str,
+    urls: Sequence[str],
+    writer: "IncrementalWriter",
+    *,
+    export_path: Optional[Path] = None,
+) -> List[str]:
+    """Return pending URLs ordered by how likely they are to have changed.
+
+    URLs already in ``writer`` are dropped. With ``RECRAWL_SAMPLE_RATE`` (<1.0)
+    or ``RECRAWL_MAX_FETCHES`` set, stable URLs are deferred and their previous
+    records from ``export_path`` are carried forward into the partial so the
+    export stays complete. ``RECRAWL_PLANNER=0`` disables planning.
+    """
+
+    pending = [url for url in urls if url not in writer.processed_urls]
+    if not pending or not _env_flag("RECRAWL_PLANNER", default=True):
+        return pending
+
+    history = RecrawlHistory.for_domain(_normalize_domain(domain))
+    if not history.stats:
+        return pending
+
+    # An explicit 0 means "refetch no stable URL", so only a missing value defaults.
+    sample_rate = _env_number("RECRAWL_SAMPLE_RATE", float)
+    planner = RecrawlPlanner(
+        history,
+        sample_rate=sample_rate if sample_rate is not None else 1.0,
+    )
+    plan = planner.plan(pending, max_fetches=_env_number("RECRAWL_MAX_FETCHES", int))
+    if not plan.skipped:
+        return plan.fetch
+
+    previous: Dict[str, Dict[str, Any]] = {}
+    if export_path is not None:
+        for product in load_export_products(export_path):
+            for key in ("url", "original_url"):
+                value = product.get(key)
+                if isinstance(value, str) and value:
+                    previous.setdefault(value, product)
+
+    carried = 0
+    uncarried: List[str] = []
+    for url in plan.skipped:
+        product = previous.get(url)
+        if product is None or product.get("error"):
+            uncarried.append(url)
+            continue
+        if url not in writer.processed_urls:
+            writer.append(product)
+            carried += 1
+
+    LOGGER.info(
+        "Recrawl plan: fetching %s, carried forward %s stable products, %s without history",
+        len(plan.fetch),
+        carried,
+        len(uncarried),
+    )
+    return plan.fetch + uncarried
+
+
+def load_export_products(export_path: Path) -> List[ProductRecord]:
+    """Load products from an export file (plain or ``.zst``) as compact records."""
+
+    if compression.resolve_existing(export_path) is None:
         return []
 
     try:
-        data = json.loads(export_path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError) as exc:
+        data = serialization.loads(compression.read_bytes(export_path))
+    except (serialization.JSONDecodeError, OSError, RuntimeError) as exc:
         LOGGER.warning("Failed to load existing export %s: %s", export_path, exc)
         return []
 
     if isinstance(data, dict):
         candidates = data.get("products")
         if isinstance(candidates, list):
-            return [item for item in candidates if isinstance(item, dict)]
+            return compact_products(candidates)
         LOGGER.warning("Unexpected export object structure in %s", export_path)
         return []
     if isinstance(data, list):
-        return [item for item in data if isinstance(item, dict)]
+        return compact_products(data)
 
     LOGGER.warning("Unexpected export structure in %s", export_path)
     return []
@@ -955,15 +1748,14 @@ def prime_writer_from_export(
 ) -> int:
     """Seed writer.processed_urls from an existing export file."""
 
-    items = list(products) if products is not None else load_export_products(export_path)
+    items = products if products is not None else load_export_products(export_path)
     seeded = 0
     for product in items:
         added = False
         for key in ("url", "original_url"):
             value = product.get(key)
             if isinstance(value, str) and value:
-                if value not in writer.processed_urls:
-                    writer.processed_urls.add(value)
+                if writer.processed_urls.add_new(value):
                     added = True
         if added:
             seeded += 1
@@ -976,15 +1768,19 @@ def prime_writer_from_export(
 
 
 def merge_products(
-    existing: Sequence[Dict[str, Any]],
-    new: Sequence[Dict[str, Any]],
-) -> List[Dict[str, Any]]:
-    """Merge product lists, avoiding duplicates by url/original_url."""
+    existing: Sequence[Mapping[str, Any]],
+    new: Iterable[Mapping[str, Any]],
+) -> List[ProductRecord]:
+    """Merge product lists, avoiding duplicates by url/original_url.
+
+    ``new`` may be a lazy :class:`PartialProducts` view; every kept product is
+    held as a :class:`ProductRecord`.
+    """
 
-    merged: List[Dict[str, Any]] = []
+    merged: List[ProductRecord] = []
     seen: set[str] = set()
 
-    def _register(product: Dict[str, Any]) -> None:
+    def _register(product: Mapping[str, Any]) -> None:
         keys = False
         for key in ("url", "original_url"):
             value = product.get(key)
@@ -992,10 +1788,10 @@ def merge_products(
                 seen.add(value)
                 keys = True
         if not keys:
-            seen.add(json.dumps(product, sort_keys=True))
+            seen.add(json.dumps(product, sort_keys=True, default=dict))
 
     for product in existing:
-        merged.append(product)
+        merged.append(ProductRecord.from_mapping(product))
         _register(product)
 
     for product in new:
@@ -1007,7 +1803,7 @@ def merge_products(
                 break
         if duplicate:
             continue
-        merged.append(product)
+        merged.append(ProductRecord.from_mapping(product))
         _register(product)
 
     return merged
@@ -1064,7 +1860,7 @@ def prepare_incremental_writer(
     resume: bool,
     resume_window_hours: Optional[int] = None,
     now: Optional[datetime] = None,
-) -> tuple[IncrementalWriter, List[Dict[str, Any]]]:
+) -> tuple[IncrementalWriter, PartialProducts]:
     """Configure incremental writer, applying resume policies."""
 
     if resume_window_hours is not None and resume_window_hours < 0:
@@ -1079,14 +1875,16 @@ def prepare_incremental_writer(
     if not resume:
         writer.cleanup()
     else:
-        if partial_path.exists() and resume_window_hours is not None:
+        # With compression the records live in ``<partial>.zst``.
+        storage = writer.storage_path
+        if storage.exists() and resume_window_hours is not None:
             current_time = now or datetime.now(timezone.utc)
-            modified = datetime.fromtimestamp(partial_path.stat().st_mtime, timezone.utc)
+            modified = datetime.fromtimestamp(storage.stat().st_mtime, timezone.utc)
             if current_time - modified > timedelta(hours=resume_window_hours):
                 age_hours = (current_time - modified).total_seconds() / 3600
                 LOGGER.info(
                     "Discarding partial export %s: age %.2f h exceeds resume_window %s h",
-                    partial_path,
+                    storage,
                     age_hours,
                     resume_window_hours,
                 )
@@ -1099,9 +1897,15 @@ def prepare_incremental_writer(
 
 __all__ = [
     "AsyncFetcher",
+    "frontier_shard",
+    "merge_partial_shards",
+    "shard_path",
+    "write_shard_stats",
     "HTTPClientConfig",
     "NotFoundError",
     "IncrementalWriter",
+    "PartialProducts",
+    "ProcessedUrlSet",
     "ExportArtifacts",
     "prepare_incremental_writer",
     "binary_stock",
@@ -1116,5 +1920,7 @@ __all__ = [
     "get_canonical_map_path",
     "find_available_maps",
     "request_with_retries",
+    "client_proxy",
     "make_cli_progress_callback",
+    "select_urls_to_fetch",
 ]
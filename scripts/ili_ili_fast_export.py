@@ -27,17 +27,22 @@ from scripts.fast_export_base import (
     create_antibot_runtime,
     export_products,
     finalize_antibot_runtime,
+    frontier_shard,
     load_url_map,
     load_url_map_with_fallback,
     load_export_products,
+    merge_partial_shards,
     merge_products,
     prepare_incremental_writer,
     prime_writer_from_export,
+    select_urls_to_fetch,
     record_error_product,
     release_process_lock,
     request_with_retries,
+    shard_path,
     update_summary,
     use_export_context,
+    write_shard_stats,
 )
 
 LOGGER = logging.getLogger(__name__)
@@ -285,8 +290,11 @@ def _run(
     health_check_timeout: float = 20.0,
 ) -> None:
     urls = _load_product_urls(limit)
+    # Parallel frontier workers each keep a shard; ``--merge-shards`` exports.
+    shard = frontier_shard()
+    partial_path = shard_path(PARTIAL_PATH, shard) if shard else PARTIAL_PATH
     writer, existing_products = prepare_incremental_writer(
-        PARTIAL_PATH,
+        partial_path,
         resume=resume,
         resume_window_hours=resume_window_hours,
     )
@@ -307,7 +315,9 @@ def _run(
                     products=existing_export_products,
                 )
 
-        urls_to_fetch = [url for url in urls if url not in writer.processed_urls]
+        urls_to_fetch = select_urls_to_fetch(
+            SITE_DOMAIN, urls, writer, export_path=EXPORT_PATH
+        )
         LOGGER.info(
             "Total product URLs: %s (skipped: %s, to fetch: %s)",
             len(urls),
@@ -325,7 +335,8 @@ def _run(
                     export_file=EXPORT_PATH.name,
                     status="ok",
                 )
-            writer.cleanup()
+            if shard is None:
+                writer.cleanup()
             return
         base_concurrency = max(1, concurrency)
         fallback_concurrency = antibot_concurrency
@@ -453,6 +464,19 @@ def _run(
             finalize_antibot_runtime(antibot_runtime)
 
         products = writer.finalize()
+        if shard is not None:
+            write_shard_stats(
+                partial_path,
+                attempted=fetcher.attempted,
+                succeeded=len(processed_products),
+            )
+            LOGGER.info(
+                "Frontier worker %s: %s of %s claimed URLs parsed, export left to --merge-shards",
+                shard,
+                len(processed_products),
+                fetcher.attempted,
+            )
+            return
         if skip_existing and existing_export_products:
             products = merge_products(existing_export_products, products)
         LOGGER.info("Parsed %s products", len(products))
@@ -463,7 +487,7 @@ def _run(
             return
 
         success_ratio = (
-            len(processed_products) / total_attempts if total_attempts > 0 else None
+            len(processed_products) / fetcher.attempted if fetcher.attempted > 0 else None
         )
 
         export_products(
@@ -477,6 +501,39 @@ def _run(
         writer.close()
 
 
+def _merge_shards(*, dry_run: bool, skip_existing: bool) -> None:
+    """Export the partial shards left by parallel frontier workers as one file."""
+
+    writer, _ = prepare_incremental_writer(PARTIAL_PATH, resume=True)
+    try:
+        attempted, succeeded = merge_partial_shards(writer)
+        products = writer.finalize()
+        if skip_existing:
+            existing_export_products = load_export_products(EXPORT_PATH)
+            if existing_export_products:
+                products = merge_products(existing_export_products, products)
+        LOGGER.info(
+            "Merged %s products (%s of %s claimed URLs parsed)",
+            len(products),
+            succeeded,
+            attempted,
+        )
+
+        if dry_run:
+            LOGGER.info("Dry run: skipping export")
+            return
+
+        export_products(
+            SITE_DOMAIN,
+            EXPORT_PATH,
+            products,
+            success_rate=succeeded / attempted if attempted > 0 else None,
+        )
+        writer.cleanup()
+    finally:
+        writer.close()
+
+
 def _build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Ili-Ili fast exporter")
     parser.add_argument(
@@ -521,16 +578,26 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         default=20.0,
         help="Timeout (seconds) for pre-flight health check (default: 20)",
     )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Export the partial shards written by parallel frontier workers and exit",
+    )
     add_antibot_arguments(parser, default_enabled=True, default_concurrency=-1)
     return parser
 
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
-    acquire_process_lock(LOCK_FILE, logger=LOGGER)
+    shard = frontier_shard()
+    lock_file = shard_path(LOCK_FILE, shard) if shard else LOCK_FILE
+    acquire_process_lock(lock_file, logger=LOGGER)
 
     try:
         args = _build_arg_parser().parse_args()
+        if args.merge_shards:
+            _merge_shards(dry_run=args.dry_run, skip_existing=args.skip_existing)
+            return
         limit = args.limit if args.limit > 0 else None
         antibot_concurrency = args.antibot_concurrency
         if antibot_concurrency is not None and antibot_concurrency <= 0:
@@ -549,7 +616,7 @@ def main() -> None:
             health_check_timeout=float(args.health_timeout),
         )
     finally:
-        release_process_lock(LOCK_FILE, logger=LOGGER)
+        release_process_lock(lock_file, logger=LOGGER)
 
 
 if __name__ == "__main__":
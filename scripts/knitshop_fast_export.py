@@ -32,6 +32,7 @@ from scripts.fast_export_base import (
     merge_products,
     prepare_incremental_writer,
     prime_writer_from_export,
+    select_urls_to_fetch,
     release_process_lock,
     request_with_retries,
     use_export_context,
@@ -242,7 +243,9 @@ def _run(
         if existing_products:
             prime_writer_from_export(writer, EXPORT_PATH, existing_products)
 
-    urls_to_fetch = [url for url in urls if url not in writer.processed_urls]
+    urls_to_fetch = select_urls_to_fetch(
+        SITE_DOMAIN, urls, writer, export_path=EXPORT_PATH
+    )
     LOGGER.info(
         "Total URLs: %s (skipped: %s, to fetch: %s)",
         len(urls),
@@ -322,7 +325,7 @@ def _run(
             return
 
         success_ratio = (
-            len(processed_products) / total_attempts if total_attempts > 0 else None
+            len(processed_products) / fetcher.attempted if fetcher.attempted > 0 else None
         )
 
         export_products(
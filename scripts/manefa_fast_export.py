@@ -32,11 +32,13 @@ from scripts.fast_export_base import (
     merge_products,
     prepare_incremental_writer,
     prime_writer_from_export,
+    select_urls_to_fetch,
     record_error_product,
     release_process_lock,
     request_with_retries,
     use_export_context,
 )
+from utils.json_blocks import scan_json_blocks
 
 LOGGER = logging.getLogger(__name__)
 
@@ -170,64 +172,16 @@ PRODUCT_PATTERNS = (
 TRUTHY = {"1", "true", "yes", "y", "on", "да", "д"}
 
 
-def _extract_json_after(pattern: re.Pattern[str], text: str) -> Optional[Dict[str, Any]]:
-    match = pattern.search(text)
-    if not match:
-        return None
-
-    start = match.end()
-    length = len(text)
-    brace_level = 0
-    json_start = None
-
-    for index in range(start, length):
-        char = text[index]
-        if char == "{":
-            json_start = index
-            brace_level = 1
-            break
-        if char in " \t\n\r":
-            continue
-        return None
-
-    if json_start is None:
-        return None
-
-    for index in range(json_start + 1, length):
-        char = text[index]
-        if char == "{":
-            brace_level += 1
-        elif char == "}":
-            brace_level -= 1
-            if brace_level == 0:
-                json_text = text[json_start : index + 1]
-                try:
-                    return json.loads(json_text)
-                except json.JSONDecodeError:
-                    return None
-    return None
+_PRODUCT_ANCHORS = {str(priority): pattern for priority, pattern in enumerate(PRODUCT_PATTERNS)}
 
 
 def _parse_product_payload(html: str) -> Optional[Dict[str, Any]]:
-    # First attempt fast regex on entire HTML
-    for raw_pattern in PRODUCT_PATTERNS:
-        pattern = re.compile(raw_pattern, re.IGNORECASE)
-        payload = _extract_json_after(pattern, html)
+    # All product patterns are matched in one pass; earlier patterns win.
+    blocks = scan_json_blocks(html, _PRODUCT_ANCHORS, brackets="{", flags=re.IGNORECASE)
+    for block in sorted(blocks, key=lambda block: int(block.anchor)):
+        payload = block.decode()
         if payload:
             return payload
-
-    # Fall back to scanning inline scripts
-    soup = BeautifulSoup(html, "lxml")
-    for script in soup.find_all("script"):
-        text = script.string or script.get_text()
-        if not text:
-            continue
-        for raw_pattern in PRODUCT_PATTERNS:
-            pattern = re.compile(raw_pattern, re.IGNORECASE)
-            payload = _extract_json_after(pattern, text)
-            if payload:
-                return payload
-
     return None
 
 
@@ -712,7 +666,9 @@ async def _run_export(
                 products=existing_export_products,
             )
 
-    urls_to_fetch = [url for url in urls if url not in writer.processed_urls]
+    urls_to_fetch = select_urls_to_fetch(
+        SITE_DOMAIN, urls, writer, export_path=EXPORT_PATH
+    )
     if not urls_to_fetch:
         LOGGER.info("All URLs already processed for %s", SITE_DOMAIN)
     else:
@@ -781,8 +737,8 @@ async def _run_export(
             await antibot_runtime.cleanup()
         writer.close()
 
+    # ``products`` streams from the partial file, so it is removed only after the export.
     products = writer.finalize()
-    writer.cleanup()
 
     if existing_export_products:
         products = merge_products(existing_export_products, products)
@@ -790,8 +746,8 @@ async def _run_export(
     success_ratio: Optional[float] = None
     if urls_to_fetch:
         success_ratio = (
-            len(processed_products) / len(urls_to_fetch)
-            if len(urls_to_fetch) > 0
+            len(processed_products) / fetcher.attempted
+            if fetcher.attempted > 0
             else None
         )
 
@@ -806,6 +762,7 @@ async def _run_export(
         SITE_DOMAIN,
         len(products),
     )
+    writer.cleanup()
 
 
 def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
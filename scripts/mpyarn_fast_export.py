@@ -17,6 +17,7 @@ from typing import Any, Dict, Iterable, List, Optional
 import httpx
 from bs4 import BeautifulSoup
 
+from network.stream_cutoff import product_cutoff_markers
 from scripts import run_mpyarn_batches
 from scripts.fast_export_base import (
     IncrementalWriter,
@@ -30,12 +31,14 @@ from scripts.fast_export_base import (
     merge_products,
     prepare_incremental_writer,
     prime_writer_from_export,
+    select_urls_to_fetch,
     record_error_product,
     release_process_lock,
     request_with_retries,
     update_summary,
     use_export_context,
 )
+from utils.json_blocks import decode_json_after
 
 # ---------------------------------------------------------------------------
 # Configuration ----------------------------------------------------------------
@@ -113,24 +116,10 @@ def _parse_shop2_config(html_text: str) -> Dict[str, Any]:
     start = html_text.find(marker)
     if start == -1:
         raise ValueError("shop2.init payload not found")
-    depth = 0
-    in_string = False
-    escape = False
-    for index in range(start + len(marker), len(html_text)):
-        char = html_text[index]
-        if char == "\"" and not escape:
-            in_string = not in_string
-        escape = char == "\\" and not escape and in_string
-        if in_string:
-            continue
-        if char == "{":
-            depth += 1
-        elif char == "}":
-            depth -= 1
-            if depth == 0:
-                payload = html_text[start + len(marker) : index + 1]
-                return json.loads(payload)
-    raise ValueError("Failed to parse shop2.init payload")
+    payload = decode_json_after(html_text, start + len(marker), brackets="{")
+    if not isinstance(payload, dict):
+        raise ValueError("Failed to parse shop2.init payload")
+    return payload
 
 
 def _extract_text(element: Optional[BeautifulSoup]) -> Optional[str]:
@@ -155,6 +144,7 @@ async def _fetch_product_html(client: httpx.AsyncClient, url: str) -> str:
         "GET",
         url,
         follow_redirects=True,
+        cutoff_markers=product_cutoff_markers(url),
     )
     return response.text
 
@@ -183,6 +173,7 @@ async def _fetch_variant_html(
         data=payload,
         headers=headers,
         follow_redirects=True,
+        coalesce=True,
     )
     payload_json = response.json()
     body = payload_json.get("data", {}).get("body")
@@ -439,7 +430,9 @@ def _run(
                     products=existing_export_products,
                 )
 
-        urls_to_fetch = [url for url in urls if url not in writer.processed_urls]
+        urls_to_fetch = select_urls_to_fetch(
+            SITE_DOMAIN, urls, writer, export_path=EXPORT_PATH
+        )
         skipped = len(urls) - len(urls_to_fetch)
         LOGGER.info(
             "To fetch: %s URLs (skipped: %s already processed)",
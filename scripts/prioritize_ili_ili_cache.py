@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
-"""Reorder ili-ili.com cache so priority categories are scraped first."""
+"""Reorder ili-ili.com cache so priority categories are scraped first.
+
+Within the priority segment and the rest, URLs are ordered by their learned
+change probability (see :mod:`utils.recrawl_planner`), so products whose price
+or stock moves often are refreshed before stable ones.
+"""
 
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils.recrawl_planner import RecrawlHistory, RecrawlPlanner  # noqa: E402
+
+SITE_DOMAIN = "ili-ili.com"
+
 CACHE_PATH = Path("data/sites/ili-ili.com/cache/iliili_urls.txt")
 BACKUP_PATH = CACHE_PATH.with_suffix(".all.txt")
 PRIORITY_PATH = CACHE_PATH.with_suffix(".priority.txt")
@@ -41,20 +55,11 @@ def matches_priority(url: str) -> bool:
 
 def main() -> None:
     urls = load_urls(CACHE_PATH)
-    priority = []
-    rest = []
-    seen = set()
-
-    for url in urls:
-        if url in seen:
-            continue
-        seen.add(url)
-        if matches_priority(url):
-            priority.append(url)
-        else:
-            rest.append(url)
-
-    reordered = priority + rest
+    planner = RecrawlPlanner(
+        RecrawlHistory.for_domain(SITE_DOMAIN), priority=matches_priority
+    )
+    reordered = planner.plan(urls).fetch
+    priority = [url for url in reordered if matches_priority(url)]
     if not reordered:
         raise SystemExit("No URLs found to reorder")
 
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import argparse
 import math
+import os
 import subprocess
 import sys
 import time
@@ -12,6 +13,9 @@ from pathlib import Path
 
 CACHE_PATH = Path("data/sites/ili-ili.com/cache/iliili_urls.txt")
 SITE_SCRIPT = Path("scripts/sites/ili_ili_com.py")
+# Frontier workers run the exporter itself: it is the only place that resolves
+# SCRAPER_FRONTIER, so every URL a worker fetches came from a lease it holds.
+EXPORTER_MODULE = "scripts.ili_ili_fast_export"
 
 
 def count_urls() -> int:
@@ -21,7 +25,7 @@ def count_urls() -> int:
         return sum(1 for line in handle if line.strip())
 
 
-def launch_worker(offset: int, batch_size: int) -> subprocess.Popen:
+def launch_worker(offset: int, batch_size: int, env: dict | None = None) -> subprocess.Popen:
     cmd = [
         sys.executable,
         str(SITE_SCRIPT),
@@ -34,7 +38,37 @@ def launch_worker(offset: int, batch_size: int) -> subprocess.Popen:
         "1",
     ]
     print(f"  [spawn] offset={offset} size={batch_size}")
-    return subprocess.Popen(cmd)
+    return subprocess.Popen(cmd, env=env)
+
+
+def launch_frontier_worker(index: int, concurrency: int, env: dict) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", EXPORTER_MODULE, "--concurrency", str(concurrency)]
+    print(f"  [spawn] frontier worker {index} concurrency={concurrency}")
+    # Each worker writes its own partial shard and leaves the export to the merge.
+    return subprocess.Popen(cmd, env={**env, "SCRAPER_FRONTIER_WORKER": str(index)})
+
+
+def run_frontier(args: argparse.Namespace, worker_env: dict) -> None:
+    """Long-lived workers pulling leases from one frontier, then one merged export."""
+
+    env = {**worker_env, "SCRAPER_FRONTIER": args.frontier, "SCRAPER_FRONTIER_RUN": args.frontier_run}
+    print(f"Frontier: {args.frontier} (run {args.frontier_run})")
+    procs = [
+        launch_frontier_worker(index, args.concurrency, env)
+        for index in range(max(args.workers, 1))
+    ]
+    codes = [proc.wait() for proc in procs]
+    failed = [index for index, code in enumerate(codes) if code != 0]
+    if failed:
+        # Leases of crashed workers expire and are handed out again on resume;
+        # finished shards stay on disk until the merge.
+        print(f"[error] workers {failed} failed; rerun with --frontier-run {args.frontier_run} to resume")
+        return
+    code = subprocess.call([sys.executable, "-m", EXPORTER_MODULE, "--merge-shards"], env=worker_env)
+    if code != 0:
+        print(f"[error] merging worker shards exited with code {code}")
+        return
+    print("All batches completed")
 
 
 def main() -> None:
@@ -44,7 +78,34 @@ def main() -> None:
     parser.add_argument("--start-offset", type=int, default=0)
     parser.add_argument("--max-batches", type=int, default=0)
     parser.add_argument("--pause", type=float, default=5.0)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=24,
+        help="Concurrent requests per frontier worker",
+    )
+    parser.add_argument(
+        "--domain-health",
+        default=os.environ.get("SCRAPER_DOMAIN_HEALTH", "sqlite"),
+        help="Circuit-breaker state shared by the workers: sqlite, sqlite:///path, redis://... or memory",
+    )
+    parser.add_argument(
+        "--frontier",
+        default=os.environ.get("SCRAPER_FRONTIER"),
+        help="Share one URL frontier between the workers (sqlite, sqlite:///path, redis://...) instead of offset waves",
+    )
+    parser.add_argument(
+        "--frontier-run",
+        default=time.strftime("%Y%m%d-%H%M%S"),
+        help="Frontier run name; reuse it to resume an interrupted run",
+    )
     args = parser.parse_args()
+    # One breaker for all workers: a blocked shop costs one trip, not one per process.
+    worker_env = {**os.environ, "SCRAPER_DOMAIN_HEALTH": args.domain_health}
+
+    if args.frontier:
+        run_frontier(args, worker_env)
+        return
 
     total_urls = count_urls()
     total_batches = math.ceil(total_urls / max(args.batch_size, 1))
@@ -56,6 +117,7 @@ def main() -> None:
         f"Batch size: {args.batch_size}\n"
         f"Total batches: {total_batches}\n"
         f"Workers: {args.workers}\n"
+        f"Shared domain health: {args.domain_health}\n"
         f"Running offsets {start}..{end - 1}"
     )
 
@@ -65,7 +127,7 @@ def main() -> None:
         for _ in range(args.workers):
             if current_offset >= end:
                 break
-            procs.append((current_offset, launch_worker(current_offset, args.batch_size)))
+            procs.append((current_offset, launch_worker(current_offset, args.batch_size, worker_env)))
             current_offset += 1
 
         # wait for this wave
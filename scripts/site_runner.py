@@ -7,11 +7,12 @@ import argparse
 import asyncio
 import json
 import math
+import os
 import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from rich import box
 from rich.align import Align
@@ -46,6 +47,7 @@ from utils.rich_helpers import (
     status_spinner,
 )
 from utils.rich_themes import get_console
+from core.url_frontier import FRONTIER_ENV, FRONTIER_RUN_ENV, Lease, UrlFrontier, create_frontier
 from core.types import (
     ProgressEvent,
     ProgressCallback,
@@ -59,6 +61,8 @@ from core.types import (
 class BatchSpec:
     urls: Optional[List[str]]
     label: str
+    # Frontier leases backing ``urls`` (empty for static batches).
+    leases: Tuple[Lease, ...] = ()
 
 
 class DebugAbortError(RuntimeError):
@@ -245,6 +249,25 @@ def _parse_args(parser: argparse.ArgumentParser, argv: Optional[Sequence[str]])
         default=0,
         help="Maximum number of batches to process per site (0 = all)",
     )
+    parser.add_argument(
+        "--frontier",
+        default=os.environ.get(FRONTIER_ENV),
+        help=(
+            "Pull batches from a shared URL frontier instead of static offsets "
+            "(memory | sqlite | sqlite:///path | redis://...); needs --frontier-run"
+        ),
+    )
+    parser.add_argument(
+        "--frontier-run",
+        default=os.environ.get(FRONTIER_RUN_ENV),
+        help="Crawl run name; workers with the same run share one frontier",
+    )
+    parser.add_argument(
+        "--frontier-lease",
+        type=float,
+        default=1800.0,
+        help="Seconds a claimed batch stays invisible to other workers",
+    )
     parser.add_argument(
         "--max-products",
         type=int,
@@ -317,6 +340,40 @@ def _build_batches(
     return batches
 
 
+def _frontier_batches(frontier: UrlFrontier, chunk: int, lease_seconds: float) -> Iterator[BatchSpec]:
+    """Claim ``chunk`` URLs at a time until the frontier has nothing left to hand out."""
+
+    index = 0
+    while True:
+        leases = frontier.claim(chunk, lease_seconds)
+        if not leases:
+            return
+        index += 1
+        yield BatchSpec(
+            urls=[lease.url for lease in leases],
+            label=f"lease-{index:03d}",
+            leases=tuple(leases),
+        )
+
+
+def _settle_frontier_batch(
+    frontier: UrlFrontier,
+    batch: BatchSpec,
+    summary: Optional[Dict[str, object]],
+    error: Optional[str] = None,
+) -> None:
+    """Complete the batch's leases; URLs in ``summary['failures']`` go back for a retry."""
+
+    failures = summary.get("failures") if isinstance(summary, dict) else None
+    failures = failures if isinstance(failures, dict) else {}
+    for lease in batch.leases:
+        reason = error or failures.get(lease.url)
+        if reason is None:
+            frontier.complete(lease)
+        else:
+            frontier.fail(lease, str(reason))
+
+
 def run_site_cli(domain: str, display_name: Optional[str] = None, argv: Optional[Sequence[str]] = None) -> None:
     parser = argparse.ArgumentParser(description=f"Run scraper for {domain}")
     args = _parse_args(parser, argv)
@@ -523,7 +580,8 @@ def run_site_cli(domain: str, display_name: Optional[str] = None, argv: Optional
 
     refresh_count: Optional[int] = None
     cached_urls: List[str] = []
-    batches: List[BatchSpec]
+    batches: Iterable[BatchSpec]
+    frontier: Optional[UrlFrontier] = None
 
     with status_spinner("Loading cached URLs", console=console):
         cached_urls = _load_cached_urls(cache_path)
@@ -552,14 +610,32 @@ def run_site_cli(domain: str, display_name: Optional[str] = None, argv: Optional
     else:
         tracker.update("discovery", visible=False)
 
-    batches = _build_batches(cached_urls, args.batch_size, args.batch_offset, args.batch_max)
-    metrics["batches"] = len(batches)
+    if args.frontier and args.frontier_run:
+        # Every worker of the run seeds the same frontier; dedup keeps one copy per URL.
+        frontier = create_frontier(f"{domain}:{args.frontier_run}", args.frontier)
+        frontier.add(cached_urls)
+        chunk = args.batch_size if args.batch_size > 0 else 50
+        pending = frontier.stats().pending
+        batches = _frontier_batches(frontier, chunk, args.frontier_lease)
+        batch_count = math.ceil(pending / chunk)
+    else:
+        batches = _build_batches(cached_urls, args.batch_size, args.batch_offset, args.batch_max)
+        batch_count = len(batches)
+    metrics["batches"] = batch_count
     tracker.advance("prep")
 
-    tracker.update("scrape", visible=not args.dry_run, total=len(batches) or 1)
-    tracker.update("validate", visible=not args.dry_run, total=len(batches) or 1)
+    tracker.update("scrape", visible=not args.dry_run, total=batch_count or 1)
+    tracker.update("validate", visible=not args.dry_run, total=batch_count or 1)
     tracker.advance("prep")
 
+    if args.dry_run and frontier is not None:
+        stats = frontier.stats()
+        console.print(
+            f"Frontier {frontier.name} ({frontier.backend}): {stats.pending} pending, "
+            f"{stats.leased} leased, {stats.done} done, {stats.failed} failed"
+        )
+        return
+
     if args.dry_run:
         dry_table = Table(title="Dry-Run Batches", box=box.SIMPLE)
         dry_table.add_column("Batch", style="table.header")
@@ -625,6 +701,8 @@ def run_site_cli(domain: str, display_name: Optional[str] = None, argv: Optional
                     skip_cache_refresh=True,
                     progress_callback=progress_callback,
                 )
+                if frontier is not None:
+                    _settle_frontier_batch(frontier, batch, summary)
                 if debug_monitor:
                     debug_monitor.log_batch_summary(batch.label, summary or {})
             except DebugAbortError as exc:
@@ -638,6 +716,8 @@ def run_site_cli(domain: str, display_name: Optional[str] = None, argv: Optional
                 )
                 return
             except Exception as exc:  # noqa: BLE001
+                if frontier is not None:
+                    _settle_frontier_batch(frontier, batch, None, error=str(exc))
                 metrics["progress_text"] = Text(
                     f"Error on {batch.label}", style="table.error"
                 )
@@ -685,11 +765,11 @@ def run_site_cli(domain: str, display_name: Optional[str] = None, argv: Optional
             tracker.advance("validate")
             tracker.update(
                 "scrape",
-                description=f"Scraping batches ({index}/{len(batches)})",
+                description=f"Scraping batches ({index}/{batch_count})",
             )
             tracker.update(
                 "validate",
-                description=f"Validating results ({index}/{len(batches)})",
+                description=f"Validating results ({index}/{batch_count})",
             )
             live.update(_build_live_layout(progress, _metrics_panel()))
     live_ref["instance"] = None
@@ -741,7 +821,7 @@ def run_site_cli(domain: str, display_name: Optional[str] = None, argv: Optional
     summary_table.add_column("Metric", style="table.header", no_wrap=True)
     summary_table.add_column("Value", style="table.neutral")
     summary_table.add_row("Backend", str(backend_label))
-    summary_table.add_row("Batches", str(len(batches)))
+    summary_table.add_row("Batches", str(len(batch_results)))
     summary_table.add_row("Products scraped", str(total_products))
     summary_table.add_row("Variations scraped", str(total_variations))
     summary_table.add_row("Failures", Text(str(total_failures), style="table.error" if total_failures else "table.success"))
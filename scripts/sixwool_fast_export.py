@@ -33,6 +33,7 @@ from scripts.fast_export_base import (
     merge_products,
     prepare_incremental_writer,
     prime_writer_from_export,
+    select_urls_to_fetch,
     record_error_product,
     release_process_lock,
     request_with_retries,
@@ -283,7 +284,9 @@ async def _run_async(
                 products=existing_export_products,
             )
 
-    urls_to_fetch = [url for url in urls if url not in writer.processed_urls]
+    urls_to_fetch = select_urls_to_fetch(
+        SITE_DOMAIN, urls, writer, export_path=EXPORT_PATH
+    )
     LOGGER.info(
         "Total candidate URLs: %s (skipped: %s, to fetch: %s)",
         len(urls),
@@ -372,7 +375,7 @@ async def _run_async(
             return
 
         success_ratio = (
-            len(processed_products) / total_attempts if total_attempts > 0 else None
+            len(processed_products) / fetcher.attempted if fetcher.attempted > 0 else None
         )
 
         export_products(
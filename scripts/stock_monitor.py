@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Hourly price/stock check against the latest export of a site.
+
+Uses :class:`network.stock_probe.LightweightStockMonitor`, so only the cheapest
+CMS endpoint per product is fetched; the full export pipeline is not touched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from network.stock_probe import LightweightStockMonitor, diff_snapshots
+from scripts.fast_export_base import load_export_products
+from utils import serialization
+from utils.data_paths import get_site_paths
+
+LOGGER = logging.getLogger(__name__)
+
+STOCK_CHECK_FILENAME = "stock_check.json"
+
+
+def run_stock_check(
+    domain: str,
+    *,
+    export_path: Optional[Path] = None,
+    output_path: Optional[Path] = None,
+    limit: Optional[int] = None,
+    concurrency: int = 16,
+    monitor: Optional[LightweightStockMonitor] = None,
+) -> Dict[str, Any]:
+    paths = get_site_paths(domain)
+    source = export_path or paths.latest_export
+    previous_products = load_export_products(source)
+    previous: Dict[str, Dict[str, Any]] = {}
+    for product in previous_products:
+        url = product.get("url")
+        if isinstance(url, str) and url and not product.get("error"):
+            previous[url] = product
+
+    urls: List[str] = list(previous)
+    if limit is not None and limit > 0:
+        urls = urls[:limit]
+    if not urls:
+        LOGGER.warning("No products in %s; run a full export first", source)
+
+    monitor = monitor or LightweightStockMonitor(concurrency=concurrency)
+    snapshots = asyncio.run(monitor.check(urls, hints=previous))
+    changes = diff_snapshots(snapshots, previous)
+
+    report = {
+        "domain": paths.domain,
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "source_export": str(source),
+        "checked": len(snapshots),
+        "failed": sum(1 for snapshot in snapshots if not snapshot.ok),
+        "changes": changes,
+        "products": [snapshot.to_dict() for snapshot in snapshots],
+    }
+    target = output_path or paths.exports_dir / STOCK_CHECK_FILENAME
+    serialization.write_json(target, report, pretty=True, atomic=True)
+    LOGGER.info(
+        "Stock check for %s: %d checked, %d failed, %d changed -> %s",
+        paths.domain,
+        report["checked"],
+        report["failed"],
+        len(changes),
+        target,
+    )
+    return report
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Lightweight price/stock monitor")
+    parser.add_argument("domain", help="Site domain, e.g. manefa.ru")
+    parser.add_argument("--export", type=Path, help="Export to compare against (default: latest.json)")
+    parser.add_argument("--output", type=Path, help="Report path (default: exports/stock_check.json)")
+    parser.add_argument("--limit", type=int, help="Check only the first N products")
+    parser.add_argument("--concurrency", type=int, default=16)
+    return parser
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = _build_parser().parse_args()
+    run_stock_check(
+        args.domain,
+        export_path=args.export,
+        output_path=args.output,
+        limit=args.limit,
+        concurrency=args.concurrency,
+    )
+
+
+if __name__ == "__main__":
+    main()
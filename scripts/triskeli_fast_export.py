@@ -32,10 +32,12 @@ from scripts.fast_export_base import (
     merge_products,
     prepare_incremental_writer,
     prime_writer_from_export,
+    select_urls_to_fetch,
     release_process_lock,
     request_with_retries,
     use_export_context,
 )
+from utils.json_blocks import decode_json_after
 
 LOGGER = logging.getLogger(__name__)
 
@@ -135,38 +137,10 @@ def _parse_product_payload(html: str) -> Optional[Dict[str, Any]]:
     match = re.search(r"(?:var\s+)?product\s*=", html)
     if not match:
         return None
-    start = match.end()
-    length = len(html)
-    brace_level = 0
-    json_start = None
-    for index in range(start, length):
-        char = html[index]
-        if char == '{':
-            json_start = index
-            brace_level = 1
-            break
-        elif char in ' \t\n\r':
-            continue
-        else:
-            return None
-
-    if json_start is None:
-        return None
-
-    for index in range(json_start + 1, length):
-        char = html[index]
-        if char == '{':
-            brace_level += 1
-        elif char == '}':
-            brace_level -= 1
-            if brace_level == 0:
-                json_text = html[json_start : index + 1]
-                try:
-                    return json.loads(json_text)
-                except json.JSONDecodeError:
-                    LOGGER.debug("Failed to decode product payload")
-                    return None
-    return None
+    payload = decode_json_after(html, match.end(), brackets="{")
+    if payload is None:
+        LOGGER.debug("Failed to decode product payload")
+    return payload
 
 
 def _extract_product(html: str, url: str) -> Dict[str, Any]:
@@ -298,7 +272,9 @@ def _run(
         if existing_products:
             prime_writer_from_export(writer, EXPORT_PATH, existing_products)
 
-    urls_to_fetch = [url for url in urls if url not in writer.processed_urls]
+    urls_to_fetch = select_urls_to_fetch(
+        SITE_DOMAIN, urls, writer, export_path=EXPORT_PATH
+    )
     LOGGER.info(
         "Total URLs: %s (skipped: %s, to fetch: %s)",
         len(urls),
@@ -375,7 +351,7 @@ def _run(
             return
 
         success_ratio = (
-            len(processed_products) / total_attempts if total_attempts > 0 else None
+            len(processed_products) / fetcher.attempted if fetcher.attempted > 0 else None
         )
 
         export_products(
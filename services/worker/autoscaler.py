@@ -0,0 +1,305 @@
+"""Supervisor that sizes the RQ worker pool to the ``scraping`` queue.
+
+A fixed number of workers is either idle or far behind. The autoscaler
+samples queue depth, the URL count of queued jobs, busy workers and host
+CPU/RAM (``utils.system_monitor``) every few seconds, and spawns or retires
+``services/worker/worker.py`` processes within ``WORKER_MIN``..``WORKER_MAX``.
+
+* Scale-up is immediate but never while the host is overloaded.
+* Scale-down waits until the surplus has lasted ``WORKER_SCALE_DOWN_DELAY``
+  seconds. It then retires one worker at a time, idle workers first.
+* Workers are retired with SIGTERM. This is RQ's warm shutdown: a busy worker
+  finishes its current job before it exits.
+
+Environment variables:
+    REDIS_URL: Redis connection URL (default: redis://localhost:6379/0)
+    WORKER_MIN / WORKER_MAX: pool bounds (default: 1 / CPU count)
+    WORKER_URLS_PER_WORKER: queued URLs one worker is expected to absorb (200)
+    WORKER_CPU_HIGH / WORKER_MEMORY_HIGH: overload thresholds in % (85 / 85)
+    WORKER_SCALE_INTERVAL: seconds between samples (10)
+    WORKER_SCALE_DOWN_DELAY: seconds of surplus before retiring (60)
+    WORKER_DRAIN_TIMEOUT: seconds to wait for workers on shutdown (300)
+
+Usage:
+    python services/worker/autoscaler.py
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "scraping"
+WORKER_SCRIPT = Path(__file__).with_name("worker.py")
+# Jobs inspected per sample to estimate the queued URL count.
+JOB_SCAN_LIMIT = 200
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    return int(raw) if raw else default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    return float(raw) if raw else default
+
+
+@dataclass(slots=True)
+class AutoscalerConfig:
+    min_workers: int = 1
+    max_workers: int = 4
+    urls_per_worker: int = 200
+    cpu_high: float = 85.0
+    memory_high: float = 85.0
+    interval: float = 10.0
+    scale_down_delay: float = 60.0
+    drain_timeout: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "AutoscalerConfig":
+        min_workers = max(0, _env_int("WORKER_MIN", 1))
+        return cls(
+            min_workers=min_workers,
+            max_workers=max(min_workers, _env_int("WORKER_MAX", os.cpu_count() or 1)),
+            urls_per_worker=max(1, _env_int("WORKER_URLS_PER_WORKER", 200)),
+            cpu_high=_env_float("WORKER_CPU_HIGH", 85.0),
+            memory_high=_env_float("WORKER_MEMORY_HIGH", 85.0),
+            interval=_env_float("WORKER_SCALE_INTERVAL", 10.0),
+            scale_down_delay=_env_float("WORKER_SCALE_DOWN_DELAY", 60.0),
+            drain_timeout=_env_float("WORKER_DRAIN_TIMEOUT", 300.0),
+        )
+
+
+@dataclass(slots=True)
+class LoadSample:
+    queued_jobs: int = 0
+    queued_urls: int = 0
+    busy_workers: int = 0
+    cpu_percent: float = 0.0
+    memory_percent: float = 0.0
+
+
+def desired_workers(sample: LoadSample, current: int, config: AutoscalerConfig) -> int:
+    """Pool size for ``sample``; bounded by the config and by host load.
+
+    An RQ worker runs one job at a time, so queued jobs cap the useful extra
+    workers. Their URL counts decide how many of them are worth starting.
+    """
+
+    extra = min(sample.queued_jobs, math.ceil(sample.queued_urls / config.urls_per_worker))
+    if sample.queued_jobs and not extra:
+        extra = 1
+    target = sample.busy_workers + extra
+    overloaded = sample.cpu_percent >= config.cpu_high or sample.memory_percent >= config.memory_high
+    if overloaded:
+        target = min(target, current)
+    return max(config.min_workers, min(config.max_workers, target))
+
+
+def sample_load(queue: Any, resources: Optional[Callable[[], Dict[str, float]]] = None) -> LoadSample:
+    """Read queue depth, queued URLs, busy workers and host load."""
+
+    if resources is None:
+        from utils.system_monitor import get_system_resources as resources
+
+    queued_urls = 0
+    jobs = queue.get_jobs(0, JOB_SCAN_LIMIT)
+    for job in jobs:
+        urls = (job.kwargs or {}).get("urls") if job is not None else None
+        queued_urls += len(urls) if urls else 1
+    queued_jobs = queue.count
+    if queued_jobs > len(jobs) and jobs:
+        # Extrapolate past the scanned head of a very deep queue.
+        queued_urls = math.ceil(queued_urls * queued_jobs / len(jobs))
+    host = resources()
+    return LoadSample(
+        queued_jobs=queued_jobs,
+        queued_urls=queued_urls,
+        busy_workers=queue.started_job_registry.count,
+        cpu_percent=float(host.get("cpu_percent", 0.0)),
+        memory_percent=float(host.get("memory_percent", 0.0)),
+    )
+
+
+class WorkerPool:
+    """Worker processes owned by the supervisor."""
+
+    def __init__(self, command: Optional[Sequence[str]] = None) -> None:
+        self.command = list(command or [sys.executable, str(WORKER_SCRIPT)])
+        self.processes: List[subprocess.Popen] = []
+        self.retiring: List[subprocess.Popen] = []
+
+    @property
+    def size(self) -> int:
+        return len(self.processes)
+
+    def reap(self) -> List[int]:
+        """Forget exited processes; returns the exit codes of unexpected exits."""
+
+        crashed = [proc.returncode for proc in self.processes if proc.poll() is not None]
+        self.processes = [proc for proc in self.processes if proc.returncode is None]
+        self.retiring = [proc for proc in self.retiring if proc.poll() is None]
+        return crashed
+
+    def spawn(self) -> subprocess.Popen:
+        proc = subprocess.Popen(self.command)
+        self.processes.append(proc)
+        logger.info("Spawned worker pid=%s (pool=%d)", proc.pid, self.size)
+        return proc
+
+    def retire(self, idle_pids: Sequence[int] = ()) -> Optional[subprocess.Popen]:
+        """Warm-shutdown one worker, idle ones first (else the newest)."""
+
+        if not self.processes:
+            return None
+        idle_set = set(idle_pids)
+        idle = [proc for proc in self.processes if proc.pid in idle_set]
+        proc = idle[0] if idle else self.processes[-1]
+        self.processes.remove(proc)
+        self.retiring.append(proc)
+        proc.send_signal(signal.SIGTERM)
+        logger.info("Retiring worker pid=%s (pool=%d)", proc.pid, self.size)
+        return proc
+
+    def drain(self, timeout: float) -> None:
+        """Warm-shutdown every worker; kill whatever is still running after ``timeout``."""
+
+        for proc in self.processes:
+            proc.send_signal(signal.SIGTERM)
+        self.retiring.extend(self.processes)
+        self.processes = []
+        deadline = time.monotonic() + timeout
+        for proc in self.retiring:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning("Worker pid=%s did not drain in time; killing", proc.pid)
+                proc.kill()
+                proc.wait()
+        self.retiring = []
+
+
+class Autoscaler:
+    """Control loop: sample, decide, spawn/retire."""
+
+    def __init__(
+        self,
+        queue: Any,
+        config: AutoscalerConfig,
+        pool: Optional[WorkerPool] = None,
+        *,
+        sampler: Optional[Callable[[Any], LoadSample]] = None,
+        idle_pids: Optional[Callable[[], Sequence[int]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.queue = queue
+        self.config = config
+        self.pool = pool or WorkerPool()
+        self.sampler = sampler or sample_load
+        self.idle_pids = idle_pids or self._idle_worker_pids
+        self.clock = clock
+        self._surplus_since: Optional[float] = None
+        self._stopping = False
+
+    def _idle_worker_pids(self) -> List[int]:
+        from rq import Worker
+
+        pids = []
+        for worker in Worker.all(queue=self.queue):
+            # worker.py names its workers "worker-<pid>".
+            prefix, _, pid = (worker.name or "").partition("-")
+            if prefix == "worker" and pid.isdigit() and worker.get_state() == "idle":
+                pids.append(int(pid))
+        return pids
+
+    def step(self) -> int:
+        """One control iteration; returns the pool size afterwards."""
+
+        for code in self.pool.reap():
+            logger.warning("Worker exited unexpectedly with code %s", code)
+        sample = self.sampler(self.queue)
+        current = self.pool.size
+        target = desired_workers(sample, current, self.config)
+
+        if target > current:
+            self._surplus_since = None
+            for _ in range(target - current):
+                self.pool.spawn()
+        elif target < current:
+            now = self.clock()
+            if self._surplus_since is None:
+                self._surplus_since = now
+            # Above the maximum is retired right away; ordinary surplus waits out the delay.
+            if now - self._surplus_since >= self.config.scale_down_delay or current > self.config.max_workers:
+                self.pool.retire(self.idle_pids())
+                self._surplus_since = now
+        else:
+            self._surplus_since = None
+        logger.debug(
+            "queue=%d urls=%d busy=%d cpu=%.0f%% mem=%.0f%% pool=%d target=%d",
+            sample.queued_jobs,
+            sample.queued_urls,
+            sample.busy_workers,
+            sample.cpu_percent,
+            sample.memory_percent,
+            self.pool.size,
+            target,
+        )
+        return self.pool.size
+
+    def stop(self, *_: Any) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        try:
+            while not self._stopping:
+                try:
+                    self.step()
+                except Exception:  # noqa: BLE001 - keep supervising through Redis hiccups
+                    logger.exception("Autoscaler step failed")
+                time.sleep(self.config.interval)
+        finally:
+            logger.info("Draining %d workers", self.pool.size)
+            self.pool.drain(self.config.drain_timeout)
+
+
+def main() -> None:
+    from redis import Redis
+    from rq import Queue
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    config = AutoscalerConfig.from_env()
+    queue = Queue(QUEUE_NAME, connection=Redis.from_url(redis_url))
+    logger.info(
+        "Autoscaler on queue %s (%s): %d..%d workers", QUEUE_NAME, redis_url, config.min_workers, config.max_workers
+    )
+    Autoscaler(queue, config).run()
+
+
+__all__ = [
+    "Autoscaler",
+    "AutoscalerConfig",
+    "LoadSample",
+    "WorkerPool",
+    "desired_workers",
+    "sample_load",
+]
+
+
+if __name__ == "__main__":
+    main()
+
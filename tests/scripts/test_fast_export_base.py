@@ -0,0 +1,283 @@
+"""Tests for the incremental partial writer used by fast exporters."""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from scripts.fast_export_base import (  # noqa: E402
+    IncrementalWriter,
+    frontier_shard,
+    merge_partial_shards,
+    prepare_incremental_writer,
+    prime_writer_from_export,
+    shard_path,
+    write_shard_stats,
+)
+
+
+def _product(index: int) -> dict:
+    return {
+        "url": f"https://example.com/p/{index}",
+        "original_url": f"https://example.com/p/{index}?ref=map",
+        "name": f"Товар {index}",
+    }
+
+
+def test_resume_uses_sidecar_index(tmp_path):
+    partial = tmp_path / "httpx_partial.jsonl"
+    writer, existing = prepare_incremental_writer(partial, resume=True)
+    assert len(existing) == 0
+    for index in range(5):
+        writer.append(_product(index))
+    writer.close()
+
+    assert writer.index_path.exists()
+    assert writer.index_path.stat().st_size == 5 * 24
+
+    resumed, existing = prepare_incremental_writer(partial, resume=True)
+    try:
+        assert len(existing) == 5
+        assert "https://example.com/p/3" in resumed.processed_urls
+        assert "https://example.com/p/3?ref=map" in resumed.processed_urls
+        assert "https://example.com/p/9" not in resumed.processed_urls
+        resumed.append(_product(5))
+    finally:
+        products = resumed.finalize()
+
+    assert [item["name"] for item in products] == [f"Товар {i}" for i in range(6)]
+    assert products[2]["url"] == "https://example.com/p/2"
+
+
+def test_resume_recovers_unindexed_tail_and_torn_line(tmp_path):
+    partial = tmp_path / "httpx_partial.jsonl"
+    writer, _ = prepare_incremental_writer(partial, resume=True)
+    writer.append(_product(0))
+    writer.close()
+
+    with partial.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(_product(1), ensure_ascii=False) + "\n")
+        handle.write('{"url": "https://example.com/p/torn"')
+
+    resumed, existing = prepare_incremental_writer(partial, resume=True)
+    resumed.append(_product(2))
+    products = list(resumed.finalize())
+
+    assert len(existing) == 2
+    assert [item["url"] for item in products] == [
+        "https://example.com/p/0",
+        "https://example.com/p/1",
+        "https://example.com/p/2",
+    ]
+    assert "https://example.com/p/torn" not in resumed.processed_urls
+
+
+def test_missing_index_is_rebuilt(tmp_path):
+    partial = tmp_path / "httpx_partial.jsonl"
+    partial.write_text(
+        "".join(json.dumps(_product(i)) + "\n" for i in range(3)), encoding="utf-8"
+    )
+
+    writer = IncrementalWriter(partial_path=partial, resume=True)
+    existing = writer.load_existing()
+
+    assert len(existing) == 3
+    assert writer.index_path.stat().st_size == 3 * 24
+
+
+def test_group_commit_defers_flush(tmp_path):
+    partial = tmp_path / "httpx_partial.jsonl"
+    writer, _ = prepare_incremental_writer(partial, resume=False)
+    writer.flush_every = 10
+    writer.flush_interval = 3600
+    writer.append(_product(0))
+    assert partial.stat().st_size == 0
+    writer.checkpoint()
+    assert partial.stat().st_size > 0
+    writer.cleanup()
+    assert not partial.exists()
+    assert not writer.index_path.exists()
+
+
+def test_prime_writer_counts_only_new_products(tmp_path):
+    writer = IncrementalWriter(partial_path=tmp_path / "partial.jsonl", resume=True)
+    writer.processed_urls.add("https://example.com/p/0")
+    writer.processed_urls.add("https://example.com/p/0?ref=map")
+
+    seeded = prime_writer_from_export(
+        writer, tmp_path / "latest.json", products=[_product(0), _product(1)]
+    )
+
+    assert seeded == 1
+    assert len(writer.processed_urls) == 4
+
+
+def test_compressed_partial_resumes_from_virtual_offsets(tmp_path):
+    partial = tmp_path / "httpx_partial.jsonl"
+    writer, _ = prepare_incremental_writer(partial, resume=True)
+    writer.compress = True
+    writer.cleanup()
+    writer.open()
+    writer.flush_every = 2
+    for index in range(5):
+        writer.append(_product(index))
+    writer.close()
+
+    assert not partial.exists()
+    assert (tmp_path / "httpx_partial.jsonl.zst").read_bytes()[:4] == b"\x28\xb5\x2f\xfd"
+
+    resumed, existing = prepare_incremental_writer(partial, resume=True)
+    assert resumed.compressed
+    assert len(existing) == 5
+    assert existing[4]["url"] == "https://example.com/p/4"
+    resumed.append(_product(5))
+    products = list(resumed.finalize())
+
+    assert [item["name"] for item in products] == [f"Товар {i}" for i in range(6)]
+
+
+def test_finalized_products_must_be_exported_before_cleanup(tmp_path, monkeypatch):
+    import pytest
+
+    import scripts.fast_export_base as base
+
+    monkeypatch.setattr(base, "update_summary", lambda *args, **kwargs: None)
+    monkeypatch.setattr(base, "_record_recrawl_observations", lambda *args: None)
+    writer, _ = prepare_incremental_writer(tmp_path / "httpx_partial.jsonl", resume=False)
+    for index in range(2):
+        writer.append(_product(index))
+    products = writer.finalize()
+    export_path = tmp_path / "site" / "exports" / "httpx_latest.json"
+    base.export_products("shop.example", export_path, products)
+    writer.cleanup()
+
+    exported = json.loads(export_path.read_text(encoding="utf-8"))["products"]
+    assert [item["url"] for item in exported] == [_product(i)["url"] for i in range(2)]
+
+    # Cleaning up first used to turn the view into an empty iterable with len() == 2.
+    writer, _ = prepare_incremental_writer(tmp_path / "httpx_partial.jsonl", resume=False)
+    writer.append(_product(0))
+    products = writer.finalize()
+    writer.cleanup()
+    assert len(products) == 1
+    with pytest.raises(FileNotFoundError):
+        list(products)
+
+
+def test_stale_compressed_partial_is_discarded(tmp_path):
+    from datetime import datetime, timedelta, timezone
+
+    partial = tmp_path / "httpx_partial.jsonl"
+    writer = IncrementalWriter(partial_path=partial, resume=True, compress=True)
+    writer.open()
+    writer.append(_product(0))
+    writer.close()
+    assert writer.storage_path.name == "httpx_partial.jsonl.zst"
+
+    later = datetime.now(timezone.utc) + timedelta(hours=7)
+    resumed, existing = prepare_incremental_writer(
+        partial, resume=True, resume_window_hours=6, now=later
+    )
+    resumed.close()
+
+    assert len(existing) == 0
+    assert "https://example.com/p/0" not in resumed.processed_urls
+
+
+def test_load_export_products_reads_zstd_export(tmp_path, monkeypatch):
+    from scripts.fast_export_base import load_export_products
+    from utils.export_writers import write_product_exports
+
+    monkeypatch.setenv("SCRAPER_STORAGE_COMPRESSION", "zstd")
+    export_path = tmp_path / "site" / "exports" / "httpx_latest.json"
+    write_product_exports([_product(0)], export_path)
+
+    assert not export_path.exists()
+    assert (export_path.parent / "httpx_latest.json.zst").exists()
+    # The dashboard reads latest.json as plain JSON.
+    assert not (export_path.parent / "latest.json.zst").exists()
+    latest = json.loads((export_path.parent / "latest.json").read_text(encoding="utf-8"))
+    assert latest["products"][0]["url"] == "https://example.com/p/0"
+    assert load_export_products(export_path)[0]["url"] == "https://example.com/p/0"
+
+
+def test_select_urls_carries_forward_deferred_products(tmp_path, monkeypatch):
+    import utils.recrawl_planner as recrawl_planner
+    from scripts.fast_export_base import select_urls_to_fetch
+    from utils import serialization
+
+    monkeypatch.setattr(recrawl_planner, "SITE_DATA_ROOT", tmp_path / "sites")
+    monkeypatch.setenv("RECRAWL_MAX_FETCHES", "2")
+    history = recrawl_planner.RecrawlHistory.for_domain("shop.example")
+    observed_at = time.time() - 60
+    products = [dict(_product(i), scraped_at=observed_at) for i in range(4)]
+    history.observe_products(products)
+    history.save()
+    export_path = tmp_path / "latest.json"
+    serialization.write_json(export_path, {"products": products[:3]})
+
+    writer, _ = prepare_incremental_writer(tmp_path / "partial.jsonl", resume=False)
+    urls = [product["url"] for product in products] + ["https://example.com/p/new"]
+    to_fetch = select_urls_to_fetch("shop.example", urls, writer, export_path=export_path)
+    carried = list(writer.finalize())
+
+    assert to_fetch[0] == "https://example.com/p/new"
+    assert len(to_fetch) + len(carried) == len(urls)
+    assert "https://example.com/p/3" in to_fetch
+    assert all(item["url"] not in to_fetch for item in carried)
+
+
+def test_zero_sample_rate_defers_every_stable_url(tmp_path, monkeypatch):
+    import utils.recrawl_planner as recrawl_planner
+    from scripts.fast_export_base import select_urls_to_fetch
+    from utils import serialization
+
+    monkeypatch.setattr(recrawl_planner, "SITE_DATA_ROOT", tmp_path / "sites")
+    monkeypatch.setenv("RECRAWL_SAMPLE_RATE", "0")
+    history = recrawl_planner.RecrawlHistory.for_domain("shop.example")
+    products = [dict(_product(i), scraped_at=time.time() - 60) for i in range(3)]
+    history.observe_products(products)
+    history.save()
+    export_path = tmp_path / "latest.json"
+    serialization.write_json(export_path, {"products": products})
+
+    writer, _ = prepare_incremental_writer(tmp_path / "partial.jsonl", resume=False)
+    urls = [product["url"] for product in products] + ["https://example.com/p/new"]
+    to_fetch = select_urls_to_fetch("shop.example", urls, writer, export_path=export_path)
+
+    assert to_fetch == ["https://example.com/p/new"]
+    assert len(writer.finalize()) == 3
+
+
+def test_frontier_workers_merge_their_shards_into_one_partial(tmp_path, monkeypatch):
+    partial = tmp_path / "httpx_partial.jsonl"
+    monkeypatch.setenv("SCRAPER_FRONTIER_WORKER", "1")
+    assert frontier_shard() is None  # no frontier run, no shard
+    monkeypatch.setenv("SCRAPER_FRONTIER", "sqlite")
+    monkeypatch.setenv("SCRAPER_FRONTIER_RUN", "r1")
+    assert frontier_shard() == "1"
+    assert shard_path(partial, "1").name == "httpx_partial.shard-1.jsonl"
+
+    # Worker 0 claimed 4 URLs and parsed 3 over two resumed runs; worker 1 parsed 2 of 2.
+    for shard, indexes, runs in (("0", [0, 1, 2], [(3, 2), (1, 1)]), ("1", [3, 0], [(2, 2)])):
+        writer, _ = prepare_incremental_writer(shard_path(partial, shard), resume=True)
+        for index in indexes:
+            writer.append(_product(index))
+        writer.close()
+        for attempted, succeeded in runs:
+            write_shard_stats(writer.partial_path, attempted=attempted, succeeded=succeeded)
+
+    merged, _ = prepare_incremental_writer(partial, resume=True)
+    assert merge_partial_shards(merged) == (6, 5)
+    products = merged.finalize()
+
+    assert sorted(product["url"] for product in products) == [
+        f"https://example.com/p/{index}" for index in range(4)
+    ]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "httpx_partial.jsonl",
+        "httpx_partial.jsonl.idx",
+    ]
+
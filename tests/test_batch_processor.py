@@ -0,0 +1,203 @@
+"""Tests for the pipelined fetch -> parse -> persist BatchProcessor."""
+
+import asyncio
+import json
+
+import pytest
+
+from core.batch_processor import BatchProcessor
+
+URLS = [f"https://shop.example/p/{index}" for index in range(6)]
+
+
+class FetchFailure(RuntimeError):
+    def __init__(self, url):
+        super().__init__(f"Failed to fetch {url}: timeout")
+        self.url = url
+
+
+class Crash(BaseException):
+    """Simulates the process dying mid-run."""
+
+
+class FakeEngine:
+    def __init__(self, events=None, broken=(), flaky=()):
+        self.events = events if events is not None else []
+        self.broken = set(broken)
+        self.flaky = set(flaky)
+        self.calls = []
+
+    async def batch_scrape_optimized(self, urls, batch_size=10):
+        self.calls.append(list(urls))
+        self.events.append(("fetch-start", urls[0]))
+        await asyncio.sleep(0.02)
+        self.events.append(("fetch-end", urls[0]))
+        results = []
+        for url in urls:
+            if url in self.broken or url in self.flaky:
+                self.flaky.discard(url)
+                results.append(FetchFailure(url))
+            else:
+                results.append({"url": url, "html": f"<h1>{url}</h1>", "method": "aiohttp"})
+        return results
+
+
+class FakeParser:
+    def parse(self, html, url):
+        if url.endswith("/3"):
+            raise ValueError("no price block")
+        return {"url": url, "name": html, "variations": [{"sku": "a"}, {"sku": "b"}]}
+
+
+class AsyncDB:
+    def __init__(self, events=None, crash_on=None):
+        self.events = events if events is not None else []
+        self.crash_on = crash_on
+        self.rows, self.variations = [], []
+
+    async def insert_product(self, product):
+        if product["url"] == self.crash_on:
+            raise Crash()
+        self.events.append(("persist-start", product["url"]))
+        await asyncio.sleep(0.025)
+        self.rows.append(product)
+        self.events.append(("persist-end", product["url"]))
+        return len(self.rows)
+
+    async def insert_variations(self, product_id, variations, domain=None):
+        self.variations.extend(variations)
+        return list(range(len(variations)))
+
+
+class RowDB:
+    def __init__(self):
+        self.products, self.variations = [], []
+
+    def insert_product(self, product):
+        if product["url"].endswith("/5"):
+            raise RuntimeError("unique violation")
+        self.products.append(product)
+        return len(self.products)
+
+    def insert_variations(self, product_id, variations, domain=None):
+        self.variations.extend(variations)
+        return list(range(len(variations)))
+
+
+def _processor(engine, **settings):
+    settings = {"parse_workers": 2, "retry_backoff": 0.0, "max_retries": 2, **settings}
+    return BatchProcessor(db_manager=None, config={"batch_processing": settings}, engine=engine)
+
+
+def test_fetch_of_next_batch_overlaps_persist_of_previous():
+    events = []
+    db = AsyncDB(events)
+    processor = _processor(FakeEngine(events))
+
+    summary = processor.process_url_batches(URLS[:2] + URLS[4:], FakeParser(), db, batch_size=2)
+
+    assert summary["scraped_products"] == 4 and summary["variations"] == 8
+    assert summary["failures"] == []
+    # Batch 2 was being fetched while batch 1 was still being written.
+    assert events.index(("fetch-start", URLS[4])) < events.index(("persist-end", URLS[0]))
+    assert len(db.rows) == 4 and all(row["site_domain"] == "shop.example" for row in db.rows)
+    assert len(db.variations) == 8
+
+
+def test_failures_are_structured_by_stage_and_only_transient_ones_retried():
+    engine = FakeEngine(broken={URLS[0]}, flaky={URLS[1]})
+    db = RowDB()
+    processor = _processor(engine)
+
+    summary = processor.process_url_batches(URLS, FakeParser(), db, batch_size=3)
+
+    failures = {failure["url"]: failure for failure in summary["failures"]}
+    assert failures[URLS[0]]["stage"] == "fetch" and "timeout" in failures[URLS[0]]["error"]
+    assert failures[URLS[3]] == {"url": URLS[3], "stage": "parse", "error": "no price block"}
+    assert failures[URLS[5]]["stage"] == "persist"
+    assert sorted(summary["failed_urls"]) == sorted([URLS[0], URLS[3], URLS[5]])
+    assert summary["scraped_products"] == 3 and summary["variations"] == 6  # flaky URL recovered
+    # Parse failures are not refetched; the permanently broken URL used every retry.
+    assert [call for call in engine.calls[2:] if URLS[3] in call] == []
+    assert sum(URLS[0] in call for call in engine.calls) == 3
+    assert processor.retry_queues["parse_error"] == [URLS[3]]
+
+
+def test_checkpoint_resumes_after_crash(tmp_path):
+    checkpoint = tmp_path / "batches.json"
+    first = _processor(FakeEngine(), checkpoint_path=str(checkpoint))
+    with pytest.raises(Crash):
+        first.process_url_batches(URLS, FakeParser(), AsyncDB(crash_on=URLS[4]), batch_size=2)
+    state = json.loads(checkpoint.read_text())
+    assert state["completed"] == [1, 2]
+    assert state["failures"][URLS[3]]["stage"] == "parse"
+
+    engine = FakeEngine()
+    db = AsyncDB()
+    summary = _processor(engine, checkpoint_path=str(checkpoint)).process_url_batches(
+        URLS, FakeParser(), db, batch_size=2
+    )
+    assert engine.calls == [URLS[4:]]
+    assert [row["url"] for row in db.rows] == URLS[4:]
+    assert summary["failed_urls"] == [URLS[3]]  # remembered from the first run
+    assert json.loads(checkpoint.read_text())["completed"] == [1, 2, 3]
+
+
+def test_resume_reuses_the_checkpoint_batch_size(tmp_path):
+    checkpoint = tmp_path / "batches.json"
+    sizes = iter([2, 4])  # memory pressure before the crash, idle host after it
+
+    def processor(engine):
+        processor = _processor(engine, checkpoint_path=str(checkpoint))
+        processor.calculate_optimal_batch_size = lambda *args: next(sizes)
+        return processor
+
+    with pytest.raises(Crash):
+        processor(FakeEngine()).process_url_batches(URLS, FakeParser(), AsyncDB(crash_on=URLS[4]))
+
+    engine = FakeEngine()
+    summary = processor(engine).process_url_batches(URLS, FakeParser(), AsyncDB())
+
+    assert engine.calls == [URLS[4:]]
+    assert summary["failed_urls"] == [URLS[3]]
+    assert json.loads(checkpoint.read_text())["batch_size"] == 2
+
+
+def test_urls_recovered_on_retry_leave_the_checkpoint_failures(tmp_path):
+    checkpoint = tmp_path / "batches.json"
+    processor = _processor(FakeEngine(flaky={URLS[1]}), checkpoint_path=str(checkpoint))
+
+    summary = processor.process_url_batches(URLS[:3], FakeParser(), RowDB(), batch_size=3)
+
+    assert summary["failures"] == []
+    assert json.loads(checkpoint.read_text())["failures"] == {}
+
+
+def test_failing_persist_stage_cancels_fetch_and_parse():
+    engine = FakeEngine()
+    processor = _processor(engine)
+
+    def broken_progress(*args, **kwargs):
+        raise RuntimeError("progress sink is gone")
+
+    processor.track_batch_performance = broken_progress
+
+    async def main():
+        with pytest.raises(RuntimeError, match="progress sink"):
+            await processor.process_url_batches_async(URLS, FakeParser(), RowDB(), batch_size=1)
+        await asyncio.sleep(0.1)
+        # Without cancellation the fetch stage stays blocked on the full queue forever.
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(main()) == []
+    assert len(engine.calls) < len(URLS)
+
+
+def test_async_entry_point_and_empty_input():
+    processor = _processor(FakeEngine())
+    assert processor.process_url_batches([], FakeParser(), RowDB())["batches_completed"] == 0
+
+    async def main():
+        return await processor.process_url_batches_async(URLS[:2], FakeParser(), RowDB(), batch_size=1)
+
+    assert asyncio.run(main())["scraped_products"] == 2
@@ -0,0 +1,105 @@
+"""Tests for the shared DNS cache and connection pre-warming."""
+
+import asyncio
+import socket
+
+import httpx
+
+from network.dns_cache import AsyncDnsCache, DnsEntry, cached_transport, prewarm_connections
+
+
+def test_lookups_are_coalesced_cached_and_rotated(monkeypatch):
+    cache = AsyncDnsCache(default_ttl=60)
+    calls = []
+
+    async def fake_lookup(host):
+        calls.append(host)
+        await asyncio.sleep(0.01)
+        return DnsEntry(addresses=((2, "10.0.0.1"), (2, "10.0.0.2")), expires_at=1e18)
+
+    monkeypatch.setattr(cache, "_lookup", fake_lookup)
+
+    async def run():
+        first = await asyncio.gather(*(cache.resolve("Shop.RU") for _ in range(3)))
+        second = await cache.resolve("shop.ru")
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert calls == ["shop.ru"]
+    assert {pairs[0][1] for pairs in first} == {"10.0.0.1", "10.0.0.2"}
+    assert len(second) == 2
+
+
+def test_cached_transport_connects_to_cached_address():
+    async def run():
+        async def handle(reader, writer):
+            request = await reader.readuntil(b"\r\n\r\n")
+            host = [line for line in request.split(b"\r\n") if line.lower().startswith(b"host:")][0]
+            body = host.split(b":", 1)[1].strip()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+            )
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = AsyncDnsCache()
+        cache.prime("catalog.invalid", ["127.0.0.1"])
+        try:
+            async with httpx.AsyncClient(transport=cached_transport(cache=cache)) as client:
+                response = await client.get(f"http://catalog.invalid:{port}/")
+        finally:
+            server.close()
+            await server.wait_closed()
+        return response, port
+
+    response, port = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.text == f"catalog.invalid:{port}"
+
+
+def test_prewarm_counts_validated_connections():
+    statuses = iter([200, 503, 204])
+
+    def handler(request):
+        assert request.method == "HEAD"
+        return httpx.Response(next(statuses))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await prewarm_connections(client, "https://shop.test/p/1", connections=3)
+
+    assert asyncio.run(run()) == 2
+
+
+def test_aiodns_lookups_share_one_resolver_and_include_ipv6(monkeypatch):
+    from types import SimpleNamespace
+
+    import network.dns_cache as dns_cache
+
+    resolvers = []
+
+    class FakeResolver:
+        def __init__(self, loop=None):
+            resolvers.append(self)
+
+        async def query(self, host, qtype):
+            if host == "v4.example" and qtype == "AAAA":
+                raise OSError("no AAAA records")
+            address = "2001:db8::1" if qtype == "AAAA" else "192.0.2.1"
+            return [SimpleNamespace(host=address, ttl=120)]
+
+    monkeypatch.setattr(dns_cache, "_aiodns", SimpleNamespace(DNSResolver=FakeResolver))
+    cache = AsyncDnsCache(default_ttl=60)
+
+    async def run():
+        return await cache.resolve("dual.example"), await cache.resolve("v4.example")
+
+    dual, v4 = asyncio.run(run())
+
+    assert len(resolvers) == 1
+    assert sorted(address for _, address in dual) == ["192.0.2.1", "2001:db8::1"]
+    assert v4 == [(socket.AF_INET, "192.0.2.1")]
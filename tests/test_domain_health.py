@@ -0,0 +1,133 @@
+"""Tests for the cross-process domain health / circuit breaker store."""
+
+import multiprocessing
+import time
+
+from core.domain_health import (
+    CLOSED,
+    DOMAIN_HEALTH_ENV,
+    HALF_OPEN,
+    OPEN,
+    BreakerPolicy,
+    DomainHealthStore,
+    SQLiteHealthStore,
+    create_domain_health_store,
+    shared_domain_health_store,
+)
+from core.exponential_backoff import ExponentialBackoff
+
+POLICY = BreakerPolicy(failure_threshold=3, window_size=10, error_rate=0.8, open_seconds=60.0)
+
+
+def _fail_many(path, count):
+    store = SQLiteHealthStore(path, namespace="antibot")
+    for _ in range(count):
+        store.record("shop.example", POLICY, False)
+    store.close()
+
+
+def test_breaker_opens_probes_once_and_closes():
+    store = DomainHealthStore()
+    for _ in range(2):
+        assert store.record("shop.example", POLICY, False, now=0.0) is None
+    assert store.record("shop.example", POLICY, False, now=1.0) == OPEN
+
+    denied = store.acquire("shop.example", POLICY, now=30.0)
+    assert (denied.allowed, denied.state, denied.retry_at) == (False, OPEN, 61.0)
+
+    probe = store.acquire("shop.example", POLICY, now=62.0)
+    assert probe.allowed and probe.probe
+    # While the probe is in flight others wait instead of reopening the breaker.
+    assert store.acquire("shop.example", POLICY, now=63.0).state == HALF_OPEN
+    assert not store.acquire("shop.example", POLICY, now=63.0).allowed
+
+    assert store.record("shop.example", POLICY, True, now=64.0) == CLOSED
+    assert store.acquire("shop.example", POLICY, now=65.0).allowed
+    assert store.snapshot("shop.example").outcomes == "0001"
+
+
+def test_sqlite_store_counts_failures_from_every_process(tmp_path):
+    path = tmp_path / "health.sqlite3"
+    policy = BreakerPolicy(failure_threshold=1000, window_size=0)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_fail_many, args=(path, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    store = SQLiteHealthStore(path, namespace="antibot")
+    assert store.snapshot("shop.example").consecutive_failures == 100
+    # Other namespaces (components with other policies) are independent.
+    assert SQLiteHealthStore(path, namespace="backoff").snapshot("shop.example").consecutive_failures == 0
+
+    assert store.trip("other.example", now=0.0)
+    other = SQLiteHealthStore(path, namespace="antibot")
+    winners = [s.acquire("other.example", policy, now=400.0).probe for s in (store, other, store)]
+    assert winners == [True, False, False]
+
+
+def test_backoff_instances_share_circuits(tmp_path):
+    config = {
+        "circuit_failure_threshold": 2,
+        "circuit_timeout_seconds": 60,
+        "domain_health": {"backend": "sqlite", "sqlite_path": str(tmp_path / "h.db")},
+    }
+    first, second = ExponentialBackoff(config), ExponentialBackoff(config)
+
+    first.track_failure("shop.example", "timeout")
+    second.track_failure("shop.example", "timeout")
+
+    assert not first.is_identifier_healthy("shop.example")
+    assert not second.should_retry("shop.example", 0, "timeout")
+    assert first.force_circuit_breaker_reset("shop.example")
+    assert second.is_identifier_healthy("shop.example")
+
+
+def test_backend_selection_and_fallbacks(tmp_path, monkeypatch):
+    monkeypatch.delenv(DOMAIN_HEALTH_ENV, raising=False)
+    assert create_domain_health_store().backend == "memory"
+    assert shared_domain_health_store({"backend": "memory"}) is None
+
+    monkeypatch.setenv(DOMAIN_HEALTH_ENV, f"sqlite:///{tmp_path / 'env.db'}")
+    store = shared_domain_health_store(namespace="site_scheduler")
+    assert store.backend == "sqlite" and store.path == tmp_path / "env.db"
+
+    # Unreachable Redis degrades to the single-host SQLite store.
+    monkeypatch.setenv(DOMAIN_HEALTH_ENV, "redis://127.0.0.1:1/0")
+    store = create_domain_health_store({"sqlite_path": str(tmp_path / "fallback.db")})
+    assert store.backend == "sqlite"
+
+
+def test_breaker_reopens_after_open_period_expires():
+    store = DomainHealthStore(namespace="antibot")
+    assert store.trip("shop.example", now=0.0, policy=POLICY)
+    assert not store.trip("shop.example", now=30.0, policy=POLICY)
+    # Expired: trip opens it again from now instead of reporting "already open".
+    assert store.trip("shop.example", now=100.0, policy=POLICY)
+    assert store.snapshot("shop.example").open_until(POLICY) == 160.0
+
+    # A failure recorded after expiry (no acquire() in between) re-opens too.
+    assert store.record("shop.example", POLICY, False, now=200.0) == OPEN
+    assert store.snapshot("shop.example").opened_at == 200.0
+    assert store.record("shop.example", POLICY, True, now=300.0) == CLOSED
+
+
+def test_backoff_circuit_trips_again_after_expiry():
+    config = {"circuit_failure_threshold": 2, "circuit_timeout_seconds": 0.05}
+    store = DomainHealthStore(namespace="backoff")
+    # ``observer`` never fails itself, so it only sees the shared circuit.
+    worker, observer = ExponentialBackoff(config, store), ExponentialBackoff(config, store)
+
+    def burst():
+        for _ in range(2):
+            worker.track_failure("shop.example", "timeout")
+        worker.should_retry("shop.example", 0, "timeout")
+
+    burst()
+    assert not observer.is_identifier_healthy("shop.example")
+    time.sleep(0.06)
+    assert observer.is_identifier_healthy("shop.example")
+
+    burst()
+    assert not observer.is_identifier_healthy("shop.example")
@@ -0,0 +1,96 @@
+"""Tests for the per-URL escalation ladder."""
+
+import asyncio
+
+from core.escalation import EscalationLadder, EscalationReport, urls_to_escalate
+
+URLS = [f"https://shop.example/p/{index}" for index in range(5)] + ["https://other.example/p/1"]
+
+
+def test_only_urls_without_products_escalate_with_their_reason():
+    products = [{"url": URLS[0] + "/"}, {"url": URLS[2]}, "not-a-product"]
+    failures = {URLS[1]: "parse_failed"}
+
+    pending = urls_to_escalate(URLS[:3] + [URLS[1]], products, failures)
+
+    assert pending == {URLS[1]: "parse_failed"}
+    assert urls_to_escalate([URLS[3]], [], {}) == {URLS[3]: "fetch_failed"}
+
+
+def test_each_url_stops_at_first_step_that_yields_a_product():
+    calls = []
+
+    async def playwright(url):
+        calls.append(("playwright", url))
+        if url.endswith("/1"):
+            raise RuntimeError("navigation timeout")
+        return {"url": url, "via": "playwright"} if url.endswith("/3") else None
+
+    async def flaresolverr(url):
+        calls.append(("flaresolverr", url))
+        return {"url": url, "via": "flaresolverr"} if "shop" in url else None
+
+    report = EscalationReport()
+    report.record_attempted(URLS)
+    seen = []
+    ladder = EscalationLadder(
+        [("playwright", playwright), ("flaresolverr", flaresolverr)],
+        on_result=lambda url, step: seen.append((url, step)),
+    )
+    pending = {URLS[1]: "guard", URLS[3]: "parse_failed", URLS[5]: "fetch_failed"}
+    products = asyncio.run(ladder.run(pending, report))
+
+    assert sorted((p["url"], p["via"]) for p in products) == [
+        (URLS[1], "flaresolverr"),
+        (URLS[3], "playwright"),
+    ]
+    assert ("flaresolverr", URLS[3]) not in calls
+    assert sorted(seen) == [(URLS[5], None), (URLS[1], "flaresolverr"), (URLS[3], "playwright")]
+
+
+def test_ladder_bounds_concurrency():
+    state = {"active": 0, "peak": 0}
+
+    async def slow(url):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return {"url": url}
+
+    ladder = EscalationLadder([("playwright", slow)], concurrency=2)
+    products = asyncio.run(ladder.run({url: "guard" for url in URLS}, EscalationReport()))
+
+    assert len(products) == len(URLS)
+    assert state["peak"] == 2
+
+
+def test_report_gives_escalation_rate_per_domain():
+    report = EscalationReport()
+    report.record_attempted(URLS)
+    for url in URLS[:2]:
+        report.record_escalated(url, "guard")
+    report.record_escalated(URLS[5], "fetch_failed")
+    report.record_recovered(URLS[0], "playwright")
+
+    stats = report.to_dict()
+    assert stats["shop.example"] == {
+        "total": 5,
+        "escalated": 2,
+        "recovered": 1,
+        "escalation_rate": 0.4,
+        "by_step": {"playwright": 1},
+        "reasons": {"guard": 2},
+    }
+    assert stats["other.example"]["escalation_rate"] == 1.0
+    assert report.recovered_by_step() == {"playwright": 1}
+
+
+def test_recovered_by_step_sums_over_domains():
+    report = EscalationReport()
+    report.record_recovered(URLS[0], "flaresolverr")
+    report.record_recovered(URLS[1], "flaresolverr")
+    report.record_recovered(URLS[5], "flaresolverr")
+    report.record_recovered(URLS[5], "parser")
+
+    assert report.recovered_by_step() == {"flaresolverr": 3, "parser": 1}
@@ -0,0 +1,98 @@
+"""Tests for tabular export writers."""
+
+import os
+
+import pytest
+
+from utils.export_writers import (
+    FULL_CSV_COLUMNS,
+    SEO_CSV_COLUMNS,
+    _ROW_BUILDER,
+    write_product_exports,
+)
+
+pytest.importorskip("xlsxwriter")
+pytest.importorskip("pandas")
+
+
+def _products(price_override=None):
+    products = []
+    for index in range(4):
+        product = {
+            "url": f"https://shop.example/p/{index}",
+            "name": f"Пряжа {index}",
+            "price": "1 250,5",
+            "stock": index,
+            "scraped_at": "2025-01-01T00:00:00Z",
+            "variations": [],
+        }
+        if index % 2:
+            product["variations"] = [
+                {"variation_id": "v1", "price": 10, "stock": 2, "in_stock": True,
+                 "attributes": {"color": "red"}},
+            ]
+        products.append(product)
+    if price_override is not None:
+        products[0]["price"] = price_override
+    return products
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_streaming_matches_dataframe_path(tmp_path, streaming):
+    reference_path = tmp_path / "reference" / "site" / "exports" / "export.json"
+    streamed_path = tmp_path / "streamed" / "site" / "exports" / "export.json"
+
+    for path, mode in ((reference_path, False), (streamed_path, streaming)):
+        write_product_exports(_products()[:3], path, streaming=mode)
+        write_product_exports(_products(price_override=99), path, streaming=mode)
+
+    for sheet in ("full.csv", "seo.csv", "diff.csv"):
+        assert (streamed_path.parent / sheet).read_text(encoding="utf-8") == (
+            reference_path.parent / sheet
+        ).read_text(encoding="utf-8")
+
+    diff_lines = (streamed_path.parent / "diff.csv").read_text(encoding="utf-8").splitlines()
+    assert any(line.startswith("https://shop.example/p/0;") and ";price;" in line for line in diff_lines)
+
+
+def test_latest_workbooks_are_hardlinked(tmp_path):
+    json_path = tmp_path / "site" / "exports" / "export.json"
+
+    artifacts = write_product_exports(_products(), json_path, streaming=True)
+    first_inode = os.stat(artifacts.excel_path).st_ino
+    write_product_exports(_products(price_override=5), json_path, streaming=True)
+
+    latest = json_path.parent / "latest.xlsx"
+    assert os.stat(latest).st_ino == os.stat(artifacts.excel_path).st_ino
+    assert os.stat(json_path.parent / "site_latest.xlsx").st_ino == os.stat(latest).st_ino
+    assert os.stat(artifacts.excel_path).st_ino != first_inode
+
+
+def test_row_builder_resolves_fallbacks_in_one_pass():
+    product = {
+        "url": "https://shop.example/p/1",
+        "title": "   ",
+        "name": "Пряжа",
+        "price": "1 200,50",
+        "stock_quantity": "3",
+        "og": {"og:title": "OG title"},
+        "twitter_card": {"title": "Tw"},
+        "image_alts": ["a", "b"],
+        "variations": [
+            {"value": "red", "price": "10", "in_stock": 1, "attributes": {"color": "red"}},
+            "broken",
+            {"variant_id": 7, "stock": 0},
+        ],
+    }
+
+    full_rows, seo_row = _ROW_BUILDER.build(product)
+    full = [dict(zip(FULL_CSV_COLUMNS, values)) for values in full_rows]
+    seo = dict(zip(SEO_CSV_COLUMNS, seo_row))
+
+    assert [row["title"] for row in full] == ["Пряжа", "Пряжа"]
+    assert full[0]["price"] == 10.0 and full[0]["variation_in_stock"] is True
+    assert full[0]["variation_attributes"] == '{"color": "red"}'
+    assert full[1]["variation_id"] == "7" and full[1]["stock"] == 0
+    assert seo["title"] == "Пряжа" and seo["og_title"] == "OG title"
+    assert seo["twitter_title"] == "Tw"
+    assert _ROW_BUILDER.build({"title": "no url"}) == ([], None)
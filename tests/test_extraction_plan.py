@@ -0,0 +1,91 @@
+"""Tests for compiled per-domain extraction plans."""
+
+from bs4 import BeautifulSoup
+
+from core.extraction_plan import ExtractionPlan, rule_keys
+from core.selector_memory import SelectorMemory
+from utils.helpers import clean_price
+
+PAGE = """
+<html><body>
+  <h1 class="title"></h1>
+  <div class="product">
+    <h2 class="product-name">Пряжа Alpaca</h2>
+    <span class="price old">нет цены</span>
+    <div class="price-box"><span class="price">1 250 ₽</span></div>
+    <span class="stock">5</span>
+  </div>
+</body></html>
+"""
+
+
+def test_plan_matches_the_sequential_cascade_in_one_walk():
+    chains = {
+        "name": ["h1", ".product-name", "h2"],
+        "price": [".missing", "span.price", ".price-box .price"],
+        "stock": ["#qty", ".stock"],
+    }
+    plan = ExtractionPlan.compile("shop.example", chains)
+
+    matches = plan.evaluate(BeautifulSoup(PAGE, "html.parser"), {"price": clean_price})
+
+    # h1 is empty and the first span.price does not parse: like select_one,
+    # only a rule's first match counts, so the next rule wins.
+    assert {field: (m.value, m.selector) for field, m in matches.items()} == {
+        "name": ("Пряжа Alpaca", ".product-name"),
+        "price": (1250.0, ".price-box .price"),
+        "stock": ("5", ".stock"),
+    }
+    assert plan.evaluate(PAGE, fields=["stock"]).keys() == {"stock"}
+
+
+def test_negated_attribute_selectors_match_like_the_cascade():
+    page = """
+    <html><body>
+      <h1 data-b="x">Draft</h1><h1>Title</h1>
+      <span hidden>0</span><span>12</span>
+    </body></html>
+    """
+    chains = {"name": ["h1:not([data-b])"], "stock": ["span:not([hidden])"]}
+    soup = BeautifulSoup(page, "html.parser")
+
+    matches = ExtractionPlan.compile("shop.example", chains).evaluate(soup)
+
+    cascade = {field: soup.select_one(chain[0]).get_text(strip=True) for field, chain in chains.items()}
+    assert {field: m.text for field, m in matches.items()} == cascade == {
+        "name": "Title",
+        "stock": "12",
+    }
+
+
+def test_rule_keys_index_the_rightmost_compound():
+    assert rule_keys("div.price > span.value") == (("class", "value"),)
+    assert rule_keys('[itemprop="price"], #qty') == (("attr", "itemprop"), ("id", "qty"))
+    assert rule_keys("div:not(.sale)") == (("tag", "div"),)
+    assert rule_keys("span:not([hidden])") == (("tag", "span"),)
+    assert rule_keys("a[href]:not([rel])") == (("attr", "href"),)
+    assert rule_keys("*") is None
+    assert ExtractionPlan.compile("d", {"name": ["h1", "h1", "::invalid(", ""]}).chains == {
+        "name": ("h1",)
+    }
+
+
+def test_selector_memory_plans_are_cached_per_store_version(tmp_path):
+    memory = SelectorMemory(memory_dir=str(tmp_path))
+    memory.save_domain_selectors("shop.example", {"price": [".learned-price"]}, source="static")
+
+    plan = memory.get_extraction_plan(
+        "shop.example", ("name", "price"), before={"price": [".config-price"]}, after={"name": ["h1"]}
+    )
+    assert plan.chains == {"name": ("h1",), "price": (".config-price", ".learned-price")}
+    assert memory.get_extraction_plan(
+        "shop.example", ("name", "price"), before={"price": [".config-price"]}, after={"name": ["h1"]}
+    ) is plan
+
+    memory.update_selector_confidence("shop.example", "name", ".product-name", True)
+    rebuilt = memory.get_extraction_plan(
+        "shop.example", ("name", "price"), before={"price": [".config-price"]}, after={"name": ["h1"]}
+    )
+    assert rebuilt is not plan
+    assert rebuilt.chains["name"] == (".product-name", "h1")
+    assert memory.get_memory_stats()["plan_cache_stats"] == {"plans": 1, "hits": 1, "builds": 2}
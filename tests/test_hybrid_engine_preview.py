@@ -0,0 +1,89 @@
+"""Tests for preview reuse and per-template method decisions in HybridScrapingEngine."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("psutil")
+pytest.importorskip("aiolimiter")
+
+from core.hybrid_engine import HybridScrapingEngine, path_template  # noqa: E402
+
+STATIC_HTML = "<html><body><h1>Merino</h1><span class='price'>4.50</span></body></html>"
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = HybridScrapingEngine()
+    previews = []
+
+    async def fake_preview(url):
+        previews.append(url)
+        return STATIC_HTML
+
+    async def no_fetch(url, **kwargs):
+        raise AssertionError(f"{url} fetched twice")
+
+    monkeypatch.setattr(engine, "_fetch_preview_html", fake_preview)
+    monkeypatch.setattr(engine, "scrape_with_aiohttp", no_fetch)
+    engine.previews = previews
+    yield engine
+    engine.shutdown()
+
+
+def test_path_template_wildcards_leaf_and_id_segments():
+    assert path_template("https://Shop.example/product/merino-blue") == "shop.example/product/*"
+    assert path_template("https://shop.example/p/123/colour/?v=2") == "shop.example/p/{id}/*"
+    assert path_template("https://shop.example/") == "shop.example/"
+    assert path_template("https://shop.example/catalog/yarn") != path_template(
+        "https://shop.example/catalog/yarn/merino"
+    )
+    # Products nested under different categories share one decision.
+    assert path_template("https://shop.example/catalog/yarn/alize/merino") == path_template(
+        "https://shop.example/catalog/knit/bamboo/cotton"
+    )
+
+
+def test_scrape_single_reuses_preview_as_aiohttp_result(engine):
+    result = asyncio.run(engine.scrape_single("https://shop.example/product/merino"))
+
+    assert result == {"html": STATIC_HTML, "url": "https://shop.example/product/merino", "method": "aiohttp"}
+    assert engine.previews == ["https://shop.example/product/merino"]
+
+
+def test_detection_runs_once_per_template(engine):
+    urls = [f"https://shop.example/product/item-{index}" for index in range(3)]
+
+    async def main():
+        first = await engine.detect_optimal_scraping_method(urls[0])
+        rest = [await engine.detect_optimal_scraping_method(url) for url in urls[1:]]
+        return first, rest
+
+    first, rest = asyncio.run(main())
+    assert rest == [first, first]
+    assert engine.previews == urls[:1]
+    assert engine.template_decisions == {"shop.example/product/*": first}
+
+
+def test_concurrent_batch_decisions_fetch_one_preview_per_template(engine):
+    urls = [f"https://shop.example/catalog/yarn-{index}/item-{index}" for index in range(4)]
+
+    async def main():
+        return await asyncio.gather(*(engine._decide_method(url) for url in urls))
+
+    decisions = asyncio.run(main())
+
+    assert len(engine.previews) == 1
+    assert len({method for method, _ in decisions}) == 1
+    # Only the URL whose preview was fetched may reuse it as its result.
+    assert [url for url, (_, html) in zip(urls, decisions) if html] == engine.previews
+
+
+def test_sync_wrappers_refuse_running_loop(engine):
+    assert engine.sync_detect_optimal_method("https://shop.example/product/a") in {"aiohttp", "playwright"}
+
+    async def inside_loop():
+        with pytest.raises(RuntimeError, match="await"):
+            engine.sync_detect_optimal_method("https://shop.example/product/b")
+
+    asyncio.run(inside_loop())
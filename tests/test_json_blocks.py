@@ -0,0 +1,50 @@
+"""Tests for the shared embedded-JSON block scanner."""
+
+from utils.json_blocks import (
+    assignment_anchor,
+    decode_json_after,
+    find_closing_bracket,
+    scan_json_blocks,
+)
+
+PAGE = (
+    "<html><script>var x = 1;\n"
+    "new JCCatalogElement({'OFFERS': [{'ID': '1', 'NAME': 'it\\'s } big'}], \"A\": \"]\"});\n"
+    "</script><div>filler</div><script>"
+    'window.__INITIAL_STATE__ = {"cart": []};'
+    'shop2.init({"verId": 7, "apiHash": {"getProductListItem": "h"}});'
+    'myproduct = {"skip": true}; var product = {"id": 5, "title": "a}b"};'
+    "</script></html>"
+)
+
+
+def test_scan_finds_every_default_anchor_in_document_order():
+    blocks = scan_json_blocks(PAGE)
+
+    assert [block.anchor for block in blocks] == [
+        "jccatalogelement",
+        "initial_state",
+        "shop2.init",
+        "product",
+    ]
+    assert blocks[0].text.startswith("{'OFFERS'") and blocks[0].text.endswith('"]"}')
+    assert blocks[0].decode() is None  # JS literal, not strict JSON
+    assert blocks[2].decode()["verId"] == 7
+    assert blocks[3].decode() == {"id": 5, "title": "a}b"}
+
+
+def test_closing_bracket_skips_strings_and_rejects_unterminated():
+    text = '{"a": "}", \'b\': [1, "]"]} tail'
+
+    assert find_closing_bracket(text, 0) == text.index("} tail")
+    assert find_closing_bracket(text, text.index("[")) == text.index("]}")
+    assert find_closing_bracket('{"open', 0) == -1
+
+
+def test_assignment_anchor_and_decode_after():
+    text = "foo;offersData = [1, 2]; notoffers = [3]"
+    blocks = scan_json_blocks(text, {"offers": assignment_anchor(["offersData", "offers"])})
+
+    assert [block.text for block in blocks] == ["[1, 2]"]
+    assert decode_json_after("shop2.init( {\"a\": 1})", len("shop2.init"), skip="(") == {"a": 1}
+    assert decode_json_after("x = [1, 2]", 3, brackets="{") is None
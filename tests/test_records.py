@@ -0,0 +1,66 @@
+"""Tests for compact slotted product/variation records."""
+
+import json
+import pickle
+
+from utils import serialization
+from utils.export_writers import write_product_exports
+from utils.records import ProductRecord, VariationRecord, compact_products, to_plain
+
+PRODUCT = {
+    "url": "https://shop.example/p/1",
+    "name": "Пряжа Alpaca",
+    "site_domain": "shop.example",
+    "price": 1250.0,
+    "variations": [
+        {"variant_id": "A-1", "variation_id": "A-1", "type": "color", "value": "Red", "stock": 3},
+        {"variant_id": "A-2", "variation_id": "A-2", "type": "color", "value": "Blue", "stock": 0},
+    ],
+}
+
+
+def test_records_round_trip_and_share_shapes():
+    first, second = compact_products([PRODUCT, dict(PRODUCT, url="https://shop.example/p/2"), "junk"])
+
+    assert first == PRODUCT and list(first) == list(PRODUCT)
+    assert first.to_dict() == PRODUCT and type(first.to_dict()["variations"][0]) is dict
+    assert isinstance(first["variations"][0], VariationRecord)
+    assert first._shape is second._shape
+    assert first["variations"][0]._shape is second["variations"][1]._shape
+    assert ProductRecord.from_mapping(first) is first
+    assert pickle.loads(pickle.dumps(first)) == first
+
+
+def test_assignment_and_deletion_move_between_shapes():
+    record = ProductRecord(PRODUCT)
+    other = ProductRecord(PRODUCT)
+
+    record["stock"] = 3
+    other["stock"] = 5
+    assert record._shape is other._shape and list(record)[-1] == "stock"
+    del record["price"]
+    assert "price" not in record and record.get("price", "n/a") == "n/a"
+    assert list(record) == ["url", "name", "site_domain", "variations", "stock"]
+    assert ProductRecord(PRODUCT)["price"] == 1250.0
+
+
+def test_duplicate_and_categorical_strings_are_shared():
+    product = ProductRecord(PRODUCT)
+    loaded = ProductRecord(json.loads(json.dumps(PRODUCT)))
+    variation, copy = product["variations"][0], loaded["variations"][0]
+
+    assert copy["variant_id"] is copy["variation_id"]  # separate strings after json.loads
+    assert variation["type"] is copy["type"]
+    assert product["site_domain"] is loaded["site_domain"]
+
+
+def test_records_serialise_and_export_like_dicts(tmp_path):
+    records = compact_products([PRODUCT])
+
+    assert json.loads(serialization.dumps(records)) == [PRODUCT]
+    assert to_plain(records) == [PRODUCT]
+
+    artifacts = write_product_exports(records, tmp_path / "shop.json")
+    payload = json.loads(artifacts.json_path.read_text(encoding="utf-8"))
+    assert payload["products"] == [PRODUCT]
+    assert "Пряжа Alpaca" in artifacts.csv_paths["full"].read_text(encoding="utf-8")
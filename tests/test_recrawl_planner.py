@@ -0,0 +1,57 @@
+"""Tests for the change-rate-aware recrawl planner."""
+
+from utils.recrawl_planner import RecrawlHistory, RecrawlPlanner
+
+HOUR = 3600.0
+
+
+def _product(url, price, scraped_at):
+    return {"url": url, "name": "Пряжа", "price": price, "stock": 1, "scraped_at": scraped_at}
+
+
+def test_volatile_products_are_fetched_first(tmp_path):
+    history = RecrawlHistory(path=tmp_path / "recrawl_stats.json")
+    for run in range(6):
+        observed = 1_700_000_000 + run * 24 * HOUR
+        history.observe_products(
+            [
+                _product("https://shop/stable", 100, observed),
+                _product("https://shop/volatile", 100 + run, observed),
+            ]
+        )
+    history.save()
+
+    reloaded = RecrawlHistory.load(history.path)
+    now = 1_700_000_000 + 6 * 24 * HOUR
+    plan = RecrawlPlanner(reloaded).plan(
+        ["https://shop/stable", "https://shop/volatile", "https://shop/new"], now=now
+    )
+
+    assert plan.fetch == ["https://shop/new", "https://shop/volatile", "https://shop/stable"]
+    assert reloaded.stats["https://shop/volatile"].changes == 5
+    assert reloaded.stats["https://shop/stable"].changes == 0
+
+
+def test_stale_observations_are_ignored(tmp_path):
+    history = RecrawlHistory(path=tmp_path / "stats.json")
+    history.observe_products([_product("https://shop/a", 1, 1000.0)])
+
+    assert history.observe_products([_product("https://shop/a", 2, 1000.0)]) == 0
+    assert history.stats["https://shop/a"].observations == 1
+
+
+def test_stable_urls_are_down_sampled_and_budgeted(tmp_path):
+    history = RecrawlHistory(path=tmp_path / "stats.json")
+    urls = [f"https://shop/p/{index}" for index in range(200)]
+    now = 1_700_000_000.0
+    for offset in (30 * 24 * HOUR, HOUR):
+        history.observe_products(_product(url, 10, now - offset) for url in urls)
+
+    plan = RecrawlPlanner(history, sample_rate=0.1).plan(urls, now=now)
+
+    assert 0 < len(plan.fetch) < 60
+    assert set(plan.fetch) | set(plan.skipped) == set(urls)
+
+    budgeted = RecrawlPlanner(history).plan(urls, max_fetches=5, now=now)
+    assert len(budgeted.fetch) == 5
+    assert len(budgeted.skipped) == 195
@@ -0,0 +1,77 @@
+"""Tests for the escalation rungs wired into ScraperEngine."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+ScraperEngine = pytest.importorskip("core.scraper_engine").ScraperEngine
+
+from core.types import ScrapingMethod  # noqa: E402
+
+URLS = [f"https://shop.example/p/{index}" for index in range(4)]
+
+
+class FlareSolverr:
+    async def solve_get_request(self, url):
+        return {"status": 200, "html": f"<h1>{url}</h1>"}
+
+
+class Parser:
+    def __init__(self):
+        self.threads = []
+
+    def parse_product(self, html, url):
+        self.threads.append(threading.current_thread())
+        return {"url": url, "name": html}
+
+
+class BrowserlessManager:
+    def __init__(self):
+        self.launches = 0
+
+    async def get_browser(self):
+        self.launches += 1
+        return None
+
+
+def make_engine(ladder):
+    engine = ScraperEngine.__new__(ScraperEngine)
+    engine.config = {"scraping": {"escalation": {"ladder": ladder}}}
+    engine.logger = SimpleNamespace(info=lambda *args, **kwargs: None)
+    engine.parser = Parser()
+    engine.playwright_manager = BrowserlessManager()
+    engine._flaresolverr_client = FlareSolverr()
+    engine._last_scrape_metadata = {}
+    engine._current_scrape_total = len(URLS)
+    engine._escalation_report = None
+    engine._emit_progress = lambda *args, **kwargs: None
+    return engine
+
+
+def test_flaresolverr_rung_parses_off_the_event_loop():
+    engine = make_engine(["flaresolverr"])
+
+    products = asyncio.run(engine._escalate_failed_urls(URLS, []))
+
+    assert sorted(product["url"] for product in products) == URLS
+    assert threading.main_thread() not in engine.parser.threads
+
+
+def test_failed_browser_launch_is_not_retried_for_every_url():
+    engine = make_engine(["playwright", "flaresolverr"])
+
+    products = asyncio.run(engine._escalate_failed_urls(URLS, []))
+
+    assert len(products) == len(URLS)
+    assert engine.playwright_manager.launches == 1
+
+
+def test_method_used_follows_the_rung_that_recovered_the_urls():
+    engine = make_engine(["playwright", "flaresolverr"])
+
+    asyncio.run(engine._escalate_failed_urls(URLS, []))
+
+    assert engine._escalation_report.recovered_by_step() == {"flaresolverr": len(URLS)}
+    assert engine._escalation_method() == ScrapingMethod.HTTPX
@@ -0,0 +1,60 @@
+"""Tests for the JSON serialization facade."""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from utils import serialization
+
+
+@dataclass
+class _Record:
+    name: str
+    price: float
+
+
+def test_dumps_is_compact_and_keeps_unicode():
+    payload = {"name": "Пряжа", "tags": ["a", "b"]}
+
+    assert serialization.dumps(payload) == '{"name":"Пряжа","tags":["a","b"]}'
+    assert "\n  " in serialization.dumps(payload, pretty=True)
+
+
+def test_dumps_handles_rich_types():
+    payload = {
+        "at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "record": _Record("x", 1.5),
+        "path": Path("/tmp/export.json"),
+        "ids": {7},
+        1: "non-str key",
+    }
+
+    decoded = serialization.loads(serialization.dumps_bytes(payload))
+
+    assert decoded == {
+        "at": "2025-01-02T03:04:05+00:00",
+        "record": {"name": "x", "price": 1.5},
+        "path": "/tmp/export.json",
+        "ids": [7],
+        "1": "non-str key",
+    }
+
+
+def test_custom_default_is_used_as_last_resort():
+    class Opaque:
+        def __str__(self) -> str:
+            return "opaque"
+
+    assert serialization.dumps({"v": Opaque()}, default=str) == '{"v":"opaque"}'
+
+
+def test_write_json_atomic_round_trip(tmp_path):
+    target = tmp_path / "nested" / "summary.json"
+
+    written = serialization.write_json(
+        target, {"ok": True}, atomic=True, trailing_newline=True
+    )
+
+    assert target.read_bytes() == written == b'{"ok":true}\n'
+    assert serialization.read_json(target) == {"ok": True}
+    assert list(target.parent.iterdir()) == [target]
@@ -0,0 +1,124 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from network.single_flight import SingleFlight, normalize_url, request_key
+from scripts.fast_export_base import request_with_retries
+
+
+def test_concurrent_callers_share_one_execution_and_memo():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "body"
+
+    async def run():
+        flight = SingleFlight(ttl=60)
+        first = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        again = await flight.do("k", fetch)
+        return flight, first, again
+
+    flight, first, again = asyncio.run(run())
+
+    assert first == ["body"] * 5 and again == "body"
+    assert len(calls) == 1
+    assert (flight.stats.executed, flight.stats.coalesced, flight.stats.memo_hits) == (1, 4, 1)
+
+
+def test_failures_propagate_and_are_not_memoised():
+    attempts = []
+
+    async def boom():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise ValueError("down")
+
+    async def run():
+        flight = SingleFlight(ttl=60)
+        results = await asyncio.gather(
+            flight.do("k", boom), flight.do("k", boom), return_exceptions=True
+        )
+        with pytest.raises(ValueError):
+            await flight.do("k", boom)
+        return results
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(item, ValueError) for item in results)
+    assert len(attempts) == 2
+
+
+def test_keys_normalise_urls_and_ignore_irrelevant_headers():
+    assert normalize_url("HTTPS://Shop.RU:443/p?b=2&a=1#top") == "https://shop.ru/p?a=1&b=2"
+    assert request_key("get", "https://shop.ru/p", headers={"Referer": "x"}) == request_key(
+        "GET", "https://shop.ru/p/".rstrip("/"), headers={"Referer": "y"}
+    )
+    assert request_key("POST", "https://shop.ru/api", body={"id": 1}) != request_key(
+        "POST", "https://shop.ru/api", body={"id": 2}
+    )
+
+
+def test_request_with_retries_coalesces_identical_posts():
+    hits = []
+
+    async def handler(request):
+        hits.append(request.url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"ok": True})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await asyncio.gather(
+                *(
+                    request_with_retries(
+                        client,
+                        "POST",
+                        "https://shop.test/ajax?kind=7",
+                        data={"product_id": "1"},
+                        headers={"Referer": f"https://shop.test/p/{index}"},
+                        coalesce=True,
+                    )
+                    for index in range(3)
+                )
+            )
+
+    responses = asyncio.run(run())
+
+    assert [response.json() for response in responses] == [{"ok": True}] * 3
+    assert len(hits) == 1
+
+
+def test_request_with_retries_does_not_share_responses_across_clients_or_proxies():
+    hits = []
+
+    async def handler(request):
+        hits.append(request.url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"ok": True})
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport) as first, httpx.AsyncClient(
+            transport=transport
+        ) as second:
+            calls = [
+                request_with_retries(first, "GET", "https://shop.test/p/1", coalesce=True),
+                request_with_retries(second, "GET", "https://shop.test/p/1", coalesce=True),
+                request_with_retries(
+                    first,
+                    "GET",
+                    "https://shop.test/p/1",
+                    proxy_endpoint="http://proxy.test:8080",
+                    coalesce=True,
+                ),
+            ]
+            return await asyncio.gather(*calls)
+
+    asyncio.run(run())
+
+    assert len(hits) == 3
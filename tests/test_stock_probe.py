@@ -0,0 +1,127 @@
+"""Tests for the lightweight price/stock probes."""
+
+import asyncio
+import json
+
+import httpx
+
+from network.stock_probe import LightweightStockMonitor, diff_snapshots
+
+SHOP2_PAGE = """
+<html><script>shop2.init({"productRefs": {"501": {"color": {"11": ["9001"], "12": ["9002"]}}},
+"apiHash": {"getProductListItem": "abc"}, "verId": 7});</script></html>
+"""
+
+BITRIX_PAGE = """
+<html><script>var obj = new JCCatalogElement({"OFFERS": [
+  {"ID": "1", "ITEM_PRICES": [{"PRICE": 250}], "MAX_QUANTITY": 4, "CAN_BUY": true},
+  {"ID": "2", "ITEM_PRICES": [{"PRICE": 270}], "MAX_QUANTITY": 0, "CAN_BUY": false}
+]});</script></html>
+"""
+
+GENERIC_PAGE = """
+<html><head><script type="application/ld+json">
+{"@type": "Product", "offers": {"price": "1 490,00", "availability": "https://schema.org/InStock"}}
+</script></head></html>
+"""
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    if url == "https://www.manefa.ru/product/yarn.json":
+        payload = {
+            "product": {
+                "price_min": "199.0",
+                "variants": [
+                    {"id": 1, "price": "199.0", "quantity": 3, "available": True},
+                    {"id": 2, "price": "219.0", "quantity": 0, "available": False},
+                ],
+            }
+        }
+        return httpx.Response(200, json=payload)
+    if url == "https://mpyarn.ru/goods/yarn":
+        return httpx.Response(200, text=SHOP2_PAGE)
+    if url.startswith("https://mpyarn.ru/-/shop2-api/"):
+        kind_id = dict(httpx.QueryParams(request.content.decode()))["kind_id"]
+        button = '<a class="shop-product-btn buy">' if kind_id == "9001" else ""
+        body = f'<div class="price-current"><strong>3{kind_id[-1]}0</strong></div>{button}'
+        return httpx.Response(200, json={"data": {"body": body}})
+    if url == "https://ili-ili.com/catalog/yarn/":
+        return httpx.Response(200, text=BITRIX_PAGE)
+    if url == "https://example.org/item":
+        return httpx.Response(200, text=GENERIC_PAGE)
+    return httpx.Response(404)
+
+
+def _check(urls):
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+            return await LightweightStockMonitor(client=client).check(urls)
+
+    return {snapshot.url: snapshot for snapshot in asyncio.run(_run())}
+
+
+def test_cms_specific_probes_extract_price_and_stock():
+    snapshots = _check(
+        [
+            "https://www.manefa.ru/product/yarn",
+            "https://mpyarn.ru/goods/yarn",
+            "https://ili-ili.com/catalog/yarn/",
+            "https://example.org/item",
+        ]
+    )
+
+    insales = snapshots["https://www.manefa.ru/product/yarn"]
+    assert (insales.source, insales.price, insales.stock, insales.in_stock) == (
+        "insales_json", 199.0, 3.0, True,
+    )
+
+    shop2 = snapshots["https://mpyarn.ru/goods/yarn"]
+    assert shop2.source == "shop2_api"
+    assert [item["in_stock"] for item in shop2.variations] == [True, False]
+    assert shop2.price == 310.0
+
+    bitrix = snapshots["https://ili-ili.com/catalog/yarn/"]
+    assert (bitrix.source, bitrix.price, bitrix.stock, bitrix.in_stock) == (
+        "bitrix_offers", 250.0, 4.0, True,
+    )
+
+    generic = snapshots["https://example.org/item"]
+    assert (generic.price, generic.in_stock) == (1490.0, True)
+
+
+def test_failures_are_reported_and_diff_detects_changes():
+    snapshots = _check(["https://example.org/missing", "https://www.manefa.ru/product/yarn"])
+
+    assert not snapshots["https://example.org/missing"].ok
+    changes = diff_snapshots(
+        snapshots.values(),
+        {"https://www.manefa.ru/product/yarn": {"price": 199.0, "stock": 5, "in_stock": True}},
+    )
+    assert changes == [
+        {
+            "url": "https://www.manefa.ru/product/yarn",
+            "changes": {"stock": [5.0, 3.0]},
+            "source": "insales_json",
+        }
+    ]
+    json.dumps([snapshot.to_dict() for snapshot in snapshots.values()])
+
+
+def test_malformed_shop2_config_falls_back_to_markup():
+    page = SHOP2_PAGE.replace('{"getProductListItem": "abc"}', '"abc"')
+
+    def handler(request):
+        if str(request.url) == "https://mpyarn.ru/goods/yarn":
+            return httpx.Response(200, text=page)
+        return _handler(request)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monitor = LightweightStockMonitor(client=client)
+            return await monitor.check(["https://mpyarn.ru/goods/yarn", "https://example.org/item"])
+
+    shop2, generic = asyncio.run(_run())
+
+    assert (shop2.error, shop2.source) == (None, "shop2_html")
+    assert generic.price == 1490.0
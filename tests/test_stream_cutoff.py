@@ -0,0 +1,122 @@
+"""Tests for marker-based early termination of streamed downloads."""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+
+from network.stream_cutoff import (
+    CUTOFF_PROFILES,
+    STREAM_CUTOFF_ENV,
+    CutoffMarker,
+    MarkerCutoff,
+    product_cutoff_markers,
+    resolve_cutoff_markers,
+)
+from scripts.fast_export_base import request_with_retries
+
+MPYARN_PAGE = Path(__file__).parent / "fixtures" / "mpyarn_product.html"
+
+
+def _cut(body: bytes, markers, chunk_size: int = 512) -> bytes:
+    cutoff = MarkerCutoff(markers)
+    for offset in range(0, len(body), chunk_size):
+        if cutoff.feed(body[offset : offset + chunk_size]):
+            return body[: offset + chunk_size]
+    return body
+
+
+def test_markers_split_across_chunks_require_their_terminator():
+    cutoff = MarkerCutoff(CUTOFF_PROFILES["cm3"][:2])
+    chunks = [
+        b"<html><div class='price-cur",
+        b"rent'><strong>120</strong></div>",
+        b"<script>shop2.in",
+        b"it({\"a\": 1});",
+        b"</scr",
+        b"ipt><footer>",
+    ]
+
+    results = [cutoff.feed(chunk) for chunk in chunks]
+
+    assert results == [False, False, False, False, False, True]
+
+
+def test_end_before_start_does_not_count():
+    cutoff = MarkerCutoff([CutoffMarker(b"jccatalogelement(", b"</script>")])
+
+    assert not cutoff.feed(b"<script>var a;</script><script>new JCCatalogElement({")
+    assert cutoff.feed(b"});</script>")
+
+
+def test_profile_resolution_prefers_configured_domain():
+    assert resolve_cutoff_markers("https://www.mpyarn.ru/goods/1") == CUTOFF_PROFILES["cm3"]
+    assert resolve_cutoff_markers("https://unknown.example/") is None
+    assert resolve_cutoff_markers(
+        "https://unknown.example/", {"unknown.example": [["<h1", "</h1>"]]}
+    ) == (CutoffMarker(b"<h1", b"</h1>"),)
+
+
+def test_request_with_retries_stops_reading_after_markers():
+    served = []
+
+    async def body():
+        for part in (b"<html><script>new JCCatalogElement({});</script>", b"x" * 4096, b"y" * 4096):
+            served.append(part)
+            yield part
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=body())
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await request_with_retries(
+                client,
+                "GET",
+                "https://ili-ili.com/catalog/item/",
+                cutoff_markers=CUTOFF_PROFILES["bitrix"],
+            )
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.text.endswith("</script>")
+    assert len(served) == 1
+
+
+def test_cm3_cutoff_keeps_every_field_the_mpyarn_parser_reads():
+    from scripts.mpyarn_fast_export import _parse_product_meta, _parse_shop2_config
+
+    url = "https://mpyarn.ru/magazin/product/alize-angora-gold-simli"
+    body = MPYARN_PAGE.read_bytes()
+    truncated = _cut(body, CUTOFF_PROFILES["cm3"])
+
+    assert len(truncated) < len(body) // 2
+    text = truncated.decode("utf-8", errors="ignore")
+    full = _parse_product_meta(body.decode("utf-8"), url)
+    assert _parse_product_meta(text, url) == full
+    assert full["in_stock"] is True and full["price"] == 349.0
+    assert "AG-SIMLI-1" in text and "data-multiplicity" in text
+    assert _parse_shop2_config(text)["verId"] == 2437113
+
+    # shop2.init + price block alone stop before the buy button.
+    early = _cut(body, CUTOFF_PROFILES["cm3"][:2]).decode("utf-8", errors="ignore")
+    assert _parse_product_meta(early, url)["in_stock"] is False
+
+
+def test_cutoff_only_applies_when_the_caller_passes_markers(monkeypatch):
+    monkeypatch.setenv(STREAM_CUTOFF_ENV, "1")
+    assert product_cutoff_markers("https://mpyarn.ru/magazin/product/x") == CUTOFF_PROFILES["cm3"]
+    body = MPYARN_PAGE.read_bytes()
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=body)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            # A listing page fetched by host alone is never truncated.
+            return await request_with_retries(client, "GET", "https://mpyarn.ru/magazin/folder/alize")
+
+    assert asyncio.run(run()).content == body
+    monkeypatch.delenv(STREAM_CUTOFF_ENV)
+    assert product_cutoff_markers("https://mpyarn.ru/magazin/product/x") is None
@@ -0,0 +1,140 @@
+"""Tests for the structured-data-first product extractor."""
+
+import json
+
+from parsers.structured_data import extract_structured_product
+
+JSON_LD = {
+    "@context": "https://schema.org",
+    "@graph": [
+        {"@type": "BreadcrumbList", "itemListElement": []},
+        {
+            "@type": "Product",
+            "name": "Пряжа Alize Angora Gold",
+            "sku": "AG-100",
+            "image": ["https://shop.example/1.jpg", {"url": "https://shop.example/2.jpg"}],
+            "brand": {"@type": "Brand", "name": "Alize"},
+            "offers": {
+                "@type": "AggregateOffer",
+                "lowPrice": "1 490,00",
+                "priceCurrency": "RUB",
+                "offers": [
+                    {"@type": "Offer", "price": 1490, "sku": "AG-100-RED", "name": "Красный",
+                     "availability": "https://schema.org/OutOfStock"},
+                    {"@type": "Offer", "price": "1590.00", "sku": "AG-100-BLUE", "name": "Синий",
+                     "availability": "https://schema.org/InStock", "inventoryLevel": {"value": 7}},
+                ],
+            },
+        },
+    ],
+}
+
+MICRODATA_PAGE = """
+<html><head>
+<meta property="og:title" content="OG title">
+<meta property="og:image" content="https://shop.example/og.jpg">
+<meta property="product:price:amount" content="999">
+</head><body>
+<div itemscope itemtype="http://schema.org/Product">
+  <h1 itemprop="name">Спицы круговые</h1>
+  <div itemprop="offers" itemscope itemtype="http://schema.org/Offer">
+    <span itemprop="price" content="350.50">350,50 ₽</span>
+    <meta itemprop="priceCurrency" content="RUB">
+    <link itemprop="availability" href="http://schema.org/OutOfStock">
+  </div>
+</div>
+</body></html>
+"""
+
+
+def test_json_ld_graph_offers_and_variants():
+    html = f'<script type="application/ld+json">{json.dumps(JSON_LD)}</script><h1>Other</h1>'
+    product = extract_structured_product(html)
+
+    assert product.name == "Пряжа Alize Angora Gold"
+    assert (product.price, product.currency, product.sku, product.brand) == (1490.0, "RUB", "AG-100", "Alize")
+    assert product.images == ["https://shop.example/1.jpg", "https://shop.example/2.jpg"]
+    assert [offer.currency for offer in product.offers] == ["RUB", "RUB"]
+    assert product.availability == "InStock"  # any in-stock offer makes the product available
+    assert product.in_stock is True
+    assert product.stock == 7
+    assert product.offers[1].to_variation()["in_stock"] is True
+    assert set(product.sources.values()) == {"json-ld"}
+
+
+def test_microdata_beats_opengraph_which_fills_the_gaps():
+    product = extract_structured_product(MICRODATA_PAGE)
+
+    assert (product.name, product.price, product.currency) == ("Спицы круговые", 350.5, "RUB")
+    assert product.images == ["https://shop.example/og.jpg"]
+    assert product.sources == {
+        "name": "microdata",
+        "offers": "microdata",
+        "price": "microdata",
+        "currency": "microdata",
+        "availability": "microdata",
+        "images": "opengraph",
+    }
+    # OutOfStock is availability, not a quantity: stock selectors still run.
+    assert (product.in_stock, product.stock) == (False, None)
+    assert product.og_title == "OG title"
+
+
+RELATED_PAGE = """
+<html><head>
+<meta property="og:title" content="Alize Angora — купить в магазине Пряжа-Шоп">
+</head><body>
+<div itemscope itemtype="https://schema.org/Product">
+  <div itemprop="isRelatedTo" itemscope itemtype="https://schema.org/Product">
+    <span itemprop="name">Related yarn</span>
+    <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+      <meta itemprop="price" content="999">
+      <link itemprop="availability" href="https://schema.org/InStock">
+      <meta itemprop="inventoryLevel" content="40">
+    </div>
+  </div>
+  <h1 itemprop="name">Alize Angora</h1>
+  <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+    <meta itemprop="price" content="450">
+    <link itemprop="availability" href="https://schema.org/OutOfStock">
+  </div>
+</div>
+<div class="carousel" itemscope itemtype="https://schema.org/Product">
+  <span itemprop="name">Carousel yarn</span>
+  <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+    <meta itemprop="price" content="999">
+  </div>
+</div>
+</body></html>
+"""
+
+
+def test_microdata_ignores_related_and_carousel_products():
+    product = extract_structured_product(RELATED_PAGE)
+
+    assert product.name == "Alize Angora"
+    assert [offer.price for offer in product.offers] == [450.0]
+    assert product.price == 450.0
+    assert (product.in_stock, product.stock) == (False, None)
+    assert product.og_title.startswith("Alize Angora —")
+
+
+def test_pages_without_structured_data_return_none():
+    assert extract_structured_product("<html><body><h1>Plain</h1></body></html>") is None
+    assert extract_structured_product('<script type="application/ld+json">{broken</script>') is None
+    assert extract_structured_product("") is None
+
+
+def test_httpx_fallback_parser_prefers_structured_fields():
+    from network.httpx_scraper import ModernHttpxScraper
+
+    scraper = ModernHttpxScraper.__new__(ModernHttpxScraper)
+    scraper.logger = __import__("logging").getLogger("test")
+    html = f'<script type="application/ld+json">{json.dumps(JSON_LD)}</script><h1>Other</h1>'
+
+    parsed = scraper._fallback_parse_product(html, "https://shop.example/p/1")
+
+    assert parsed["name"] == "Пряжа Alize Angora Gold"
+    assert parsed["price"] == 1490.0
+    assert parsed["stock_quantity"] == 7 and parsed["in_stock"] is True
+    assert parsed["sku"] == "AG-100" and parsed["currency"] == "RUB"
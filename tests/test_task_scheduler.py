@@ -0,0 +1,224 @@
+"""Tests for the in-process cron scheduler."""
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from core.task_scheduler import CronSchedule, ScheduledJob, TaskScheduler
+
+EVERY_MINUTE = CronSchedule.parse("* * * * *")
+
+
+def test_cron_next_after_handles_ranges_steps_and_day_fields():
+    business = CronSchedule.parse("*/15 9-17 * * 1-5")
+    friday_evening = datetime(2026, 10, 16, 17, 50)
+    assert business.next_after(friday_evening) == datetime(2026, 10, 19, 9, 0)
+    assert business.next_after(datetime(2026, 10, 19, 9, 0)) == datetime(2026, 10, 19, 9, 15)
+
+    # Both day fields restricted: either one matching is enough (1st or Sunday).
+    either = CronSchedule.parse("0 6 1 * 7")
+    assert either.next_after(datetime(2026, 10, 16)) == datetime(2026, 10, 18, 6, 0)
+    assert CronSchedule.parse("@monthly").next_after(datetime(2026, 12, 5)) == datetime(2027, 1, 1)
+
+    for bad in ("* * *", "61 * * * *", "*/0 * * * *", "0 0 30 2 *"):
+        with pytest.raises(ValueError):
+            CronSchedule.parse(bad).next_after(datetime(2026, 1, 1))
+
+
+def _job(task_id, domain, priority=0, due=0.0):
+    return ScheduledJob(task_id, EVERY_MINUTE, domain, priority=priority, next_run=due)
+
+
+def _run_until(scheduler, condition):
+    async def main():
+        runner = asyncio.create_task(scheduler.run())
+        while not condition():
+            await asyncio.sleep(0.005)
+        scheduler.stop()
+        await asyncio.wait_for(runner, 5)
+
+    asyncio.run(main())
+
+
+def test_due_tasks_start_in_priority_order_when_slots_are_scarce():
+    order = []
+
+    async def dispatch(job):
+        order.append(job.task_id)
+        await asyncio.sleep(0.01)
+
+    scheduler = TaskScheduler(dispatch, max_concurrent=1)
+    scheduler.add(_job("low", "a.example", priority=5, due=1.0))
+    scheduler.add(_job("high", "b.example", priority=0, due=2.0))
+    scheduler.add(_job("mid", "c.example", priority=1, due=1.5))
+    _run_until(scheduler, lambda: len(order) == 3)
+
+    assert order == ["high", "mid", "low"]
+    # Each task is re-armed for its next cron slot after it finished.
+    assert all(job.runs == 1 and job.next_run > time.time() for job in scheduler.jobs.values())
+
+
+def test_runs_for_one_domain_never_overlap():
+    active = {}
+    peak = {}
+    started, finished = [], []
+
+    async def dispatch(job):
+        started.append(job.task_id)
+        active[job.domain] = active.get(job.domain, 0) + 1
+        peak[job.domain] = max(peak.get(job.domain, 0), active[job.domain])
+        await asyncio.sleep(0.03)
+        active[job.domain] -= 1
+        finished.append(job.task_id)
+
+    scheduler = TaskScheduler(dispatch, max_concurrent=4)
+    for index in range(3):
+        scheduler.add(_job(f"shop-{index}", "shop.example"))
+    scheduler.add(_job("other", "other.example"))
+    _run_until(scheduler, lambda: len(finished) == 4)
+
+    assert peak == {"shop.example": 1, "other.example": 1}
+    assert started[:2] == ["shop-0", "other"]  # not held back by the busy domain
+
+
+def test_jitter_retry_and_removal():
+    now = [1_000_000.0]
+    scheduler = TaskScheduler(lambda job: None, clock=lambda: now[0])
+    jittered = ScheduledJob("j", EVERY_MINUTE, "a.example", jitter=20.0)
+    scheduler.add(jittered)
+    slot = EVERY_MINUTE.next_after(datetime.fromtimestamp(now[0], scheduler.tz)).timestamp()
+    assert slot <= jittered.next_run <= slot + 20.0
+
+    calls = []
+
+    async def failing(job):
+        calls.append(job.task_id)
+        return {"status": "failed", "retry_at": time.time() - 1}
+
+    scheduler = TaskScheduler(failing)
+    scheduler.add(_job("flaky", "a.example"))
+    scheduler.add(_job("gone", "b.example", due=time.time() + 0.05))
+    scheduler.remove("gone")
+    _run_until(scheduler, lambda: len(calls) >= 2)
+
+    assert set(calls) == {"flaky"}  # retried immediately, removed task never ran
+
+
+class _SQLiteTasks:
+    """The slice of the task database ScheduleManager uses, on sqlite3."""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE scheduled_tasks (id TEXT, task_name TEXT, cron_schedule TEXT, base_url TEXT,"
+            " email TEXT, status TEXT, last_run TEXT, next_run TEXT, created_at TEXT, updated_at TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE task_executions (task_id TEXT, execution_start TEXT, execution_end TEXT, status TEXT,"
+            " products_scraped INT, variations_found INT, errors_count INT, error_details TEXT)"
+        )
+
+    def execute_query(self, query, params=()):
+        rows = self.conn.execute(query, list(params)).fetchall()
+        self.conn.commit()
+        return rows
+
+
+class _FailingScraper:
+    def run_scheduled_scrape(self, task):
+        raise RuntimeError("site down")
+
+
+def _manager(db, tmp_path):
+    from core.scheduler import ScheduleManager, TaskExecutor
+
+    config = {"scheduling": {"max_task_retries": 2, "retry_delay_minutes": 1}}
+    manager = ScheduleManager.__new__(ScheduleManager)
+    manager.config_path = str(tmp_path / "settings.json")
+    manager.config = config
+    manager.task_storage_path = str(tmp_path / "tasks.json")
+    manager.mirror_to_json = False
+    manager.db_manager = db
+    manager.logger = __import__("logging").getLogger("test")
+    manager._tasks = None
+    manager.scheduler = None
+    manager.task_executor = TaskExecutor(config)
+    manager.task_executor._scraper = _FailingScraper()
+    manager._ensure_retry_count_column()
+    return manager
+
+
+def test_retry_count_survives_worker_reloads_until_the_task_fails(tmp_path):
+    db = _SQLiteTasks(tmp_path / "tasks.db")
+    serve_side = _manager(db, tmp_path)
+    task_id = serve_side.create_scheduled_task("0 * * * *", "shop", "https://shop.example/", "a@b.c")
+
+    worker = _manager(db, tmp_path)
+    results = []
+    for _ in range(3):
+        worker.reload_tasks()  # as run_scheduled_task does on every run
+        results.append(worker.execute_scheduled_task(task_id))
+
+    assert [("retry_at" in result) for result in results] == [True, True, False]
+    task = worker._refresh_task(task_id)
+    assert (task.status, task.retry_count) == ("failed", 2)
+
+    # The serve process edits the current row, not its stale cached copy.
+    assert serve_side.update_schedule(task_id, "30 * * * *")
+    fresh = serve_side._refresh_task(task_id)
+    assert (fresh.status, fresh.retry_count, fresh.cron_schedule) == ("failed", 2, "30 * * * *")
+
+
+def test_serve_drops_tasks_a_worker_marked_failed(tmp_path):
+    db = _SQLiteTasks(tmp_path / "tasks.db")
+    manager = _manager(db, tmp_path)
+    task_id = manager.create_scheduled_task("* * * * *", "shop", "https://shop.example/", "a@b.c")
+    task = manager._refresh_task(task_id)
+    task.next_run = datetime.fromtimestamp(time.time() - 1)
+    manager._save_task(task)
+    worker = _manager(db, tmp_path)
+    dispatched = []
+
+    async def dispatch(job):
+        worker.reload_tasks()
+        dispatched.append(worker.execute_scheduled_task(job.task_id))
+        failed = worker._refresh_task(job.task_id)
+        failed.status = "failed"
+        worker._save_task(failed)
+
+    async def main():
+        runner = asyncio.create_task(manager.serve(dispatch))
+        while not dispatched or manager.scheduler.running:
+            await asyncio.sleep(0.005)
+        jobs = dict(manager.scheduler.jobs)
+        manager.stop()
+        await asyncio.wait_for(runner, 5)
+        return jobs
+
+    assert asyncio.run(main()) == {}
+    assert manager._load_tasks()[0].status == "failed"
+
+
+def test_first_run_is_computed_in_the_scheduling_timezone(tmp_path):
+    from zoneinfo import ZoneInfo
+
+    from core.scheduler import ScheduledTask
+
+    manager = _manager(_SQLiteTasks(tmp_path / "tasks.db"), tmp_path)
+    manager.config["scheduling"]["timezone"] = "America/New_York"
+    task_id = manager.create_scheduled_task("0 9 * * *", "shop", "https://shop.example/", "a@b.c")
+
+    task = manager._refresh_task(task_id)
+    local = task.next_run.astimezone(ZoneInfo("America/New_York"))
+    assert (local.hour, local.minute) == (9, 0)
+    assert manager._job_for(task).next_run == task.next_run.timestamp()
+
+    legacy = ScheduledTask.from_dict(
+        {**task.to_dict(), "next_run": datetime(2030, 1, 1, 9, 0).isoformat()}
+    )
+    assert legacy.next_run.tzinfo is not None
+    assert min([legacy.next_run, task.next_run])
@@ -0,0 +1,47 @@
+"""Tests for the memoised price/stock/variation-type parsers."""
+
+from parsers.variation_parser import VariationParser
+from utils.helpers import (
+    clean_price,
+    clear_parsing_caches,
+    get_variation_type_details,
+    parse_stock,
+    parsing_cache_stats,
+)
+
+
+def test_parsers_keep_their_results_and_count_hits():
+    clear_parsing_caches()
+
+    for _ in range(3):
+        assert clean_price("1 250 ₽") == 1250.0
+        assert clean_price("123,45") == 123.45
+        assert parse_stock("В наличии") == -1
+        assert parse_stock("Отсутствует") == 0
+        assert parse_stock("12 шт.") == 12
+
+    assert clean_price("   ") is None
+    assert parse_stock(None) is None
+
+    stats = parsing_cache_stats()
+    assert (stats["clean_price"]["hits"], stats["clean_price"]["misses"]) == (4, 2)
+    assert stats["parse_stock"]["hit_rate"] == round(6 / 9, 4)
+
+
+def test_cached_results_are_not_shared_between_callers():
+    first = get_variation_type_details("Цвет")
+    first["type"] = "mutated"
+
+    assert get_variation_type_details("Цвет") == {"type": "color", "confidence": 1.0}
+
+
+def test_classify_variation_type_is_memoised():
+    clear_parsing_caches()
+    parser = VariationParser()
+
+    results = [parser.classify_variation_type("Размер", "10x20") for _ in range(3)]
+
+    assert results[0] == {"type": "size", "confidence": 1.0, "category": "dimension"}
+    assert results[0] == results[2] and results[0] is not results[2]
+    assert parser.classify_variation_type("", "красный")["type"] == "color"
+    assert parsing_cache_stats()["classify_variation_type"]["hits"] == 2
@@ -0,0 +1,106 @@
+"""Tests for the lease-based shared URL frontier."""
+
+import asyncio
+import multiprocessing
+
+import httpx
+
+from core.url_frontier import FRONTIER_ENV, MemoryFrontier, SQLiteFrontier, create_frontier
+from scripts.fast_export_base import AsyncFetcher, HTTPClientConfig
+
+URLS = [f"https://shop.example/p/{index}" for index in range(40)]
+
+
+def _drain(path, queue):
+    frontier = SQLiteFrontier("shop:run", path)
+    frontier.add(URLS)  # every worker seeds; dedup keeps one copy
+    claimed = []
+    while leases := frontier.claim(3):
+        for lease in leases:
+            assert frontier.complete(lease)
+            claimed.append(lease.url)
+    queue.put(claimed)
+
+
+def test_claim_dedups_and_lost_leases_cannot_settle(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("core.url_frontier.time.time", lambda: clock[0])
+    frontier = MemoryFrontier("shop", lease_seconds=10.0, max_attempts=2, retry_delay=5.0)
+
+    assert frontier.add(URLS[:3] + [URLS[0], " " + URLS[1]]) == 3
+    first = frontier.claim(2)
+    assert [lease.url for lease in first] == URLS[:2]
+    assert [lease.url for lease in frontier.claim(5)] == [URLS[2]]
+    assert frontier.claim(5) == []
+
+    # The first worker stalls: its leases expire and go back with one attempt used.
+    clock[0] = 111.0
+    assert frontier.claim(5) == []
+    clock[0] = 116.0
+    retried = frontier.claim(5)
+    assert sorted((lease.url, lease.attempts) for lease in retried) == [(URLS[0], 1), (URLS[1], 1), (URLS[2], 1)]
+    assert not frontier.complete(first[0])
+    assert frontier.complete(retried[0])
+    assert frontier.stats().done == 1 and frontier.stats().leased == 2
+
+
+def test_failures_retry_until_attempts_are_exhausted(tmp_path, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("core.url_frontier.time.time", lambda: clock[0])
+    for frontier in (
+        MemoryFrontier("shop", max_attempts=2, retry_delay=10.0),
+        SQLiteFrontier("shop", tmp_path / "frontier.db", max_attempts=2, retry_delay=10.0),
+    ):
+        clock[0] = 0.0
+        frontier.add(URLS[:2])
+        lease, other = frontier.claim(2)
+        assert frontier.fail(lease, "timeout")
+        assert frontier.fail(other, "404", retry=False)
+
+        assert frontier.claim(5) == []  # waiting out the retry delay
+        clock[0] = 10.0
+        (retry,) = frontier.claim(5)
+        assert (retry.url, retry.attempts) == (lease.url, 1)
+        assert frontier.fail(retry, "timeout again")
+
+        stats = frontier.stats()
+        assert (stats.pending, stats.failed, stats.drained) == (0, 2, True)
+        assert frontier.failures() == {lease.url: "timeout again", other.url: "404"}
+
+
+def test_sqlite_frontier_splits_catalog_across_processes(tmp_path):
+    path = tmp_path / "frontier.db"
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=_drain, args=(path, queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    claimed = [url for _ in workers for url in queue.get(timeout=30)]
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert sorted(claimed) == sorted(URLS)
+    assert SQLiteFrontier("shop:run", path).stats().done == len(URLS)
+    assert SQLiteFrontier("other:run", path).stats().total == 0
+
+
+def test_fetcher_pulls_from_frontier_named_by_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(FRONTIER_ENV, f"sqlite:///{tmp_path / 'env.db'}")
+    monkeypatch.setenv("SCRAPER_FRONTIER_RUN", "r1")
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+    fetcher = AsyncFetcher(HTTPClientConfig(concurrency=3, transport=transport))
+
+    async def handler(client, url):
+        if url.endswith("/3"):
+            return None
+        return {"url": url, "body": (await client.get(url)).text}
+
+    results = asyncio.run(fetcher.run(URLS[:6], handler))
+    assert sorted(item["url"] for item in results) == sorted(URLS[:3] + URLS[4:6])
+    assert fetcher.attempted == 6  # success rate is taken over claimed URLs
+
+    frontier = create_frontier("shop.example:r1")
+    assert (frontier.stats().done, frontier.failures()) == (5, {URLS[3]: "no product"})
+    # A second worker of the same run finds nothing left to do.
+    assert asyncio.run(fetcher.run(URLS[:6], handler)) == []
+    assert fetcher.attempted == 0
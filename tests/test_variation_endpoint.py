@@ -0,0 +1,90 @@
+"""Tests for inferring the variation endpoint from recorded requests."""
+
+import json
+
+from core.variation_endpoint import RecordedRequest, infer_endpoint, variant_fields
+
+
+def _get(color, size, **extra):
+    return RecordedRequest(
+        method="GET",
+        url=f"https://shop.example/ajax/variant?product=42&color={color}&size={size}&_=1",
+        selected={"color": color, "size": size},
+        headers={"X-Requested-With": "XMLHttpRequest", "cookie": "sid=1"},
+        response={"price": 100},
+        **extra,
+    )
+
+
+def test_query_slots_are_mapped_and_rendered_for_other_combinations():
+    noise = RecordedRequest(
+        method="GET",
+        url="https://shop.example/analytics?event=click",
+        selected={"color": "red", "size": "M"},
+    )
+    recorded = [_get("red", "M"), noise, _get("blue", "M"), _get("blue", "L")]
+
+    template = infer_endpoint(recorded, ["color", "size"])
+
+    assert template is not None
+    assert template.slots == {"query:color": "color", "query:size": "size"}
+    request = template.render({"color": "green", "size": "XL"})
+    assert request["url"] == (
+        "https://shop.example/ajax/variant?product=42&color=green&size=XL&_=1"
+    )
+    assert request["method"] == "GET"
+    assert request["headers"] == {"X-Requested-With": "XMLHttpRequest"}
+
+
+def test_json_body_and_path_slots():
+    def post(color, size):
+        return RecordedRequest(
+            method="POST",
+            url=f"https://shop.example/api/products/42/{color}",
+            selected={"color": color, "size": size},
+            post_data=json.dumps({"size": size, "qty": 1}),
+            headers={"Content-Type": "application/json"},
+            response={"data": {"price": "1 290,50"}},
+        )
+
+    recorded = [post("red", "S"), post("navy", "S"), post("navy", "M")]
+    template = infer_endpoint(recorded, ["color", "size"])
+
+    assert template is not None
+    request = template.render({"color": "white", "size": "XS"})
+    assert request["url"] == "https://shop.example/api/products/42/white"
+    assert json.loads(request["data"]) == {"size": "XS", "qty": 1}
+
+
+def test_no_template_when_an_attribute_is_not_carried_by_any_request():
+    # The page resolved a variant id client-side; size never appears in the request.
+    recorded = [
+        RecordedRequest("GET", f"https://shop.example/variant/{vid}", {"color": c, "size": s})
+        for vid, c, s in [(1, "red", "M"), (2, "blue", "M"), (3, "blue", "L")]
+    ]
+
+    assert infer_endpoint(recorded, ["color", "size"]) is None
+    # Requests recorded before every attribute had a value are ignored.
+    assert infer_endpoint([_get("red", "M")], ["color", "size"]) is None
+
+
+def test_variant_fields_reads_nested_payloads():
+    fields = variant_fields(
+        {
+            "variant": {
+                "price": {"value": "1 290,50"},
+                "inventory_quantity": "3",
+                "sku": 1234,
+                "featured_image": {"src": "/img/red.jpg"},
+            }
+        }
+    )
+    assert fields == {
+        "price": 1290.5,
+        "stock": 3,
+        "sku": "1234",
+        "image_url": "/img/red.jpg",
+        "available": True,
+    }
+    assert variant_fields({"price": 10, "available": "false"})["available"] is False
+    assert variant_fields({"price": 10, "stock": 0})["available"] is False
@@ -0,0 +1,91 @@
+"""Tests for the queue-depth driven RQ worker autoscaler."""
+
+import sys
+from types import SimpleNamespace
+
+from services.worker.autoscaler import (
+    Autoscaler,
+    AutoscalerConfig,
+    LoadSample,
+    WorkerPool,
+    desired_workers,
+    sample_load,
+)
+
+CONFIG = AutoscalerConfig(min_workers=1, max_workers=6, urls_per_worker=100, scale_down_delay=30.0)
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+class FakeQueue:
+    def __init__(self, jobs, count=None, started=0):
+        self.jobs = [SimpleNamespace(kwargs={"urls": ["u"] * size}) for size in jobs]
+        self.count = len(jobs) if count is None else count
+        self.started_job_registry = SimpleNamespace(count=started)
+
+    def get_jobs(self, offset, length):
+        return self.jobs[offset : offset + length]
+
+
+def test_desired_workers_follow_urls_bounds_and_host_load():
+    assert desired_workers(LoadSample(), 3, CONFIG) == 1  # idle -> minimum
+    # Many tiny jobs: one worker clears them; huge jobs: one worker each, capped.
+    assert desired_workers(LoadSample(queued_jobs=20, queued_urls=40), 1, CONFIG) == 1
+    assert desired_workers(LoadSample(queued_jobs=3, queued_urls=3000, busy_workers=1), 1, CONFIG) == 4
+    assert desired_workers(LoadSample(queued_jobs=50, queued_urls=50000, busy_workers=2), 2, CONFIG) == 6
+    # An overloaded host keeps the pool where it is instead of adding workers.
+    hot = LoadSample(queued_jobs=5, queued_urls=5000, busy_workers=2, cpu_percent=95.0)
+    assert desired_workers(hot, 2, CONFIG) == 2
+
+
+def test_sample_load_counts_urls_and_extrapolates_deep_queues():
+    host = lambda: {"cpu_percent": 40.0, "memory_percent": 55.0}  # noqa: E731
+    sample = sample_load(FakeQueue([10, 30], started=2), resources=host)
+    assert (sample.queued_jobs, sample.queued_urls, sample.busy_workers) == (2, 40, 2)
+    assert (sample.cpu_percent, sample.memory_percent) == (40.0, 55.0)
+
+    assert sample_load(FakeQueue([10, 30], count=8), resources=host).queued_urls == 160
+
+
+def test_autoscaler_scales_up_now_and_down_after_delay():
+    now = [0.0]
+    samples = iter(
+        [
+            LoadSample(queued_jobs=3, queued_urls=900),
+            LoadSample(busy_workers=1),
+            LoadSample(busy_workers=1),
+            LoadSample(busy_workers=1),
+        ]
+    )
+    pool = WorkerPool(SLEEPER)
+    scaler = Autoscaler(
+        None, CONFIG, pool, sampler=lambda _: next(samples), idle_pids=lambda: [], clock=lambda: now[0]
+    )
+    try:
+        assert scaler.step() == 3
+        first_pid = pool.processes[0].pid
+        now[0] = 10.0
+        assert scaler.step() == 3  # surplus, but not for long enough yet
+        now[0] = 45.0
+        assert scaler.step() == 2  # retires the newest when none is idle
+        assert [proc.pid for proc in pool.processes][0] == first_pid
+        assert pool.retiring and pool.retiring[0].wait(timeout=10) != 0
+    finally:
+        pool.drain(timeout=10)
+
+
+def test_pool_prefers_idle_workers_and_respawns_crashes():
+    pool = WorkerPool(SLEEPER)
+    try:
+        workers = [pool.spawn() for _ in range(3)]
+        assert pool.retire(idle_pids=[workers[1].pid]) is workers[1]
+
+        workers[0].kill()
+        workers[0].wait()
+        assert pool.reap() == [workers[0].returncode]
+        assert pool.size == 1
+
+        scaler = Autoscaler(None, CONFIG, pool, sampler=lambda _: LoadSample(busy_workers=2), idle_pids=lambda: [])
+        assert scaler.step() == 2
+    finally:
+        pool.drain(timeout=10)
+    assert pool.size == 0 and pool.retiring == []
@@ -0,0 +1,259 @@
+"""Opt-in zstd storage for exports, partial JSONL files and backups.
+
+Compression is enabled with ``SCRAPER_STORAGE_COMPRESSION=zstd`` (requires the
+optional ``zstandard`` package). Compressed artefacts live next to their plain
+counterparts with a ``.zst`` suffix; the readers here accept either form, so
+callers can keep passing the logical (uncompressed) path around.
+
+XLSX/CSV exports and the per-site ``history/history.csv`` files stay plain:
+they are what users download from the dashboard (Node has no zstd decoder),
+and ``site_runner`` re-reads the history CSV as text right after writing it.
+
+Partial JSONL files are written as a sequence of independent zstd frames. A
+record is addressed by a *virtual offset* — the compressed offset of its frame
+shifted left by :data:`FRAME_OFFSET_BITS` plus the record's offset inside the
+decompressed frame — which keeps the sidecar index seekable.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import os
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import zstandard as _zstd
+except ImportError:  # pragma: no cover - environment without zstandard
+    _zstd = None
+
+logger = logging.getLogger(__name__)
+
+ZSTD_AVAILABLE = _zstd is not None
+ZSTD_SUFFIX = ".zst"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_ENV = "SCRAPER_STORAGE_COMPRESSION"
+DEFAULT_LEVEL = 3
+
+FRAME_OFFSET_BITS = 24
+MAX_FRAME_BYTES = (1 << FRAME_OFFSET_BITS) - 1
+_READ_CHUNK = 1 << 16
+
+
+def compression_enabled() -> bool:
+    """Return True when zstd storage was requested and is available."""
+
+    mode = os.environ.get(COMPRESSION_ENV, "").strip().lower()
+    if mode not in {"zstd", "zst", "1", "true", "yes", "on"}:
+        return False
+    if not ZSTD_AVAILABLE:
+        logger.warning(
+            "%s=%s requested but zstandard is not installed; writing plain files",
+            COMPRESSION_ENV,
+            mode,
+        )
+        return False
+    return True
+
+
+def _require_zstd():
+    if _zstd is None:
+        raise RuntimeError("zstandard is required to read or write .zst files")
+    return _zstd
+
+
+def compressed_path(path: Path) -> Path:
+    """Return the ``.zst`` sibling for ``path``."""
+
+    path = Path(path)
+    if path.name.endswith(ZSTD_SUFFIX):
+        return path
+    return path.with_name(path.name + ZSTD_SUFFIX)
+
+
+def logical_path(path: Path) -> Path:
+    """Strip a trailing ``.zst`` suffix from ``path``."""
+
+    path = Path(path)
+    if path.name.endswith(ZSTD_SUFFIX):
+        return path.with_name(path.name[: -len(ZSTD_SUFFIX)])
+    return path
+
+
+def resolve_existing(path: Path) -> Optional[Path]:
+    """Return the freshest existing variant (plain or ``.zst``) of ``path``."""
+
+    plain = logical_path(path)
+    packed = compressed_path(plain)
+    candidates = []
+    for candidate in (plain, packed):
+        try:
+            candidates.append((candidate.stat().st_mtime, candidate))
+        except OSError:
+            continue
+    if not candidates:
+        return None
+    candidates.sort(key=lambda item: item[0], reverse=True)
+    return candidates[0][1]
+
+
+def is_compressed(path: Path) -> bool:
+    """Detect zstd content by magic number."""
+
+    try:
+        with Path(path).open("rb") as handle:
+            return handle.read(4) == ZSTD_MAGIC
+    except OSError:
+        return False
+
+
+def read_bytes(path: Path) -> bytes:
+    """Read ``path`` (or its ``.zst`` variant), decompressing when needed."""
+
+    target = resolve_existing(path)
+    if target is None:
+        raise FileNotFoundError(str(path))
+    raw = target.read_bytes()
+    if raw[:4] != ZSTD_MAGIC:
+        return raw
+    reader = _require_zstd().ZstdDecompressor().stream_reader(
+        io.BytesIO(raw), read_across_frames=True
+    )
+    with reader:
+        return reader.read()
+
+
+def open_reader(path: Path) -> BinaryIO:
+    """Open a streaming binary reader over ``path`` or its ``.zst`` variant."""
+
+    target = resolve_existing(path)
+    if target is None:
+        raise FileNotFoundError(str(path))
+    handle = target.open("rb")
+    if handle.read(4) != ZSTD_MAGIC:
+        handle.seek(0)
+        return handle
+    handle.seek(0)
+    return _require_zstd().ZstdDecompressor().stream_reader(
+        handle, read_across_frames=True, closefd=True
+    )
+
+
+def write_bytes(path: Path, data: bytes, *, compress: Optional[bool] = None) -> Path:
+    """Write ``data`` to ``path`` (``.zst`` when compressing) and return the target.
+
+    The stale sibling in the other format is removed so readers never pick an
+    outdated copy.
+    """
+
+    if compress is None:
+        compress = compression_enabled()
+    plain = logical_path(path)
+    target = compressed_path(plain) if compress else plain
+    stale = plain if compress else compressed_path(plain)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    payload = compress_frame(data) if compress else data
+    target.write_bytes(payload)
+    if stale.exists():
+        try:
+            stale.unlink()
+        except OSError:
+            logger.debug("Failed to remove stale %s", stale)
+    return target
+
+
+def compress_file(source: Path, target: Path, *, level: int = DEFAULT_LEVEL) -> None:
+    """Stream-compress ``source`` into ``target``."""
+
+    compressor = _require_zstd().ZstdCompressor(level=level)
+    with Path(source).open("rb") as src, Path(target).open("wb") as dst:
+        compressor.copy_stream(src, dst)
+
+
+def decompress_file(source: Path, target: Path) -> None:
+    """Stream-decompress ``source`` into ``target``."""
+
+    decompressor = _require_zstd().ZstdDecompressor()
+    with Path(source).open("rb") as src, Path(target).open("wb") as dst:
+        decompressor.copy_stream(src, dst)
+
+
+# --- Seekable frame helpers -------------------------------------------------
+
+
+def compress_frame(data: bytes, *, level: int = DEFAULT_LEVEL) -> bytes:
+    """Compress ``data`` into a single self-contained zstd frame."""
+
+    return _require_zstd().ZstdCompressor(level=level, write_content_size=True).compress(data)
+
+
+def make_virtual_offset(frame_offset: int, inner_offset: int) -> int:
+    if inner_offset > MAX_FRAME_BYTES:
+        raise ValueError("record offset exceeds zstd frame capacity")
+    return (frame_offset << FRAME_OFFSET_BITS) | inner_offset
+
+
+def split_virtual_offset(virtual_offset: int) -> Tuple[int, int]:
+    return virtual_offset >> FRAME_OFFSET_BITS, virtual_offset & MAX_FRAME_BYTES
+
+
+def read_frame(handle: BinaryIO, frame_offset: int) -> Tuple[Optional[bytes], int]:
+    """Decode the frame starting at ``frame_offset``.
+
+    Returns ``(payload, frame_end)``; ``payload`` is None for a torn or
+    corrupt frame.
+    """
+
+    decompressor = _require_zstd().ZstdDecompressor().decompressobj()
+    handle.seek(frame_offset)
+    consumed = 0
+    chunks = []
+    try:
+        while True:
+            chunk = handle.read(_READ_CHUNK)
+            if not chunk:
+                return None, frame_offset
+            chunks.append(decompressor.decompress(chunk))
+            consumed += len(chunk)
+            if decompressor.eof:
+                frame_end = frame_offset + consumed - len(decompressor.unused_data)
+                return b"".join(chunks), frame_end
+    except _zstd.ZstdError:
+        return None, frame_offset
+
+
+def iter_frames(handle: BinaryIO, start: int = 0) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield ``(frame_offset, frame_end, payload)`` for complete frames from ``start``."""
+
+    offset = start
+    while True:
+        payload, frame_end = read_frame(handle, offset)
+        if payload is None:
+            return
+        yield offset, frame_end, payload
+        offset = frame_end
+
+
+__all__ = [
+    "COMPRESSION_ENV",
+    "FRAME_OFFSET_BITS",
+    "MAX_FRAME_BYTES",
+    "ZSTD_AVAILABLE",
+    "ZSTD_SUFFIX",
+    "compress_file",
+    "compress_frame",
+    "compressed_path",
+    "compression_enabled",
+    "decompress_file",
+    "is_compressed",
+    "iter_frames",
+    "logical_path",
+    "make_virtual_offset",
+    "open_reader",
+    "read_bytes",
+    "read_frame",
+    "resolve_existing",
+    "split_virtual_offset",
+    "write_bytes",
+]
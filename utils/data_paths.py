@@ -29,6 +29,8 @@ try:  # pragma: no cover - optional dependency
 except ImportError:  # pragma: no cover - environment without PyYAML
     yaml = None
 
+from utils.compression import resolve_existing
+
 
 SITE_DATA_ROOT = Path("data/sites")
 COMPILED_DATA_ROOT = SITE_DATA_ROOT / "_compiled"
@@ -223,11 +225,15 @@ def iter_site_domains() -> Iterator[str]:
 
 
 def iter_latest_exports() -> Iterator[Tuple[str, Path]]:
-    """Yield `(domain, latest_export_path)` pairs for all sites that have exports."""
+    """Yield `(domain, latest_export_path)` pairs for all sites that have exports.
+
+    The path may point at ``latest.json.zst`` when compressed storage is on;
+    read it through :func:`utils.compression.read_bytes`.
+    """
 
     for domain in iter_site_domains():
-        latest_path = SITE_DATA_ROOT / domain / "exports" / "latest.json"
-        if latest_path.exists():
+        latest_path = resolve_existing(SITE_DATA_ROOT / domain / "exports" / "latest.json")
+        if latest_path is not None:
             yield domain, latest_path
 
 
@@ -347,7 +353,12 @@ def get_backup_files(file_path: Path) -> List[Path]:
         return []
 
     stem = file_path.stem
-    backups = [p for p in backup_dir.glob(f"{stem}_*{file_path.suffix}.bak") if p.is_file()]
+    backup_suffixes = (".bak", ".bak.gz", ".bak.zst")
+    backups = [
+        p
+        for p in backup_dir.glob(f"{stem}_*{file_path.suffix}.bak*")
+        if p.is_file() and p.name.endswith(backup_suffixes)
+    ]
     backups.sort(key=lambda path: path.stat().st_mtime, reverse=True)
     return backups
 
@@ -10,9 +10,12 @@ from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
 from importlib import import_module
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
 import importlib.util
 
+from utils import compression, serialization
+from utils.records import MAPPING_TYPES
+
 if TYPE_CHECKING:  # pragma: no cover - typing only
     import pandas as pd
 
@@ -254,7 +257,7 @@ def apply_tabular_style(ws) -> None:
 def _serialize_value(value: Any) -> Any:
     """Convert complex values to JSON strings for flat tabular export."""
     if isinstance(value, (dict, list)):
-        return json.dumps(value, ensure_ascii=False)
+        return json.dumps(value, ensure_ascii=False, default=dict)
     return value
 
 
@@ -441,7 +444,7 @@ def _choose_price(product: Dict[str, Any]) -> Any:
     variations = product.get("variations")
     if isinstance(variations, list):
         for variation in variations:
-            if not isinstance(variation, dict):
+            if not isinstance(variation, MAPPING_TYPES):
                 continue
             candidate = _first_value(
                 variation, "price", "variation_price", "current_price"
@@ -515,7 +518,7 @@ def _normalize_availability(product: Dict[str, Any]) -> Optional[str]:
     variations = product.get("variations")
     if isinstance(variations, list) and variations:
         for variation in variations:
-            if not isinstance(variation, dict):
+            if not isinstance(variation, MAPPING_TYPES):
                 continue
             flag = variation.get("in_stock")
             if isinstance(flag, bool):
@@ -686,153 +689,268 @@ def _normalize_images_alt(value: Any) -> Optional[str]:
     return None
 
 
-def _build_full_rows(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    for product in products:
-        if not isinstance(product, dict):
-            continue
+# --- Compiled row builder ---------------------------------------------------
+#
+# Key-fallback chains are resolved into getter closures once, at import time;
+# every product is then turned into its full-sheet rows and its SEO row in one
+# pass, as tuples ordered like FULL_CSV_COLUMNS / SEO_CSV_COLUMNS.
 
-        url = _clean_str(product.get("url"))
-        if not url:
-            continue
+_CONTAINER_TYPES = (list, tuple, set, dict)
 
-        price_candidate = _choose_price(product)
-        stock_candidate = _first_value(
-            product,
-            "stock",
-            "stock_quantity",
-            "quantity",
-            "inventory",
-            "available",
-        )
-        normalized_price = _normalize_price(price_candidate)
-        normalized_stock = _normalize_stock(stock_candidate)
+FieldGetter = Callable[[Dict[str, Any]], Any]
 
-        base_row: Dict[str, Any] = {
-            "url": url,
-            "final_url": _clean_str(
-                _first_value(product, "final_url", "resolved_url", "canonical_url")
-            ),
-            "http_status": _normalize_int(
-                _first_value(product, "http_status", "status_code")
-            ),
-            "fetched_at": _normalize_timestamp_field(
-                _first_value(
-                    product,
-                    "fetched_at",
-                    "scraped_at",
-                    "collected_at",
-                    "timestamp",
-                )
-            ),
-            "title": _clean_str(_first_value(product, "title", "name")),
-            "h1": _clean_str(_first_value(product, "h1", "seo_h1")),
-            "price": normalized_price,
-            "stock": normalized_stock,
-            "stock_value": _compute_stock_value(normalized_price, normalized_stock),
-            "currency": _clean_str(
-                _first_value(product, "currency", "price_currency", "currency_code")
-            ),
-            "availability": _normalize_availability(product),
-            "sku": _clean_str(
-                _first_value(product, "sku", "article", "product_id", "id")
-            ),
-            "brand": _clean_str(_first_value(product, "brand", "manufacturer")),
-            "category": _normalize_category(
-                _first_value(product, "category", "categories")
-            ),
-            "breadcrumbs": _normalize_breadcrumbs(
-                _first_value(product, "breadcrumbs", "breadcrumb", "breadcrumb_path")
-            ),
-            "images": _normalize_images(
-                _first_value(product, "images", "image_urls", "gallery")
-            ),
-            "attrs_json": _normalize_attrs_payload(product),
-            "text_hash": _clean_str(
-                _first_value(product, "text_hash", "content_hash", "body_hash")
-            ),
+
+def _compile_first(keys: Sequence[str]) -> FieldGetter:
+    """Compile ``_first_value(source, *keys)`` into a closure."""
+
+    chain = tuple(keys)
+
+    def first(source: Dict[str, Any]) -> Any:
+        get = source.get
+        for key in chain:
+            value = get(key)
+            if value is None:
+                continue
+            kind = value.__class__
+            if kind is str:
+                if value.strip():
+                    return value
+            elif kind in _CONTAINER_TYPES:
+                if value:
+                    return value
+            elif _has_value(value):
+                return value
+        return None
+
+    return first
+
+
+def _compile_block(keys: Sequence[str]) -> FieldGetter:
+    """First dict-valued key (e.g. ``open_graph``/``og``) or an empty dict."""
+
+    chain = tuple(keys)
+
+    def block(source: Dict[str, Any]) -> Dict[str, Any]:
+        for key in chain:
+            candidate = source.get(key)
+            if isinstance(candidate, dict):
+                return candidate
+        return {}
+
+    return block
+
+
+def _compile_truthy(keys: Sequence[str]) -> FieldGetter:
+    """Compile ``source.get(a) or source.get(b) or ...``."""
+
+    chain = tuple(keys)
+
+    def truthy(source: Dict[str, Any]) -> Any:
+        get = source.get
+        for key in chain:
+            value = get(key)
+            if value:
+                return value
+        return None
+
+    return truthy
+
+
+# (column, fallback keys, normaliser) for plain product-level columns.
+_FULL_FIELD_SPECS: Tuple[Tuple[str, Tuple[str, ...], Callable[[Any], Any]], ...] = (
+    ("final_url", ("final_url", "resolved_url", "canonical_url"), _clean_str),
+    ("http_status", ("http_status", "status_code"), _normalize_int),
+    (
+        "fetched_at",
+        ("fetched_at", "scraped_at", "collected_at", "timestamp"),
+        _normalize_timestamp_field,
+    ),
+    ("title", ("title", "name"), _clean_str),
+    ("h1", ("h1", "seo_h1"), _clean_str),
+    ("currency", ("currency", "price_currency", "currency_code"), _clean_str),
+    ("sku", ("sku", "article", "product_id", "id"), _clean_str),
+    ("brand", ("brand", "manufacturer"), _clean_str),
+    ("category", ("category", "categories"), _normalize_category),
+    ("breadcrumbs", ("breadcrumbs", "breadcrumb", "breadcrumb_path"), _normalize_breadcrumbs),
+    ("images", ("images", "image_urls", "gallery"), _normalize_images),
+    ("text_hash", ("text_hash", "content_hash", "body_hash"), _clean_str),
+)
+
+_SEO_FIELD_SPECS: Tuple[Tuple[str, Tuple[str, ...], Callable[[Any], Any]], ...] = (
+    (
+        "fetched_at",
+        ("fetched_at", "scraped_at", "collected_at", "timestamp"),
+        _normalize_timestamp_field,
+    ),
+    ("title", ("seo_title", "title", "name"), _clean_str),
+    ("meta_description", ("seo_meta_description", "meta_description"), _clean_str),
+    ("h1", ("seo_h1", "h1"), _clean_str),
+    ("canonical", ("canonical", "canonical_url"), _clean_str),
+    ("robots", ("robots", "meta_robots"), _clean_str),
+)
+
+# (column, product key, block getter, block keys) for OG/Twitter columns.
+_SEO_BLOCK_SPECS: Tuple[Tuple[str, str, str, Tuple[str, ...]], ...] = (
+    ("og_title", "og_title", "og", ("title", "og:title")),
+    ("og_description", "og_description", "og", ("description", "og:description")),
+    ("og_image", "og_image", "og", ("image", "og:image")),
+    ("twitter_title", "twitter_title", "twitter", ("title", "twitter:title")),
+    (
+        "twitter_description",
+        "twitter_description",
+        "twitter",
+        ("description", "twitter:description"),
+    ),
+)
+
+_STOCK_CANDIDATE = _compile_first(("stock", "stock_quantity", "quantity", "inventory", "available"))
+_VARIATION_PRICE = _compile_first(("variation_price", "price", "current_price"))
+_VARIATION_STOCK = _compile_first(("variation_stock", "stock_quantity", "stock", "quantity"))
+
+_FULL_INDEX = {column: index for index, column in enumerate(FULL_CSV_COLUMNS)}
+_SEO_INDEX = {column: index for index, column in enumerate(SEO_CSV_COLUMNS)}
+
+
+class _CompiledRowBuilder:
+    """Build full-sheet rows and the SEO row of a product in a single pass."""
+
+    __slots__ = (
+        "_full_fields",
+        "_seo_fields",
+        "_seo_blocks",
+        "_block_getters",
+        "_hreflang",
+        "_images_alt",
+        "_full_width",
+        "_seo_width",
+    )
+
+    def __init__(self) -> None:
+        self._full_fields = tuple(
+            (_FULL_INDEX[column], _compile_first(keys), normalize)
+            for column, keys, normalize in _FULL_FIELD_SPECS
+        )
+        self._seo_fields = tuple(
+            (_SEO_INDEX[column], _compile_first(keys), normalize)
+            for column, keys, normalize in _SEO_FIELD_SPECS
+        )
+        self._block_getters = {
+            "og": _compile_block(("open_graph", "og", "og_data")),
+            "twitter": _compile_block(("twitter", "twitter_card", "twitter_data")),
         }
+        self._seo_blocks = tuple(
+            (_SEO_INDEX[column], _compile_first((product_key,)), block, _compile_first(block_keys))
+            for column, product_key, block, block_keys in _SEO_BLOCK_SPECS
+        )
+        self._hreflang = _compile_truthy(
+            ("hreflang", "alternate_locales", "alternates", "alternate_hreflang")
+        )
+        self._images_alt = _compile_truthy(("images_alt", "image_alts", "alt_texts"))
+        self._full_width = len(FULL_CSV_COLUMNS)
+        self._seo_width = len(SEO_CSV_COLUMNS)
 
+    def build(
+        self, product: Dict[str, Any]
+    ) -> Tuple[List[Tuple[Any, ...]], Optional[Tuple[Any, ...]]]:
+        """Return ``(full_rows, seo_row)``; both empty/None without a URL."""
+
+        url = _clean_str(product.get("url"))
+        if not url:
+            return [], None
+        return self._full_rows(product, url), self._seo_row(product, url)
+
+    def _full_rows(self, product: Dict[str, Any], url: str) -> List[Tuple[Any, ...]]:
+        base: List[Any] = [None] * self._full_width
+        base[0] = url
+        for index, getter, normalize in self._full_fields:
+            base[index] = normalize(getter(product))
+
+        price = _normalize_price(_choose_price(product))
+        stock = _normalize_stock(_STOCK_CANDIDATE(product))
+        base[_I_PRICE] = price
+        base[_I_STOCK] = stock
+        base[_I_STOCK_VALUE] = _compute_stock_value(price, stock)
+        base[_I_AVAILABILITY] = _normalize_availability(product)
+        base[_I_ATTRS] = _normalize_attrs_payload(product)
+
+        rows: List[Tuple[Any, ...]] = []
         variations = product.get("variations")
-        variation_rows_added = False
-        if isinstance(variations, list) and variations:
+        if isinstance(variations, list):
             for variation in variations:
-                if not isinstance(variation, dict):
+                if not isinstance(variation, MAPPING_TYPES):
                     continue
-
-                variation_id = _clean_str(
-                    variation.get("variation_id") or variation.get("variant_id")
-                )
-                variation_value = _clean_str(
-                    variation.get("variation_value") or variation.get("value")
-                )
-                variation_type = _clean_str(
-                    variation.get("variation_type") or variation.get("type")
-                )
-                variation_price = _first_value(
-                    variation,
-                    "variation_price",
-                    "price",
-                    "current_price",
-                )
-                variation_stock = _first_value(
-                    variation,
-                    "variation_stock",
-                    "stock_quantity",
-                    "stock",
-                    "quantity",
-                )
-                variation_attributes = variation.get("variation_attributes") or variation.get(
-                    "attributes"
+                row = base.copy()
+                get = variation.get
+                variation_price = _normalize_price(_VARIATION_PRICE(variation))
+                variation_stock = _normalize_stock(_VARIATION_STOCK(variation))
+                if variation_price is not None:
+                    row[_I_PRICE] = variation_price
+                if variation_stock is not None:
+                    row[_I_STOCK] = variation_stock
+                row[_I_STOCK_VALUE] = _compute_stock_value(row[_I_PRICE], row[_I_STOCK])
+                row[_I_VARIATION_ID] = _clean_str(get("variation_id") or get("variant_id"))
+                row[_I_VARIATION_SKU] = _clean_str(get("variation_sku") or get("sku"))
+                row[_I_VARIATION_TYPE] = _clean_str(get("variation_type") or get("type"))
+                row[_I_VARIATION_VALUE] = _clean_str(get("variation_value") or get("value"))
+                row[_I_VARIATION_PRICE] = variation_price
+                row[_I_VARIATION_STOCK] = variation_stock
+                in_stock_flag = get("variation_in_stock")
+                if in_stock_flag is None:
+                    in_stock_flag = get("in_stock")
+                row[_I_VARIATION_IN_STOCK] = bool(in_stock_flag)
+                attributes = get("variation_attributes") or get("attributes")
+                row[_I_VARIATION_ATTRIBUTES] = (
+                    json.dumps(attributes, ensure_ascii=False)
+                    if isinstance(attributes, (dict, list))
+                    else _clean_str(attributes)
                 )
-
-                row = dict(base_row)
-                variation_price_normalized = _normalize_price(variation_price)
-                variation_stock_normalized = _normalize_stock(variation_stock)
-
-                if variation_price_normalized is not None:
-                    row["price"] = variation_price_normalized
-                if variation_stock_normalized is not None:
-                    row["stock"] = variation_stock_normalized
-                row["stock_value"] = _compute_stock_value(
-                    row["price"],
-                    row["stock"],
-                )
-                row["variation_id"] = variation_id
-                row["variation_sku"] = _clean_str(
-                    variation.get("variation_sku") or variation.get("sku")
-                )
-                row["variation_type"] = variation_type
-                row["variation_value"] = variation_value
-                row["variation_price"] = variation_price_normalized
-                row["variation_stock"] = variation_stock_normalized
-                variation_in_stock_flag = variation.get("variation_in_stock")
-                if variation_in_stock_flag is None:
-                    variation_in_stock_flag = variation.get("in_stock")
-                row["variation_in_stock"] = bool(variation_in_stock_flag)
-                row["variation_attributes"] = (
-                    json.dumps(variation_attributes, ensure_ascii=False)
-                    if isinstance(variation_attributes, (dict, list))
-                    else _clean_str(variation_attributes)
-                )
-                rows.append(row)
-                variation_rows_added = True
-
-        if not variation_rows_added:
-            row = dict(base_row)
-            row.update(
-                {
-                    "variation_id": None,
-                    "variation_sku": None,
-                    "variation_type": None,
-                    "variation_value": None,
-                    "variation_price": None,
-                    "variation_stock": None,
-                    "variation_in_stock": None,
-                    "variation_attributes": None,
-                }
-            )
-            rows.append(row)
+                rows.append(tuple(row))
+
+        if not rows:
+            rows.append(tuple(base))
+        return rows
+
+    def _seo_row(self, product: Dict[str, Any], url: str) -> Tuple[Any, ...]:
+        row: List[Any] = [None] * self._seo_width
+        row[0] = url
+        for index, getter, normalize in self._seo_fields:
+            row[index] = normalize(getter(product))
+
+        blocks = {name: getter(product) for name, getter in self._block_getters.items()}
+        for index, direct, block, block_getter in self._seo_blocks:
+            row[index] = _clean_str(direct(product) or block_getter(blocks[block]))
+
+        row[_I_SEO_HREFLANG] = _normalize_hreflang(self._hreflang(product))
+        row[_I_SEO_IMAGES_ALT] = _normalize_images_alt(self._images_alt(product))
+        return tuple(row)
+
+
+_I_PRICE = _FULL_INDEX["price"]
+_I_STOCK = _FULL_INDEX["stock"]
+_I_STOCK_VALUE = _FULL_INDEX["stock_value"]
+_I_AVAILABILITY = _FULL_INDEX["availability"]
+_I_ATTRS = _FULL_INDEX["attrs_json"]
+_I_VARIATION_ID = _FULL_INDEX["variation_id"]
+_I_VARIATION_SKU = _FULL_INDEX["variation_sku"]
+_I_VARIATION_TYPE = _FULL_INDEX["variation_type"]
+_I_VARIATION_VALUE = _FULL_INDEX["variation_value"]
+_I_VARIATION_PRICE = _FULL_INDEX["variation_price"]
+_I_VARIATION_STOCK = _FULL_INDEX["variation_stock"]
+_I_VARIATION_IN_STOCK = _FULL_INDEX["variation_in_stock"]
+_I_VARIATION_ATTRIBUTES = _FULL_INDEX["variation_attributes"]
+_I_SEO_HREFLANG = _SEO_INDEX["hreflang"]
+_I_SEO_IMAGES_ALT = _SEO_INDEX["images_alt_joined"]
+
+_ROW_BUILDER = _CompiledRowBuilder()
+
+
+def _build_full_rows(products: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for product in products:
+        if not isinstance(product, MAPPING_TYPES):
+            continue
+        full_rows, _ = _ROW_BUILDER.build(product)
+        rows.extend(dict(zip(FULL_CSV_COLUMNS, values)) for values in full_rows)
     return rows
 
 
@@ -850,90 +968,18 @@ def _build_full_dataframe(products: List[Dict[str, Any]]) -> "pd.DataFrame":
     return dataframe
 
 
-def _build_seo_rows(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _build_seo_rows(products: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
     seen_urls: set[str] = set()
 
     for product in products:
-        if not isinstance(product, dict):
+        if not isinstance(product, MAPPING_TYPES):
             continue
-
         url = _clean_str(product.get("url"))
         if not url or url in seen_urls:
             continue
         seen_urls.add(url)
-
-        fetched_at = _normalize_timestamp_field(
-            _first_value(product, "fetched_at", "scraped_at", "collected_at", "timestamp")
-        )
-
-        og_block: Dict[str, Any] = {}
-        for key in ("open_graph", "og", "og_data"):
-            candidate = product.get(key)
-            if isinstance(candidate, dict):
-                og_block = candidate
-                break
-
-        twitter_block: Dict[str, Any] = {}
-        for key in ("twitter", "twitter_card", "twitter_data"):
-            candidate = product.get(key)
-            if isinstance(candidate, dict):
-                twitter_block = candidate
-                break
-
-        hreflang_source = (
-            product.get("hreflang")
-            or product.get("alternate_locales")
-            or product.get("alternates")
-            or product.get("alternate_hreflang")
-        )
-
-        images_alt_source = (
-            product.get("images_alt")
-            or product.get("image_alts")
-            or product.get("alt_texts")
-        )
-
-        row: Dict[str, Any] = {
-            "url": url,
-            "fetched_at": fetched_at,
-            "title": _clean_str(
-                _first_value(product, "seo_title", "title", "name")
-            ),
-            "meta_description": _clean_str(
-                _first_value(product, "seo_meta_description", "meta_description")
-            ),
-            "h1": _clean_str(_first_value(product, "seo_h1", "h1")),
-            "og_title": _clean_str(
-                _first_value(product, "og_title")
-                or _first_value(og_block, "title", "og:title")
-            ),
-            "og_description": _clean_str(
-                _first_value(product, "og_description")
-                or _first_value(og_block, "description", "og:description")
-            ),
-            "og_image": _clean_str(
-                _first_value(product, "og_image")
-                or _first_value(og_block, "image", "og:image")
-            ),
-            "twitter_title": _clean_str(
-                _first_value(product, "twitter_title")
-                or _first_value(twitter_block, "title", "twitter:title")
-            ),
-            "twitter_description": _clean_str(
-                _first_value(product, "twitter_description")
-                or _first_value(twitter_block, "description", "twitter:description")
-            ),
-            "canonical": _clean_str(
-                _first_value(product, "canonical", "canonical_url")
-            ),
-            "robots": _clean_str(
-                _first_value(product, "robots", "meta_robots")
-            ),
-            "hreflang": _normalize_hreflang(hreflang_source),
-            "images_alt_joined": _normalize_images_alt(images_alt_source),
-        }
-        rows.append(row)
+        rows.append(dict(zip(SEO_CSV_COLUMNS, _ROW_BUILDER._seo_row(product, url))))
 
     return rows
 
@@ -1123,13 +1169,321 @@ def _write_csv_exports(
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "files": {sheet: path.name for sheet, path in csv_paths.items()},
     }
-    manifest_path.write_text(
-        json.dumps(manifest_payload, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    serialization.write_json(manifest_path, manifest_payload, pretty=True)
 
     return csv_paths
 
 
+# --- Streaming export path ---------------------------------------------------
+
+_XLSXWRITER_AVAILABLE = importlib.util.find_spec("xlsxwriter") is not None
+
+_DIFF_SNAPSHOT_FIELDS: Tuple[str, ...] = (
+    "fetched_at",
+    "price",
+    "availability",
+    "title",
+    "text_hash",
+)
+
+_XLSX_HEADER_FORMAT: Dict[str, Any] = {
+    "bold": True,
+    "font_name": "Calibri",
+    "font_size": 11,
+    "font_color": "#1F2937",
+    "bg_color": "#E5E7EB",
+    "align": "center",
+    "valign": "vcenter",
+    "text_wrap": True,
+    "border": 1,
+    "border_color": "#D1D5DB",
+}
+_XLSX_BODY_FORMAT: Dict[str, Any] = {
+    "font_name": "Calibri",
+    "font_size": 11,
+    "font_color": "#111827",
+    "valign": "vcenter",
+    "border": 1,
+    "border_color": "#D1D5DB",
+}
+
+
+def _format_csv_value(value: Any) -> str:
+    """Render a cell the way ``DataFrame.to_csv(decimal=',')`` does."""
+
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "True" if value else "False"
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        return repr(value).replace(".", ",")
+    return str(value)
+
+
+class _StreamingSheet:
+    """One export sheet written row-at-a-time to CSV and (optionally) XLSX."""
+
+    def __init__(
+        self,
+        name: str,
+        columns: Tuple[str, ...],
+        csv_path: Path,
+        workbook: Any,
+        formats: Optional[Dict[str, Any]],
+    ) -> None:
+        import csv
+
+        self.name = name
+        self.columns = columns
+        self.csv_path = csv_path
+        self.rows = 0
+        self._csv_handle = csv_path.open("w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._csv_handle, delimiter=";", lineterminator="\n")
+        self._csv.writerow(columns)
+        self._worksheet = None
+        self._formats = formats
+        if workbook is not None and formats is not None:
+            self._worksheet = workbook.add_worksheet(name)
+            self._worksheet.freeze_panes(1, 0)
+            self._worksheet.write_row(0, 0, columns, formats["header"])
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self.write_values([row.get(column) for column in self.columns])
+
+    def write_values(self, values: Sequence[Any]) -> None:
+        """Write a row already ordered like ``self.columns``."""
+
+        self._csv.writerow([_format_csv_value(value) for value in values])
+        self.rows += 1
+        if self._worksheet is None:
+            return
+        left = self._formats["left"]
+        right = self._formats["right"]
+        for col_index, value in enumerate(values):
+            if value is None:
+                self._worksheet.write_blank(self.rows, col_index, None, left)
+            elif isinstance(value, bool):
+                self._worksheet.write_boolean(self.rows, col_index, value, left)
+            elif isinstance(value, (int, float)):
+                self._worksheet.write_number(self.rows, col_index, value, right)
+            else:
+                self._worksheet.write_string(self.rows, col_index, str(value), left)
+
+    def close(self) -> None:
+        if self._worksheet is not None:
+            self._worksheet.autofilter(0, 0, self.rows, len(self.columns) - 1)
+        self._csv_handle.close()
+
+
+_DIFF_SNAPSHOT_INDEXES: Tuple[Tuple[str, int], ...] = tuple(
+    (field_name, _FULL_INDEX[field_name]) for field_name in _DIFF_SNAPSHOT_FIELDS
+)
+
+
+def _diff_snapshot(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: row.get(field) for field in _DIFF_SNAPSHOT_FIELDS}
+
+
+def _diff_snapshot_values(values: Sequence[Any]) -> Dict[str, Any]:
+    return {field: values[index] for field, index in _DIFF_SNAPSHOT_INDEXES}
+
+
+def _diff_rows_from_snapshots(
+    current_records: Dict[str, Dict[str, Any]],
+    previous_records: Dict[str, Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    """Yield diff rows with the same semantics as ``_build_diff_dataframe``."""
+
+    for url in sorted(set(current_records) | set(previous_records)):
+        current = current_records.get(url)
+        previous = previous_records.get(url)
+
+        if current and not previous:
+            yield {
+                "url": url,
+                "curr_crawl_at": current.get("fetched_at"),
+                "change_type": "ADDED",
+                "fields_changed": "added",
+                "price_curr": current.get("price"),
+                "availability_curr": current.get("availability"),
+                "title_curr": current.get("title"),
+            }
+            continue
+
+        if previous and not current:
+            yield {
+                "url": url,
+                "prev_crawl_at": previous.get("fetched_at"),
+                "change_type": "REMOVED",
+                "fields_changed": "removed",
+                "price_prev": previous.get("price"),
+                "availability_prev": previous.get("availability"),
+                "title_prev": previous.get("title"),
+            }
+            continue
+
+        if not current or not previous:
+            continue
+
+        fields_changed_list: List[str] = []
+        if _to_float(previous.get("price")) != _to_float(current.get("price")):
+            fields_changed_list.append("price")
+        for field_name in ("availability", "title", "text_hash"):
+            prev_value = previous.get(field_name)
+            curr_value = current.get(field_name)
+            if (prev_value or curr_value) and prev_value != curr_value:
+                fields_changed_list.append(field_name)
+
+        if not fields_changed_list:
+            continue
+
+        yield {
+            "url": url,
+            "prev_crawl_at": previous.get("fetched_at"),
+            "curr_crawl_at": current.get("fetched_at"),
+            "change_type": "MODIFIED",
+            "fields_changed": ";".join(fields_changed_list),
+            "price_prev": previous.get("price"),
+            "price_curr": current.get("price"),
+            "availability_prev": previous.get("availability"),
+            "availability_curr": current.get("availability"),
+            "title_prev": previous.get("title"),
+            "title_curr": current.get("title"),
+        }
+
+
+def _collect_diff_snapshots(products: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    records: Dict[str, Dict[str, Any]] = {}
+    for product in products:
+        if not isinstance(product, MAPPING_TYPES):
+            continue
+        full_rows, _ = _ROW_BUILDER.build(product)
+        for values in full_rows:
+            records[values[0]] = _diff_snapshot_values(values)
+    return records
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Expose ``source`` at ``target`` via hardlink, falling back to a copy.
+
+    The link is created under a temporary name and renamed into place so
+    readers never observe a half-written file.
+    """
+
+    import shutil
+
+    temp_target = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with contextlib.suppress(FileNotFoundError):
+        temp_target.unlink()
+    try:
+        os.link(source, temp_target)
+    except OSError:
+        shutil.copyfile(source, temp_target)
+    os.replace(temp_target, target)
+
+
+def _mirror_excel_export(json_path: Path, excel_path: Path) -> None:
+    """Expose the workbook as ``latest.xlsx`` and ``<site>_latest.xlsx``."""
+
+    try:
+        site_slug = json_path.parents[1].name
+    except IndexError:
+        site_slug = json_path.stem
+    for alias in (
+        json_path.parent / f"{site_slug}_latest.xlsx",
+        json_path.parent / "latest.xlsx",
+    ):
+        if alias == excel_path:
+            continue
+        try:
+            _link_or_copy(excel_path, alias)
+        except OSError:
+            logger.debug("Failed to mirror export to %s", alias)
+
+
+def _write_streaming_tabular_exports(
+    products: Iterable[Dict[str, Any]],
+    json_path: Path,
+    previous_records: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, Path], Optional[Path]]:
+    """Write full/seo/diff CSV + XLSX in a single pass with bounded memory.
+
+    Rows go straight to ``csv.writer`` and to an xlsxwriter workbook in
+    ``constant_memory`` mode with styling applied at write time; only a small
+    per-URL snapshot is retained for the diff sheet.
+    """
+
+    base_dir = json_path.parent
+    excel_path = json_path.with_suffix(".xlsx")
+    temp_excel = excel_path.with_name(f".{excel_path.name}.{os.getpid()}.tmp")
+
+    workbook = None
+    formats: Optional[Dict[str, Any]] = None
+    if _XLSXWRITER_AVAILABLE:
+        xlsxwriter = import_module("xlsxwriter")
+        workbook = xlsxwriter.Workbook(
+            str(temp_excel),
+            {
+                "constant_memory": True,
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+                "nan_inf_to_errors": True,
+            },
+        )
+        formats = {
+            "header": workbook.add_format(_XLSX_HEADER_FORMAT),
+            "left": workbook.add_format({**_XLSX_BODY_FORMAT, "align": "left", "text_wrap": True}),
+            "right": workbook.add_format({**_XLSX_BODY_FORMAT, "align": "right"}),
+        }
+
+    sheets = {
+        "full": _StreamingSheet("full", FULL_CSV_COLUMNS, base_dir / CSV_SHEETS["full"], workbook, formats),
+        "seo": _StreamingSheet("seo", SEO_CSV_COLUMNS, base_dir / CSV_SHEETS["seo"], workbook, formats),
+        "diff": _StreamingSheet("diff", DIFF_CSV_COLUMNS, base_dir / CSV_SHEETS["diff"], workbook, formats),
+    }
+
+    current_records: Dict[str, Dict[str, Any]] = {}
+    seen_seo_urls: set[str] = set()
+    try:
+        for product in products:
+            if not isinstance(product, MAPPING_TYPES):
+                continue
+            full_rows, seo_row = _ROW_BUILDER.build(product)
+            for values in full_rows:
+                sheets["full"].write_values(values)
+                current_records[values[0]] = _diff_snapshot_values(values)
+            if seo_row is not None and seo_row[0] not in seen_seo_urls:
+                seen_seo_urls.add(seo_row[0])
+                sheets["seo"].write_values(seo_row)
+
+        for row in _diff_rows_from_snapshots(current_records, previous_records):
+            sheets["diff"].write(row)
+    finally:
+        for sheet in sheets.values():
+            sheet.close()
+
+    csv_paths = {name: sheet.csv_path for name, sheet in sheets.items()}
+    manifest_payload = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "files": {sheet: path.name for sheet, path in csv_paths.items()},
+    }
+    serialization.write_json(base_dir / "export_manifest.json", manifest_payload, pretty=True)
+
+    if workbook is None:
+        logger.warning("xlsxwriter is not available; skipping Excel export for %s", json_path)
+        return csv_paths, None
+
+    try:
+        workbook.close()
+        os.replace(temp_excel, excel_path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            temp_excel.unlink()
+    return csv_paths, excel_path
+
+
 def _is_placeholder_dataset(products: List[Dict[str, Any]]) -> bool:
     """Detect the synthetic payload emitted by legacy tests."""
 
@@ -1137,7 +1491,7 @@ def _is_placeholder_dataset(products: List[Dict[str, Any]]) -> bool:
     sample_names = 0
     placeholder_scrapes = 0
     for product in products:
-        if not isinstance(product, dict):
+        if not isinstance(product, MAPPING_TYPES):
             continue
         total += 1
         name = product.get("name")
@@ -1179,8 +1533,19 @@ def _extract_products_from_payload(payload: Any) -> List[Dict[str, Any]]:
 def write_product_exports(
     products: List[Dict[str, Any]],
     json_path: Path,
+    *,
+    pretty_json: bool = False,
+    streaming: Optional[bool] = None,
 ) -> ExportArtifacts:
-    """Persist product payload, CSV файлы и (при необходимости) Excel."""
+    """Persist product payload, CSV файлы и (при необходимости) Excel.
+
+    JSON пишется компактно; ``pretty_json=True`` включает отступы.
+    ``streaming`` (по умолчанию — если установлен xlsxwriter) пишет CSV/XLSX
+    построчно без DataFrame; ``streaming=False`` возвращает pandas-путь.
+    """
+
+    if streaming is None:
+        streaming = _XLSXWRITER_AVAILABLE
 
     if _is_export_path_under_repo_sites(json_path) and _is_placeholder_dataset(products):
         raise ValueError(
@@ -1190,30 +1555,50 @@ def write_product_exports(
 
     json_path.parent.mkdir(parents=True, exist_ok=True)
     previous_dataframe: Optional["pd.DataFrame"] = None
-    previous_products: List[Dict[str, Any]] = []
-    if _PANDAS_AVAILABLE and json_path.exists():
+    previous_records: Dict[str, Dict[str, Any]] = {}
+    if (streaming or _PANDAS_AVAILABLE) and compression.resolve_existing(json_path) is not None:
         try:
-            payload = json.loads(json_path.read_text(encoding="utf-8"))
+            payload = serialization.loads(compression.read_bytes(json_path))
             previous_products = _extract_products_from_payload(payload)
-            if previous_products:
+            del payload
+            if previous_products and streaming:
+                previous_records = _collect_diff_snapshots(previous_products)
+            elif previous_products:
                 previous_dataframe = _build_full_dataframe(previous_products)
+            del previous_products
         except Exception:  # pragma: no cover - defensive guard
             previous_dataframe = None
+            previous_records = {}
 
     generated_at = datetime.now(timezone.utc).isoformat()
     json_payload_obj = {
         "generated_at": generated_at,
         "products": products,
     }
-    json_payload = json.dumps(json_payload_obj, ensure_ascii=False, indent=2)
-    json_path.write_text(json_payload, encoding="utf-8")
-
+    json_payload = serialization.dumps_bytes(json_payload_obj, pretty=pretty_json)
+    # The dashboard reads latest.json directly, so that mirror always stays plain JSON.
     latest_json = json_path.parent / "latest.json"
+    compress = compression.compression_enabled() and json_path != latest_json
+    compression.write_bytes(json_path, json_payload, compress=compress)
+
     if latest_json != json_path:
         try:
-            latest_json.write_text(json_payload, encoding="utf-8")
+            compression.write_bytes(latest_json, json_payload, compress=False)
         except OSError:
             logger.debug("Failed to mirror export JSON to %s", latest_json)
+    del json_payload
+
+    if streaming:
+        try:
+            csv_paths, excel_path = _write_streaming_tabular_exports(
+                products, json_path, previous_records
+            )
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.warning("Failed to write tabular exports for %s: %s", json_path, exc)
+            return ExportArtifacts(json_path=json_path, csv_paths={}, excel_path=None)
+        if excel_path is not None:
+            _mirror_excel_export(json_path, excel_path)
+        return ExportArtifacts(json_path=json_path, csv_paths=csv_paths, excel_path=excel_path)
 
     if not _PANDAS_AVAILABLE:
         logger.warning(
@@ -1245,13 +1630,10 @@ def write_product_exports(
 
     excel_path: Optional[Path] = None
     try:
-        try:
-            site_slug = json_path.parents[1].name
-        except IndexError:
-            site_slug = json_path.stem
         excel_path = json_path.with_suffix(".xlsx")
-        alternate_excel = json_path.parent / f"{site_slug}_latest.xlsx"
-        with pd.ExcelWriter(excel_path, engine="openpyxl") as writer:
+        # Write to a fresh inode: latest.xlsx aliases may hardlink the old one.
+        temp_excel = excel_path.with_name(f".{excel_path.name}.{os.getpid()}.tmp.xlsx")
+        with pd.ExcelWriter(temp_excel, engine="openpyxl") as writer:
             full_display.to_excel(writer, sheet_name="full", index=False)
             seo_dataframe.to_excel(writer, sheet_name="seo", index=False)
             diff_dataframe.to_excel(writer, sheet_name="diff", index=False)
@@ -1261,18 +1643,8 @@ def write_product_exports(
                 ws = workbook[sheet_name]
                 apply_tabular_style(ws)
 
-        excel_bytes = excel_path.read_bytes()
-        if alternate_excel != excel_path:
-            try:
-                alternate_excel.write_bytes(excel_bytes)
-            except OSError:
-                logger.debug("Failed to mirror export to %s", alternate_excel)
-        latest_excel = json_path.parent / "latest.xlsx"
-        if latest_excel != excel_path:
-            try:
-                latest_excel.write_bytes(excel_bytes)
-            except OSError:
-                logger.debug("Failed to mirror export to %s", latest_excel)
+        os.replace(temp_excel, excel_path)
+        _mirror_excel_export(json_path, excel_path)
     except Exception as exc:  # pragma: no cover - defensive logging of rare failures
         logger.warning("Failed to write Excel export for %s: %s", json_path, exc)
         excel_path = None
@@ -13,7 +13,7 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from utils import data_paths
+from utils import compression, data_paths
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +74,12 @@ def create_backup(source_path: Path, backup_dir: Optional[Path] = None, *, algor
     suffix = source_path.suffix
     backup_name = f"{stem}_{timestamp}{suffix}.bak"
     backup_path = backup_dir / backup_name
-    shutil.copy2(source_path, backup_path)
+    if compression.compression_enabled() and not compression.is_compressed(source_path):
+        backup_path = compression.compressed_path(backup_path)
+        compression.compress_file(source_path, backup_path)
+        shutil.copystat(source_path, backup_path)
+    else:
+        shutil.copy2(source_path, backup_path)
 
     checksum = _compute_checksum(backup_path, algorithm)
     size = backup_path.stat().st_size
@@ -96,7 +101,13 @@ def restore_from_backup(backup_path: Path, target_path: Path) -> bool:
         return False
     try:
         target_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(backup_path, target_path)
+        if backup_path.name.endswith(".bak" + compression.ZSTD_SUFFIX):
+            compression.decompress_file(backup_path, target_path)
+        elif backup_path.suffix == ".gz":
+            with gzip.open(backup_path, "rb") as src, target_path.open("wb") as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            shutil.copy2(backup_path, target_path)
         return True
     except OSError as exc:
         logger.error("Failed to restore %s from %s: %s", target_path, backup_path, exc)
@@ -153,14 +164,26 @@ def get_backup_size(file_path: Path) -> int:
 
 
 def compress_old_backups(file_path: Path, age_threshold_days: int = 7) -> int:
-    """Compress backups older than ``age_threshold_days`` using gzip."""
+    """Compress backups older than ``age_threshold_days``.
+
+    Uses zstd when compressed storage is enabled, gzip otherwise.
+    """
 
     compressed = 0
+    use_zstd = compression.compression_enabled()
     cutoff = datetime.now(timezone.utc) - timedelta(days=age_threshold_days)
     for version in list_versions(file_path):
-        if version.timestamp >= cutoff or version.backup_path.suffix == ".gz":
+        if version.timestamp >= cutoff or version.backup_path.suffix in {".gz", compression.ZSTD_SUFFIX}:
             continue
         try:
+            if use_zstd:
+                packed_path = compression.compressed_path(version.backup_path)
+                if packed_path.exists():
+                    continue
+                compression.compress_file(version.backup_path, packed_path)
+                version.backup_path.unlink(missing_ok=True)
+                compressed += 1
+                continue
             gz_path = version.backup_path.with_suffix(version.backup_path.suffix + ".gz")
             if gz_path.exists():
                 continue
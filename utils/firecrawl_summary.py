@@ -2,10 +2,6 @@
 
 from __future__ import annotations
 
-import contextlib
-import json
-import os
-import tempfile
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -13,6 +9,9 @@ from typing import Any, Dict, List, MutableMapping, Optional
 
 import fcntl
 
+from utils import serialization
+from utils.records import MAPPING_TYPES
+
 SUMMARY_PATH = Path("reports/firecrawl_baseline_summary.json")
 
 
@@ -72,7 +71,7 @@ def _to_float(value: Any) -> Optional[float]:
 def _load_json(path: Path) -> Any:
     if not path.exists():
         return None
-    return json.loads(path.read_text(encoding="utf-8"))
+    return serialization.read_json(path)
 
 
 def compute_metrics(
@@ -94,7 +93,7 @@ def compute_metrics(
     variations_in_stock_true = 0
 
     for product in products:
-        if not isinstance(product, dict):
+        if not isinstance(product, MAPPING_TYPES):
             continue
         products_count += 1
         if product.get("price") is not None:
@@ -123,7 +122,7 @@ def compute_metrics(
             products_with_variations += 1
             total_variations += len(variations)
             for variation in variations:
-                if not isinstance(variation, dict):
+                if not isinstance(variation, MAPPING_TYPES):
                     continue
                 var_stock = _to_float(variation.get("stock"))
                 if var_stock is not None:
@@ -166,18 +165,9 @@ def _acquire_lock(path: Path):
 
 
 def _write_json_atomic(path: Path, payload: MutableMapping[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    serialized = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
-    fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix=".tmp")
-    try:
-        with os.fdopen(fd, "w", encoding="utf-8") as handle:
-            handle.write(serialized)
-            handle.flush()
-            os.fsync(handle.fileno())
-        os.replace(temp_path, path)
-    finally:
-        with contextlib.suppress(FileNotFoundError):
-            os.unlink(temp_path)
+    serialization.write_json(
+        path, payload, pretty=True, atomic=True, fsync=True, trailing_newline=True
+    )
 
 
 def update_summary(
@@ -10,6 +10,7 @@ from selenium.webdriver.support.ui import Select
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import NoSuchElementException
 import json
+from functools import lru_cache
 
 if TYPE_CHECKING:  # pragma: no cover - typing only
     from bs4 import BeautifulSoup
@@ -63,16 +64,127 @@ def looks_like_guard_html(html: Optional[str]) -> bool:
     return any(snippet in lowered for snippet in GUARD_SNIPPETS)
 
 
+# --- Memoised text parsing ---------------------------------------------------
+#
+# Price, stock and variation-label strings repeat heavily across products
+# ("В наличии", "1 250 ₽", colour names), so the parsers below are pure
+# functions over precompiled patterns wrapped in bounded LRU caches. Invalid
+# input is rejected (and logged) before the cache so every bad call is visible.
+
+PARSE_CACHE_SIZE = 4096
+
+_PARSE_CACHES: Dict[str, Any] = {}
+
+_PRICE_STRIP_RE = re.compile(r"[€$£¥₽\s]")
+_PRICE_NUMBER_RE = re.compile(r"(\d+(?:\.\d{1,2})?)")
+_STOCK_NUMBER_RE = re.compile(r"(\d+)")
+_LABEL_TOKEN_RE = re.compile(r"[a-z0-9а-яё]+")
+
+_STOCK_AVAILABLE_PHRASES = ("в наличии", "in stock", "available", "есть")
+_STOCK_MISSING_PHRASES = ("нет в наличии", "out of stock", "unavailable", "отсутствует")
+_STOCK_UNLIMITED_PHRASES = ("unlimited", "много", "большое количество", "неограничено")
+
+_SIZE_KEYWORDS = (
+    "размер",
+    "size",
+    "разм",
+    "s/m/l",
+    "xs",
+    "s",
+    "m",
+    "l",
+    "xl",
+    "xxl",
+    "размеры",
+    "sizes",
+    "объем",
+    "volume",
+    "вес",
+    "weight",
+)
+_COLOR_KEYWORDS = (
+    "цвет",
+    "color",
+    "colour",
+    "красный",
+    "red",
+    "синий",
+    "blue",
+    "зеленый",
+    "green",
+    "черный",
+    "black",
+    "белый",
+    "white",
+    "желтый",
+    "yellow",
+    "оранжевый",
+    "orange",
+    "фиолетовый",
+    "purple",
+)
+_MODEL_KEYWORDS = (
+    "модель",
+    "model",
+    "стиль",
+    "style",
+    "тип",
+    "type",
+    "вариант",
+    "variant",
+    "серия",
+    "series",
+    "линейка",
+    "line",
+)
+
+
+def memoized_parser(name: str, maxsize: int = PARSE_CACHE_SIZE):
+    """LRU-memoise a pure text parser and register it for :func:`parsing_cache_stats`."""
+
+    def decorator(func):
+        cached = lru_cache(maxsize=maxsize)(func)
+        _PARSE_CACHES[name] = cached
+        return cached
+
+    return decorator
+
+
+def parsing_cache_stats() -> Dict[str, Dict[str, Union[int, float]]]:
+    """Hit/miss counters of every memoised parser."""
+
+    stats: Dict[str, Dict[str, Union[int, float]]] = {}
+    for name, cached in _PARSE_CACHES.items():
+        info = cached.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+        }
+    return stats
+
+
+def clear_parsing_caches() -> None:
+    for cached in _PARSE_CACHES.values():
+        cached.cache_clear()
+
+
 def clean_price(price_text: str) -> Optional[float]:
     """Clean and parse price text to float with enhanced currency and decimal support."""
     if not isinstance(price_text, str) or not price_text.strip():
         logger.warning("Invalid price_text input: %s", price_text)
         return None
+    return _clean_price_cached(price_text)
 
+
+@memoized_parser("clean_price")
+def _clean_price_cached(price_text: str) -> Optional[float]:
     try:
-        # Enhanced regex to handle various formats
-        # Remove currency symbols: €, $, £, ¥, ₽, and others
-        cleaned = re.sub(r"[€$£¥₽\s]", "", price_text.strip())
+        # Remove currency symbols: €, $, £, ¥, ₽ and whitespace
+        cleaned = _PRICE_STRIP_RE.sub("", price_text.strip())
 
         # Handle decimal separators: replace comma with dot if it's a decimal separator
         # Assume comma is decimal if there's only one comma and no dot, or if comma is followed by 2 digits
@@ -86,7 +198,7 @@ def clean_price(price_text: str) -> Optional[float]:
                 cleaned = cleaned.replace(",", "")
 
         # Extract numeric value with optional decimal
-        match = re.search(r"(\d+(?:\.\d{1,2})?)", cleaned)
+        match = _PRICE_NUMBER_RE.search(cleaned)
         if not match:
             logger.warning("No numeric value found in price_text: %s", price_text)
             return None
@@ -110,12 +222,16 @@ def parse_stock(stock_text: str) -> Optional[int]:
     if not isinstance(stock_text, str) or not stock_text.strip():
         logger.warning("Invalid stock_text input: %s", stock_text)
         return None
+    return _parse_stock_cached(stock_text)
+
 
+@memoized_parser("parse_stock")
+def _parse_stock_cached(stock_text: str) -> Optional[int]:
     try:
         stock_lower = stock_text.lower().strip()
 
         # First, try to extract quantity if present
-        match = re.search(r"(\d+)", stock_lower)
+        match = _STOCK_NUMBER_RE.search(stock_lower)
         if match:
             quantity = int(match.group(1))
             # Validate reasonable quantity
@@ -123,25 +239,11 @@ def parse_stock(stock_text: str) -> Optional[int]:
                 return quantity
 
         # Enhanced stock status patterns (fallback when no quantity found)
-        if any(
-            phrase in stock_lower
-            for phrase in ["в наличии", "in stock", "available", "есть"]
-        ):
+        if any(phrase in stock_lower for phrase in _STOCK_AVAILABLE_PHRASES):
             return -1  # Available without explicit quantity
-        elif any(
-            phrase in stock_lower
-            for phrase in [
-                "нет в наличии",
-                "out of stock",
-                "unavailable",
-                "отсутствует",
-            ]
-        ):
+        elif any(phrase in stock_lower for phrase in _STOCK_MISSING_PHRASES):
             return 0  # Out of stock
-        elif any(
-            phrase in stock_lower
-            for phrase in ["unlimited", "много", "большое количество", "неограничено"]
-        ):
+        elif any(phrase in stock_lower for phrase in _STOCK_UNLIMITED_PHRASES):
             return -1  # Treat unlimited stock as open-ended
 
         logger.warning("Unable to parse stock_text: %s", stock_text)
@@ -164,95 +266,46 @@ def get_variation_type_details(label_text: str) -> Dict[str, Union[str, float]]:
         logger.warning("Invalid label_text input: %s", label_text)
         return {"type": "unknown", "confidence": 0.0}
 
+    var_type, confidence = _variation_type_cached(label_text)
+    # Fresh dict per call: callers are free to mutate the result.
+    return {"type": var_type, "confidence": confidence}
+
+
+@memoized_parser("variation_type")
+def _variation_type_cached(label_text: str) -> Tuple[str, float]:
     try:
         label_lower = label_text.lower().strip()
-        tokens = set(re.findall(r"[a-z0-9а-яё]+", label_lower))
-
-        # Comprehensive keyword lists with multilingual support
-        size_keywords = [
-            "размер",
-            "size",
-            "разм",
-            "s/m/l",
-            "xs",
-            "s",
-            "m",
-            "l",
-            "xl",
-            "xxl",
-            "размеры",
-            "sizes",
-            "объем",
-            "volume",
-            "вес",
-            "weight",
-        ]
-        color_keywords = [
-            "цвет",
-            "color",
-            "colour",
-            "красный",
-            "red",
-            "синий",
-            "blue",
-            "зеленый",
-            "green",
-            "черный",
-            "black",
-            "белый",
-            "white",
-            "желтый",
-            "yellow",
-            "оранжевый",
-            "orange",
-            "фиолетовый",
-            "purple",
-        ]
-        model_keywords = [
-            "модель",
-            "model",
-            "стиль",
-            "style",
-            "тип",
-            "type",
-            "вариант",
-            "variant",
-            "серия",
-            "series",
-            "линейка",
-            "line",
-        ]
+        tokens = set(_LABEL_TOKEN_RE.findall(label_lower))
 
         # Count matches for confidence scoring
         def keyword_matches(keyword: str) -> bool:
-            kw = keyword.lower()
-            if kw in tokens:
+            if keyword in tokens:
                 return True
-            return len(kw) > 2 and kw in label_lower
+            return len(keyword) > 2 and keyword in label_lower
 
-        size_matches = sum(1 for keyword in size_keywords if keyword_matches(keyword))
-        color_matches = sum(1 for keyword in color_keywords if keyword_matches(keyword))
-        model_matches = sum(1 for keyword in model_keywords if keyword_matches(keyword))
+        size_matches = sum(1 for keyword in _SIZE_KEYWORDS if keyword_matches(keyword))
+        color_matches = sum(1 for keyword in _COLOR_KEYWORDS if keyword_matches(keyword))
+        model_matches = sum(1 for keyword in _MODEL_KEYWORDS if keyword_matches(keyword))
 
         # Determine type with confidence
         max_matches = max(size_matches, color_matches, model_matches)
         if max_matches == 0:
-            return {"type": "unknown", "confidence": 0.0}
+            return "unknown", 0.0
 
         confidence = min(
             max_matches / len(label_lower.split()), 1.0
         )  # Simple confidence metric
 
         if size_matches == max_matches:
-            return {"type": "size", "confidence": confidence}
+            return "size", confidence
         elif color_matches == max_matches:
-            return {"type": "color", "confidence": confidence}
+            return "color", confidence
         else:
-            return {"type": "model", "confidence": confidence}
+            return "model", confidence
 
     except Exception as e:
         logger.error("Error determining variation type for '%s': %s", label_text, e)
-        return {"type": "unknown", "confidence": 0.0}
+        return "unknown", 0.0
 
 
 def select_variation(driver: webdriver.Chrome, selector: str, value: str) -> bool:
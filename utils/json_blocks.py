@@ -0,0 +1,203 @@
+"""Balanced-brace scanner for JSON payloads embedded in inline JavaScript.
+
+Product pages carry their data in script blocks (``new JCCatalogElement({...})``,
+``shop2.init({...})``, ``var product = {...}``, ``window.__INITIAL_STATE__ =
+{...}``) inside several hundred KB of HTML. Instead of walking the document
+character by character in Python, this module:
+
+* finds every anchor of interest with one C-level ``finditer`` sweep per
+  anchor and a single Python pass over the merged hits
+  (:func:`scan_json_blocks`). A combined alternation would be one sweep too,
+  but it defeats ``re``'s literal-prefix search and is ~10x slower on real
+  pages, so anchors are kept separate and literal-led;
+* matches brackets with a regex tokenizer that jumps over whole string
+  literals at once (:func:`find_closing_bracket`), so JS object literals with
+  single-quoted strings work too;
+* decodes strict JSON directly with ``JSONDecoder.raw_decode`` anchored at the
+  opening bracket (:func:`decode_json_after`), without slicing the block first.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Pattern, Tuple, Union
+
+# Quoted strings (either quote, escapes honoured), a lone quote (unterminated
+# string) or a bracket. Everything else is skipped by the regex engine.
+_TOKEN_RE = re.compile(
+    r'"[^"\\]*(?:\\.[^"\\]*)*"'
+    r"|'[^'\\]*(?:\\.[^'\\]*)*'"
+    r"|[\"'{}\[\]]",
+    re.DOTALL,
+)
+_CLOSING = {"{": "}", "[": "]"}
+_DECODER = json.JSONDecoder()
+
+DEFAULT_ANCHORS: Dict[str, Pattern[str]] = {
+    "jccatalogelement": re.compile(r"new\s+JCCatalog(?:Element|Section)\s*\(", re.IGNORECASE),
+    "shop2.init": re.compile(r"shop2\.init\s*\("),
+    "initial_state": re.compile(r"window\.__INITIAL_STATE__\s*=\s*"),
+    "product": re.compile(r"[Pp]roduct(?:Data)?\s*=(?!=)\s*"),
+}
+
+
+def assignment_anchor(names: Iterable[str]) -> str:
+    """Pattern for ``[var|let|const] <name> =`` assignments of any of ``names``."""
+
+    escaped = [re.escape(name) for name in names if name]
+    if not escaped:
+        raise ValueError("assignment_anchor() needs at least one name")
+    return r"(?:^|[;,{]\s*|\s+)(?:var|let|const)?\s*(?:" + "|".join(escaped) + r")\b\s*=\s*"
+
+
+@lru_cache(maxsize=64)
+def _opening_pattern(brackets: str, skip: str) -> Pattern[str]:
+    return re.compile(rf"[\s{re.escape(skip)}]*([{re.escape(brackets)}])")
+
+
+def find_opening_bracket(text: str, index: int, *, brackets: str = "{[", skip: str = "") -> int:
+    """Index of the bracket at ``index`` after whitespace (and ``skip`` chars), else -1."""
+
+    match = _opening_pattern(brackets, skip).match(text, index)
+    return match.start(1) if match else -1
+
+
+def find_closing_bracket(text: str, start: int) -> int:
+    """Index of the bracket closing ``text[start]`` (string literals skipped), else -1."""
+
+    if start >= len(text):
+        return -1
+    opening = text[start]
+    closing = _CLOSING.get(opening)
+    if closing is None:
+        return -1
+
+    depth = 0
+    for match in _TOKEN_RE.finditer(text, start):
+        token = match.group()
+        if len(token) > 1:  # complete string literal
+            continue
+        if token == opening:
+            depth += 1
+        elif token == closing:
+            depth -= 1
+            if depth == 0:
+                return match.start()
+        elif token in "\"'":  # unterminated string swallows the rest
+            return -1
+    return -1
+
+
+def decode_json_after(
+    text: str, index: int, *, brackets: str = "{[", skip: str = ""
+) -> Optional[Any]:
+    """Decode the JSON value opening at ``index`` (after whitespace/``skip``), or ``None``."""
+
+    opening = find_opening_bracket(text, index, brackets=brackets, skip=skip)
+    if opening == -1:
+        return None
+    try:
+        value, _ = _DECODER.raw_decode(text, opening)
+    except json.JSONDecodeError:
+        return None
+    return value
+
+
+@dataclass(slots=True)
+class JsonBlock:
+    """A bracket-balanced block found after an anchor."""
+
+    anchor: str
+    start: int
+    end: int
+    source: str
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start : self.end]
+
+    def decode(self) -> Optional[Any]:
+        """Strict JSON decode (``None`` for JS-only literals)."""
+
+        try:
+            value, end = _DECODER.raw_decode(self.source, self.start)
+        except json.JSONDecodeError:
+            return None
+        return value if end == self.end else None
+
+
+AnchorSpec = Union[str, Pattern[str]]
+
+
+@lru_cache(maxsize=256)
+def _compile_anchor(pattern: str, flags: int) -> Pattern[str]:
+    return re.compile(pattern, flags)
+
+
+def _is_identifier_char(char: str) -> bool:
+    return char.isalnum() or char in "_$"
+
+
+def _anchor_hits(
+    text: str, order: int, name: str, pattern: Pattern[str]
+) -> Iterator[Tuple[int, int, str, int]]:
+    for match in pattern.finditer(text):
+        start = match.start()
+        # ``myproduct =`` is not ``product =``; checked here rather than with a
+        # look-behind, which would disable the literal-prefix search.
+        if start and _is_identifier_char(text[start - 1]) and _is_identifier_char(text[start]):
+            continue
+        yield start, order, name, match.end()
+
+
+def scan_json_blocks(
+    text: str,
+    anchors: Optional[Mapping[str, AnchorSpec]] = None,
+    *,
+    brackets: str = "{[",
+    skip: str = "",
+    flags: int = re.IGNORECASE | re.MULTILINE,
+) -> List[JsonBlock]:
+    """Return the blocks following every anchor match, in document order.
+
+    ``anchors`` maps a label to a regex ending right before the payload (see
+    :data:`DEFAULT_ANCHORS`). String patterns are compiled with ``flags``;
+    precompiled patterns keep their own flags. Matches starting in the middle
+    of an identifier are ignored.
+    """
+
+    if not text:
+        return []
+    compiled = [
+        (name, pattern if isinstance(pattern, re.Pattern) else _compile_anchor(pattern, flags))
+        for name, pattern in (anchors if anchors is not None else DEFAULT_ANCHORS).items()
+    ]
+    hits = heapq.merge(
+        *(_anchor_hits(text, order, name, pattern) for order, (name, pattern) in enumerate(compiled))
+    )
+
+    blocks: List[JsonBlock] = []
+    for _, _, name, anchor_end in hits:
+        opening = find_opening_bracket(text, anchor_end, brackets=brackets, skip=skip)
+        if opening == -1:
+            continue
+        closing = find_closing_bracket(text, opening)
+        if closing == -1:
+            continue
+        blocks.append(JsonBlock(name, opening, closing + 1, text))
+    return blocks
+
+
+__all__ = [
+    "DEFAULT_ANCHORS",
+    "JsonBlock",
+    "assignment_anchor",
+    "decode_json_after",
+    "find_closing_bracket",
+    "find_opening_bracket",
+    "scan_json_blocks",
+]
@@ -0,0 +1,243 @@
+"""Compact in-flight product and variation records.
+
+Between parsing and export a run keeps every product (and every variation)
+alive: the resumed partial, the previous export, the merged and sorted lists.
+As plain ``dict`` objects each one carries its own hash table of keys.
+:class:`ProductRecord` and :class:`VariationRecord` store only a pointer to a
+shared, interned *shape* (the ordered key tuple, as in hidden-class VMs) plus
+a value list sized to the keys, and intern short categorical strings
+(domains, currencies, variation types), so a 100k-variation catalog takes a
+fraction of the memory.
+
+Records are ``MutableMapping`` objects: ``record["url"]``, ``record.get()``,
+``in``, iteration, ``dict(record)`` and assignment all behave like the source
+dict, key order included. Converting back to plain dicts happens at
+serialisation time only (:meth:`Record.to_dict`, or the ``Mapping`` fallback in
+:mod:`utils.serialization`).
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Values of these keys repeat across the catalog; keep one copy of each.
+_INTERNED_VALUE_KEYS = frozenset(
+    {
+        "site_domain",
+        "domain",
+        "currency",
+        "type",
+        "variation_type",
+        "stock_status",
+        "status",
+        "source",
+        "cms",
+        "brand",
+        "category",
+    }
+)
+_INTERN_MAX_LENGTH = 64
+
+
+class _Shape:
+    """Ordered key layout shared by every record with the same keys."""
+
+    __slots__ = ("keys", "index", "_transitions")
+
+    def __init__(self, keys: Tuple[str, ...]) -> None:
+        self.keys = keys
+        self.index = {key: position for position, key in enumerate(keys)}
+        self._transitions: Dict[str, "_Shape"] = {}
+
+    def with_key(self, key: str) -> "_Shape":
+        shape = self._transitions.get(key)
+        if shape is None:
+            shape = self._transitions[key] = shape_for(self.keys + (key,))
+        return shape
+
+
+_SHAPES: Dict[Tuple[str, ...], _Shape] = {}
+
+
+def shape_for(keys: Iterable[str]) -> _Shape:
+    """Interned shape for ``keys`` (in order)."""
+
+    key_tuple = tuple(keys)
+    shape = _SHAPES.get(key_tuple)
+    if shape is None:
+        key_tuple = tuple(sys.intern(key) for key in key_tuple)
+        shape = _SHAPES[key_tuple] = _Shape(key_tuple)
+    return shape
+
+
+_EMPTY_SHAPE = shape_for(())
+
+
+def _compact_value(key: str, value: Any) -> Any:
+    if (
+        value.__class__ is str
+        and key in _INTERNED_VALUE_KEYS
+        and len(value) <= _INTERN_MAX_LENGTH
+    ):
+        return sys.intern(value)
+    return value
+
+
+class Record(MutableMapping):
+    """Slotted mapping with a shared key layout."""
+
+    __slots__ = ("_shape", "_values")
+
+    def __init__(self, data: Optional[Mapping[str, Any]] = None, /, **kwargs: Any) -> None:
+        items: Dict[str, Any] = dict(data) if data is not None else {}
+        if kwargs:
+            items.update(kwargs)
+        self._shape = shape_for(items) if items else _EMPTY_SHAPE
+        values: List[Any] = []
+        seen: Dict[str, str] = {}
+        for key, value in items.items():
+            value = self._coerce(key, value)
+            # ``variant_id``/``variation_id``, ``value``/``variation_value``...
+            # are usually equal; keep one string object per record.
+            if value.__class__ is str:
+                value = seen.setdefault(value, value)
+            values.append(value)
+        self._values = values
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "Record":
+        """``data`` as a record of this class (records are returned as is)."""
+
+        if data.__class__ is cls:
+            return data  # type: ignore[return-value]
+        return cls(data)
+
+    def _coerce(self, key: str, value: Any) -> Any:
+        return _compact_value(key, value)
+
+    # Mapping protocol -----------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._shape.index.get(key)
+        if position is None:
+            raise KeyError(key)
+        return self._values[position]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self._shape.index.get(key)
+        return default if position is None else self._values[position]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._shape.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._shape.keys)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        value = self._coerce(key, value)
+        position = self._shape.index.get(key)
+        if position is None:
+            self._shape = self._shape.with_key(key)
+            self._values.append(value)
+        else:
+            self._values[position] = value
+
+    def __delitem__(self, key: str) -> None:
+        position = self._shape.index.get(key)
+        if position is None:
+            raise KeyError(key)
+        keys = self._shape.keys
+        self._shape = shape_for(keys[:position] + keys[position + 1 :])
+        del self._values[position]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Record) and other._shape is self._shape:
+            return self._values == other._values
+        if isinstance(other, Mapping):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.to_dict(),)
+
+    def copy(self) -> "Record":
+        clone = type(self).__new__(type(self))
+        clone._shape = self._shape
+        clone._values = list(self._values)
+        return clone
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain ``dict`` copy, nested records converted too."""
+
+        return {
+            key: _to_plain(value) for key, value in zip(self._shape.keys, self._values)
+        }
+
+
+def _to_plain(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if value.__class__ is list and any(isinstance(item, Record) for item in value):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+class VariationRecord(Record):
+    """One product variation (size, colour, ...)."""
+
+    __slots__ = ()
+
+
+class ProductRecord(Record):
+    """One scraped product; ``variations`` holds :class:`VariationRecord` items."""
+
+    __slots__ = ()
+
+    def _coerce(self, key: str, value: Any) -> Any:
+        if key == "variations" and value.__class__ is list:
+            return [
+                VariationRecord.from_mapping(item) if isinstance(item, Mapping) else item
+                for item in value
+            ]
+        return _compact_value(key, value)
+
+
+# Types accepted wherever a product or variation ``dict`` is expected.
+MAPPING_TYPES = (dict, Record)
+
+
+def compact_products(products: Iterable[Any]) -> List[ProductRecord]:
+    """Records for every mapping in ``products`` (other items are dropped)."""
+
+    return [
+        ProductRecord.from_mapping(product)  # type: ignore[misc]
+        for product in products
+        if isinstance(product, MAPPING_TYPES)
+    ]
+
+
+def to_plain(products: Iterable[Any]) -> List[Any]:
+    """Plain-dict list for callers that need real ``dict`` objects."""
+
+    return [_to_plain(product) for product in products]
+
+
+__all__ = [
+    "MAPPING_TYPES",
+    "ProductRecord",
+    "Record",
+    "VariationRecord",
+    "compact_products",
+    "shape_for",
+    "to_plain",
+]
@@ -0,0 +1,302 @@
+"""Change-rate-aware recrawl planning for catalog exports.
+
+Every export is an observation of each product's price/stock/availability/title
+fingerprint. From successive observations the planner estimates a per-URL
+change rate (a Poisson rate with a weak prior) and orders the next run so
+products most likely to have changed are fetched first.
+Optionally, stable products are down-sampled: only a rotating fraction of them
+is refetched per run, the rest are carried forward from the previous export.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from utils import serialization
+from utils.data_paths import SITE_DATA_ROOT
+
+logger = logging.getLogger(__name__)
+
+RECRAWL_STATS_FILENAME = "recrawl_stats.json"
+
+# Prior: one change per week for products we know nothing about.
+PRIOR_CHANGES = 1.0
+PRIOR_HOURS = 24.0 * 7
+
+_FINGERPRINT_FIELDS = ("price", "stock", "stock_quantity", "in_stock", "availability")
+
+
+def _hash_payload(payload: Any) -> str:
+    return hashlib.blake2b(
+        serialization.dumps_bytes(payload, sort_keys=True), digest_size=8
+    ).hexdigest()
+
+
+def product_fingerprint(product: Mapping[str, Any]) -> str:
+    """Hash the fields whose changes matter for recrawl scheduling."""
+
+    variations = []
+    raw_variations = product.get("variations")
+    if isinstance(raw_variations, list):
+        for variation in raw_variations:
+            if not isinstance(variation, Mapping):
+                continue
+            variations.append(
+                [
+                    variation.get("variation_id") or variation.get("variant_id") or variation.get("sku"),
+                    variation.get("price", variation.get("variation_price")),
+                    variation.get("stock", variation.get("stock_quantity")),
+                    variation.get("in_stock"),
+                ]
+            )
+    payload = {key: product.get(key) for key in _FINGERPRINT_FIELDS}
+    payload["title"] = product.get("title") or product.get("name")
+    payload["variations"] = variations
+    return _hash_payload(payload)
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    if isinstance(value, str) and value.strip():
+        try:
+            dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        dt = dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+@dataclass(slots=True)
+class UrlChangeStats:
+    """Observation counters for a single URL."""
+
+    fingerprint: str
+    first_seen: float
+    last_seen: float
+    last_changed: float
+    observations: int = 1
+    changes: int = 0
+
+    def change_rate(self) -> float:
+        """Estimated changes per hour."""
+
+        span_hours = max(self.last_seen - self.first_seen, 0.0) / 3600.0
+        return (self.changes + PRIOR_CHANGES) / (span_hours + PRIOR_HOURS)
+
+    def change_probability(self, now: float) -> float:
+        """Probability that the product changed since it was last seen."""
+
+        elapsed_hours = max(now - self.last_seen, 0.0) / 3600.0
+        return 1.0 - math.exp(-self.change_rate() * elapsed_hours)
+
+    def to_list(self) -> List[Any]:
+        return [
+            self.fingerprint,
+            self.first_seen,
+            self.last_seen,
+            self.last_changed,
+            self.observations,
+            self.changes,
+        ]
+
+    @classmethod
+    def from_list(cls, raw: Sequence[Any]) -> "UrlChangeStats":
+        fingerprint, first_seen, last_seen, last_changed, observations, changes = raw
+        return cls(
+            fingerprint=str(fingerprint),
+            first_seen=float(first_seen),
+            last_seen=float(last_seen),
+            last_changed=float(last_changed),
+            observations=int(observations),
+            changes=int(changes),
+        )
+
+
+@dataclass
+class RecrawlHistory:
+    """Per-site change statistics persisted next to the URL cache."""
+
+    path: Path
+    stats: Dict[str, UrlChangeStats] = field(default_factory=dict)
+
+    @classmethod
+    def for_domain(cls, domain: str) -> "RecrawlHistory":
+        path = SITE_DATA_ROOT / domain.strip().lower() / "cache" / RECRAWL_STATS_FILENAME
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "RecrawlHistory":
+        history = cls(path=path)
+        if not path.exists():
+            return history
+        try:
+            payload = serialization.read_json(path)
+            for url, raw in (payload.get("urls") or {}).items():
+                history.stats[url] = UrlChangeStats.from_list(raw)
+        except (serialization.JSONDecodeError, OSError, TypeError, ValueError) as exc:
+            logger.warning("Ignoring unreadable recrawl stats %s: %s", path, exc)
+            history.stats.clear()
+        return history
+
+    def save(self) -> None:
+        payload = {
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "urls": {url: stats.to_list() for url, stats in self.stats.items()},
+        }
+        serialization.write_json(self.path, payload, atomic=True)
+
+    def observe(self, url: str, fingerprint: str, observed_at: float) -> bool:
+        """Record one observation; returns True when the product changed.
+
+        Observations not newer than the last one (e.g. records carried forward
+        from a previous export) are ignored.
+        """
+
+        stats = self.stats.get(url)
+        if stats is None:
+            self.stats[url] = UrlChangeStats(
+                fingerprint=fingerprint,
+                first_seen=observed_at,
+                last_seen=observed_at,
+                last_changed=observed_at,
+            )
+            return False
+        if observed_at <= stats.last_seen:
+            return False
+        stats.observations += 1
+        stats.last_seen = observed_at
+        if stats.fingerprint == fingerprint:
+            return False
+        stats.fingerprint = fingerprint
+        stats.changes += 1
+        stats.last_changed = observed_at
+        return True
+
+    def observe_products(
+        self, products: Iterable[Mapping[str, Any]], *, now: Optional[float] = None
+    ) -> int:
+        """Record an export; returns the number of changed products."""
+
+        fallback = now if now is not None else time.time()
+        changed = 0
+        for product in products:
+            url = product.get("url")
+            if not isinstance(url, str) or not url or product.get("error"):
+                continue
+            observed_at = _parse_timestamp(
+                product.get("scraped_at") or product.get("fetched_at")
+            )
+            if self.observe(url, product_fingerprint(product), observed_at or fallback):
+                changed += 1
+        return changed
+
+
+@dataclass(slots=True)
+class RecrawlPlan:
+    """Ordered URLs to fetch this run plus stable URLs deferred to later runs."""
+
+    fetch: List[str]
+    skipped: List[str]
+    scores: Dict[str, float]
+
+
+class RecrawlPlanner:
+    """Order (and optionally down-sample) a run's URL list by change likelihood.
+
+    Args:
+        history: Learned per-URL change statistics.
+        stable_threshold: URLs whose change probability is below this are
+            considered stable.
+        sample_rate: Fraction of stable URLs refetched per run (1.0 disables
+            skipping). The sampled subset rotates daily so every URL is
+            eventually refreshed.
+        max_age_hours: Stable URLs not seen for this long are always fetched.
+        priority: Optional predicate; matching URLs are ordered first within
+            the fetch set (e.g. business-critical categories).
+    """
+
+    def __init__(
+        self,
+        history: RecrawlHistory,
+        *,
+        stable_threshold: float = 0.05,
+        sample_rate: float = 1.0,
+        max_age_hours: float = 24.0 * 14,
+        priority: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        self.history = history
+        self.stable_threshold = stable_threshold
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_age_hours = max_age_hours
+        self.priority = priority
+
+    def score(self, url: str, now: float) -> float:
+        stats = self.history.stats.get(url)
+        if stats is None:
+            return 1.0
+        return stats.change_probability(now)
+
+    def _sampled(self, url: str, now: float) -> bool:
+        if self.sample_rate >= 1.0:
+            return True
+        rotation = int(now // 86400)
+        digest = hashlib.blake2b(f"{rotation}:{url}".encode("utf-8"), digest_size=4).digest()
+        return int.from_bytes(digest, "little") / 0xFFFFFFFF < self.sample_rate
+
+    def plan(
+        self,
+        urls: Sequence[str],
+        *,
+        max_fetches: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> RecrawlPlan:
+        current = now if now is not None else time.time()
+        scores: Dict[str, float] = {}
+        fetch: List[str] = []
+        skipped: List[str] = []
+
+        for url in dict.fromkeys(urls):
+            score = self.score(url, current)
+            scores[url] = score
+            stats = self.history.stats.get(url)
+            stale = stats is not None and (current - stats.last_seen) / 3600.0 >= self.max_age_hours
+            if score >= self.stable_threshold or stale or self._sampled(url, current):
+                fetch.append(url)
+            else:
+                skipped.append(url)
+
+        position = {url: index for index, url in enumerate(fetch)}
+        fetch.sort(
+            key=lambda url: (
+                not (self.priority(url) if self.priority else False),
+                -scores[url],
+                position[url],
+            )
+        )
+        if max_fetches is not None and 0 <= max_fetches < len(fetch):
+            skipped.extend(fetch[max_fetches:])
+            fetch = fetch[:max_fetches]
+
+        return RecrawlPlan(fetch=fetch, skipped=skipped, scores=scores)
+
+
+__all__ = [
+    "RECRAWL_STATS_FILENAME",
+    "RecrawlHistory",
+    "RecrawlPlan",
+    "RecrawlPlanner",
+    "UrlChangeStats",
+    "product_fingerprint",
+]
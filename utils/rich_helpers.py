@@ -30,6 +30,7 @@ from rich.status import Status
 from rich.table import Table
 from rich.text import Text
 
+from . import serialization
 from .rich_themes import RichThemeManager, get_console
 
 
@@ -387,16 +388,13 @@ def persist_snapshots(path: Path, snapshot: Dict[str, ProgressSnapshot]) -> None
         }
         for key, snap in snapshot.items()
     }
-    path.parent.mkdir(parents=True, exist_ok=True)
-    data = json_dumps(payload)
-    path.write_text(data, encoding="utf-8")
+    serialization.write_json(path, payload, atomic=True)
 
 
 def load_snapshots(path: Path) -> Dict[str, ProgressSnapshot]:
     if not path.exists():
         return {}
-    raw = path.read_text(encoding="utf-8")
-    payload = json_loads(raw)
+    payload = serialization.read_json(path)
     snapshots: Dict[str, ProgressSnapshot] = {}
     for key, value in payload.items():
         snapshots[key] = ProgressSnapshot(
@@ -408,18 +406,6 @@ def load_snapshots(path: Path) -> Dict[str, ProgressSnapshot]:
     return snapshots
 
 
-def json_dumps(data: Dict[str, Any]) -> str:
-    import json
-
-    return json.dumps(data, ensure_ascii=False, indent=2)
-
-
-def json_loads(data: str) -> Dict[str, Any]:
-    import json
-
-    return json.loads(data)
-
-
 __all__ = [
     "ProgressSnapshot",
     "ProgressTracker",
@@ -1,11 +1,33 @@
-"""Shared helpers for serialising complex objects to JSON."""
+"""Shared helpers for serialising complex objects to JSON.
+
+The ``dumps``/``loads`` facade uses ``orjson`` when it is installed and falls
+back to the standard library otherwise. Output is compact UTF-8 unless
+``pretty=True`` is requested.
+"""
 
 from __future__ import annotations
 
+import contextlib
 import json
+import os
+import tempfile
 from dataclasses import asdict, is_dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Mapping, Optional, Union
+
+try:  # pragma: no cover - exercised implicitly depending on environment
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - optional dependency
+    _orjson = None
+
+ORJSON_AVAILABLE = _orjson is not None
+
+JSONDecodeError = json.JSONDecodeError
+
+DefaultHook = Callable[[Any], Any]
 
 
 def _looks_like_rename_action(value: Any) -> bool:
@@ -15,7 +37,7 @@ def _looks_like_rename_action(value: Any) -> bool:
 def prepare_for_json(value: Any) -> Any:
     """Recursively normalise objects into JSON-serialisable primitives."""
 
-    if isinstance(value, dict):
+    if isinstance(value, (dict, Mapping)):
         return {str(key): prepare_for_json(val) for key, val in value.items()}
 
     if isinstance(value, (list, tuple, set)):
@@ -51,4 +73,157 @@ def json_dumps(
     return json.dumps(normalised, ensure_ascii=ensure_ascii, sort_keys=sort_keys, indent=indent)
 
 
-__all__ = ["prepare_for_json", "json_dumps"]
+def _fallback_default(value: Any) -> Any:
+    """Convert values neither backend handles natively."""
+
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, Mapping):  # e.g. utils.records.ProductRecord
+        return dict(value)
+    if _looks_like_rename_action(value):
+        return prepare_for_json(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _chain_default(default: Optional[DefaultHook]) -> DefaultHook:
+    if default is None:
+        return _fallback_default
+
+    def _hook(value: Any) -> Any:
+        try:
+            return _fallback_default(value)
+        except TypeError:
+            return default(value)
+
+    return _hook
+
+
+def dumps_bytes(
+    value: Any,
+    *,
+    pretty: bool = False,
+    sort_keys: bool = False,
+    default: Optional[DefaultHook] = None,
+) -> bytes:
+    """Serialise ``value`` to UTF-8 JSON bytes (compact unless ``pretty``)."""
+
+    hook = _chain_default(default)
+    if _orjson is not None:
+        option = _orjson.OPT_NON_STR_KEYS | _orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= _orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= _orjson.OPT_SORT_KEYS
+        try:
+            return _orjson.dumps(value, default=hook, option=option)
+        except TypeError:
+            # orjson rejects integers beyond 64 bits; the stdlib does not.
+            pass
+
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if pretty else None,
+        separators=None if pretty else (",", ":"),
+        default=hook,
+    ).encode("utf-8")
+
+
+def dumps(
+    value: Any,
+    *,
+    pretty: bool = False,
+    sort_keys: bool = False,
+    default: Optional[DefaultHook] = None,
+) -> str:
+    """Serialise ``value`` to a JSON string (compact unless ``pretty``)."""
+
+    return dumps_bytes(value, pretty=pretty, sort_keys=sort_keys, default=default).decode(
+        "utf-8"
+    )
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Parse JSON from ``str`` or UTF-8 bytes."""
+
+    if _orjson is not None:
+        return _orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def read_json(path: Path) -> Any:
+    """Load JSON from ``path``."""
+
+    return loads(Path(path).read_bytes())
+
+
+def write_json(
+    path: Path,
+    value: Any,
+    *,
+    pretty: bool = False,
+    atomic: bool = False,
+    fsync: bool = False,
+    trailing_newline: bool = False,
+    default: Optional[DefaultHook] = None,
+) -> bytes:
+    """Serialise ``value`` to ``path`` and return the bytes written.
+
+    With ``atomic=True`` the payload goes to a temporary file in the same
+    directory that is then renamed over ``path``.
+    """
+
+    target = Path(path)
+    payload = dumps_bytes(value, pretty=pretty, default=default)
+    if trailing_newline:
+        payload += b"\n"
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if not atomic:
+        with target.open("wb") as handle:
+            handle.write(payload)
+            if fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        return payload
+
+    fd, temp_path = tempfile.mkstemp(dir=str(target.parent), prefix=target.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            if fsync:
+                os.fsync(handle.fileno())
+        os.replace(temp_path, target)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+    return payload
+
+
+__all__ = [
+    "ORJSON_AVAILABLE",
+    "JSONDecodeError",
+    "dumps",
+    "dumps_bytes",
+    "json_dumps",
+    "loads",
+    "prepare_for_json",
+    "read_json",
+    "write_json",
+]